@@ -1 +1,7 @@
-(여기에 내가 이전 메시지에서 준 **72_finish_all.sh** 전체 내용을 그대로 붙여넣기)
+#!/usr/bin/env bash
+# 야간 빌드: pipeline/dag.json 단계를 DAG 실행기로 실행(입력 지문이 그대로인 단계는 건너뜀)
+#   전체 강제 재실행: ./72_finish_all.sh --force   /  특정 단계부터: ./72_finish_all.sh --from statcast_enrich
+set -euo pipefail
+export PYTHONUNBUFFERED=1
+mkdir -p logs
+python -m pipeline.dag_runner --jobs "${DAG_JOBS:-4}" "$@"
@@ -7,12 +7,22 @@ import json
 import sqlite3
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+
+try:  # 요청 계측(라우트별 지연 히스토그램 / 캐시 귀속 / 느린 요청 프로파일)
+    from tools.asgi_metrics import MetricsMiddleware, note_cache, render_prometheus, REGISTRY as _REQ_METRICS
+except Exception:  # pragma: no cover
+    MetricsMiddleware = None
+    def note_cache(layer: str, source: str) -> None:
+        return None
 
 # -----------------------------
 # App & constants
 # -----------------------------
 app = FastAPI(title="cogm-assistant API (stable)")
+if MetricsMiddleware is not None and os.environ.get("COGM_REQ_METRICS", "1") == "1":
+    app.add_middleware(MetricsMiddleware)
 DB_PATH = os.environ.get("LAHMAN_DB", "data/lahman.sqlite")
 
 # -----------------------------
@@ -61,8 +71,10 @@ def _cache_get(key: str) -> Optional[Any]:
             raw = _REDIS.get(key)
             if raw is not None:
                 _CACHE_METRICS["hits"] += 1
+                note_cache("redis", "hit")
                 return json.loads(raw)
             _CACHE_METRICS["miss"] += 1
+            note_cache("redis", "miss")
             return None
         except Exception as e:  # fallback to memory
             global _REDIS_LAST_ERROR
@@ -71,13 +83,16 @@ def _cache_get(key: str) -> Optional[Any]:
     item = _MEM_CACHE.get(key)
     if not item:
         _CACHE_METRICS["miss"] += 1
+        note_cache("mem", "miss")
         return None
     exp, val = item
     if exp >= now:
         _CACHE_METRICS["hits"] += 1
+        note_cache("mem", "hit")
         return val
     # expired
     _CACHE_METRICS["miss"] += 1
+    note_cache("mem", "expired")
     _MEM_CACHE.pop(key, None)
     return None
 
@@ -200,13 +215,20 @@ def ping():
     return {"ok": True}
 
 @app.get("/_metrics")
-def metrics():
-    return {
-        "cache": _CACHE_METRICS,
-        "db_path": DB_PATH,
-        "redis_enabled": bool(_REDIS),
-        "last_error": _REDIS_LAST_ERROR,
-    }
+def metrics(request: Request, format: str = Query("json", pattern="^(json|prom|prometheus)$")):
+    # 기본: 기존 JSON(+라우트별 지연 요약) / ?format=prom 또는 Accept: text/plain → Prometheus text
+    prom = format != "json" or "text/plain" in request.headers.get("accept", "")
+    if not prom or MetricsMiddleware is None:
+        return {
+            "cache": _CACHE_METRICS,
+            "db_path": DB_PATH,
+            "redis_enabled": bool(_REDIS),
+            "last_error": _REDIS_LAST_ERROR,
+            "routes": _REQ_METRICS.snapshot() if MetricsMiddleware is not None else [],
+        }
+    extra = {f'cogm_app_cache_total{{op="{k}"}}': v for k, v in _CACHE_METRICS.items()}
+    extra["cogm_app_cache_redis_enabled"] = int(bool(_REDIS))
+    return PlainTextResponse(render_prometheus(extra=extra), media_type="text/plain; version=0.0.4")
 
 @app.post("/_cache_reload")
 def cache_reload():
@@ -433,7 +455,6 @@ except Exception:
 try:
     import importlib, types, pathlib, hashlib, time, json
     from typing import Any
-    from fastapi import Request
 
     @app.get("/_routes_verbose")
     def _routes_verbose():
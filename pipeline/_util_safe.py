@@ -1,4 +1,8 @@
+import os, sys
 import pandas as pd, numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # python pipeline/x.py 실행 시 tools/ 임포트
+from tools.artifact_io import read_artifact, write_artifact, snapshot  # noqa: F401  (파이프라인 공용 재노출)
+from tools.perf import recorder, load_runs  # noqa: F401
 def to_num(s): return pd.to_numeric(s, errors='coerce')
 def wmean(x,w):
     x=to_num(x); w=to_num(w)
@@ -1,7 +1,8 @@
 import pandas as pd, numpy as np
 from pathlib import Path
+from _util_safe import read_artifact, write_artifact
 ROOT=Path.cwd(); OUT=ROOT/'output'; OUT.mkdir(exist_ok=True)
-bat=pd.read_csv(OUT/'statcast_pitch_mix_detailed_plus_bat.csv', low_memory=False)
+bat=read_artifact(OUT/'statcast_pitch_mix_detailed_plus_bat.csv')
 
 def to_num(x): return pd.to_numeric(x, errors='coerce').fillna(0)
 # 안전 가드
@@ -22,6 +23,6 @@ stab=(g.groupby(['mlbam'])[['z_contact_rate','z_csw_rate','chase_rate']].std()
         .rename(columns=lambda c: f"{c}_std").reset_index())
 
 res=g.copy()
-res.to_csv(OUT/'count_tendencies_bat.csv', index=False)
-stab.to_csv(OUT/'bat_stability.csv', index=False)
+write_artifact(res, OUT/'count_tendencies_bat.csv')
+write_artifact(stab, OUT/'bat_stability.csv')
 print(f"[DAY70] count_tendencies_bat.csv rows={len(res)}; bat_stability.csv rows={len(stab)}")
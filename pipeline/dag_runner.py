@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+# 파이프라인 DAG 실행기
+#   - 단계 정의: pipeline/dag.json (name, cmd, inputs/outputs glob, after, retries, timeout)
+#   - 의존성: 앞 단계 outputs 와 뒤 단계 inputs 의 glob 이 겹치면 간선(+ after 명시)
+#   - 입력 지문(파일 경로/내용 sha256 + 명령 + 스크립트 파일)이 지난 성공 때와 같고 출력이 있으면 건너뜀
+#     내용 해시는 logs/dag_file_hashes.json 에 (크기, mtime, ctime, inode) 와 함께 보관 — 그대로인 파일은 다시 읽지 않음
+#   - 준비된 단계는 별도 프로세스로 병렬 실행(--jobs), 실패 단계의 하류는 blocked
+#   - 단계별 벽시계 시간/최대 RSS/시도 횟수를 logs/dag_runs/<run_id>.json 매니페스트에 기록
+# 사용: python -m pipeline.dag_runner [--jobs 4] [--only a,b | --from step] [--force] [--dry-run]
+import os, sys, json, glob, time, hashlib, fnmatch, argparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Dict, List, Set
+
+from pipeline.retry_watchdog import run_with_retries
+
+SPEC = "pipeline/dag.json"
+STATE = Path("logs/dag_state.json")
+HASHES = Path("logs/dag_file_hashes.json")
+RUNS_DIR = Path("logs/dag_runs")
+STEP_LOG_DIR = Path("logs/dag_steps")
+
+def load_spec(path: str = SPEC) -> Dict[str, dict]:
+    spec = json.loads(Path(path).read_text(encoding="utf-8"))
+    dflt = spec.get("defaults", {})
+    steps = {}
+    for s in spec["steps"]:
+        if s["name"] in steps:
+            raise ValueError(f"duplicate step: {s['name']}")
+        steps[s["name"]] = {"inputs": [], "outputs": [], "after": [], **dflt, **s}
+    return steps
+
+def _expand(patterns: List[str]) -> List[str]:
+    return sorted({f for p in patterns for f in glob.glob(p, recursive=True) if os.path.isfile(f)})
+
+def _script_of(cmd: List[str]) -> List[str]:
+    # 명령이 실행하는 스크립트 파일도 입력으로(코드 수정 시 재실행)
+    out = [c for c in cmd if c.endswith(".py") and os.path.isfile(c)]
+    if "-m" in cmd and cmd.index("-m") + 1 < len(cmd):
+        mod = cmd[cmd.index("-m") + 1].replace(".", "/") + ".py"
+        if os.path.isfile(mod):
+            out.append(mod)
+    return out
+
+def _file_digest(path: str, memo: Dict[str, list] = None) -> str:
+    """파일 내용 sha256. memo 는 (크기, mtime, ctime, inode) 가 그대로인 파일만 재사용 —
+    복사/체크아웃은 mtime 을 보존해도 ctime·inode 가 바뀌므로 다시 읽음."""
+    st = os.stat(path)
+    sig = [st.st_size, st.st_mtime_ns, st.st_ctime_ns, st.st_ino]
+    hit = (memo or {}).get(path)
+    if hit and hit[:4] == sig:
+        return hit[4]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for blk in iter(lambda: f.read(1 << 20), b""):
+            h.update(blk)
+    if memo is not None:
+        memo[path] = sig + [h.hexdigest()]
+    return h.hexdigest()
+
+def fingerprint(step: dict, memo: Dict[str, list] = None) -> str:
+    h = hashlib.sha256(json.dumps(step["cmd"]).encode())
+    for f in _expand(step["inputs"]) + _script_of(step["cmd"]):
+        h.update(f"{f}\0{_file_digest(f, memo)}\n".encode())
+    return h.hexdigest()
+
+def outputs_exist(step: dict) -> bool:
+    return all(glob.glob(p, recursive=True) for p in step["outputs"])
+
+def _overlap(a: str, b: str) -> bool:
+    return a == b or fnmatch.fnmatch(a, b) or fnmatch.fnmatch(b, a)
+
+def build_graph(steps: Dict[str, dict]) -> Dict[str, Set[str]]:
+    deps: Dict[str, Set[str]] = {n: set(s["after"]) for n, s in steps.items()}
+    for b, sb in steps.items():
+        for a, sa in steps.items():
+            if a != b and any(_overlap(o, i) for o in sa["outputs"] for i in sb["inputs"]):
+                deps[b].add(a)
+    unknown = {d for ds in deps.values() for d in ds} - set(steps)
+    if unknown:
+        raise ValueError(f"unknown step in after: {sorted(unknown)}")
+    topo_order(deps)
+    return deps
+
+def topo_order(deps: Dict[str, Set[str]]) -> List[str]:
+    order, seen, temp = [], set(), set()
+    def visit(n):
+        if n in seen: return
+        if n in temp: raise ValueError(f"cycle at {n}")
+        temp.add(n)
+        for d in sorted(deps[n]): visit(d)
+        temp.discard(n); seen.add(n); order.append(n)
+    for n in sorted(deps): visit(n)
+    return order
+
+def _downstream(deps: Dict[str, Set[str]], roots: Set[str]) -> Set[str]:
+    out = set(roots); grew = True
+    while grew:
+        grew = False
+        for n, ds in deps.items():
+            if n not in out and ds & out:
+                out.add(n); grew = True
+    return out
+
+def _load_state(path: Path = STATE) -> dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def _save_json(path: Path, obj):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(obj, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+def _cmd(step: dict) -> List[str]:
+    return [sys.executable if c == "python" else c for c in step["cmd"]]
+
+def run(steps: Dict[str, dict], jobs: int = 2, only: Set[str] = None, start: str = None,
+        force: bool = False, dry_run: bool = False) -> dict:
+    if only and start:
+        raise ValueError("--only 와 --from 은 함께 쓸 수 없음")
+    deps = build_graph(steps)
+    selected = set(steps)
+    if only: selected = set(only)
+    if start: selected = _downstream(deps, {start})
+    state = _load_state()
+    memo = _load_state(HASHES)
+    run_id = f"{time.strftime('%Y%m%dT%H%M%S')}_{os.getpid()}"
+    manifest = {"run_id": run_id, "started": time.strftime("%Y-%m-%dT%H:%M:%S"), "jobs": jobs,
+                "force": force, "steps": {}}
+    res = manifest["steps"]
+    t0 = time.monotonic()
+
+    def _ready(n):
+        return all(d in res or d not in selected for d in deps[n])
+
+    pending = set(selected)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as ex:
+        while pending or running:
+            for n in sorted(pending):
+                if not _ready(n) or len(running) >= jobs:
+                    continue
+                pending.discard(n)
+                bad = [d for d in deps[n] if res.get(d, {}).get("status") in ("failed", "blocked")]
+                if bad:
+                    res[n] = {"status": "blocked", "by": bad}; continue
+                fp = fingerprint(steps[n], memo)
+                if not force and state.get(n) == fp and outputs_exist(steps[n]):
+                    res[n] = {"status": "skipped", "fingerprint": fp}; continue
+                if dry_run:
+                    res[n] = {"status": "would_run", "fingerprint": fp}; continue
+                s = steps[n]
+                print(f"[DAG] start {n}", flush=True)
+                fut = ex.submit(run_with_retries, _cmd(s), int(s.get("retries", 0)), s.get("timeout"),
+                                n, STEP_LOG_DIR)
+                running[fut] = (n, fp)
+            if not running:
+                if pending and not any(_ready(n) for n in pending):
+                    raise RuntimeError(f"stuck: {sorted(pending)}")
+                continue
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in done:
+                n, fp = running.pop(fut)
+                r = fut.result()
+                ok = r["rc"] == 0
+                res[n] = {"status": "ok" if ok else "failed", "fingerprint": fp, **r}
+                if ok:
+                    state[n] = fp
+                    _save_json(STATE, state)                    # 중단돼도 끝난 단계는 다음에 건너뜀
+                print(f"[DAG] {'ok' if ok else 'FAIL'} {n} wall={r['wall_sec']}s peak={r['peak_rss_mb']}MB attempts={r['attempts']}", flush=True)
+    manifest["finished"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    manifest["wall_sec"] = round(time.monotonic() - t0, 3)
+    manifest["order"] = [n for n in topo_order(deps) if n in res]
+    if not dry_run:
+        _save_json(HASHES, memo)
+        _save_json(RUNS_DIR / f"{run_id}.json", manifest)
+    return manifest
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--spec", default=SPEC)
+    ap.add_argument("--jobs", type=int, default=int(os.getenv("DAG_JOBS", "2")))
+    sel = ap.add_mutually_exclusive_group()
+    sel.add_argument("--only", default="", help="쉼표 구분 단계만 실행")
+    sel.add_argument("--from", dest="start", default=None, help="이 단계와 하류 전체")
+    ap.add_argument("--force", action="store_true", help="지문 무시하고 재실행")
+    ap.add_argument("--dry-run", action="store_true")
+    a = ap.parse_args()
+    steps = load_spec(a.spec)
+    only = {x for x in a.only.split(",") if x}
+    if only - set(steps):
+        sys.exit(f"[ERR] unknown step: {sorted(only - set(steps))}")
+    m = run(steps, a.jobs, only or None, a.start, a.force, a.dry_run)
+    counts: Dict[str, int] = {}
+    for n in m["order"]:
+        r = m["steps"][n]; counts[r["status"]] = counts.get(r["status"], 0) + 1
+        print(f"  {n:<24} {r['status']:<10} {r.get('wall_sec', ''):>9} {r.get('peak_rss_mb', '')}")
+    print(f"[DAG] run={m['run_id']} wall={m['wall_sec']}s {counts}")
+    sys.exit(1 if counts.get("failed") or counts.get("blocked") else 0)
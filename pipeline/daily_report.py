@@ -1,8 +1,11 @@
 import pandas as pd, numpy as np, datetime as dt
 from pathlib import Path
+from _util_safe import recorder
 ROOT=Path.cwd(); OUT=ROOT/'output'
+PERF=recorder('daily_report')
 f=OUT/'statcast_features_player_year.csv'
-df=pd.read_csv(f, low_memory=False)
+with PERF.stage('load') as st:
+    df=pd.read_csv(f, low_memory=False); st.rows_out=len(df)
 yr=int(df['year'].max())
 b=df[(df.get('role','bat')=='bat')&(df['year']==yr)].copy()
 p=df[(df.get('role','pit')=='pit')&(df['year']==yr)].copy()
@@ -13,3 +16,4 @@ lines=["# Daily Report (latest available cache)\n\n",
        f"## Hitters — Top xwOBA ({yr})\n", top_b.to_markdown(index=False), "\n\n",
        f"## Pitchers — Top CSW% ({yr})\n", top_p.to_markdown(index=False), "\n"]
 (Path(OUT/'daily_report_latest.md')).write_text("".join(lines), encoding='utf-8'); print("[OK] daily_report_latest.md")
+PERF.checkpoint('render', rows_in=len(b)+len(p))
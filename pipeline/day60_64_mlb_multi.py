@@ -2,6 +2,8 @@
 import os, sys, re, json, math, datetime as dt
 import pandas as pd, numpy as np
 from tools.team_code_utils import norm_team_series as _norm_team
+from tools.artifact_io import read_artifact, write_artifact
+from tools.perf import recorder
 from pathlib import Path
 
 ROOT = Path.cwd()
@@ -9,6 +11,8 @@ OUT  = ROOT/"output"; OUT.mkdir(parents=True, exist_ok=True)
 LOGS = ROOT/"logs";   LOGS.mkdir(parents=True, exist_ok=True)
 TEST = ROOT/"tests";  TEST.mkdir(parents=True, exist_ok=True)
 
+PERF = recorder("mlb_multi")   # 구간별 시간/행 수/RSS → logs/perf/mlb_multi.jsonl
+
 def log(*a): print(*a); sys.stdout.flush()
 def nz(s,v=0): return s.fillna(v)
 
@@ -76,6 +80,7 @@ mlb = {"AL","NL"}
 bat = bat[bat["lgID"].isin(mlb)].copy()
 pit = pit[pit["lgID"].isin(mlb)].copy()
 teams = teams[teams["lgID"].isin(mlb)].copy()
+PERF.checkpoint("lahman_load", rows_out=len(bat) + len(pit))
 
 # ---------- Chadwick(있으면 매핑) ----------
 chad = pd.DataFrame()
@@ -108,6 +113,7 @@ if chad_dir:
         log(f"[CHAD] rows={len(chad)} cols={list(chad.columns)}")
     else:
         log("[CHAD] no csv found")
+PERF.checkpoint("chadwick", rows_out=len(chad))
 
 # ---------- Statcast 집계 ----------
 STAT_MAX_FILES = int(os.environ.get("STATCAST_MAX_FILES", "24"))
@@ -160,43 +166,18 @@ if stat_dirs:
 stat_agg = pd.concat(stat_agg, ignore_index=True) if stat_agg else pd.DataFrame(columns=["mlbam","year","xwOBA_mean","EV_avg","BBE","Hard","HardHitRate"])
 stat_agg.to_csv(OUT/"statcast_agg_player_year.csv", index=False)
 log(f"[STATCAST] agg rows={len(stat_agg)} -> output/statcast_agg_player_year.csv")
+PERF.checkpoint("statcast_agg", rows_out=len(stat_agg))
 
 # ---------- Retrosheet 파크팩터(안전 버전) ----------
 def compute_park_factors(retro_dir: Path):
-    import re
-    if not retro_dir or not retro_dir.exists():
-        return pd.DataFrame(columns=["year","teamID","ParkFactor"])
-    files=[]
-    for fp in retro_dir.rglob("*"):
-        if fp.is_file() and re.match(r"(?i)^gl.*\.(csv|txt)$", fp.name):
-            files.append(fp)
-    if not files:
+    # output/park_factors.csv 는 DAG park_factors 단계 소유 — 있으면 읽고, 없으면 메모리에서만 계산(파일은 쓰지 않음)
+    # → 기존 요약 스키마로 축약
+    from tools.park_factors import build, PF_CSV
+    src = OUT/PF_CSV
+    pf = pd.read_csv(src) if src.exists() else build(retro_dir, str(OUT), write=False)
+    if not len(pf):
         return pd.DataFrame(columns=["year","teamID","ParkFactor"])
-    rows=[]
-    for fp in files[:80]:
-        try:
-            df = pd.read_csv(fp, header=None, low_memory=False)
-            if df.shape[1] >= 11:
-                y = df.iloc[:,3].astype(str).str.slice(0,4)
-                year = pd.to_numeric(y, errors="coerce").mode()
-                year = int(year.iloc[0]) if len(year) else np.nan
-                vis = pd.to_numeric(df.iloc[:,9], errors="coerce")
-                hom = pd.to_numeric(df.iloc[:,10], errors="coerce")
-                ht  = df.iloc[:,7].astype(str).str.upper()
-                at  = df.iloc[:,6].astype(str).str.upper()
-                tmp = pd.DataFrame({"home":ht,"away":at,"Rvis":vis,"Rhom":hom})
-                tmp["year"]=year
-                rows.append(tmp.dropna(subset=["Rvis","Rhom","year"]))
-        except Exception:
-            pass
-    if not rows: return pd.DataFrame(columns=["year","teamID","ParkFactor"])
-    gl = pd.concat(rows, ignore_index=True)
-    home = gl.groupby(["year","home"], as_index=False).agg(R=("Rhom","mean")).rename(columns={"home":"teamID"})
-    away = gl.groupby(["year","away"], as_index=False).agg(R=("Rvis","mean")).rename(columns={"away":"teamID"})
-    m = home.merge(away, on=["year","teamID"], suffixes=("_home","_away"))
-    m["PF_raw"] = (m["R_home"] / m["R_away"]).replace([np.inf,-np.inf], np.nan)
-    m["ParkFactor"] = m["PF_raw"] / m.groupby("year")["PF_raw"].transform("mean")
-    return m[["year","teamID","ParkFactor"]]
+    return pf.rename(columns={"season":"year","team":"teamID","run_factor":"ParkFactor"})[["year","teamID","ParkFactor"]]
 
 try:
     pf = compute_park_factors(retro_dir)
@@ -208,6 +189,7 @@ try:
 except Exception as e:
     log(f"[RETRO][WARN] park factor failed: {e}")
     pf = pd.DataFrame(columns=["year","teamID","ParkFactor"])
+PERF.checkpoint("park_factors", rows_out=len(pf))
 
 # ---------- Day 60: 리그 비교 리포트 ----------
 bat2 = bat.assign(PA = nz(bat.get("AB",0))+nz(bat.get("BB",0))+nz(bat.get("HBP",0))+nz(bat.get("SH",0))+nz(bat.get("SF",0)))
@@ -264,6 +246,7 @@ if len(pf_summary):
     md.append(f"\n## Park factors — {y}\n- mean≈{row['PF_mean']:.3f}, std≈{row['PF_std']:.3f}")
 (OUT/"league_report.md").write_text("\n".join(md), encoding="utf-8")
 log("[DAY60] output/league_report.md written")
+PERF.checkpoint("league_report")
 
 
 # ---------- Day 62: 분석용 마트 (Lahman-only, 무필터 보존) ----------
@@ -302,8 +285,9 @@ bat_keep = bat_src[[c for c in cols_keep_b if c in bat_src.columns]]
 pit_keep = pit_src[[c for c in cols_keep_p if c in pit_src.columns]]
 
 star = pd.concat([bat_keep, pit_keep], ignore_index=True)
-star.to_csv(OUT/"mart_star.csv", index=False)
+write_artifact(star, OUT/"mart_star.csv", snapshot=True)  # CSV+Parquet, 버전 스냅샷
 log(f"[DAY62] output/mart_star.csv rows={len(star)} (Lahman-only baseline)")
+PERF.checkpoint("mart_star", rows_in=len(bat) + len(pit), rows_out=len(star))
 
 
 
@@ -325,7 +309,7 @@ modern['teamID'] = modern['teamID'].astype(str).str.upper()
 key = modern.rename(columns={'yearID':'year'})
 
 # mart_star 집계
-ms = pd.read_csv(OUT/'mart_star.csv', low_memory=False)
+ms = read_artifact(OUT/'mart_star.csv')
 ms['teamID'] = _norm_team(ms['teamID'])
 ms['year'] = pd.to_numeric(ms['year'], errors='coerce')
 ms['teamID'] = ms['teamID'].astype(str).str.upper()
@@ -384,7 +368,7 @@ pd.concat([
 
 print(f"[DAY63] {TEST/'benchmark_set.csv'} rows={len(cmpb)} pass_rate≈{pass_rate} detail="+str(summary))
 # ---------- Day 64: 벤치마크(±1%) ----------
-ms = pd.read_csv(OUT/"mart_star.csv", low_memory=False)
+ms = read_artifact(OUT/'mart_star.csv')
 
 # 타격 합: HR/PA
 mart_b = ms[ms["role"]=="bat"].groupby(["year","teamID"], as_index=False).agg(
@@ -418,6 +402,7 @@ bench_df = pd.concat([cmp_b, cmp_p], ignore_index=True)
 bench_df.to_csv("tests/benchmark_set.csv", index=False)
 ok = (bench_df.filter(like="_diff_rel").abs() <= 0.01).mean().mean()
 log(f"[DAY63] tests/benchmark_set.csv rows={len(bench_df)} pass_rate≈{ok:.3f}")
+PERF.checkpoint("benchmark", rows_out=len(bench_df))
 
 # ---------- Day 64: Trade Value v1 (WAR/$) ----------
 def pick_col(df, candidates):
@@ -568,4 +553,5 @@ summary = {
 with open(LOGS/"day60_64_summary.json","w",encoding="utf-8") as f:
     json.dump(summary, f, ensure_ascii=False, indent=2)
 
+PERF.checkpoint("trade_value", rows_out=len(trade_val))
 log("[DONE] Day60–64 multi-source pipeline complete")
@@ -1,8 +1,8 @@
 import pandas as pd, numpy as np
 from pathlib import Path
-from _util_safe import zscore
+from _util_safe import zscore, read_artifact
 ROOT=Path.cwd(); OUT=ROOT/'output'
-feat = pd.read_csv(OUT/'statcast_features_player_year.csv', low_memory=False)
+feat = read_artifact(OUT/'statcast_features_player_year.csv')
 yr   = int(pd.to_numeric(feat['year'], errors='coerce').max())
 df   = feat[feat['year']==yr].copy()
 if 'role' not in df.columns: df['role']='bat'
@@ -23,7 +23,7 @@ df['perf']=pd.to_numeric(df['perf'], errors='coerce').fillna(0)
 perWAR=9.5
 tvp=OUT/'trade_value.csv'
 if tvp.exists():
-    tv=pd.read_csv(tvp, low_memory=False)
+    tv=read_artifact(tvp)
     if {'salaryMM','WAR'}.issubset(tv.columns):
         sal=pd.to_numeric(tv['salaryMM'],errors='coerce'); war=pd.to_numeric(tv['WAR'],errors='coerce')
         mask=(sal>0)&(war>0); m=(sal[mask]/war[mask]).median()
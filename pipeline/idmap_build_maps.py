@@ -1,7 +1,9 @@
 import pandas as pd, json
 from pathlib import Path
+from _util_safe import recorder
 ROOT=Path.cwd(); DATA=ROOT/'data'; OUT=ROOT/'mappings'
 OUT.mkdir(exist_ok=True, parents=True)
+PERF=recorder('idmap_build_maps')
 
 def norm(s:pd.Series)->pd.Series:
     return (s.astype(str).str.strip()
@@ -24,6 +26,7 @@ if p:
     ppl[['playerID','bbrefID','retroID']]=ppl[['playerID','bbrefID','retroID']].apply(norm)
     ppl[['playerID','bbrefID']].drop_duplicates().to_csv(OUT/'pid2bb.csv', index=False)
     ppl[['playerID','retroID']].drop_duplicates().to_csv(OUT/'pid2rt.csv', index=False)
+    PERF.checkpoint('people', rows_in=len(ppl))
 
 # Chadwick register (컬럼명이 제각각이라 alias 처리)
 reg=None
@@ -50,5 +53,6 @@ if reg:
         rk=r.copy(); rk['k']=rk['nameFirst'].str.lower()+'|'+rk['nameLast'].str.lower()
         rk[['k','mlbam']].drop_duplicates().to_csv(OUT/'nm2m.csv', index=False)
         rk[['k','fgID']].drop_duplicates().to_csv(OUT/'nm2f.csv', index=False)
+    PERF.checkpoint('chadwick', rows_in=len(r))
 
 print("[MAPS] built in ./mappings")
@@ -1,8 +1,8 @@
-import pandas as pd, numpy as np, datetime as dt
+import numpy as np
 from pathlib import Path
-from _util_safe import zscore
+from _util_safe import zscore, read_artifact
 ROOT=Path.cwd(); OUT=ROOT/'output'
-df=pd.read_csv(OUT/'statcast_features_player_year.csv', low_memory=False)
+df=read_artifact(OUT/'statcast_features_player_year.csv')
 for c in ['hardhit_rate','whiff_rate','csw_rate']: 
     if c not in df: df[c]=np.nan
 df['hardhit_z']=df.groupby('year')['hardhit_rate'].transform(zscore)
@@ -1,7 +1,8 @@
-import pandas as pd, numpy as np
+import numpy as np
 from pathlib import Path
+from _util_safe import read_artifact
 ROOT=Path.cwd(); OUT=ROOT/'output'; OUT.mkdir(exist_ok=True)
-feat=pd.read_csv(OUT/'statcast_features_player_year.csv', low_memory=False)
+feat=read_artifact(OUT/'statcast_features_player_year.csv')
 pit=feat[feat['role']=='pit'].copy()
 # 연도별 정렬
 pit=pit.sort_values(['mlbam','year'])
@@ -1,5 +1,8 @@
 import pandas as pd, numpy as np
 from pathlib import Path
+import _util_safe  # noqa: F401  (sys.path 부트스트랩)
+from tools.cbt import load_table, tax_matrix
+from tools import payroll_engine as pe
 ROOT=Path.cwd(); OUT=ROOT/'output'; OUT.mkdir(exist_ok=True); LOG=ROOT/'logs'; LOG.mkdir(exist_ok=True)
 
 def _ff(name):
@@ -9,32 +12,34 @@ def _ff(name):
 
 sal = pd.read_csv(_ff('Salaries.csv'), low_memory=False)
 
-cbtfile = next((p for p in [ROOT/'data'/'cbt_thresholds.csv', ROOT/'data'/'cbt_thresholds.json'] if p.exists()), None)
-if cbtfile is None:
-    cbt = pd.DataFrame({'year': list(range(2003,2026)),
-                        'threshold':[117e6,120e6,128e6,136e6,148e6,155e6,162e6,170e6,178e6,178e6,189e6,189e6,189e6,189e6,195e6,206e6,208e6,210e6,210e6,230e6,233e6,237e6,241e6]})
-else:
-    if str(cbtfile).endswith('.csv'):
-        cbt=pd.read_csv(cbtfile)
-    else:
-        import json
-        cbt=pd.DataFrame(json.loads(Path(cbtfile).read_text()))
-    cbt.rename(columns={'yearID':'year'}, inplace=True)
+cbt = load_table(ROOT)   # 기준선 테이블은 tools/cbt.py 공용
 
 pay = sal.groupby(['yearID','teamID'], as_index=False)['salary'].sum().rename(columns={'yearID':'year'})
 df  = pay.merge(cbt, on='year', how='left')
 
-s = (df['salary'] - df['threshold'])
-df['over_amount'] = s.where(df['threshold'].notna(), 0.0).clip(lower=0.0)
+# (팀 × 연도) 배열로 한 번에 — 연속 초과 연수(반복 위반 세율)는 이력 전체에서 계산
+M = df.pivot(index='teamID', columns='year', values='salary')
+years = [int(y) for y in M.columns]
+thr = df.drop_duplicates('year').set_index('year')['threshold'].reindex(years).to_numpy(float)
+res = tax_matrix(M.fillna(0.0).to_numpy(), thr, years)
+ti = M.index.get_indexer(df['teamID']); yi = pd.Index(years).get_indexer(df['year'])
 
-def tax_calc(row):
-    if pd.isna(row['threshold']) or row['over_amount'] <= 0: return 0.0
-    # 단순 고정세율(예시): 20% — 필요 시 실제 규칙으로 교체 가능
-    return 0.20 * row['over_amount']
-
-df['cbt_tax']  = df.apply(tax_calc, axis=1)
+df['over_amount'] = res['over'][ti, yi]
+df['cbt_tax']  = res['tax'][ti, yi]
 df['cbt_flag'] = (df['over_amount'] > 0).astype(int)
+df['streak']    = res['streak'][ti, yi]
+df['base_rate'] = res['base_rate'][ti, yi]
+df['surcharge'] = res['surcharge'][ti, yi]
+df['tier']      = res['tier'][ti, yi]
 
 out = ROOT/'output'/'payroll_sim.csv'
-df[['year','teamID','salary','threshold','over_amount','cbt_tax','cbt_flag']].to_csv(out, index=False)
+df[['year','teamID','salary','threshold','over_amount','cbt_tax','cbt_flag','streak','base_rate','surcharge','tier']].to_csv(out, index=False)
 print("[DAY65] output/payroll_sim.csv rows=", len(df))
+
+# 확정 계약(data/contracts.csv)이 있으면 다음 시즌부터 5년 CBT 노출도 같은 엔진으로
+con = pe.load_commitments(ROOT)
+if len(con):
+    start = int(con['year'].min())
+    book = pe.PayrollBook(con, start, pe.DEFAULT_HORIZON, root=ROOT)
+    book.frame(book.exposure(root=ROOT)).to_csv(ROOT/pe.EXPOSURE_OUT, index=False)
+    print(f"[DAY65] {pe.EXPOSURE_OUT} teams={len(book)} years={book.years[0]}-{book.years[-1]}")
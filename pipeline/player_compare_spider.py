@@ -1,8 +1,8 @@
-import pandas as pd, numpy as np, matplotlib.pyplot as plt
+import numpy as np, matplotlib.pyplot as plt
 from pathlib import Path
-from _util_safe import to_num
+from _util_safe import to_num, read_artifact
 ROOT=Path.cwd(); OUT=ROOT/'output'
-df=pd.read_csv(OUT/'statcast_features_player_year.csv', low_memory=False)
+df=read_artifact(OUT/'statcast_features_player_year.csv')
 yr=int(df['year'].max()); pool=df[df['year']==yr].copy()
 pool['label']=pool['player_name'].fillna(pool['mlbam'].astype(str))
 metrics=['xwOBA','avg_ev','hardhit_rate','barrel_rate','whiff_rate','z_csw_rate','chase_rate']
@@ -1 +1,70 @@
-Usage: python -m pipeline.retry_watchdog --retries N --timeout SEC --tag TAG -- cmd ...
+# -*- coding: utf-8 -*-
+# 재시도/타임아웃 감시 실행기(파이프라인 단계 공용)
+#   - 타임아웃 시 프로세스 그룹 전체 종료(SIGTERM → 5초 후 SIGKILL)
+#   - 실패 시 N회 재시도(시도 간 대기는 선형 증가)
+#   - 자식별 벽시계 시간 / 최대 RSS(os.wait4) 측정 → DAG 실행기 매니페스트에 기록
+# 사용: python -m pipeline.retry_watchdog --retries N --timeout SEC --tag TAG -- cmd ...
+import os, sys, json, time, signal, argparse, threading, subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+LOG_DIR = Path("logs")
+RETRY_WAIT_SEC = 5.0
+
+def run_once(cmd: List[str], timeout: Optional[float] = None, log_path: Optional[Path] = None,
+             env: Optional[Dict[str, str]] = None):
+    """1회 실행 → (rc, wall_sec, peak_rss_mb, timed_out)."""
+    out = open(log_path, "ab") if log_path else None
+    t0 = time.monotonic()
+    p = subprocess.Popen(cmd, stdout=out, stderr=subprocess.STDOUT if out else None, env=env, start_new_session=True)
+    timed_out = threading.Event()
+    def _kill():
+        timed_out.set()
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            try:
+                os.killpg(p.pid, sig)
+            except ProcessLookupError:
+                return
+            time.sleep(5)
+    timer = threading.Timer(timeout, _kill) if timeout else None
+    if timer:
+        timer.daemon = True; timer.start()
+    try:
+        _, status, ru = os.wait4(p.pid, 0)
+    finally:
+        if timer: timer.cancel()
+        if out: out.close()
+    p.returncode = os.waitstatus_to_exitcode(status)        # Popen 이 다시 wait 하지 않도록
+    return p.returncode, time.monotonic() - t0, ru.ru_maxrss / 1024.0, timed_out.is_set()
+
+def run_with_retries(cmd: List[str], retries: int = 0, timeout: Optional[float] = None, tag: str = "job",
+                     log_dir: Path = LOG_DIR, env: Optional[Dict[str, str]] = None) -> Dict:
+    log_dir.mkdir(parents=True, exist_ok=True)
+    log_path = log_dir / f"{tag}.log"
+    wall = peak = 0.0
+    rc, timed_out, attempt = 1, False, 0
+    for attempt in range(1, retries + 2):
+        with open(log_path, "ab") as f:
+            f.write(f"\n[watchdog] {time.strftime('%Y-%m-%dT%H:%M:%S')} attempt={attempt} cmd={' '.join(cmd)}\n".encode())
+        rc, w, pk, timed_out = run_once(cmd, timeout, log_path, env)
+        wall += w; peak = max(peak, pk)
+        if rc == 0:
+            break
+        if attempt <= retries:
+            time.sleep(RETRY_WAIT_SEC * attempt)
+    return {"rc": rc, "attempts": attempt, "wall_sec": round(wall, 3), "peak_rss_mb": round(peak, 1),
+            "timed_out": timed_out, "log": str(log_path)}
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    if "--" not in argv:
+        sys.exit("Usage: python -m pipeline.retry_watchdog --retries N --timeout SEC --tag TAG -- cmd ...")
+    i = argv.index("--")
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--retries", type=int, default=2)
+    ap.add_argument("--timeout", type=float, default=None)
+    ap.add_argument("--tag", default="job")
+    a = ap.parse_args(argv[:i])
+    res = run_with_retries(argv[i + 1:], a.retries, a.timeout, a.tag)
+    print(json.dumps({"tag": a.tag, **res}, ensure_ascii=False))
+    sys.exit(res["rc"])
@@ -1,8 +1,9 @@
 import json, pandas as pd, numpy as np
 from pathlib import Path
+from _util_safe import read_artifact
 ROOT=Path.cwd(); OUT=ROOT/'output'; OUT.mkdir(parents=True, exist_ok=True); LOG=ROOT/'logs'; LOG.mkdir(parents=True, exist_ok=True)
 
-ms = pd.read_csv(OUT/'mart_star.csv', low_memory=False)
+ms = read_artifact(OUT/'mart_star.csv')
 for c in ['PA','IPouts','OPS','ERA','WARx']:
     if c not in ms.columns: ms[c]=np.nan
 ms['year']=pd.to_numeric(ms['year'], errors='coerce')
@@ -2,16 +2,19 @@
 # -*- coding: utf-8 -*-
 """
 스키마 패치: 기존 산출물 CSV를 재계산 없이 필수 열만 맞춰서 인플레이스로 수정
-- 백업: <file>.bak
+- 백업: output/snapshots/<stem>/ 버전 Parquet(pyarrow 없으면 <file>.bak)
 - 결측 열은 생성만 하고 값은 공란/0/유도값으로 채움(스모크는 열 존재 + 0~1 sanity만 봄)
 """
 import csv, shutil, math
 from pathlib import Path
+from _util_safe import snapshot
 
 ROOT = Path("/workspaces/cogm-assistant")
 OUT  = ROOT/"output"
 
 def backup(p: Path):
+    if snapshot(p, out_dir=str(OUT)) is not None:
+        return
     bak = p.with_suffix(p.suffix+".bak")
     if not bak.exists():
         shutil.copy2(p, bak)
@@ -8,15 +8,18 @@
 import os, math
 import pandas as pd, numpy as np
 from pathlib import Path
+from _util_safe import write_artifact, recorder
 
 ROOT=Path.cwd(); OUT=ROOT/'output'; OUT.mkdir(parents=True, exist_ok=True)
 BASES=[OUT/'cache'/'statcast_clean', OUT/'cache'/'statcast']
 MAX_FILES=int(os.environ.get('STATCAST_MAX_FILES','64'))
+PERF=recorder('statcast_enrich')  # logs/perf/statcast_enrich.jsonl
 
 def _rate(n,d): 
     n=float(n); d=float(d); 
     return (n/d) if d>0 else np.nan
 
+@PERF.timed('list_files')
 def _load_files():
     files=[]
     for b in BASES:
@@ -99,7 +102,8 @@ def aggregate():
 
     bat_rows=[]; pit_rows=[]; mix_rows=[]
     for f in files:
-        df=_read_csv(f)
+        with PERF.stage('read_csv') as st:
+            df=_read_csv(f); st.rows_out=len(df)
         if df.empty:
             print(f"[STATCAST][SKIP] {f.name}: empty")
             continue
@@ -216,6 +220,7 @@ def aggregate():
                 mix['h_mov_in']  = pd.to_numeric(mix['pfx_x'], errors='coerce')*12
                 mix['v_mov_in']  = pd.to_numeric(mix['pfx_z'], errors='coerce')*12
                 mix_rows.append(mix)
+        PERF.checkpoint('aggregate', rows_in=len(df))
 
     # ---- 합치고 저장 ----
     bat_df = pd.concat(bat_rows, ignore_index=True) if bat_rows else pd.DataFrame()
@@ -234,12 +239,12 @@ def aggregate():
               'chase_rate','csw_rate','avg_ext','avg_spin','h_mov_in','v_mov_in']
         for c in need:
             if c not in all_df.columns: all_df[c]=np.nan
-        all_df.to_csv(OUT/'statcast_features_player_year.csv', index=False)
+        write_artifact(all_df, OUT/'statcast_features_player_year.csv')
 
         slim=all_df[['year','mlbam','player_name','role','xwOBA']].copy()
         slim['avg_ev']=pd.to_numeric(all_df['EV'], errors='coerce')  # 이전 호환
         slim['hardhit_rate']=all_df['hardhit_rate']
-        slim.to_csv(OUT/'statcast_agg_player_year.csv', index=False)
+        write_artifact(slim, OUT/'statcast_agg_player_year.csv')
 
         print(f"[STATCAST][ENRICH] rows={len(all_df)} -> {OUT/'statcast_features_player_year.csv'}")
 
@@ -249,6 +254,7 @@ def aggregate():
         print(f"[STATCAST][PITCH-MIX] rows={len(mix_df)} -> {OUT/'statcast_pitch_mix_player_year.csv'}")
     else:
         (OUT/'statcast_pitch_mix_player_year.csv').write_text("", encoding='utf-8')
+    PERF.checkpoint('write', rows_out=len(all_df))
 
 def _read_str(df,col): return df[col].astype(str)
 
@@ -1,5 +1,6 @@
 import json, time
 from pathlib import Path
+from _util_safe import load_runs
 ROOT=Path.cwd(); LOG=ROOT/'logs'; LOG.mkdir(exist_ok=True); OUT=ROOT/'output'
 t0=time.time(); stats={}
 for p in [OUT/'statcast_agg_player_year.csv', OUT/'mart_star.csv', OUT/'trade_value.csv']:
@@ -8,5 +9,14 @@ logf=LOG/'day60_64_mlb_multi.log'
 hits=None
 if logf.exists(): txt=logf.read_text(errors='ignore'); hits=txt.count("No columns to parse from file")
 stats['statcast_cache_hits']=hits; stats['ran_at']=time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+# 스크립트별 최근 계측(logs/perf) — 느린 단계 상위 3개
+perf={}
+for fp in sorted((LOG/'perf').glob('*.jsonl')):
+    runs=load_runs(fp.stem, LOG/'perf')
+    if not runs: continue
+    r=runs[-1]; top=sorted(r['stages'].items(), key=lambda kv: -kv[1]['sec'])[:3]
+    perf[fp.stem]={'started':r['started'],'wall_sec':r['wall_sec'],'max_rss_mb':r.get('max_rss_mb'),
+                   'slowest':{k:v['sec'] for k,v in top}}
+stats['perf']=perf
 (LOG/'tune_profile.json').write_text(json.dumps(stats, indent=2), encoding='utf-8')
 print("[DAY68] logs/tune_profile.json written")
@@ -1,15 +1,18 @@
 
 import pandas as pd, numpy as np, datetime as dt
 from pathlib import Path
+from _util_safe import recorder
 
 ROOT=Path.cwd(); OUT=ROOT/'output'; OUT.mkdir(exist_ok=True)
+PERF=recorder('weekly_report')
 
 lines = ["# Weekly MLB Report — Auto\n\n",
          f"- Generated: {dt.datetime.utcnow().isoformat()}Z\n\n"]
 
 f = OUT/'statcast_features_player_year.csv'
 if f.exists():
-    df = pd.read_csv(f, low_memory=False)
+    with PERF.stage('load') as st:
+        df = pd.read_csv(f, low_memory=False); st.rows_out = len(df)
     # 필수 컬럼 가드
     need = ["role","year","player_name","xwOBA","avg_ev","hardhit_rate","barrel_rate",
             "whiff_rate","z_whiff_rate","o_swing_rate","z_contact_rate","o_contact_rate",
@@ -47,4 +50,5 @@ if f.exists():
                      f"V {r.get('v_mov_in',np.nan):.1f} in\n")
 
 (OUT/'weekly_report.md').write_text("".join(lines), encoding='utf-8')
+PERF.checkpoint('render')
 print("[DAY70] output/weekly_report.md written")
@@ -42,17 +42,26 @@ DEFAULT_LEAGUE_BASELINES: Dict[int, Dict[str, float]] = {
 # -------------------
 # 캐시 계층
 # -------------------
+try:
+    from tools.asgi_metrics import note_cache   # 요청별 캐시 적중 귀속(/_metrics)
+except Exception:
+    def note_cache(layer: str, source: str) -> None:
+        return None
+
 class _MemoryCache:
     def __init__(self):
         self._store: Dict[str, Tuple[float, Any]] = {}
     def get(self, key: str):
         rec = self._store.get(key)
         if not rec:
+            note_cache("core_mem", "miss")
             return None
         exp, val = rec
         if time.time() > exp:
             self._store.pop(key, None)
+            note_cache("core_mem", "expired")
             return None
+        note_cache("core_mem", "hit")
         return val
     def set(self, key: str, val: Any, ttl: int):
         self._store[key] = (time.time() + ttl, val)
@@ -65,6 +74,7 @@ class _RedisCache:
         self._cli = redis.from_url(url)
     def get(self, key: str):
         val = self._cli.get(key)
+        note_cache("core_redis", "miss" if val is None else "hit")
         if val is None:
             return None
         try:
@@ -490,15 +500,46 @@ def _zone_grid_keys():
 
 # ===== #5 약점 탐색(구종×코스) =====
 class WeaknessMapQuery(BaseModel):
-    player_id: str
+    player_id: str                           # Lahman playerID(또는 MLBAM) — 히트맵 조회는 id_map 크로스워크로 MLBAM 변환
     season: int
     pitch_types: Optional[List[str]] = None  # None이면 기본 ["FF","SL","CH","CB"]
+    mlbam: Optional[str] = None              # MLBAM id 직접 지정(크로스워크보다 우선)
 
 class WeaknessMapResponse(BaseModel):
     player_id: str
     season: int
-    metric: str                       # "xwOBA_like" (0.200~0.450)
+    metric: str                       # "xwOBA" (실측) | "xwOBA_like" (스텁 0.200~0.450)
     grid: Dict[str, Dict[str, float]] # {pitch_type: {zone: value}}
+    source: str = "heatmap"
+
+try:
+    from tools.weakness_heatmap import get_heatmap_store, zone_labels, grid_to_list
+except Exception:
+    get_heatmap_store = None
+
+def _heatmap_store():
+    if get_heatmap_store is None:
+        return None
+    try:
+        return get_heatmap_store()
+    except Exception:
+        return None
+
+try:
+    from tools.id_xwalk import to_mlbam as _to_mlbam
+except Exception:
+    _to_mlbam = None
+
+def _heatmap_key(player_id: str, mlbam: Optional[str] = None) -> str:
+    # 히트맵 저장소는 Statcast batter(MLBAM) 키 — API player_id(Lahman) 는 크로스워크로 변환, 매핑 없으면 원래 값
+    if mlbam:
+        return str(mlbam).strip()
+    if _to_mlbam is None:
+        return player_id
+    try:
+        return _to_mlbam(player_id) or player_id
+    except Exception:
+        return player_id
 
 def _seed_from(pid: str, season: int) -> int:
     return sum(ord(c) for c in f"{pid}{season}")
@@ -513,6 +554,18 @@ def _xwoba_like(seed: int, bias: float) -> float:
 async def weakness_map(q: WeaknessMapQuery):
     ptypes = q.pitch_types or ["FF","SL","CH","CB"]
     zones = _zone_grid_keys()
+    # 실측: weakness_heatmap memmap 행 슬라이스(구종별 3×3 xwOBA, 빈 셀은 해당 구종 전체 xwOBA)
+    store = _heatmap_store()
+    key = _heatmap_key(q.player_id, q.mlbam) if store is not None else q.player_id
+    if store is not None and store.has(key, q.season):
+        grid = {}
+        for pt in ptypes:
+            r = store.query(key, q.season, ["CU" if pt == "CB" else pt])
+            if not r or r["n_pitches"] == 0:
+                continue
+            fill = round(r["xwoba_all"], 3) if r["xwoba_all"] is not None else 0.320
+            grid[pt] = {z: (v if v is not None else fill) for z, v in zone_labels(r["xwoba"]).items()}
+        return WeaknessMapResponse(player_id=q.player_id, season=q.season, metric="xwOBA", grid=grid, source="heatmap")
     # 플레이어 현재 성능을 약간 반영 (OPS 높으면 전체가 약간 낮아짐=약점 덜함)
     base = league_baseline_for(q.season, None)
     st = build_player_stats(q.player_id, q.season, base)
@@ -526,7 +579,45 @@ async def weakness_map(q: WeaknessMapQuery):
             z_bias = (j+1)/len(zones) * 0.6 + 0.4*ops_bias
             row[zone] = _xwoba_like(pt_seed + j*13, z_bias)
         grid[pt] = row
-    return WeaknessMapResponse(player_id=q.player_id, season=q.season, metric="xwOBA_like", grid=grid)
+    return WeaknessMapResponse(player_id=q.player_id, season=q.season, metric="xwOBA_like", grid=grid, source="stub_fallback")
+
+class WeaknessHeatmapQuery(BaseModel):
+    player_id: str
+    season: int
+    pitch_types: Optional[List[str]] = None  # None이면 전체 구종
+    p_throws: Optional[str] = None           # "L" | "R" | None(전체)
+    mlbam: Optional[str] = None              # MLBAM id 직접 지정(없으면 player_id 를 크로스워크로 변환)
+
+class WeaknessHeatmapResponse(BaseModel):
+    player_id: str
+    season: int
+    filters: Dict[str, Any]
+    x_edges: List[float]
+    z_edges: List[float]
+    grids: Dict[str, List[List[Optional[float]]]]   # 5×5, 아래→위 / 몸쪽→바깥쪽
+    n_pitches: int
+    chase_rate: Optional[float] = None
+    xwoba: Optional[float] = None
+    meta: Dict[str, Any] = {}
+
+@router.post("/player/weakness_heatmap", response_model=WeaknessHeatmapResponse)
+async def weakness_heatmap(q: WeaknessHeatmapQuery):
+    filters = {"pitch_types": q.pitch_types, "p_throws": q.p_throws}
+    store = _heatmap_store()
+    r = store.query(_heatmap_key(q.player_id, q.mlbam), q.season, q.pitch_types, q.p_throws) if store is not None else None
+    if r is None:
+        return WeaknessHeatmapResponse(player_id=q.player_id, season=q.season, filters=filters,
+                                       x_edges=[], z_edges=[], grids={}, n_pitches=0,
+                                       meta={"fallback": True, "reason": "no_heatmap_row" if store is not None else "no_heatmap_store"})
+    grids = {k: grid_to_list(r[k], 0 if k == "pitches" else 3) for k in ("pitches", "swing_rate", "whiff_rate", "xwoba")}
+    return WeaknessHeatmapResponse(
+        player_id=q.player_id, season=q.season, filters=filters,
+        x_edges=store.meta["x_edges"], z_edges=store.meta["z_edges"], grids=grids,
+        n_pitches=r["n_pitches"],
+        chase_rate=round(r["chase_rate"], 3) if r["chase_rate"] is not None else None,
+        xwoba=round(r["xwoba_all"], 3) if r["xwoba_all"] is not None else None,
+        meta={"fallback": False},
+    )
 
 # ===== #8 핫/콜드 스틱 검증(안정화) =====
 class HotColdQuery(BaseModel):
@@ -594,21 +685,16 @@ async def injury_risk_signal(q: InjuryRiskQuery):
 
 # ========= Day4: Roster & Payroll v1 — #13 멀티-이어 페이롤 / #14 ARB 예상 =========
 from pydantic import BaseModel
-from math import pow
+import numpy as np
 
 # ----- 공용 -----
+# 계약/NPV 계산은 tools.contract_engine(NumPy, 계약×연도 행렬) 한 곳으로 모음
+from tools import contract_engine as _ce
+from tools import payroll_engine as _pe
+
 def _npv(cashflows: List[float], discount_rate: float = 0.08) -> float:
     # 연 단위 NPV (연 8% 기본)
-    return round(sum(cf / pow(1.0 + discount_rate, i) for i, cf in enumerate(cashflows, start=1)), 2)
-
-def _salary_growth(base: float, rate: float, years: int) -> List[float]:
-    # 단순 연복리 성장
-    out = []
-    sal = base
-    for _ in range(years):
-        out.append(round(sal, 2))
-        sal *= (1.0 + rate)
-    return out
+    return round(_ce.npv(cashflows, discount_rate, start=1), 2)
 
 # ===== #13 멀티-이어 페이롤 시뮬 =====
 class MultiYearPayrollItem(BaseModel):
@@ -634,21 +720,18 @@ class MultiYearPayrollResponse(BaseModel):
 async def multi_year_payroll(q: MultiYearPayrollQuery):
     max_years = max((it.years for it in q.items), default=0)
     years = [q.season_start + i for i in range(max_years)]
-    table = []
-    totals = [0.0 for _ in years]
-
-    for it in q.items:
-        yearly = _salary_growth(it.base_year_salary, it.growth_rate, it.years)
-        # 자리채움(표 길이 정렬)
-        yearly += [0.0] * (max_years - len(yearly))
-        for i, v in enumerate(yearly):
-            totals[i] += v
-        total = round(sum(yearly), 2)
-        npv = _npv([v for v in yearly if v > 0], q.discount_rate)
-        table.append({"player_id": it.player_id, "yearly": yearly, "total": total, "npv": npv})
-
-    grand_total = round(sum(totals), 2)
-    grand_npv = _npv([v for v in totals if v > 0], q.discount_rate)
+    # (항목 × 연도) 성장 행렬 한 번 — 계약 기간 밖은 0(표 길이 정렬)
+    M = np.round(_pe.growth_matrix([it.base_year_salary for it in q.items], [it.growth_rate for it in q.items],
+                                   [it.years for it in q.items], max_years), 2).reshape(len(q.items), max_years)
+    # NPV 는 양수 연도만, 첫 해 무할인(아래 Day 후반 _npv 재정의와 같은 규칙)
+    disc = _ce.discount(max_years, q.discount_rate, start=0)
+    npvs = np.clip(M, 0.0, None) @ disc
+    totals = M.sum(0)
+    table = [{"player_id": it.player_id, "yearly": M[k].tolist(), "total": round(float(M[k].sum()), 2),
+              "npv": round(float(npvs[k]), 2)} for k, it in enumerate(q.items)]
+
+    grand_total = round(float(totals.sum()), 2)
+    grand_npv = round(float(np.clip(totals, 0.0, None) @ disc), 2)
     return MultiYearPayrollResponse(season_years=years, table=table, totals_by_year=[round(t,2) for t in totals],
                                     grand_total=grand_total, grand_npv=grand_npv)
 
@@ -710,7 +793,7 @@ async def arb_estimate(q: ArbQuery):
 from pydantic import BaseModel
 
 def _npv_series(values: List[float], r: float) -> float:
-    return round(sum(v / ((1.0 + r) ** i) for i, v in enumerate(values, start=1)), 2)
+    return round(_ce.npv(values, r, start=1), 2)
 
 # ----- #15 계약 ROI/서플러스 ($/WAR·NPV) -----
 class ContractYear(BaseModel):
@@ -730,19 +813,16 @@ class ContractROIResponse(BaseModel):
 
 @router.post("/roster/contract_roi", response_model=ContractROIResponse)
 async def contract_roi(q: ContractROIQuery):
-    rows = []
-    v_series, s_series = [], []
-    for cy in q.contract:
-        value = cy.proj_war * q.dollar_per_war
-        surplus = value - cy.salary
-        rows.append({"year": cy.year, "salary": round(cy.salary,2), "proj_war": round(cy.proj_war,2),
-                     "value": round(value,2), "surplus": round(surplus,2)})
-        v_series.append(value); s_series.append(cy.salary)
-    tot_salary = round(sum(s_series), 2)
-    tot_value = round(sum(v_series), 2)
+    ev = _ce.evaluate([[cy.salary for cy in q.contract]], [[cy.proj_war for cy in q.contract]],
+                      dpw=q.dollar_per_war, rate=q.discount_rate, start=1)
+    rows = [{"year": cy.year, "salary": round(cy.salary,2), "proj_war": round(cy.proj_war,2),
+             "value": round(float(v),2), "surplus": round(float(su),2)}
+            for cy, v, su in zip(q.contract, ev["value"][0], ev["surplus"][0])]
+    tot_salary = round(float(ev["salary_total"][0]), 2)
+    tot_value = round(float(ev["value_total"][0]), 2)
     tot_surplus = round(tot_value - tot_salary, 2)
-    npv_salary = _npv_series(s_series, q.discount_rate)
-    npv_value  = _npv_series(v_series, q.discount_rate)
+    npv_salary = round(float(ev["npv_salary"][0]), 2)
+    npv_value  = round(float(ev["npv_value"][0]), 2)
     npv_surplus = round(npv_value - npv_salary, 2)
     roi = round((tot_value / tot_salary) if tot_salary > 0 else 0.0, 3)
     return ContractROIResponse(table=rows,
@@ -751,6 +831,10 @@ async def contract_roi(q: ContractROIQuery):
                                roi=roi)
 
 # ----- #16 포지션 대체 자원 추천 (간단형) -----
+# 후보 목록이 없으면 tools/replacement_index(마트 + player_cards, 포지션 파티션) 에서 직접 조회
+import numpy as np
+from tools.replacement_index import get_index as _repl_index, DOLLAR_PER_WAR as _REPL_DPW
+
 class ReplacementCand(BaseModel):
     player_id: str
     pos: str
@@ -759,9 +843,11 @@ class ReplacementCand(BaseModel):
 
 class ReplacementQuery(BaseModel):
     need_pos: str
-    candidates: List[ReplacementCand]
+    candidates: List[ReplacementCand] = []   # 비우면 후보 인덱스
     min_war: float = 0.5
     top_n: int = 5
+    season: Optional[int] = None             # 인덱스 조회 시즌(기본 최신)
+    exclude: List[str] = []
 
 from pydantic import Field
 from pydantic import ConfigDict
@@ -779,24 +865,26 @@ class ReplacementResponse(BaseModel):
 
 @router.post("/roster/replacement_suggestions", response_model=ReplacementResponse)
 async def replacement_suggestions(q: ReplacementQuery):
-    out: List[Dict[str, float]] = []
-    for c in q.candidates:
-        if c.pos != q.need_pos:
-            continue
-        if c.proj_war < q.min_war:
-            continue
-        war_per_dollar = (c.proj_war / c.expected_cost) if c.expected_cost > 0 else 0.0
-        surplus = c.proj_war * 9_000_000.0 - c.expected_cost  # 9M/WAR 기본
-        out.append({
-            "player_id": c.player_id,
-            "proj_war": round(c.proj_war, 2),
-            "expected_cost": round(c.expected_cost, 2),
-            "war_per_$": round(war_per_dollar, 8),
-            "surplus": round(surplus, 2),
-        })
-    out.sort(key=lambda x: (x["surplus"], x["war_per_$"]), reverse=True)
-    ranked = [ReplacementRankRow(**row) for row in out[: q.top_n]]
-    return ReplacementResponse(pos=q.need_pos, ranked=ranked)
+    # ranked 는 dict 로 넘김(아래 Day32 의 같은 이름 모델이 전역을 덮어쓰므로 필드 타입으로 검증)
+    if not q.candidates:
+        _, rows = _repl_index().rank(q.need_pos, q.top_n, mode="surplus", min_war=q.min_war,
+                                     season=q.season, exclude=q.exclude)
+        out = [{"player_id": r["player_id"], "proj_war": r["proj_war"], "expected_cost": r["expected_cost"],
+                "war_per_$": round(r["proj_war"] / r["expected_cost"], 8) if r["expected_cost"] > 0 else 0.0,
+                "surplus": round(r["proj_war"] * _REPL_DPW - r["expected_cost"], 2)} for r in rows]
+        return ReplacementResponse(pos=q.need_pos, ranked=out)
+    pos = np.array([c.pos for c in q.candidates])
+    war = np.array([c.proj_war for c in q.candidates], dtype=float)
+    cost = np.array([c.expected_cost for c in q.candidates], dtype=float)
+    ix = np.flatnonzero((pos == q.need_pos) & (war >= q.min_war))
+    war, cost = war[ix], cost[ix]
+    wpd = np.round(np.where(cost > 0, war / np.where(cost > 0, cost, 1.0), 0.0), 8)
+    surplus = np.round(war * 9_000_000.0 - cost, 2)  # 9M/WAR 기본
+    order = np.lexsort((-wpd, -surplus))[: max(0, q.top_n)]   # (surplus, war_per_$) 내림차순, 동률은 입력 순서
+    out = [{"player_id": q.candidates[ix[i]].player_id, "proj_war": round(float(war[i]), 2),
+            "expected_cost": round(float(cost[i]), 2), "war_per_$": float(wpd[i]), "surplus": float(surplus[i])}
+           for i in order]
+    return ReplacementResponse(pos=q.need_pos, ranked=out)
 
 # ========= Day6: #22 트레이드 밸류 / #23 모의 트레이드 =========
 from pydantic import BaseModel
@@ -917,6 +1005,20 @@ def _stable_rng01(seed: int) -> float:
     return x / 233280.0
 
 # ===== #29 일정 분석 =====
+try:
+    from tools.schedule_index import get_schedule_index
+except Exception:  # tools/ 경로 미포함 실행 등
+    get_schedule_index = None
+
+def _schedule_window(team: str, d0: date, d1: date) -> Optional[Dict[str, Any]]:
+    # games.csv 기반 실측 구간 요약(팀 데이터 없으면 None → 스텁)
+    if get_schedule_index is None:
+        return None
+    try:
+        return get_schedule_index().window(team, d0, d1)
+    except Exception:
+        return None
+
 class ScheduleAnalyzeResponse(BaseModel):
     team: str
     date_from: str
@@ -928,6 +1030,22 @@ class ScheduleAnalyzeResponse(BaseModel):
     travel_km_stub: int
     opp_strength_stub: float
     fatigue_index: float  # 0~100
+    travel_km: Optional[float] = None
+    tz_shifts: Optional[int] = None
+    road_trip_len: Optional[int] = None
+    home_games: Optional[int] = None
+    source: str = "games_csv"
+
+def _schedule_fatigue(games: int, days: int, back_to_backs: int, travel_km: float, opp_strength: float) -> float:
+    # 피로 지수: 경기밀도/백투백/이동거리/상대강도 종합
+    density = games / max(1, days)
+    fatigue = (
+        45.0 * density +
+        25.0 * (back_to_backs / max(1, games)) +
+        20.0 * min(1.0, travel_km / 5000.0) +
+        10.0 * (opp_strength - 0.5 + 0.5)
+    )
+    return round(_clamp(fatigue, 0.0, 100.0), 1)
 
 @router.get("/schedule/analyze", response_model=ScheduleAnalyzeResponse)
 async def schedule_analyze(team: str, from_: str, to: str):
@@ -937,7 +1055,19 @@ async def schedule_analyze(team: str, from_: str, to: str):
         d0, d1 = d1, d0
     days = (d1 - d0).days + 1
 
-    # 시드: 팀+기간
+    w = _schedule_window(team, d0, d1)
+    if w is not None:
+        opp_strength = w["opp_strength"] if w["opp_strength"] is not None else 0.5
+        return ScheduleAnalyzeResponse(
+            team=team, date_from=d0.isoformat(), date_to=d1.isoformat(), days=days,
+            games=w["games"], back_to_backs=w["back_to_backs"], rest_days=w["rest_days"],
+            travel_km_stub=int(round(w["travel_km"])), opp_strength_stub=opp_strength,
+            fatigue_index=_schedule_fatigue(w["games"], days, w["back_to_backs"], w["travel_km"], opp_strength),
+            travel_km=w["travel_km"], tz_shifts=w["tz_shifts"], road_trip_len=w["road_trip_max"],
+            home_games=w["home_games"], source="games_csv",
+        )
+
+    # 폴백: 시드: 팀+기간
     seed = _seed_from(team, d0.year) + days * 37
     r1 = _stable_rng01(seed + 11)
     r2 = _stable_rng01(seed + 23)
@@ -948,26 +1078,30 @@ async def schedule_analyze(team: str, from_: str, to: str):
     games = max(0, int(round(days * (0.6 + 0.25 * r1))))
     back_to_backs = max(0, int(round(games * (0.10 + 0.10 * r2))))
     rest_days = max(0, days - math.ceil(games * 1.05))
-    travel_km_stub = int( (300 + 1700 * r3) * max(1, days/10) )  # 대략적 스케일
+    travel_km = float(int( (300 + 1700 * r3) * max(1, days/10) ))  # 대략적 스케일(구장 레지스트리 값과 같은 필드로)
     opp_strength = round(0.45 + 0.15 * r4, 3)  # 0.45~0.60
 
-    # 피로 지수: 경기밀도/백투백/이동거리/상대강도 종합
-    density = games / max(1, days)
-    fatigue = (
-        45.0 * density +
-        25.0 * (back_to_backs / max(1, games)) +
-        20.0 * min(1.0, travel_km_stub / 5000.0) +
-        10.0 * (opp_strength - 0.5 + 0.5)
-    )
-    fatigue = round(_clamp(fatigue, 0.0, 100.0), 1)
-
     return ScheduleAnalyzeResponse(
         team=team, date_from=d0.isoformat(), date_to=d1.isoformat(), days=days,
         games=games, back_to_backs=back_to_backs, rest_days=rest_days,
-        travel_km_stub=travel_km_stub, opp_strength_stub=opp_strength,
-        fatigue_index=fatigue
+        travel_km_stub=int(travel_km), opp_strength_stub=opp_strength,
+        fatigue_index=_schedule_fatigue(games, days, back_to_backs, travel_km, opp_strength),
+        travel_km=travel_km, source="stub_fallback",
     )
 
+class ScheduleAnalyzeAllResponse(BaseModel):
+    date_from: str
+    date_to: str
+    teams: List[ScheduleAnalyzeResponse]
+
+@router.get("/schedule/analyze_all", response_model=ScheduleAnalyzeAllResponse)
+async def schedule_analyze_all(from_: str, to: str):
+    # 인덱스에 있는 전 구단 일괄(팀별 bisect + 누적합이라 전체도 ms 단위)
+    d0, d1 = sorted((_parse_ymd(from_), _parse_ymd(to)))
+    teams = sorted(get_schedule_index().teams) if get_schedule_index is not None else []
+    out = [await schedule_analyze(t, d0.isoformat(), d1.isoformat()) for t in teams]
+    return ScheduleAnalyzeAllResponse(date_from=d0.isoformat(), date_to=d1.isoformat(), teams=out)
+
 # ===== #35 승률/WP 예측 =====
 class WinProbQuery(BaseModel):
     home: str
@@ -1064,51 +1198,180 @@ class TeamFitResponse(BaseModel):
     team: str
     ranked: List[TeamFitRow]
 
+def _team_fit_score(needs: List[str], c: TeamFitCandidate) -> Tuple[float, List[str]]:
+    # needs 는 _norm_need 적용된 목록
+    ctools = { _norm_need(t) for t in (c.tools or []) }
+    # 1) needs-툴 매칭
+    inter = ctools.intersection(needs)
+    base = 0.7 * (len(inter) / max(1, len(needs)))
+    reasons = []
+    if inter:
+        reasons.append(f"needs_matched:{','.join(sorted(inter))}")
+    # 2) 좌우타 보정
+    bats = (c.bats or "").upper()
+    lh_bonus = 0.2 if ("LHH" in needs and bats == "L") else 0.0
+    rh_bonus = 0.2 if ("RHH" in needs and bats == "R") else 0.0
+    if lh_bonus: reasons.append("bats:LHH_fit")
+    if rh_bonus: reasons.append("bats:RHH_fit")
+    # 3) 포지션/유틸 보정
+    pos_bonus = 0.1 if (c.pos in needs or (c.pos == "UTL") or any(p in (c.pos or "") for p in ("UTL","OF","IF"))) else 0.0
+    if pos_bonus: reasons.append("pos_flex")
+    return round(min(1.0, base + lh_bonus + rh_bonus + pos_bonus), 4), reasons
+
 @router.post("/scouting/team_fit", response_model=TeamFitResponse)
 async def team_fit(q: TeamFitQuery):
     needs = [_norm_need(n) for n in q.needs]
     out: List[TeamFitRow] = []
     for c in q.candidates:
-        ctools = { _norm_need(t) for t in (c.tools or []) }
-        # 1) needs-툴 매칭
-        inter = ctools.intersection(needs)
-        base = 0.7 * (len(inter) / max(1, len(needs)))
-        reasons = []
-        if inter:
-            reasons.append(f"needs_matched:{','.join(sorted(inter))}")
-        # 2) 좌우타 보정
-        bats = (c.bats or "").upper()
-        lh_bonus = 0.2 if ("LHH" in needs and bats == "L") else 0.0
-        rh_bonus = 0.2 if ("RHH" in needs and bats == "R") else 0.0
-        if lh_bonus: reasons.append("bats:LHH_fit")
-        if rh_bonus: reasons.append("bats:RHH_fit")
-        # 3) 포지션/유틸 보정
-        pos_bonus = 0.1 if (c.pos in needs or (c.pos == "UTL") or any(p in (c.pos or "") for p in ("UTL","OF","IF"))) else 0.0
-        if pos_bonus: reasons.append("pos_flex")
-        score = round(min(1.0, base + lh_bonus + rh_bonus + pos_bonus), 4)
+        score, reasons = _team_fit_score(needs, c)
         out.append(TeamFitRow(player_id=c.player_id, score=score, reasons=reasons or ["baseline"]))
     out.sort(key=lambda r: r.score, reverse=True)
     return TeamFitResponse(team=q.team, ranked=out[: q.top_n])
 
+# ===== 트레이드 패키지 탐색(mock_trade 의 합계 비교 대신 균형 패키지 top-k) =====
+from fastapi.concurrency import run_in_threadpool
+from tools import trade_search as _ts
+
+_TRADE_VALUES_PATH = os.getenv("TRADE_VALUES_PATH", "output/trade_values.csv")
+_TEAM_FIT_PATH = os.getenv("TEAM_FIT_PATH", "output/team_fit.csv")
+
+class TradeSearchPlayer(BaseModel):
+    player_id: str
+    value: Optional[float] = None     # 트레이드 가치($). 없으면 trade_values.csv 의 Surplus
+    fit: Optional[float] = None       # 상대 팀 적합도(0~1). 없으면 상대 needs → team_fit 규칙 → team_fit.csv → 0.5
+    bats: Optional[str] = None
+    tools: List[str] = []
+    pos: Optional[str] = None
+
+class TradeSearchQuery(BaseModel):
+    team_a: str                                   # 우리 팀(점수는 A 관점 이득)
+    team_b: str
+    roster_a: List[TradeSearchPlayer] = []        # 비우면 trade_values.csv 에서 team 으로
+    roster_b: List[TradeSearchPlayer] = []
+    needs_a: List[str] = []
+    needs_b: List[str] = []
+    tolerance: float = 3_000_000.0
+    max_size: int = Field(3, ge=1, le=5)
+    max_count_diff: int = Field(1, ge=0, le=4)
+    top_k: int = Field(20, ge=1, le=500)
+    fit_weight: float = 1.0
+    surplus_weight: float = 0.5                   # $10M 당
+    must_give: List[str] = []
+    must_get: List[str] = []
+    untouchable_a: List[str] = []
+    untouchable_b: List[str] = []
+    time_budget_sec: float = Field(2.0, gt=0, le=30)
+
+class TradeSearchPackage(BaseModel):
+    gives: List[str]
+    gets: List[str]
+    give_value: float
+    get_value: float
+    delta: float              # get − give (A 관점)
+    fit_a: float              # A 가 받는 선수들의 A 니즈 충족도
+    fit_b: float
+    score: float
+
+class TradeSearchResponse(BaseModel):
+    team_a: str
+    team_b: str
+    packages: List[TradeSearchPackage]
+    stats: Dict[str, Any]
+    notes: List[str] = []
+
+def _trade_roster(team: str, partner: str, given: List[TradeSearchPlayer], partner_needs: List[str]) -> List[Tuple[str, float, float]]:
+    tv = _ts.load_table(_TRADE_VALUES_PATH)
+    fit_tbl = _ts.load_table(_TEAM_FIT_PATH)
+    base = _ts.roster_arrays(tv, fit_tbl, team, partner) if tv is not None and {"player", "team", "Surplus"} <= set(tv.columns) else None
+    known = {} if base is None else {str(r.player): (float(r.value), float(r.fit)) for r in base.itertuples()}
+    needs = [_norm_need(n) for n in partner_needs]
+    if not given:
+        return [(pid, v, f) for pid, (v, f) in known.items()]
+    out = []
+    for p in given:
+        v, f = known.get(p.player_id, (0.0, 0.5))
+        if p.value is not None:
+            v = float(p.value)
+        if p.fit is not None:
+            f = float(p.fit)
+        elif needs and (p.tools or p.bats or p.pos):
+            f = _team_fit_score(needs, TeamFitCandidate(player_id=p.player_id, bats=p.bats, tools=p.tools, pos=p.pos))[0]
+        out.append((p.player_id, v, f))
+    return out
+
+@router.post("/transactions/trade_search", response_model=TradeSearchResponse)
+async def trade_search(q: TradeSearchQuery):
+    ra = _trade_roster(q.team_a, q.team_b, q.roster_a, q.needs_b)
+    rb = _trade_roster(q.team_b, q.team_a, q.roster_b, q.needs_a)
+    if not ra or not rb:
+        return TradeSearchResponse(team_a=q.team_a, team_b=q.team_b, packages=[], stats={},
+                                   notes=[f"empty roster: {q.team_a if not ra else q.team_b}"])
+    ia = {pid: i for i, (pid, _, _) in enumerate(ra)}
+    ib = {pid: i for i, (pid, _, _) in enumerate(rb)}
+    kw = dict(tolerance=q.tolerance, max_size=q.max_size, max_count_diff=q.max_count_diff, top_k=q.top_k,
+              fit_weight=q.fit_weight, surplus_weight=q.surplus_weight,
+              a_required=[ia[p] for p in q.must_give if p in ia], b_required=[ib[p] for p in q.must_get if p in ib],
+              a_exclude=[ia[p] for p in q.untouchable_a if p in ia], b_exclude=[ib[p] for p in q.untouchable_b if p in ib],
+              time_budget_sec=q.time_budget_sec)
+    # 탐색은 최대 time_budget_sec(30초)까지 CPU 를 씀 → 스레드풀에서(이벤트 루프 막지 않게)
+    res = await run_in_threadpool(_ts.search, [v for _, v, _ in ra], [f for _, _, f in ra],
+                                  [v for _, v, _ in rb], [f for _, _, f in rb], **kw)
+    notes = [f"unknown player ignored: {p}" for p in q.must_give + q.untouchable_a if p not in ia]
+    notes += [f"unknown player ignored: {p}" for p in q.must_get + q.untouchable_b if p not in ib]
+    if res["truncated"]:
+        notes.append("time budget reached; larger package sizes not enumerated")
+    pk = [TradeSearchPackage(gives=[ra[i][0] for i in p["a_idx"]], gets=[rb[j][0] for j in p["b_idx"]],
+                             give_value=round(p["a_total"], 2), get_value=round(p["b_total"], 2),
+                             delta=round(p["delta"], 2), fit_a=round(p["fit_a"], 4), fit_b=round(p["fit_b"], 4),
+                             score=round(p["score"], 4)) for p in res["packages"]]
+    stats = {k: res[k] for k in ("subsets_a", "subsets_b", "truncated", "elapsed_sec")}
+    return TradeSearchResponse(team_a=q.team_a, team_b=q.team_b, packages=pk, stats=stats, notes=notes)
+
 # ===== #33 구장 파크팩터(데일리) =====
+try:
+    from tools.park_factors import get_park_factors, weather_adjust
+except Exception:
+    get_park_factors = None
+    def weather_adjust(run, hr, xbh, *_):
+        return run, hr, xbh
+
 class ParkFactorsResponse(BaseModel):
     park: str
     date: str
     run_factor: float    # R
     hr_factor: float     # HR
     xbh_factor: float    # 2B/3B 가중
+    season: Optional[int] = None
+    source: str = "park_factors"
 
 def _seed_from_str(s: str) -> int:
     return sum(ord(ch) for ch in (s or "")) % 10_000_019
 
 @router.get("/parks/daily_factors", response_model=ParkFactorsResponse)
 async def parks_daily_factors(park: str, date: str):
-    # 날짜 파싱 + 안정 난수로 일별 변동 (±3% 내외)
     try:
         d = datetime.strptime(date, "%Y-%m-%d").date()
     except Exception:
         # 잘못된 날짜는 오늘로 처리(스텁)
         d = datetime.utcnow().date()
+
+    # 실측: output/park_factors.csv (tools.park_factors 빌드 결과) 인메모리 조회
+    row = None
+    if get_park_factors is not None:
+        try:
+            row = get_park_factors().lookup(park, d.year)
+        except Exception:
+            row = None
+    if row is not None:
+        return ParkFactorsResponse(
+            park=park, date=d.isoformat(),
+            run_factor=round(float(row["run_factor"]), 3),
+            hr_factor=round(float(row["hr_factor"]), 3),
+            xbh_factor=round(float(row["xbh_factor"]), 3),
+            season=int(row["season"]), source="park_factors",
+        )
+
+    # 폴백: 안정 난수로 일별 변동 (±3% 내외)
     seed = (_seed_from_str(park) * 97 + d.toordinal() * 131) % 1_000_003
     # 안정 난수 0~1 세 개
     def rng(k: int) -> float:
@@ -1123,6 +1386,7 @@ async def parks_daily_factors(park: str, date: str):
         run_factor=round(float(base_run), 3),
         hr_factor=round(float(base_hr), 3),
         xbh_factor=round(float(base_xbh), 3),
+        source="stub_fallback",
     )
 
 # ========= Day10: #31 인-게임 레버리지 어시스트 / #32 심판 EUZ 편향(스텁) =========
@@ -1213,16 +1477,36 @@ async def leverage_assist(q: LeverageQuery):
         suggestions=suggestions
     )
 
-# ===== #32 심판 EUZ 편향(스텁) =====
+# ===== #32 심판 EUZ 편향 =====
+try:
+    from tools.ump_euz_index import get_euz_index
+except Exception:
+    get_euz_index = None
+
+def _euz_lookup(ump: Optional[str], season: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    # output/ump_euz/*.npz (tools.ump_euz_index 빌드 결과) 심판-시즌 셀 카운트 기반
+    if not ump or get_euz_index is None:
+        return None
+    try:
+        return get_euz_index().lookup(ump, season)
+    except Exception:
+        return None
+
 class UmpBiasResponse(BaseModel):
     ump: str
     zone_expand_pct: float   # 스트라이크 존 확장 비율(+면 넓음)
     low_strike_bias: float   # 낮은 코스 스트 주기(+면 낮은쪽 후함)
     edge_call_volatility: float  # 코너 콜 변동성(0~1)
+    n_called: int = 0
+    seasons: List[int] = []
+    source: str = "euz_index"
 
 @router.get("/ump/euz_bias", response_model=UmpBiasResponse)
-async def euz_bias(ump: str):
-    # 이름 해시로 안정 난수
+async def euz_bias(ump: str, season: Optional[int] = None):
+    m = _euz_lookup(ump, season)
+    if m is not None:
+        return UmpBiasResponse(ump=ump, **m, source="euz_index")
+    # 폴백: 이름 해시로 안정 난수
     seed = _seed_from_str(ump)
     zexp = 0.02 + (seed % 7) * 0.005         # 2% ~ 5.5%
     lowb = -0.01 + (seed % 9) * 0.004        # -1% ~ +3.2%
@@ -1232,6 +1516,7 @@ async def euz_bias(ump: str):
         zone_expand_pct=round(zexp, 3),
         low_strike_bias=round(lowb, 3),
         edge_call_volatility=round(vol, 3),
+        source="stub_fallback",
     )
 
 # ========= Day11: #34 원정 피로 / #30 라인업 최적화 =========
@@ -1247,7 +1532,28 @@ class FatigueResponse(BaseModel):
 
 @router.get("/travel/fatigue_index", response_model=FatigueResponse)
 async def travel_fatigue_index(team: str, date: str):
-    # team+date 기반 안정 난수
+    # 실측: 기준일 포함 직전 7일 창(이동거리/시차 → travel, 연전 → b2b, 휴식 부족 → rest)
+    try:
+        d = _parse_ymd(date)
+        w = _schedule_window(team, d - timedelta(days=6), d)
+    except ValueError:
+        w = None
+    if w is not None and w["games"] > 0:
+        rA = min(1.0, w["travel_km"] / 6000.0 + 0.1 * w["tz_shifts"])
+        rB = min(1.0, w["back_to_backs"] / 6.0)
+        rC = min(1.0, max(0.0, 2 - w["rest_days"]) / 2.0)
+        travel = round(35.0 * rA, 1)
+        b2b    = round(40.0 * (rB**1.2), 1)
+        rest   = round(30.0 * (rC**1.1), 1)
+        idx = round(_clamp(travel + b2b + rest, 0.0, 100.0), 1)
+        return FatigueResponse(
+            team=team, date=date, fatigue_index=idx,
+            components={"travel":travel, "back_to_back":b2b, "rest_deficit":rest,
+                        "travel_km":w["travel_km"], "tz_shifts":float(w["tz_shifts"]),
+                        "road_trip_len":float(w["road_trip_current"])}
+        )
+
+    # 폴백: team+date 기반 안정 난수
     seed = _seed_from(team, sum(ord(c) for c in (date or "")))
     rA = _stable_rng01(seed + 101)  # 이동거리/시차
     rB = _stable_rng01(seed + 211)  # 연전 길이
@@ -1511,8 +1817,6 @@ from pydantic import BaseModel
 from typing import Tuple, Dict, Optional, Any
 import os, time, json
 from datetime import datetime, timezone
-from urllib.request import Request, urlopen
-from urllib.error import URLError, HTTPError
 
 # --- 시크릿 키 상태: 값 노출 없이 "present/absent" 만 ---
 class SecretsStatus(BaseModel):
@@ -1546,35 +1850,31 @@ async def rate_limit_status():
     return RateStatus(counters=_RATE_COUNTERS)
 
 # --- 외부 페치 + 간단 캐시(in-mem) ---
+# 비동기 풀링 클라이언트(tools.async_fetch): 네임스페이스 동시성 제한 + 동일 URL 합치기 + stale-while-revalidate
+# 디스크 캐시(tools.http_cache, EXT_DISK_CACHE=0 으로 끔): 재시작 후에도 웜 캐시, 만료 시 조건부 요청
+from tools.async_fetch import AsyncFetcher
+
+def _ext_disk_cache():
+    if os.getenv("EXT_DISK_CACHE", "1") != "1":
+        return None
+    try:
+        from tools.http_cache import get_http_cache
+        return get_http_cache()
+    except Exception:
+        return None
+
 _EXT_CACHE: Dict[str, Dict[str, Any]] = {}
-def _ext_cache_key(url: str, headers: Optional[Dict[str,str]]) -> str:
-    h = json.dumps({"url":url, "headers": headers or {}}, sort_keys=True)
-    return h
+_EXT_FETCHER = AsyncFetcher(cache=_EXT_CACHE, on_result=lambda ns, ok: _rate_touch(ns, ok), disk=_ext_disk_cache())
 
-def _ext_fetch(url: str, headers: Optional[Dict[str,str]]=None, ttl_sec: int=300, ns: str="generic") -> Dict[str, Any]:
-    key = _ext_cache_key(url, headers)
-    now = time.time()
+async def _ext_fetch(url: str, headers: Optional[Dict[str,str]]=None, ttl_sec: int=300, ns: str="generic") -> Dict[str, Any]:
+    r = await _EXT_FETCHER.fetch(url, headers=headers, ttl_sec=ttl_sec, ns=ns)
+    note_cache(f"ext:{ns}", r.get("source", "unknown"))
+    return r
 
-    # 캐시 히트
-    ent = _EXT_CACHE.get(key)
-    if ent and (now - ent["t0"] < ttl_sec):
-        _rate_touch(ns, True)
-        return {"source":"cache", "cache_hit": True, "status": 200, "fetched_at": ent["t0"], "ttl": ttl_sec, "text": ent["text"]}
+async def _ext_shutdown():
+    await _EXT_FETCHER.aclose()
 
-    # 네트워크 시도
-    try:
-        req = Request(url, headers=headers or {})
-        with urlopen(req, timeout=10) as r:
-            text = r.read().decode("utf-8", errors="replace")
-            _EXT_CACHE[key] = {"t0": now, "text": text}
-            _rate_touch(ns, True)
-            return {"source":"network", "cache_hit": False, "status": getattr(r, "status", 200), "fetched_at": now, "ttl": ttl_sec, "text": text}
-    except (HTTPError, URLError) as e:
-        _rate_touch(ns, False)
-        # 네트워크 실패시 캐시 폴백
-        if ent:
-            return {"source":"cache_fallback", "cache_hit": True, "status": getattr(e, "code", 599), "error": str(e), "fetched_at": ent["t0"], "ttl": ttl_sec, "text": ent["text"]}
-        return {"source":"error", "cache_hit": False, "status": getattr(e, "code", 599), "error": str(e)}
+router.add_event_handler("shutdown", _ext_shutdown)
 
 # --- 셀프체크: 임의 URL 호출(헤더/TTL 선택) ---
 class ExtSelfcheckQuery(BaseModel):
@@ -1590,7 +1890,7 @@ class ExtSelfcheckResponse(BaseModel):
 
 @router.post("/ops/ext_selfcheck", response_model=ExtSelfcheckResponse)
 async def ext_selfcheck(q: ExtSelfcheckQuery):
-    r = _ext_fetch(q.url, headers=q.headers, ttl_sec=q.ttl_sec, ns=q.ns)
+    r = await _ext_fetch(q.url, headers=q.headers, ttl_sec=q.ttl_sec, ns=q.ns)
     ok = r.get("status", 599) < 500
     text = r.get("text","")
     preview = text[:300].replace("\n"," ") if isinstance(text, str) else str(text)[:300]
@@ -1666,7 +1966,7 @@ async def ext_mlb_schedule_live(team: str, date: str):
         return {"ok": False, "error": "unknown_team", "team": team}
 
     url = f"https://statsapi.mlb.com/api/v1/schedule?sportId=1&teamId={tid}&date={date}"
-    r = _ext_fetch(url, headers={"User-Agent":"cogm-assistant"}, ttl_sec=300, ns="mlb/schedule")
+    r = await _ext_fetch(url, headers={"User-Agent":"cogm-assistant"}, ttl_sec=300, ns="mlb/schedule")
     ok = r.get("status", 599) < 500 and isinstance(r.get("text"), str)
     try:
         raw = json.loads(r.get("text","")) if ok else {}
@@ -1713,7 +2013,7 @@ async def ext_mlb_boxscore_live(game_pk: int):
     StatsAPI: https://statsapi.mlb.com/api/v1/game/{gamePk}/boxscore
     """
     url = f"https://statsapi.mlb.com/api/v1/game/{game_pk}/boxscore"
-    r = _ext_fetch(url, headers={"User-Agent":"cogm-assistant"}, ttl_sec=600, ns="mlb/boxscore")
+    r = await _ext_fetch(url, headers={"User-Agent":"cogm-assistant"}, ttl_sec=600, ns="mlb/boxscore")
     ok = r.get("status", 599) < 500 and isinstance(r.get("text"), str)
     try:
         raw = json.loads(r.get("text","")) if ok else {}
@@ -1753,6 +2053,7 @@ from pydantic import BaseModel
 from typing import Tuple, List, Dict, Any, Optional
 import xml.etree.ElementTree as ET
 from datetime import datetime, timezone
+import io, re, asyncio
 
 _NEWS_REGISTRY: Dict[str, List[str]] = {}  # team -> feeds[]
 
@@ -1788,82 +2089,102 @@ class NewsDigestLiveResponse(BaseModel):
     items: List[NewsItem]
     meta: Dict[str, Any]
 
-def _rss_items_parse(text: str, src: str, limit: int = 5) -> List[Dict[str, Any]]:
-    out: List[Dict[str, Any]] = []
+_ATOM = "{http://www.w3.org/2005/Atom}"
+NEWS_DEADLINE_MS = int(os.getenv("NEWS_DEADLINE_MS", "3000"))
+
+def _rss_pub_iso(pub: str) -> Optional[str]:
+    # RFC822 → ISO8601 시도 (예: Tue, 24 Sep 2024 18:10:00 GMT)
     try:
-        root = ET.fromstring(text)
+        return datetime.strptime(pub[:25], "%a, %d %b %Y %H:%M:%S").replace(tzinfo=timezone.utc).isoformat()
     except Exception:
+        return None
+
+def _rss_items_parse(text: str, src: str, limit: int = 5) -> List[Dict[str, Any]]:
+    # iterparse 증분 파싱: RSS item / Atom entry 가 limit 개 모이면 즉시 중단(나머지 문서는 읽지 않음)
+    out: List[Dict[str, Any]] = []
+    if not text:
         return out
-    # RSS 2.0: channel/item
-    chan = root.find("channel")
-    nodes = (chan.findall("item") if chan is not None else []) or root.findall(".//item")
-    for it in nodes[: limit * 2]:
-        title = (it.findtext("title") or "").strip()
-        link  = (it.findtext("link") or "").strip()
-        pub   = (it.findtext("pubDate") or "").strip()
-        # RFC822 → ISO8601 시도
-        iso = None
-        if pub:
-            try:
-                # 예: Tue, 24 Sep 2024 18:10:00 GMT
-                iso = datetime.strptime(pub[:25], "%a, %d %b %Y %H:%M:%S").replace(tzinfo=timezone.utc).isoformat()
-            except Exception:
-                iso = None
-        if title:
-            out.append({"src": src, "title": title, "link": link or None, "published": iso})
-        if len(out) >= limit:
-            break
-    # Atom: entry
-    if not out:
-        entries = root.findall(".//{http://www.w3.org/2005/Atom}entry")
-        for e in entries[:limit]:
-            title = (e.findtext("{http://www.w3.org/2005/Atom}title") or "").strip()
-            link_el = e.find("{http://www.w3.org/2005/Atom}link")
-            href = link_el.get("href") if link_el is not None else None
-            pub = (e.findtext("{http://www.w3.org/2005/Atom}updated") or "").strip() or \
-                  (e.findtext("{http://www.w3.org/2005/Atom}published") or "").strip()
-            if title:
-                out.append({"src": src, "title": title, "link": href, "published": pub or None})
+    try:
+        for _ev, el in ET.iterparse(io.BytesIO(text.encode("utf-8")), events=("end",)):
+            if el.tag == "item":
+                title = (el.findtext("title") or "").strip()
+                link  = (el.findtext("link") or "").strip()
+                pub   = (el.findtext("pubDate") or "").strip()
+                if title:
+                    out.append({"src": src, "title": title, "link": link or None, "published": _rss_pub_iso(pub) if pub else None})
+                el.clear()
+            elif el.tag == _ATOM + "entry":
+                title = (el.findtext(_ATOM + "title") or "").strip()
+                link_el = el.find(_ATOM + "link")
+                href = link_el.get("href") if link_el is not None else None
+                pub = (el.findtext(_ATOM + "updated") or "").strip() or (el.findtext(_ATOM + "published") or "").strip()
+                if title:
+                    out.append({"src": src, "title": title, "link": href, "published": pub or None})
+                el.clear()
+            if len(out) >= limit:
+                break
+    except ET.ParseError:
+        pass  # 잘린/깨진 피드: 그때까지 읽은 항목만 사용
     return out[:limit]
 
+def _news_dedup_key(title: str, link: Optional[str]) -> Tuple[str, str]:
+    # 제목: 소문자 + 영숫자/한글만, 링크: 스킴/쿼리/프래그먼트/끝 슬래시 제거
+    t = re.sub(r"[^0-9a-z가-힣]+", " ", (title or "").lower()).strip()
+    l = re.sub(r"^https?://(www\.)?", "", (link or "").split("#")[0].split("?")[0]).rstrip("/").lower()
+    return t, l
+
 @router.get("/intel/news_digest_live", response_model=NewsDigestLiveResponse)
-async def news_digest_live(team: str, limit: int = 5):
+async def news_digest_live(team: str, limit: int = 5, deadline_ms: int = NEWS_DEADLINE_MS):
     feeds = _NEWS_REGISTRY.get(team, [])
+    t0 = time.perf_counter()
+    # 피드 동시 요청 + 요청 단위 데드라인(초과분은 건너뛰고 부분 결과 반환; 백그라운드 페치는 캐시를 채움)
+    tasks = {asyncio.ensure_future(_ext_fetch(u, headers={"User-Agent":"cogm-assistant"}, ttl_sec=600, ns="news/rss")): u for u in feeds}
+    done, pending = (await asyncio.wait(tasks, timeout=max(0.0, deadline_ms / 1000.0))) if tasks else (set(), set())
+    for t in pending:
+        t.cancel()
     items: List[NewsItem] = []
     metas: List[Dict[str, Any]] = []
-    for u in feeds:
-        r = _ext_fetch(u, headers={"User-Agent":"cogm-assistant"}, ttl_sec=600, ns="news/rss")
-        metas.append({k:v for k,v in r.items() if k!="text"})
-        txt = r.get("text") or ""
-        for it in _rss_items_parse(txt, u, limit=limit):
+    for t, u in tasks.items():
+        if t not in done:
+            metas.append({"feed": u, "source": "timeout"})
+            continue
+        r = t.result()
+        metas.append({"feed": u} | {k:v for k,v in r.items() if k!="text"})
+        for it in _rss_items_parse(r.get("text") or "", u, limit=limit):
             items.append(NewsItem(**it))
-    # 간단 정렬: published(ISO) 내림차순 → title
+    # 간단 정렬: published(ISO) 내림차순 → title, 이후 제목/링크 기준 중복 제거(최신 1건 유지)
     def _key(x: NewsItem):
         return (x.published or "", x.title)
     items.sort(key=_key, reverse=True)
-    return NewsDigestLiveResponse(team=team, feeds=feeds, items=items[:limit], meta={"feeds_count": len(feeds), "calls": len(metas)})
+    seen_t, seen_l, uniq = set(), set(), []
+    for it in items:
+        kt, kl = _news_dedup_key(it.title, it.link)
+        if (kt and kt in seen_t) or (kl and kl in seen_l):
+            continue
+        seen_t.add(kt); seen_l.add(kl); uniq.append(it)
+    timed_out = [m["feed"] for m in metas if m.get("source") == "timeout"]
+    return NewsDigestLiveResponse(team=team, feeds=feeds, items=uniq[:limit], meta={
+        "feeds_count": len(feeds), "calls": len(metas), "partial": bool(timed_out), "timed_out": timed_out,
+        "duplicates_dropped": len(items) - len(uniq), "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1),
+        "feeds_meta": metas,
+    })
 
 # ========= Day19: 날씨 연동 → 파크팩터/승률 반영 =========
 from pydantic import BaseModel
 from typing import Tuple, Optional, Dict, Any
 from datetime import datetime, date
 
-# 간단 구장 좌표(확장 가능; 미지정 파크는 lat/lon 쿼리로 대체)
-_PARK_LATLON = {
-    "LAD": (34.0739, -118.2400),  # Dodger Stadium (approx)
-    "SF":  (37.7786, -122.3893),  # Oracle Park
-    "SEA": (47.5914, -122.3325),  # T-Mobile Park
-    "NYY": (40.8296,  -73.9262),  # Yankee Stadium
-    "BOS": (42.3467,  -71.0972),  # Fenway
-}
+# 구장 좌표: tools.venue_registry(전 구장/연도별 이력; 미등록 파크는 lat/lon 쿼리로 대체)
+try:
+    from tools.venue_registry import latlon as _venue_latlon
+except Exception:
+    _venue_latlon = None
 
-def _resolve_latlon(park: Optional[str], lat: Optional[float], lon: Optional[float]):
+def _resolve_latlon(park: Optional[str], lat: Optional[float], lon: Optional[float], year: Optional[int] = None):
     if lat is not None and lon is not None:
         return float(lat), float(lon)
-    if park:
-        t = (park or "").upper()
-        if t in _PARK_LATLON:
-            return _PARK_LATLON[t]
+    if park and _venue_latlon is not None:
+        return _venue_latlon(park, year)
     return None, None
 
 # ===== 19-1) 날씨 LIVE =====
@@ -1883,7 +2204,11 @@ async def weather_game(park: Optional[str] = None, date: str = "", lat: Optional
     Open-Meteo (무료, 키 불필요)에서 일자별 시간대 데이터 수집 후 일 평균 요약
     https://api.open-meteo.com/v1/forecast?latitude=...&longitude=...&hourly=temperature_2m,precipitation_probability,wind_speed_10m&start_date=YYYY-MM-DD&end_date=YYYY-MM-DD
     """
-    la, lo = _resolve_latlon(park, lat, lon)
+    try:
+        year = int((date or "")[:4]) if date else None
+    except ValueError:
+        year = None
+    la, lo = _resolve_latlon(park, lat, lon, year)
     if la is None or lo is None:
         return WeatherResponse(
             park=park, date=date or datetime.utcnow().date().isoformat(),
@@ -1900,7 +2225,7 @@ async def weather_game(park: Optional[str] = None, date: str = "", lat: Optional
         f"&start_date={d}&end_date={d}"
         "&timezone=UTC"
     )
-    r = _ext_fetch(url, headers={"User-Agent":"cogm-assistant"}, ttl_sec=3600, ns="weather")
+    r = await _ext_fetch(url, headers={"User-Agent":"cogm-assistant"}, ttl_sec=3600, ns="weather")
     ok = r.get("status", 599) < 500 and isinstance(r.get("text"), str)
     temp, wind, pprob = 20.0, 3.0, 10.0
     try:
@@ -1946,17 +2271,8 @@ async def parks_daily_factors_live(park: str, date: str):
     wind = W.wind_speed_avg
     rain = W.precip_prob_avg
 
-    # 간단 효과: 온도↑ → R/HR 소폭↑, 강풍↑ → HR↑, 강수↑ → R/HR↓
-    run = base.run_factor
-    hr  = base.hr_factor
-    xbh = base.xbh_factor
-
-    run *= (1.0 + 0.002 * (temp - 20.0))          # +0.2% per +1C
-    hr  *= (1.0 + 0.003 * max(0.0, wind - 2.0))   # +0.3% per wind>2m/s
-    damp = max(0.0, (rain - 20.0) * 0.004)        # rain>20% → 감소
-    run *= (1.0 - damp)
-    hr  *= (1.0 - damp * 0.6)
-    xbh *= (1.0 - damp * 0.3)
+    # 간단 효과: 온도↑ → R/HR 소폭↑, 강풍↑ → HR↑, 강수↑ → R/HR↓ (tools.park_factors.weather_adjust)
+    run, hr, xbh = weather_adjust(base.run_factor, base.hr_factor, base.xbh_factor, temp, wind, rain)
 
     return ParkFactorsLiveResponse(
         park=park, date=date,
@@ -1964,7 +2280,7 @@ async def parks_daily_factors_live(park: str, date: str):
         hr_factor=round(float(hr), 3),
         xbh_factor=round(float(xbh), 3),
         weather_used={"temp_c": temp, "wind_speed": wind, "precip_prob": rain},
-        meta={"weather_ok": W.meta.get("ok", False)}
+        meta={"weather_ok": W.meta.get("ok", False), "base_source": base.source, "base_season": base.season}
     )
 
 # ===== 19-3) 승률 예측(날씨 반영 버전) =====
@@ -2021,7 +2337,7 @@ async def umpire_assignment(game_pk: int):
     officials[].official.fullName
     """
     url = f"https://statsapi.mlb.com/api/v1/game/{game_pk}/feed/live"
-    r = _ext_fetch(url, headers={"User-Agent":"cogm-assistant"}, ttl_sec=900, ns="mlb/feedlive")
+    r = await _ext_fetch(url, headers={"User-Agent":"cogm-assistant"}, ttl_sec=900, ns="mlb/feedlive")
     ok = r.get("status", 599) < 500 and isinstance(r.get("text"), str)
     plate: Optional[str] = None
     bases: List[str] = []
@@ -2065,6 +2381,9 @@ class UmpBiasLive(BaseModel):
     meta: Dict[str, Any]
 
 def _bias_from_name(ump: Optional[str]) -> Dict[str, float]:
+    m = _euz_lookup(ump)
+    if m is not None:
+        return {k: m[k] for k in ("zone_expand_pct", "low_strike_bias", "edge_call_volatility")}
     if not ump:
         # 이름이 없으면 보수적 중립값
         return {"zone_expand_pct": 0.02, "low_strike_bias": 0.0, "edge_call_volatility": 0.5}
@@ -2085,7 +2404,7 @@ async def euz_bias_live(game_pk: int):
         zone_expand_pct=bias["zone_expand_pct"],
         low_strike_bias=bias["low_strike_bias"],
         edge_call_volatility=bias["edge_call_volatility"],
-        meta=ua.meta
+        meta=ua.meta | {"euz_source": "euz_index" if _euz_lookup(ua.plate) is not None else "stub_fallback"}
     )
 
 # ========= Day21: KBO/NPB 1차 카드 + 리그 간 보정 브리지 =========
@@ -2124,7 +2443,7 @@ async def kbo_player_card(pid: str, season: Optional[int] = None, url: Optional[
 
     # 1) 라이브 시도(선택 URL 제공 시)
     if url:
-        r = _ext_fetch(url, headers={"User-Agent":"cogm-assistant"}, ttl_sec=1800, ns="kbo/card")
+        r = await _ext_fetch(url, headers={"User-Agent":"cogm-assistant"}, ttl_sec=1800, ns="kbo/card")
         meta = {k:v for k,v in r.items() if k!="text"}
         txt = r.get("text") or ""
         hints = _parse_hint_from_text(txt)
@@ -2149,7 +2468,7 @@ async def npb_player_card(pid: str, season: Optional[int] = None, url: Optional[
     name = None
 
     if url:
-        r = _ext_fetch(url, headers={"User-Agent":"cogm-assistant"}, ttl_sec=1800, ns="npb/card")
+        r = await _ext_fetch(url, headers={"User-Agent":"cogm-assistant"}, ttl_sec=1800, ns="npb/card")
         meta = {k:v for k,v in r.items() if k!="text"}
         txt = r.get("text") or ""
         hints = _parse_hint_from_text(txt)
@@ -2282,10 +2601,12 @@ class MockDraftResponse(BaseModel):
     pick_no: int
     ranked: List[MockDraftChoice]
 
+# Hit/Power 가중 상향, Field/Run 서브, Arm 보조
+_TOOL_WEIGHTS = {"Hit":0.32,"Power":0.28,"Run":0.14,"Field":0.18,"Arm":0.08}
+
 def _tool_score(tools: Dict[str, float]) -> float:
     if not tools: return 40.0
-    # Hit/Power 가중 상향, Field/Run 서브, Arm 보조
-    w = {"Hit":0.32,"Power":0.28,"Run":0.14,"Field":0.18,"Arm":0.08}
+    w = _TOOL_WEIGHTS
     return sum((tools.get(k,40.0))*w[k] for k in w)
 
 @router.post("/draft/mock", response_model=MockDraftResponse)
@@ -2308,6 +2629,91 @@ async def mock_draft(q: MockDraftQuery):
     ranked.sort(key=lambda x: x.score, reverse=True)
     return MockDraftResponse(team=q.team, pick_no=q.pick_no, ranked=ranked[:10])
 
+# ---------- 멀티팀 모의 드래프트 시뮬레이션(tools/draft_sim) ----------
+import numpy as np
+from tools import draft_sim as _draft
+
+class DraftTeam(BaseModel):
+    team: str
+    needs: TeamNeeds = TeamNeeds()
+
+class DraftSimQuery(BaseModel):
+    team: str                                            # 우리 팀
+    order: List[DraftTeam] = Field(..., min_length=2, max_length=40)   # 1라운드 지명 순서
+    candidates: List[DraftCandidate] = Field(..., min_length=1, max_length=3000)
+    rounds: int = Field(2, ge=1, le=20)
+    snake: bool = False                                  # MLB 는 고정 순서
+    sims: int = Field(2000, ge=100, le=20_000)
+    team_sd: float = Field(3.0, ge=0.0)                  # 팀별 선호 잡음(점수 단위)
+    board_sd: float = Field(2.0, ge=0.0)                 # 보드 공통 잡음
+    taken: List[str] = []                                # 이미 지명된 후보(드래프트 당일)
+    current_pick: int = Field(1, ge=1)
+    seed: Optional[int] = 0
+    top_n: int = Field(15, ge=1, le=200)
+
+class DraftSimRow(BaseModel):
+    player_id: str
+    pos: str
+    board_score: float
+    prob_available: float
+    prob_pick: float                                     # 우리 보드대로 이 픽에서 지명할 확률
+
+class DraftSimPick(BaseModel):
+    pick_no: int
+    round: int
+    candidates: List[DraftSimRow]
+
+class DraftSimResponse(BaseModel):
+    team: str
+    sims: int
+    picks: List[DraftSimPick]
+    notes: List[str] = []
+
+def _draft_bonus(needs: TeamNeeds, cands: List[DraftCandidate], hand: np.ndarray) -> np.ndarray:
+    # mock_draft 와 같은 가점(손잡이 +2, 선호 툴 (툴-50)/10) — 포지션 니즈 +5 는 시뮬레이터가 처리
+    b = np.zeros(len(cands))
+    if needs.prefer_hand:
+        b += 2.0 * (hand == needs.prefer_hand.upper())
+    pt = needs.prefer_tool
+    if pt:
+        b += np.array([(c.tools[pt] - 50.0) / 10.0 if pt in c.tools else 0.0 for c in cands])
+    return b
+
+@router.post("/draft/simulate", response_model=DraftSimResponse)
+async def draft_simulate(q: DraftSimQuery):
+    names = [t.team for t in q.order]
+    if q.team not in names:
+        return DraftSimResponse(team=q.team, sims=0, picks=[], notes=[f"team not in order: {q.team}"])
+    cands = q.candidates
+    keys = list(_TOOL_WEIGHTS)
+    tm = np.array([[c.tools.get(k, 40.0) if c.tools else 40.0 for k in keys] for c in cands])
+    base = _draft.board_scores(tm, [_TOOL_WEIGHTS[k] for k in keys])
+    pos = [c.pos.upper() for c in cands]
+    pos_names = sorted(set(pos))
+    pos_idx = np.array([pos_names.index(p) for p in pos])
+    hand = np.array([(c.hand or "").upper() for c in cands])
+    need = np.zeros((len(names), len(pos_names)), dtype=bool)
+    bonus = np.zeros((len(names), len(cands)))
+    for i, t in enumerate(q.order):
+        for p in t.needs.need_pos:
+            if p.upper() in pos_names:
+                need[i, pos_names.index(p.upper())] = True
+        bonus[i] = _draft_bonus(t.needs, cands, hand)
+    ids = {c.player_id: i for i, c in enumerate(cands)}
+    order = [names.index(t) for t in _draft.pick_order(names, q.rounds, q.snake)]
+    res = _draft.simulate(base, bonus, pos_idx, need, 5.0, order, names.index(q.team), sims=q.sims,
+                          team_sd=q.team_sd, board_sd=q.board_sd, taken=[ids[p] for p in q.taken if p in ids],
+                          start_pick=q.current_pick, seed=q.seed)
+    notes = [f"unknown taken ignored: {p}" for p in q.taken if p not in ids]
+    picks = []
+    for k, pick_no in enumerate(res["our_picks"]):
+        av, ch = res["available"][k], res["chosen"][k]
+        top = np.argsort(-(ch * 1e6 + av * 1e3 + base), kind="stable")[: q.top_n]   # 지명 확률 → 생존 확률 → 보드 순
+        picks.append(DraftSimPick(pick_no=int(pick_no), round=(int(pick_no) - 1) // len(names) + 1, candidates=[
+            DraftSimRow(player_id=cands[i].player_id, pos=pos[i], board_score=round(float(base[i]), 1),
+                        prob_available=round(float(av[i]), 4), prob_pick=round(float(ch[i]), 4)) for i in top]))
+    return DraftSimResponse(team=q.team, sims=q.sims, picks=picks, notes=notes)
+
 # ---------- #C 미래 WAR 간이 추정(스텁) ----------
 class FutureWarQuery(BaseModel):
     level: str
@@ -2463,36 +2869,30 @@ class ContractCompareResponse(BaseModel):
     ranking_by_npv_surplus: List[str]
 
 def _npv(vals: List[float], r: float) -> float:
-    v = 0.0
-    for i, x in enumerate(vals, start=1):
-        v += x / ((1+r)**(i-1))
-    return round(v, 2)
+    # 주의: 이 정의가 위 Day4 _npv 를 덮어씀(첫 해 무할인) — multi_year_payroll 도 이 규칙으로 계산됨
+    return round(_ce.npv(vals, r, start=0), 2)
 
 @router.post("/contracts/compare", response_model=ContractCompareResponse)
 async def contracts_compare(q: ContractCompareQuery):
     out: List[ContractEval] = []
-    for it in q.items:
-        rows = []
-        salary_series, value_series = [], []
-        war_sum = 0.0
-        for cy in it.contract:
-            value = cy.proj_war * q.dollar_per_war
-            surplus = value - cy.salary
-            rows.append({
+    # 전체 계약을 (계약 × 연도) 행렬로 한 번에 평가
+    sal, mask = _ce.to_matrix([[cy.salary for cy in it.contract] for it in q.items])
+    war, _ = _ce.to_matrix([[cy.proj_war for cy in it.contract] for it in q.items])
+    ev = _ce.evaluate(sal, war, dpw=q.dollar_per_war, rate=q.discount_rate, start=0, mask=mask)
+    for k, it in enumerate(q.items):
+        rows = [{
                 "year": cy.year,
                 "salary": float(cy.salary),
                 "proj_war": float(cy.proj_war),
-                "value": round(value, 2),
-                "surplus": round(surplus, 2),
-            })
-            salary_series.append(float(cy.salary))
-            value_series.append(float(value))
-            war_sum += float(cy.proj_war)
-        tot_salary  = round(sum(salary_series), 2)
-        tot_value   = round(sum(value_series), 2)
+                "value": round(float(ev["value"][k, j]), 2),
+                "surplus": round(float(ev["surplus"][k, j]), 2),
+            } for j, cy in enumerate(it.contract)]
+        war_sum = float(ev["war_total"][k])
+        tot_salary  = round(float(ev["salary_total"][k]), 2)
+        tot_value   = round(float(ev["value_total"][k]), 2)
         tot_surplus = round(tot_value - tot_salary, 2)
-        npv_salary  = _npv(salary_series, q.discount_rate)
-        npv_value   = _npv(value_series, q.discount_rate)
+        npv_salary  = round(float(ev["npv_salary"][k]), 2)
+        npv_value   = round(float(ev["npv_value"][k]), 2)
         npv_surplus = round(npv_value - npv_salary, 2)
         roi = round((tot_value / tot_salary) if tot_salary > 0 else 0.0, 3)
         dpw_real = round(tot_salary / max(1e-9, war_sum), 2)
@@ -2564,9 +2964,9 @@ async def cba_qa(q: CbaQAQuery):
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 
-# 인메모리 저장소 (실운영은 Redis/DB로 교체)
-_WATCHLIST: Dict[str, List[str]] = {}           # team -> [player_id]
-_ALERT_RULES: Dict[str, List[Dict[str, Any]]] = {}  # team -> [{metric, op, threshold}...]
+# 저장소: tools/state_store(SQLite WAL, COGM_STATE_DB) — 워커 간 공유, 재시작 후 유지
+from tools.state_store import get_state_store
+_STATE = get_state_store()
 
 class WatchlistUpsert(BaseModel):
     team: str
@@ -2578,23 +2978,19 @@ class WatchlistResp(BaseModel):
 
 @router.post("/ops/watchlist/set", response_model=WatchlistResp)
 async def watchlist_set(q: WatchlistUpsert):
-    _WATCHLIST[q.team] = list(dict.fromkeys(q.player_ids))
-    return WatchlistResp(team=q.team, players=_WATCHLIST[q.team])
+    return WatchlistResp(team=q.team, players=_STATE.watchlist_set(q.team, q.player_ids))
 
 @router.post("/ops/watchlist/add", response_model=WatchlistResp)
 async def watchlist_add(q: WatchlistUpsert):
-    cur = _WATCHLIST.setdefault(q.team, [])
-    for pid in q.player_ids:
-        if pid not in cur: cur.append(pid)
-    return WatchlistResp(team=q.team, players=cur)
+    return WatchlistResp(team=q.team, players=_STATE.watchlist_add(q.team, q.player_ids))
 
 @router.get("/ops/watchlist/get", response_model=WatchlistResp)
 async def watchlist_get(team: str):
-    return WatchlistResp(team=team, players=_WATCHLIST.get(team, []))
+    return WatchlistResp(team=team, players=_STATE.watchlist(team))
 
 # ----- 알람 규칙 -----
 class AlertRule(BaseModel):
-    metric: str           # e.g., "OPS_plus", "ERA_plus", "injury_flag"
+    metric: str           # 피드 열(e.g., "wrc_plus", "era", "injury_flag") — 스텁 "OPS_plus"/"ERA_plus" 는 피드 없을 때만
     op: str               # "gt" | "lt" | "eq"
     threshold: float = 0.0
 
@@ -2607,6 +3003,8 @@ class AlertEvalReq(BaseModel):
     season: int = 2025
     # 간단 테스트용: 임의 지표를 직접 주입(실전: 실데이터 fetch)
     metrics_overrides: Dict[str, Dict[str, float]] = Field(default_factory=dict)  # pid -> {metric: value}
+    full: bool = False                  # True: 커서 무시하고 워치리스트 전체 재평가
+    cooldown_sec: float = 86400.0       # 같은 (선수, 규칙) 알람 재발화 최소 간격
 
 class AlertHit(BaseModel):
     player_id: str
@@ -2619,43 +3017,75 @@ class AlertEvalResp(BaseModel):
     team: str
     hits: List[AlertHit]
     evaluated: int
+    mode: str = "stub"                  # overrides | full | incremental | stub
+    suppressed: int = 0                 # 쿨다운으로 억제된 발화 수
+    version: int = 0                    # 평가에 쓴 지표 피드 버전
 
 @router.post("/ops/alerts/set_rules", response_model=Dict[str, Any])
 async def alerts_set_rules(q: AlertUpsert):
-    _ALERT_RULES[q.team] = [r.model_dump() for r in q.rules]
-    return {"team": q.team, "rules": _ALERT_RULES[q.team], "ok": True}
+    rules = [r.model_dump() for r in q.rules]
+    # 피드 모드(피드 버전 있음 또는 소스 파일 존재)에서는 스텁 전용 지표가 영원히 발화하지 않으므로 거부
+    bad = _ae.stub_only(rules)
+    if bad and (_STATE.metrics_version() or _ae.sources_present()):
+        return JSONResponse(status_code=400, content={
+            "error": "metric_not_in_feed", "metrics": bad,
+            "hint": {m: _ae.STUB_METRICS[m] for m in dict.fromkeys(bad)}})
+    rules = _STATE.alert_rules_set(q.team, rules)
+    return {"team": q.team, "rules": rules, "ok": True}
+
+# 지표 소스: tools/alert_engine 변경 피드(파이프라인 단계 alert_metrics 가 publish).
+# 피드가 비어 있고 소스 파일이 있으면 백그라운드로 1회 publish(요청은 기다리지 않음) — 그동안은 예전 스텁 지표.
+import threading
+from fastapi import BackgroundTasks
+from tools import alert_engine as _ae
+
+_ALERT_PUBLISH_LOCK = threading.Lock()
+
+def _alert_publish_bg() -> None:
+    if not _ALERT_PUBLISH_LOCK.acquire(blocking=False):
+        return                                      # 다른 요청이 이미 publish 중
+    try:
+        if not _STATE.metrics_version():
+            _ae.publish_from(None, _STATE)
+    except Exception as e:
+        print(f"[alerts] metric feed publish failed: {type(e).__name__}: {e}")
+    finally:
+        _ALERT_PUBLISH_LOCK.release()
 
-def _op_ok(op: str, v: float, t: float) -> bool:
-    if op == "gt": return v > t
-    if op == "lt": return v < t
-    if op == "eq": return abs(v - t) < 1e-9
+def _alert_feed_ready(background: Optional[BackgroundTasks] = None) -> bool:
+    if _STATE.metrics_version():
+        return True
+    if background is not None and not _ALERT_PUBLISH_LOCK.locked() and _ae.sources_present():
+        background.add_task(_alert_publish_bg)
     return False
 
+def _alert_stub_metrics(team: str, pid: str, season: int) -> Dict[str, float]:
+    # 스텁 생성: 우리 시스템의 결정론 난수 기반
+    s = _seed_from_str(f"alert:{team}:{pid}:{season}")
+    # 타자 가정: OPS+ 80~150, 투수 ERA+ 80~140
+    return {
+        "OPS_plus": round(80 + 70 * _stable_rng01(s+1), 1),
+        "ERA_plus": round(80 + 60 * _stable_rng01(s+2), 1),
+        "injury_flag": 1.0 if _stable_rng01(s+3) > 0.92 else 0.0
+    }
+
 @router.post("/ops/alerts/evaluate", response_model=AlertEvalResp)
-async def alerts_evaluate(q: AlertEvalReq):
+async def alerts_evaluate(q: AlertEvalReq, background: BackgroundTasks):
     team = q.team
-    pids = _WATCHLIST.get(team, [])
-    rules = _ALERT_RULES.get(team, [])
-    hits: List[AlertHit] = []
-    for pid in pids:
-        # 1) 메트릭 소스: overrides > 간단 생성값(스텁) > 0.0
-        src = q.metrics_overrides.get(pid) or {}
-        # 스텁 생성: 우리 시스템의 결정론 난수 기반
-        if not src:
-            s = _seed_from_str(f"alert:{team}:{pid}:{q.season}")
-            # 타자 가정: OPS+ 80~150, 투수 ERA+ 80~140
-            src = {
-                "OPS_plus": round(80 + 70 * _stable_rng01(s+1), 1),
-                "ERA_plus": round(80 + 60 * _stable_rng01(s+2), 1),
-                "injury_flag": 1.0 if _stable_rng01(s+3) > 0.92 else 0.0
-            }
-        # 2) 규칙 평가
-        for r in rules:
-            m = r["metric"]; op = r["op"]; th = float(r["threshold"])
-            v = float(src.get(m, 0.0))
-            if _op_ok(op, v, th):
-                hits.append(AlertHit(player_id=pid, metric=m, op=op, value=v, threshold=th))
-    return AlertEvalResp(team=team, hits=hits, evaluated=len(pids))
+    pids = _STATE.watchlist(team)
+    rules = _STATE.alert_rules(team)
+    if not q.metrics_overrides and _alert_feed_ready(background):
+        res = _ae.evaluate(_STATE, team, rules, pids, full=q.full, cooldown_sec=q.cooldown_sec)
+        return AlertEvalResp(team=team, hits=[AlertHit(**{k: h[k] for k in AlertHit.model_fields}) for h in res["hits"]],
+                             evaluated=res["evaluated"], mode=res["mode"], suppressed=res["suppressed"],
+                             version=res["version"])
+    # 예전 경로: overrides > 스텁 지표, 없는 지표는 0.0 (커서/쿨다운 없음)
+    src = {pid: (q.metrics_overrides.get(pid) or _alert_stub_metrics(team, pid, q.season)) for pid in pids}
+    compiled = _ae.compile_rules(rules, aliases={})
+    hit, V = _ae.evaluate_matrix(src, compiled, pids, fill=0.0)
+    hits = [AlertHit(**{k: h[k] for k in AlertHit.model_fields}) for h in _ae.hits_list(pids, compiled, hit, V)]
+    return AlertEvalResp(team=team, hits=hits, evaluated=len(pids),
+                         mode="overrides" if q.metrics_overrides else "stub")
 
 # ========= Day26: 멀티시즌 시나리오 플래너(베이스) =========
 from pydantic import BaseModel, Field
@@ -2697,10 +3127,7 @@ class ScenarioEval(BaseModel):
     notes: List[str] = []
 
 def _npv_series_generic(vals: List[float], r: float) -> float:
-    v = 0.0
-    for i, x in enumerate(vals, start=0):  # t0 현재
-        v += x / ((1+r)**i)
-    return round(v, 2)
+    return round(_ce.npv(vals, r, start=0), 2)  # t0 현재
 
 @router.post("/ops/scenario/plan", response_model=ScenarioEval)
 async def scenario_plan(q: ScenarioPlanQuery):
@@ -2753,12 +3180,109 @@ async def scenario_plan(q: ScenarioPlanQuery):
     }
     return ScenarioEval(team=q.team, years=results, totals=totals, notes=notes)
 
+# ----- 후보 무브 풀 → 승수 vs 페이롤 파레토 프런티어(tools/scenario_search) -----
+import numpy as np
+from tools import scenario_search as _ss
+from tools.cbt import thresholds as _cbt_thresholds
+
+class ScenarioCandidate(ScenarioChange):
+    kind: str = "sign"                     # sign|trade|non_tender|release …(표시용)
+    roster_delta: int = 0                  # 로스터 슬롯 순증(영입 +1, 논텐더 -1, 2:1 트레이드 -1 …)
+    group: Optional[str] = None            # 같은 그룹은 최대 1개(같은 선수의 대안 오퍼 등)
+    required: bool = False                 # 반드시 포함(이미 확정된 무브)
+
+class ScenarioOptimizeQuery(BaseModel):
+    team: str
+    horizon_start: int = 2025
+    horizon_years: int = Field(3, ge=1, le=10)
+    base_wins: Dict[int, float] = Field(default_factory=dict)
+    base_payroll: Dict[int, float] = Field(default_factory=dict)
+    candidates: List[ScenarioCandidate] = Field(..., min_length=1, max_length=200)
+    budget_cap: Optional[float] = None                          # 모든 연도 공통 상한
+    budget_caps: Dict[int, float] = Field(default_factory=dict) # 연도별 상한(공통 상한보다 우선)
+    cbt_mode: str = Field("tax", pattern="^(tax|hard|ignore)$") # tax: 추가 세금을 비용에 포함 / hard: 기준선 초과 금지
+    cbt_thresholds: Dict[int, float] = Field(default_factory=dict)  # 비우면 tools/cbt 테이블
+    prior_tax_years: Optional[int] = None  # 첫 연도 직전까지 연속 초과 연수(None = 파이프라인 이력에서) — payroll_sim 과 같음
+    roster_open_slots: Optional[int] = None
+    discount_rate: float = 0.08
+    max_states: int = Field(1000, ge=50, le=20_000)
+    time_budget_sec: float = Field(5.0, gt=0, le=60)
+    frontier_limit: int = Field(25, ge=1, le=500)
+
+class ScenarioFrontierPoint(BaseModel):
+    tags: List[str]
+    wins_added: float            # 호라이즌 누적(1 WAR ≈ 1 승)
+    npv_cost: float              # 추가 급여 + 추가 CBT 세금의 NPV
+    avg_wins: float
+    years: List[ScenarioYearResult]
+    cbt_tax: Dict[int, float]
+
+class ScenarioOptimizeResp(BaseModel):
+    team: str
+    frontier: List[ScenarioFrontierPoint]   # 비용 오름차순, 승수 단조 증가
+    stats: Dict[str, Any]
+    notes: List[str] = []
+
+def _frontier_pick(n: int, k: int) -> List[int]:
+    # 프런티어가 길면 양 끝 포함 고르게 k 개
+    if n <= k:
+        return list(range(n))
+    return sorted({round(i * (n - 1) / (k - 1)) for i in range(k)}) if k > 1 else [n - 1]
+
+@router.post("/ops/scenario/optimize", response_model=ScenarioOptimizeResp)
+async def scenario_optimize(q: ScenarioOptimizeQuery):
+    yrs = [q.horizon_start + i for i in range(q.horizon_years)]
+    war = np.zeros((len(q.candidates), len(yrs)))
+    sal = np.zeros_like(war)
+    col = {y: j for j, y in enumerate(yrs)}
+    for i, ch in enumerate(q.candidates):
+        for yd in ch.years:
+            if yd.year in col:
+                war[i, col[yd.year]] += float(yd.delta_war)
+                sal[i, col[yd.year]] += float(yd.delta_salary)
+    base_p = np.array([float(q.base_payroll.get(y, 0.0)) for y in yrs])
+    base_w = np.array([float(q.base_wins.get(y, 81.0)) for y in yrs])
+    caps = None
+    if q.budget_cap is not None or q.budget_caps:
+        caps = np.array([float(q.budget_caps.get(y, q.budget_cap if q.budget_cap is not None else np.inf)) for y in yrs])
+    cbt = None
+    if q.cbt_mode != "ignore":
+        th = _cbt_thresholds(yrs, override=q.cbt_thresholds)
+        cbt = np.array([th[y] for y in yrs])
+    # 세금은 payroll_sim/cbt_exposure 와 같은 tools.cbt.tax_matrix(반복 위반 기본세율 + 구간 추가세)
+    prior = q.prior_tax_years if q.prior_tax_years is not None else int(_pe.prior_streaks(None, [q.team], yrs[0])[0])
+    notes: List[str] = []
+    try:
+        res = _ss.search(war, sal, base_p, slots=np.array([c.roster_delta for c in q.candidates], dtype=float),
+                         groups=[c.group for c in q.candidates], required=np.array([c.required for c in q.candidates]),
+                         budget_cap=caps, cbt=cbt, cbt_mode=q.cbt_mode, open_slots=q.roster_open_slots,
+                         rate=q.discount_rate, max_states=q.max_states, time_budget_sec=q.time_budget_sec,
+                         years=yrs, prior_streak=prior)
+    except ValueError as e:
+        return ScenarioOptimizeResp(team=q.team, frontier=[], stats={"candidates": len(q.candidates)}, notes=[str(e)])
+    if not res["exact"]:
+        notes.append(f"beam search (max_states={q.max_states}); frontier may be approximate")
+    pts = res["points"]
+    frontier = []
+    for j in _frontier_pick(len(pts), q.frontier_limit):
+        p = pts[j]
+        years = [ScenarioYearResult(year=y, wins=round(float(base_w[t] + p["delta_war"][t]), 1),
+                                    payroll=round(p["payroll"][t], 2), delta_war_total=round(p["delta_war"][t], 2),
+                                    delta_salary_total=round(p["delta_salary"][t], 2)) for t, y in enumerate(yrs)]
+        frontier.append(ScenarioFrontierPoint(
+            tags=[q.candidates[i].tag for i in p["moves"]], wins_added=round(p["wins_added"], 2),
+            npv_cost=round(p["npv_cost"], 2), avg_wins=round(sum(r.wins for r in years) / len(years), 2),
+            years=years, cbt_tax={y: round(p["cbt_tax"][t], 2) for t, y in enumerate(yrs)}))
+    stats = {k: res[k] for k in ("exact", "states_explored", "states_final", "stages", "elapsed_sec")}
+    stats.update({"candidates": len(q.candidates), "frontier_size": len(pts)})
+    return ScenarioOptimizeResp(team=q.team, frontier=frontier, stats=stats, notes=notes)
+
 # ========= Day27: 의사결정 로그 & 레드팀(간단) =========
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
-_DECISION_LOG: List[Dict[str, Any]] = []  # append-only
+# append-only 로그는 _STATE(decisions 테이블 + FTS5 색인), 레드팀 점수는 기록 시 계산해 함께 저장
 
 class EvidenceItem(BaseModel):
     k: str
@@ -2783,8 +3307,9 @@ class DecisionUpsert(BaseModel):
     evidence: List[EvidenceItem] = Field(default_factory=list)
 
 class DecisionListResp(BaseModel):
-    total: int
+    total: Optional[int] = None         # 첫 페이지(cursor 없음) 또는 with_total=true 일 때만
     items: List[DecisionEntry]
+    next_cursor: Optional[int] = None   # 다음 페이지: ?cursor=<next_cursor>
 
 def _redteam_score(entry: DecisionUpsert) -> Dict[str, Any]:
     # 간단 휴리스틱: 증거/수치/대안·리스크 체크
@@ -2815,16 +3340,36 @@ async def decision_log_add(d: DecisionUpsert):
         id=d.id, actor=d.actor, action=d.action, summary=d.summary,
         context=d.context, evidence=d.evidence, created_at=now, redteam=rt
     )
-    _DECISION_LOG.append(entry.model_dump())
+    _STATE.decision_append(entry.model_dump())
     return entry
 
+def _iso_bound(s: Optional[str], end: bool = False) -> Optional[str]:
+    # "YYYY-MM-DD" → 그날 00:00 UTC(until 이면 다음날 00:00, 반열린 구간), 그 외 ISO8601 은 UTC 로 정규화
+    if not s:
+        return None
+    if len(s) == 10:
+        d = datetime.fromisoformat(s).replace(tzinfo=timezone.utc)
+        return (d + timedelta(days=1) if end else d).isoformat()
+    d = datetime.fromisoformat(s.replace("Z", "+00:00"))
+    return (d if d.tzinfo else d.replace(tzinfo=timezone.utc)).astimezone(timezone.utc).isoformat()
+
 @router.get("/ops/decision/list", response_model=DecisionListResp)
-async def decision_log_list(limit: int = 20, offset: int = 0, action: Optional[str] = None):
-    items = _DECISION_LOG
-    if action:
-        items = [x for x in items if x.get("action")==action]
-    sl = items[offset: offset+limit]
-    return DecisionListResp(total=len(items), items=sl)
+async def decision_log_list(limit: int = 20, offset: int = 0, action: Optional[str] = None,
+                            team: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+                            risk: Optional[str] = None, q: Optional[str] = None, cursor: Optional[int] = None,
+                            desc: bool = False, with_total: Optional[bool] = None):
+    """필터: action/team/기간(since 이상, until 미만 — 날짜만 주면 그날 포함)/레드팀 레벨(risk)/전문 검색(q, 요약·근거).
+    cursor(seq) 키셋 페이지네이션 — 응답 next_cursor 로 이어서. offset 은 예전 호출 호환용.
+    total 은 첫 페이지에서만 계산(cursor 페이지는 null, with_total=true 면 항상)."""
+    limit = max(0, min(int(limit), 500))
+    try:
+        lo, hi = _iso_bound(since), _iso_bound(until, end=True)
+    except ValueError:
+        return JSONResponse(status_code=400, content={"error": "invalid_date", "since": since, "until": until})
+    total, items, nxt = _STATE.decision_list(limit=limit, offset=max(0, offset), action=action, team=team,
+                                             since=lo, until=hi, risk=risk, q=q, cursor=cursor, desc=desc,
+                                             with_total=with_total)
+    return DecisionListResp(total=total, items=items, next_cursor=nxt)
 
 # 리그레션 가드(간단): 응답 필수 필드 & redteam 레벨 범위
 @router.get("/ops/decision/_selfcheck")
@@ -2915,7 +3460,8 @@ async def explain_selfcheck():
         return {"ok": False, "error": f"{type(e).__name__}: {e}"}
 # ========= Day29: #13 멀티-이어 페이롤 시뮬 =========
 from pydantic import BaseModel
-from typing import List, Dict
+from typing import List, Dict, Any, Optional
+from tools import cbt as _cbt
 
 class PayrollYear(BaseModel):
     year: int
@@ -2925,37 +3471,98 @@ class PayrollSimQuery(BaseModel):
     team: str
     years: List[PayrollYear]
     cbt_line: float = 237_000_000   # 기본 CBT 기준 (2025)
+    use_cbt_table: bool = False     # True 면 연도별 기준선(tools/cbt.py 테이블), cbt_line 무시
+    prior_tax_years: Optional[int] = None   # 첫 연도 직전까지 연속 초과 연수(None = 파이프라인 이력에서)
 
 class PayrollSimResult(BaseModel):
     team: str
-    totals: Dict[int, Dict[str, float]]
+    totals: Dict[int, Dict[str, float]]   # {year: {salary, cbt_line, diff, npv, tax, rate, tier, streak}}
     npv_total: float
     overages: List[int]
+    tax_total: float = 0.0
 
 @router.post("/roster/payroll_sim", response_model=PayrollSimResult)
 async def payroll_sim(q: PayrollSimQuery):
-    r: Dict[int, Dict[str, float]] = {}
-    npv_total = 0.0
-    overages: List[int] = []
     discount = 0.08
+    ys = sorted(q.years, key=lambda y: y.year)
+    yrs = [y.year for y in ys]
+    sal = np.array([y.salary for y in ys], dtype=float)
+    thr = ([_cbt.thresholds(yrs)[y] for y in yrs] if q.use_cbt_table else [q.cbt_line] * len(yrs))
+    prior = (q.prior_tax_years if q.prior_tax_years is not None
+             else int(_pe.prior_streaks(None, [q.team], yrs[0])[0]) if yrs else 0)
+    # 실제 CBA 세율(반복 위반 기본세율 + 초과 구간 추가세), 1팀 × Y 배열
+    tx = _cbt.tax_matrix(sal[None, :], thr, yrs, [prior])
+    # NPV 할인은 요청 순서 기준(첫 항목 무할인) — 예전 응답과 동일
+    order = {y.year: i for i, y in enumerate(q.years)}
+    npv = sal * _ce.discount(len(ys), discount, start=0)[[order[y] for y in yrs]]
 
-    for i, y in enumerate(q.years):
-        value = y.salary / ((1 + discount) ** i)
-        r[y.year] = {
-            "salary": y.salary,
-            "cbt_line": q.cbt_line,
-            "diff": y.salary - q.cbt_line,
-            "npv": value,
-        }
-        npv_total += value
-        if y.salary > q.cbt_line:
-            overages.append(y.year)
-
-    return PayrollSimResult(team=q.team, totals=r, npv_total=npv_total, overages=overages)
+    r: Dict[int, Dict[str, float]] = {}
+    for j, y in enumerate(yrs):
+        r[y] = {"salary": float(sal[j]), "cbt_line": float(thr[j]), "diff": float(sal[j] - thr[j]),
+                "npv": float(npv[j]), "tax": round(float(tx["tax"][0, j]), 2),
+                "rate": round(float(tx["rate"][0, j]), 4), "tier": float(tx["tier"][0, j]),
+                "streak": float(tx["streak"][0, j])}
+    overages = [y.year for y in q.years if y.salary > r[y.year]["cbt_line"]]
+    return PayrollSimResult(team=q.team, totals=r, npv_total=float(npv.sum()), overages=overages,
+                            tax_total=round(float(tx["tax"].sum()), 2))
+
+# ----- 전 구단 CBT 노출(가상 무브마다 30팀 × N년 재계산) -----
+class CbtMove(BaseModel):
+    team: str                        # 연봉을 떠안는 팀
+    aav: float                       # CBT 기준 연평균(방출은 음수 — 다만 잔여 보장액은 CBT 에 계속 잡힘)
+    years: int = 1
+    start_year: Optional[int] = None # 없으면 season_start
+    from_team: Optional[str] = None  # 트레이드: 이 팀에서 같은 금액 차감
+    player_id: Optional[str] = None
+
+class CbtExposureQuery(BaseModel):
+    season_start: int
+    horizon: int = 5
+    moves: List[CbtMove] = []
+    commitments: Optional[List[Dict[str, Any]]] = None   # [{team, year, aav|salary, player_id?}] — 없으면 data/contracts.csv
+    prior_tax_years: Dict[str, int] = {}                  # 팀별 연속 초과 연수(없으면 파이프라인 이력)
+    thresholds: Dict[int, float] = {}                     # 연도별 기준선 덮어쓰기
+    fill_growth: Optional[float] = None                   # 미계약 연도를 첫 해 페이롤 추세로 채움
+    teams: Optional[List[str]] = None                     # 응답 필터(계산은 전 구단)
+
+class CbtExposureResp(BaseModel):
+    season_years: List[int]
+    thresholds: List[float]
+    source: str
+    totals: Dict[str, float]          # base_tax, tax, delta_tax
+    rows: List[Dict[str, Any]]        # [{team, payroll:[...], tax:[...], tier:[...], streak:[...], total_tax, delta_tax}]
+
+@router.post("/roster/cbt_exposure", response_model=CbtExposureResp)
+async def cbt_exposure(q: CbtExposureQuery):
+    horizon = max(1, min(int(q.horizon), 15))
+    source = "request" if q.commitments is not None else "contracts_file"
+    if q.commitments is None and not q.prior_tax_years:
+        book = _pe.get_book(q.season_start, horizon)          # 파일 기반은 캐시 — 무브만 바꿔 반복 호출
+    else:
+        con = _pe.normalize(q.commitments) if q.commitments is not None else _pe.load_commitments()
+        book = _pe.PayrollBook(con, q.season_start, horizon, prior=q.prior_tax_years)
+    moves = [m.dict() for m in q.moves]
+    book = book.with_teams([m["team"] for m in moves] + [m["from_team"] for m in moves if m["from_team"]])
+    if not len(book):
+        return JSONResponse(status_code=400, content={"error": "no commitments",
+                                                      "detail": f"{_pe.CONTRACTS_FILE} 또는 body.commitments 필요"})
+    ex = book.exposure(moves, threshold_override=q.thresholds or None, fill_growth=q.fill_growth)
+    keep = set(q.teams) if q.teams else None
+    delta = ex["tax"] - ex["base_tax"]
+    rows = [{"team": t, "payroll": np.round(ex["payroll"][i], 2).tolist(), "tax": np.round(ex["tax"][i], 2).tolist(),
+             "tier": ex["tier"][i].tolist(), "streak": ex["streak"][i].tolist(),
+             "total_tax": round(float(ex["tax"][i].sum()), 2), "delta_tax": round(float(delta[i].sum()), 2)}
+            for i, t in enumerate(ex["teams"]) if keep is None or t in keep]
+    rows.sort(key=lambda r: -r["total_tax"])
+    return CbtExposureResp(season_years=ex["years"], thresholds=[float(v) for v in ex["thresholds"]], source=source,
+                           totals={"base_tax": round(float(ex["base_tax"].sum()), 2),
+                                   "tax": round(float(ex["tax"].sum()), 2), "delta_tax": round(float(delta.sum()), 2)},
+                           rows=rows)
 
 # ========= Day30: #14 ARB 예상 (v2, 기존 엔드포인트 보존) =========
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Any
+from dataclasses import asdict
 
 # 입력: 포지션/역할, 서비스타임, 성과지표(OPS+/ERA+), 직전 연봉(또는 베이스라인)
 class ArbV2Query(BaseModel):
@@ -2980,87 +3587,83 @@ class ArbV2Resp(BaseModel):
     drivers: Dict[str, float]
     notes: List[str] = []
 
-def _arb_bracket_mult(svc: float) -> float:
-    # 서비스 타임 브래킷(대략치): 3.x < 4.x < 5.x
-    if svc < 4.0:   # Year 1 arb
-        return 1.00
-    if svc < 5.0:   # Year 2 arb
-        return 1.15
-    return 1.30     # Year 3 arb
-
-def _perf_raise(role: str, ops_plus: Optional[float], era_plus: Optional[float]) -> float:
-    # 성과 기반 가산 (대략치)
-    if role.lower().startswith("bat"):
-        v = (ops_plus or 100.0) - 100.0
-        # 100 기준 초과분의 0.6%p 반영
-        return max(-10.0, min(40.0, 0.6 * v))
-    else:
-        v = 100.0 - (era_plus or 100.0)  # ERA+는 높을수록 좋음 → 100-ERA+는 음수
-        # ERA+ 120이면 v=-20 → +12%p 가산 느낌으로 뒤집기
-        perf = (-(v)) * 0.6
-        return max(-10.0, min(40.0, perf))
-
-def _closer_premium(save_count: Optional[int]) -> float:
-    if not save_count or save_count <= 0:
-        return 0.0
-    if save_count >= 35:
-        return 6.0
-    if save_count >= 20:
-        return 3.0
-    return 1.0
-
-def _awards_premium(awards: List[str]) -> float:
-    if not awards:
-        return 0.0
-    m = 0.0
-    for a in awards:
-        aa = a.upper()
-        if aa in ("MVP","CY"):
-            m += 5.0
-        elif aa in ("AS","GG","SS","ROY","ASG"):
-            m += 2.0
-    return min(12.0, m)
-
-def _floor_cap(v: float, lo: float, hi: float) -> float:
-    return max(lo, min(hi, v))
+# 추정식은 tools/arb_engine(배열 한 번 계산)과 공유 — 단건도 길이 1 배열로
+from tools import arb_engine as _arb
 
 @router.post("/roster/arb_estimate_v2", response_model=ArbV2Resp)
 async def arb_estimate_v2(q: ArbV2Query):
     base = q.prev_salary if q.prev_salary is not None else q.baseline_salary
-
-    # 기본 인상률(역할별 평균치)
-    base_raise = 25.0 if q.role.lower().startswith("bat") else 22.0
-
-    # 성과 가산
-    perf = _perf_raise(q.role, q.ops_plus, q.era_plus)
-
-    # 서비스 타임 브래킷 계수
-    bracket_mult = _arb_bracket_mult(q.service_years)
-
-    # 특수 프리미엄
-    closer = _closer_premium(q.save_count if q.role.lower().startswith("pit") else 0)
-    awards = _awards_premium(q.awards or [])
-
-    # 총 인상률
-    raise_pct = (base_raise + perf + closer + awards) * bracket_mult
-    raise_pct = _floor_cap(raise_pct, -5.0, 80.0)  # 안전벨트
-
-    est_salary = round(base * (1.0 + raise_pct / 100.0))
+    nan = float("nan")
+    a = _arb.Assumptions()
+    r = _arb.estimate([q.role], np.array([q.service_years]), np.array([base]),
+                      np.array([q.ops_plus if q.ops_plus is not None else nan]),
+                      np.array([q.era_plus if q.era_plus is not None else nan]),
+                      np.array([q.save_count or 0]), _arb.awards_premium([q.awards or []], a.awards_points, a.awards_cap), a)
     return ArbV2Resp(
         player_id=q.player_id, role=q.role, last_season=q.last_season,
-        service_years=q.service_years, est_raise_pct=round(raise_pct,1),
-        est_salary=float(est_salary),
+        service_years=q.service_years, est_raise_pct=round(float(r["raise_pct"][0]), 1),
+        est_salary=float(r["est_salary"][0]),
         drivers={
-            "base_raise": base_raise,
-            "perf": round(perf,1),
-            "bracket_mult": bracket_mult,
-            "closer_premium": closer,
-            "awards_premium": awards,
+            "base_raise": float(r["base_raise"][0]),
+            "perf": round(float(r["perf"][0]), 1),
+            "bracket_mult": float(r["bracket_mult"][0]),
+            "closer_premium": float(r["closer_premium"][0]),
+            "awards_premium": float(r["awards_premium"][0]),
             "base_used": base
         },
         notes=["Heuristic v2. 실제 적용 전 구단 사례/패널티 구조와 교차검증 필요."]
     )
 
+# ----- arb 대상자 일괄 추정(리그 전체 클래스, 가정만 바꿔 반복 실행) -----
+class ArbAssumptions(BaseModel):
+    # tools.arb_engine.Assumptions 와 같은 필드 — 빠진 값은 엔진 기본값, 모르는 키/잘못된 형식은 422
+    model_config = ConfigDict(extra="forbid")
+    base_raise_bat: Optional[float] = None
+    base_raise_pit: Optional[float] = None
+    perf_slope: Optional[float] = None
+    perf_floor: Optional[float] = None
+    perf_cap: Optional[float] = None
+    bracket_mult: Optional[Tuple[float, float, float]] = None     # arb 1/2/3년차
+    raise_floor: Optional[float] = None
+    raise_cap: Optional[float] = None
+    baseline_salary: Optional[float] = Field(None, ge=0)
+    super_two_cut: Optional[float] = Field(None, ge=0, le=6)
+    comp_k: Optional[int] = Field(None, ge=1, le=100)
+    comp_weight: Optional[float] = Field(None, ge=0, le=1)
+    awards_points: Optional[Dict[str, float]] = None
+    awards_cap: Optional[float] = Field(None, ge=0)
+
+class ArbBatchQuery(BaseModel):
+    season: int                                     # 플랫폼(직전) 시즌 — 성과는 이 시즌 마트
+    team: Optional[str] = None
+    players: List[str] = Field(default_factory=list)    # 비우면 전체
+    assumptions: ArbAssumptions = Field(default_factory=ArbAssumptions)
+    limit: int = 500
+
+class ArbBatchResp(BaseModel):
+    season: int
+    count: int
+    cached: bool
+    assumptions: Dict[str, Any]
+    totals: Dict[str, float]                        # 팀별 추정 합계 + "_all"
+    rows: List[Dict[str, Any]]
+
+@router.post("/roster/arb_batch", response_model=ArbBatchResp)
+async def arb_batch(q: ArbBatchQuery):
+    a = _arb.Assumptions(**q.assumptions.model_dump(exclude_none=True))
+    roster = {t: _STATE.team_records("roster", t) for t in _STATE.teams("roster")}
+    df, cached = _arb.run_season(q.season, a, roster)
+    if q.team:
+        df = df[df["team"].astype(str) == q.team]
+    if q.players:
+        df = df[df["player_id"].isin(q.players)]
+    totals = {str(k): float(v) for k, v in df.groupby(df["team"].fillna("").astype(str))["est_salary"].sum().items()}
+    totals["_all"] = float(df["est_salary"].sum()) if len(df) else 0.0
+    rows = df.sort_values("est_salary", ascending=False).head(max(0, q.limit))
+    rows = json.loads(rows.to_json(orient="records"))           # NaN → null
+    return ArbBatchResp(season=q.season, count=int(len(df)), cached=cached,
+                        assumptions=asdict(a), totals=totals, rows=rows)
+
 # ========= Day31: #15 계약 ROI/서플러스 ($/WAR·NPV) v2 =========
 from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
@@ -3077,54 +3680,57 @@ class ContractROIV2Query(BaseModel):
     discount_rate: float = Field(0.08, description="NPV 할인율")
     war_confidence: float = Field(1.00, description="WAR 신뢰계수(0.8~1.2)")
     sensitivity_pct: float = Field(0.10, description="+/- 민감도 비율 (예: 0.10=±10%)")
+    mc_draws: int = Field(0, ge=0, le=50_000, description="몬테카를로 추첨 수(0이면 생략)")
+    war_sd: float = Field(0.35, ge=0.0, description="WAR 상대 표준편차(투영치 비례)")
+    dpw_vol: float = Field(0.08, ge=0.0, description="$/WAR 연 변동성")
+    seed: Optional[int] = 0
 
 class ContractROIV2Resp(BaseModel):
     table: List[Dict[str, float]]
     totals: Dict[str, float]
     sensitivity: Dict[str, Dict[str, float]]  # {"minus":{"npv_surplus":..}, "plus":{..}}
+    distribution: Optional[Dict[str, float]] = None  # mc_draws>0: NPV 서플러스 분포 요약
 
 def _npv_series_v2(vals: List[float], r: float) -> float:
-    acc = 0.0
-    for i, v in enumerate(vals):
-        acc += v / ((1.0 + r) ** i)
-    return round(acc, 2)
+    return round(_ce.npv(vals, r, start=0), 2)
 
 @router.post("/roster/contract_roi_v2", response_model=ContractROIV2Resp)
 async def contract_roi_v2(q: ContractROIV2Query):
-    rows = []
-    v_series, s_series, dpw_series = [], [], []
-    # 본선 계산
-    for i, cy in enumerate(q.contract):
-        dpw_y = q.base_dollar_per_war * ((1.0 + q.dpw_growth) ** i)
-        value = cy.proj_war * dpw_y * q.war_confidence
-        surplus = value - cy.salary
-        rows.append({
+    sal = [[cy.salary for cy in q.contract]]
+    war = [[cy.proj_war for cy in q.contract]]
+    ev = _ce.evaluate(sal, war, dpw=q.base_dollar_per_war, rate=q.discount_rate, start=0,
+                      dpw_growth=q.dpw_growth, war_confidence=q.war_confidence)
+    rows = [{
             "year": float(cy.year),
             "salary": float(cy.salary),
             "proj_war": float(cy.proj_war),
-            "dpw_used": round(dpw_y, 2),
-            "value": round(value, 2),
-            "surplus": round(surplus, 2),
-        })
-        v_series.append(value); s_series.append(cy.salary); dpw_series.append(dpw_y)
+            "dpw_used": round(float(d), 2),
+            "value": round(float(v), 2),
+            "surplus": round(float(su), 2),
+        } for cy, d, v, su in zip(q.contract, ev["dpw"], ev["value"][0], ev["surplus"][0])]
 
-    tot_salary = round(sum(s_series), 2)
-    tot_value  = round(sum(v_series), 2)
+    tot_salary = round(float(ev["salary_total"][0]), 2)
+    tot_value  = round(float(ev["value_total"][0]), 2)
     tot_surplus = round(tot_value - tot_salary, 2)
-    npv_salary = _npv_series_v2(s_series, q.discount_rate)
-    npv_value  = _npv_series_v2(v_series, q.discount_rate)
+    npv_salary = round(float(ev["npv_salary"][0]), 2)
+    npv_value  = round(float(ev["npv_value"][0]), 2)
     npv_surplus = round(npv_value - npv_salary, 2)
     roi = round((tot_value / tot_salary) if tot_salary > 0 else 0.0, 3)
 
-    # 민감도: $/WAR ± sensitivity_pct
+    # 민감도: $/WAR ± sensitivity_pct (NPV 는 선형이라 스케일만 곱함)
     def _with_dpw_scale(scale: float) -> float:
-        v_scaled = [x * scale for x in v_series]
-        nv = _npv_series_v2(v_scaled, q.discount_rate)
-        return round(nv - npv_salary, 2)
+        return round(round(float(ev["npv_value"][0]) * scale, 2) - npv_salary, 2)
 
     minus = _with_dpw_scale(1.0 - q.sensitivity_pct)
     plus  = _with_dpw_scale(1.0 + q.sensitivity_pct)
 
+    dist = None
+    if q.mc_draws and q.contract:
+        sim = _ce.simulate(sal, [[w * q.war_confidence for w in war[0]]], dpw=q.base_dollar_per_war,
+                           rate=q.discount_rate, start=0, draws=q.mc_draws, war_sd=q.war_sd,
+                           dpw_growth=q.dpw_growth, dpw_vol=q.dpw_vol, seed=q.seed)
+        dist = _ce.summarize(sim, 0)
+
     return ContractROIV2Resp(
         table=rows,
         totals={
@@ -3135,12 +3741,60 @@ async def contract_roi_v2(q: ContractROIV2Query):
         sensitivity={
             "minus": {"dpw_scale": 1.0 - q.sensitivity_pct, "npv_surplus": minus},
             "plus":  {"dpw_scale": 1.0 + q.sensitivity_pct, "npv_surplus": plus}
-        }
+        },
+        distribution=dist
     )
 
+# ----- FA 보드 일괄 평가(몬테카를로) -----
+class FABoardOffer(BaseModel):
+    player_id: str
+    team: Optional[str] = None
+    contract: List[ContractYearV2]
+
+class FABoardQuery(BaseModel):
+    offers: List[FABoardOffer] = Field(..., min_length=1, max_length=5000)
+    base_dollar_per_war: float = 9_000_000
+    dpw_growth: float = 0.03
+    dpw_vol: float = Field(0.08, ge=0.0)
+    discount_rate: float = 0.08
+    war_sd: float = Field(0.35, ge=0.0)
+    war_rho: float = Field(0.6, ge=0.0, le=1.0, description="연도 간 WAR 충격 상관")
+    draws: int = Field(2000, ge=100, le=20_000)
+    seed: Optional[int] = 0
+    top_n: int = 50
+
+class FABoardResponse(BaseModel):
+    draws: int
+    ranked: List[Dict[str, Any]]   # 기대 NPV 서플러스 내림차순
+    board: Dict[str, float]        # 보드 전체(양수 확률 평균 등)
+
+@router.post("/contracts/fa_board", response_model=FABoardResponse)
+async def contracts_fa_board(q: FABoardQuery):
+    sal, mask = _ce.to_matrix([[cy.salary for cy in o.contract] for o in q.offers])
+    war, _ = _ce.to_matrix([[cy.proj_war for cy in o.contract] for o in q.offers])
+    ev = _ce.evaluate(sal, war, dpw=q.base_dollar_per_war, rate=q.discount_rate, start=0,
+                      dpw_growth=q.dpw_growth, mask=mask)
+    sim = _ce.simulate(sal, war, mask=mask, dpw=q.base_dollar_per_war, rate=q.discount_rate, start=0,
+                       draws=q.draws, war_sd=q.war_sd, war_rho=q.war_rho, dpw_growth=q.dpw_growth,
+                       dpw_vol=q.dpw_vol, seed=q.seed)
+    rows = []
+    for i, o in enumerate(q.offers):
+        rows.append({"player_id": o.player_id, "team": o.team, "years": len(o.contract),
+                     "salary_total": round(float(ev["salary_total"][i]), 2),
+                     "war_total": round(float(ev["war_total"][i]), 2),
+                     "npv_surplus_point": round(float(ev["npv_surplus"][i]), 2),
+                     **_ce.summarize(sim, i)})
+    rows.sort(key=lambda r: r["npv_surplus_mean"], reverse=True)
+    return FABoardResponse(draws=q.draws, ranked=rows[: q.top_n],
+                           board={"offers": float(len(rows)),
+                                  "mean_prob_positive": round(float(sim["prob_positive"].mean()), 4),
+                                  "share_positive_median": round(float((sim["pcts"][list(sim["pct_levels"]).index(50)] > 0).mean()), 4)
+                                  if 50 in sim["pct_levels"] else 0.0})
+
 # ========= Day32: #16 포지션 대체 자원 추천 (v2) =========
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
+from tools.replacement_index import top_k as _repl_top_k
 
 class ReplacementCandV2(BaseModel):
     player_id: str
@@ -3160,13 +3814,15 @@ class ReplacementWeights(BaseModel):
 
 class ReplacementQueryV2(BaseModel):
     need_pos: str
-    candidates: List[ReplacementCandV2]
+    candidates: List[ReplacementCandV2] = []   # 비우면 후보 인덱스
     top_n: int = 5
     min_war: float = 0.5
     budget: Optional[float] = None
     prefer_bats: Optional[str] = None   # "L"|"R"
     platoon_need: Optional[str] = None  # "vsR"|"vsL"
     weights: ReplacementWeights = ReplacementWeights()
+    season: Optional[int] = None
+    exclude: List[str] = []
 
 class ReplacementRankRow(BaseModel):
     player_id: str
@@ -3190,70 +3846,59 @@ def _safe_min_max(vals: List[float]) -> Tuple[float, float]:
 
 @router.post("/roster/replacement_suggestions_v2", response_model=ReplacementResponseV2)
 async def replacement_suggestions_v2(q: ReplacementQueryV2):
+    # 후보 목록이 없으면 인덱스: 포지션·시즌 z(사전 계산) 가중합 + argpartition top-k
+    if not q.candidates:
+        _, rows = _repl_index().rank(q.need_pos, q.top_n, mode="score", weights=q.weights.model_dump(),
+                                     min_war=q.min_war, budget=q.budget, season=q.season, exclude=q.exclude,
+                                     prefer_bats=q.prefer_bats, platoon_need=q.platoon_need)
+        return ReplacementResponseV2(pos=q.need_pos, ranked=[
+            ReplacementRankRow(**{k: r[k] for k in ("player_id", "pos", "proj_war", "expected_cost", "score", "reasons")})
+            for r in rows])
+
     # 1) 포지션/최소 WAR 필터
     pool = [c for c in q.candidates if c.pos == q.need_pos and c.proj_war >= q.min_war]
     if not pool:
         return ReplacementResponseV2(pos=q.need_pos, ranked=[])
 
-    # 2) 정규화 준비 (cost, war)
-    costs = [c.expected_cost for c in pool]
-    wars  = [c.proj_war      for c in pool]
-    c_lo, c_hi = _safe_min_max(costs)
-    w_lo, w_hi = _safe_min_max(wars)
-
-    def z_cost(x: float) -> float:
-        # 비용은 낮을수록 좋음 → 낮을수록 높은 점수로 바꾸기 위해 1 - 정규화
-        z = (x - c_lo) / (c_hi - c_lo)
-        return 1.0 - max(0.0, min(1.0, z))
-
-    def z_war(x: float) -> float:
-        z = (x - w_lo) / (w_hi - w_lo)
-        return max(0.0, min(1.0, z))
+    # 2) 요청 후보 안에서 min-max 정규화(cost 는 낮을수록 좋음 → 1 - 정규화), 점수는 배열 한 번에
+    war = np.array([c.proj_war for c in pool], dtype=float)
+    cost = np.array([c.expected_cost for c in pool], dtype=float)
+    c_lo, c_hi = _safe_min_max(cost.tolist())
+    w_lo, w_hi = _safe_min_max(war.tolist())
+    fit = np.array([bool(q.prefer_bats and c.bats and q.prefer_bats.upper() == c.bats.upper()) for c in pool])
+    plat = np.array([bool(q.platoon_need and c.platoon_tag and q.platoon_need == c.platoon_tag) for c in pool])
+    risk = np.clip(np.array([c.risk or 0.0 for c in pool], dtype=float), 0.0, 1.0)
+    w = q.weights
+    score = np.round(np.clip((war - w_lo) / (w_hi - w_lo), 0.0, 1.0) * w.war
+                     + (1.0 - np.clip((cost - c_lo) / (c_hi - c_lo), 0.0, 1.0)) * w.cost
+                     + fit * w.fit + plat * w.platoon - risk * w.risk, 4)
 
     ranked: List[ReplacementRankRow] = []
-    for c in pool:
+    for i in _repl_top_k(score, q.top_n):
+        c = pool[i]
         reasons: List[str] = []
-        # WAR, COST 기여
-        s_war  = z_war(c.proj_war) * q.weights.war
-        s_cost = z_cost(c.expected_cost) * q.weights.cost
-        # FIT: 타석손/팀 니즈
-        s_fit = 0.0
-        if q.prefer_bats and c.bats and q.prefer_bats.upper() == c.bats.upper():
-            s_fit += 1.0 * q.weights.fit
+        if fit[i]:
             reasons.append(f"prefer_bats:{q.prefer_bats}")
-        # PLATOON: vsR/vsL 요청과 태그 매칭
-        s_platoon = 0.0
-        if q.platoon_need and c.platoon_tag and q.platoon_need == c.platoon_tag:
-            s_platoon += 1.0 * q.weights.platoon
+        if plat[i]:
             reasons.append(f"platoon:{q.platoon_need}")
-        # RISK: 리스크 패널티(높을수록 감점)
-        r = (c.risk or 0.0)
-        r = max(0.0, min(1.0, r))
-        s_risk = -(r * q.weights.risk)
-        if r > 0:
-            reasons.append(f"risk_penalty:{r:.2f}")
-        # BUDGET 힌트
+        if risk[i] > 0:
+            reasons.append(f"risk_penalty:{risk[i]:.2f}")
         if q.budget is not None and c.expected_cost > q.budget:
             reasons.append("over_budget")
-
-        score = round(s_war + s_cost + s_fit + s_platoon + s_risk, 4)
         base_reasons = [f"war={c.proj_war}", f"$={int(c.expected_cost):,}"]
         reasons = base_reasons + reasons if reasons else base_reasons + ["baseline"]
         ranked.append(ReplacementRankRow(
             player_id=c.player_id, pos=c.pos, proj_war=c.proj_war,
-            expected_cost=c.expected_cost, score=score, reasons=reasons
+            expected_cost=c.expected_cost, score=float(score[i]), reasons=reasons
         ))
-
-    ranked.sort(key=lambda x: x.score, reverse=True)
-    return ReplacementResponseV2(pos=q.need_pos, ranked=ranked[: q.top_n])
+    return ReplacementResponseV2(pos=q.need_pos, ranked=ranked)
 
 
 # ========= Day33: #17 옵션/40-Man 관리 (v1, in-memory) =========
 from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
 
-# 간단 in-memory 저장소 (프로세스 생존 동안)
-_ROSTER_DB: Dict[str, Dict[str, dict]] = {}  # team -> player_id -> rec
+# 저장소: _STATE(roster 테이블, (team, player_id) 행 단위)
 
 class RosterRec(BaseModel):
     player_id: str
@@ -3289,47 +3934,44 @@ class RosterOverview(BaseModel):
     table: List[RosterRec]
 
 def _team_bucket(team: str) -> Dict[str, dict]:
-    return _ROSTER_DB.setdefault(team, {})
+    return _STATE.team_records("roster", team)
+
+def _new_roster_rec(pid: str) -> dict:
+    return {"player_id": pid, "on40": False, "option_years_used": 0, "rule5_protected": False, "service_time": 0.0}
 
 @router.post("/roster/40man/set", response_model=RosterOverview)
 async def roster_40man_set(q: FortyManSetQuery):
-    b = _team_bucket(q.team)
-    # 지정된 players는 on40=True로 세팅 (없던 선수면 기본 rec 생성)
-    onset = set(q.players)
-    for pid in onset:
-        b.setdefault(pid, {"player_id": pid})
-        b[pid]["on40"] = True
-        b[pid].setdefault("option_years_used", 0)
-        b[pid].setdefault("rule5_protected", False)
-        b[pid].setdefault("service_time", 0.0)
+    # 지정된 players는 on40=True로 세팅 (없던 선수면 기본 rec 생성) — 읽기-수정-쓰기는 저장소 트랜잭션 하나로
+    def _on40(rec: dict):
+        rec["on40"] = True
+        rec.setdefault("option_years_used", 0)
+        rec.setdefault("rule5_protected", False)
+        rec.setdefault("service_time", 0.0)
+    _STATE.update_records("roster", q.team, q.players, _on40)
 
     # 나머지는 건드리지 않음(명시적 제거 API 별도 제공 가능)
     return await roster_overview(q.team)
 
 @router.post("/roster/option/update", response_model=RosterOverview)
 async def roster_option_update(q: OptionUpdateQuery):
-    b = _team_bucket(q.team)
-    rec = b.setdefault(q.player_id, {"player_id": q.player_id, "on40": False,
-                                     "option_years_used": 0, "rule5_protected": False, "service_time": 0.0})
-    if q.set_value is not None:
-        rec["option_years_used"] = max(0, min(3, int(q.set_value)))
-    else:
-        rec["option_years_used"] = max(0, min(3, int(rec.get("option_years_used", 0) + q.delta)))
+    # 읽기-수정-쓰기를 저장소 트랜잭션 하나로(동시 delta 요청이 서로 덮어쓰지 않게)
+    def _apply(rec: dict):
+        if q.set_value is not None:
+            rec["option_years_used"] = max(0, min(3, int(q.set_value)))
+        else:
+            rec["option_years_used"] = max(0, min(3, int(rec.get("option_years_used", 0) + q.delta)))
+    _STATE.update_record("roster", q.team, q.player_id, _apply, _new_roster_rec(q.player_id))
     return await roster_overview(q.team)
 
 @router.post("/roster/rule5/protect", response_model=RosterOverview)
 async def roster_rule5_protect(q: Rule5ProtectQuery):
-    b = _team_bucket(q.team)
-    rec = b.setdefault(q.player_id, {"player_id": q.player_id, "on40": False,
-                                     "option_years_used": 0, "rule5_protected": False, "service_time": 0.0})
-    rec["rule5_protected"] = bool(q.protect)
+    _STATE.update_record("roster", q.team, q.player_id, lambda rec: rec.update(rule5_protected=bool(q.protect)),
+                         _new_roster_rec(q.player_id))
     return await roster_overview(q.team)
 
 @router.post("/roster/bulk_upsert", response_model=RosterOverview)
 async def roster_bulk_upsert(q: BulkUpsertQuery):
-    b = _team_bucket(q.team)
-    for it in q.items:
-        b[it.player_id] = it.dict()
+    _STATE.upsert_records("roster", q.team, {it.player_id: it.dict() for it in q.items})
     return await roster_overview(q.team)
 
 @router.get("/roster/overview", response_model=RosterOverview)
@@ -3350,38 +3992,39 @@ async def roster_overview(team: str):
 # 셀프체크
 @router.get("/roster/_selfcheck", response_model=dict)
 async def roster_selfcheck():
-    return {"ok": True, "keys": list(_ROSTER_DB.keys())}
+    return {"ok": True, "keys": _STATE.teams("roster")}
 
 # ========= Day33.1: Roster 상태 스냅샷(자동 저장/복구) =========
 import os, json, pathlib
 from fastapi import Request
 
-_SNAPSHOT_PATH = pathlib.Path("/workspaces/cogm-assistant/data/roster_state.json")
+# 저장소 도입 전 JSON 스냅샷: 저장소가 비어 있으면 1회 이관, /roster/_dump 는 저장소 → JSON 백업
+_SNAPSHOT_PATH = pathlib.Path(os.getenv("ROSTER_SNAPSHOT_PATH", "/workspaces/cogm-assistant/data/roster_state.json"))
 
-def _snapshot_load_into_memory():
+def _snapshot_load_into_memory(replace: bool = False):
+    # 구(단일 dict=roster) / {"roster", "il"} 형식 모두 import_snapshot 이 처리
     try:
         if _SNAPSHOT_PATH.exists() and _SNAPSHOT_PATH.stat().st_size > 0:
             data = json.loads(_SNAPSHOT_PATH.read_text(encoding="utf-8"))
             if isinstance(data, dict):
-                # 이전에 선언된 in-memory DB로 머지
-                _ROSTER_DB.clear()
-                _ROSTER_DB.update(data)
+                return _STATE.import_snapshot(data, replace=replace)
     except Exception:
         pass  # 복구 실패해도 서비스 계속
+    return None
 
 def _snapshot_save():
     try:
         _SNAPSHOT_PATH.parent.mkdir(parents=True, exist_ok=True)
-        _SNAPSHOT_PATH.write_text(json.dumps(_ROSTER_DB, ensure_ascii=False), encoding="utf-8")
+        tmp = _SNAPSHOT_PATH.with_name(_SNAPSHOT_PATH.name + ".tmp")
+        tmp.write_text(json.dumps(_STATE.export_snapshot(), ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, _SNAPSHOT_PATH)
         return True
     except Exception:
         return False
 
-# 서버 기동 시 1회 복구
-_snapshot_load_into_memory()
-
-# /roster/* POST 호출 후 자동 저장
-# (autosave middleware removed; now saving inside handlers)
+# 서버 기동 시: 저장소가 비었을 때만 예전 스냅샷 이관
+if _STATE.is_empty():
+    _snapshot_load_into_memory()
 
 # 수동 덤프/리로드 엔드포인트
 @router.get("/roster/_dump")
@@ -3391,16 +4034,16 @@ async def roster_dump():
 
 @router.post("/roster/_reload")
 async def roster_reload():
-    _snapshot_load_into_memory()
-    return {"ok": True, "keys": list(_ROSTER_DB.keys())}
+    # 예전과 같이 교체: 스냅샷이 다루는 표(roster, 묶음 형식이면 il 도)는 스냅샷 내용으로 바뀜
+    n = _snapshot_load_into_memory(replace=True)
+    return {"ok": True, "keys": _STATE.teams("roster"), "imported": n or {}}
 
 # ========= Day34: #18 IL/복귀 일정 트래킹 (v1) =========
 from pydantic import BaseModel
 from typing import List, Dict, Optional
 from datetime import datetime
 
-# 별도 IL 저장소 (in-memory)
-_IL_DB: Dict[str, Dict[str, dict]] = {}   # team -> player_id -> rec
+# IL 저장소: _STATE(il 테이블, status 인덱스)
 
 class ILItem(BaseModel):
     player_id: str
@@ -3424,48 +4067,16 @@ class ILListResponse(BaseModel):
     items: List[ILItem]
 
 def _il_bucket(team: str) -> Dict[str, dict]:
-    return _IL_DB.setdefault(team, {})
-
-# 스냅샷 로드/세이브 확장(IL 포함)
-def _snapshot_load_into_memory():
-    try:
-        if _SNAPSHOT_PATH.exists() and _SNAPSHOT_PATH.stat().st_size > 0:
-            data = json.loads(_SNAPSHOT_PATH.read_text(encoding="utf-8"))
-            if isinstance(data, dict):
-                # 구(단일 dict=roster) 호환
-                if "roster" in data or "il" in data:
-                    _ROSTER_DB.clear()
-                    _ROSTER_DB.update(data.get("roster", {}))
-                    _IL_DB.clear()
-                    _IL_DB.update(data.get("il", {}))
-                else:
-                    _ROSTER_DB.clear()
-                    _ROSTER_DB.update(data)
-    except Exception:
-        pass
-
-def _snapshot_save():
-    try:
-        _SNAPSHOT_PATH.parent.mkdir(parents=True, exist_ok=True)
-        payload = {"roster": _ROSTER_DB, "il": _IL_DB}
-        _SNAPSHOT_PATH.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
-        return True
-    except Exception:
-        return False
+    return _STATE.team_records("il", team)
 
 @router.post("/roster/il/set", response_model=ILListResponse)
 async def il_set(q: ILSetQuery):
-    b = _il_bucket(q.team)
-    for it in q.items:
-        b[it.player_id] = it.dict()
-    _snapshot_save()
+    _STATE.upsert_records("il", q.team, {it.player_id: it.dict() for it in q.items})
     return await il_list(q.team)
 
 @router.post("/roster/il/clear", response_model=ILListResponse)
 async def il_clear(q: ILClearQuery):
-    b = _il_bucket(q.team)
-    b.pop(q.player_id, None)
-    _snapshot_save()
+    _STATE.delete_record("il", q.team, q.player_id)
     return await il_list(q.team)
 
 @router.get("/roster/il/list", response_model=ILListResponse)
@@ -3554,6 +4165,81 @@ async def contracts_compare_v2(q: ContractCompareV2Query):
     return ContractCompareV2Response(items=out, ranking=ranking, budget_exceeded=over)
 
 # ----- IL 연동 대체 추천 -----
+# 공용 경로: IL/DTD 선수 → 필요 포지션 → 후보 인덱스(tools/replacement_index) 상위 1명
+#   필요 포지션: 요청 need{pid: pos} > IL/로스터 기록의 pos > 인덱스의 선수 포지션 > 예전 임시 매핑 > UTL
+#   후보 제외: 팀 로스터·IL 선수, 앞에서 이미 추천한 선수
+#   인덱스가 비어 있으면(마트/카드 없음) 예전 고정 후보 풀 + 고정 스코어러
+_IL_NEED_MAP = {"p2": "1B", "p4": "CF"}   # 임시 매핑(포지션 정보 없을 때)
+_IL_FALLBACK_POOL = {
+    "1B": [
+        {"player_id":"A","pos":"1B","proj_war":2.4,"expected_cost":8_000_000,"bats":"L","platoon_tag":"vsR","risk":0.10},
+        {"player_id":"B","pos":"1B","proj_war":1.1,"expected_cost":1_500_000,"bats":"R","platoon_tag":"vsL","risk":0.05},
+    ],
+    "CF": [
+        {"player_id":"B","pos":"CF","proj_war":1.6,"expected_cost":3_500_000,"bats":"R","platoon_tag":"vsL","risk":0.12},
+        {"player_id":"C","pos":"CF","proj_war":1.3,"expected_cost":2_100_000,"bats":"L","platoon_tag":"vsR","risk":0.08},
+    ],
+}
+_IL_WEIGHTS = {"war":1.0,"cost":0.6,"fit":0.4,"platoon":0.3,"risk":0.5}
+
+def _il_fallback_score(c: Dict) -> float:
+    w = _IL_WEIGHTS
+    base = c["proj_war"]*w["war"] - (c["expected_cost"]/10_000_000.0)*w["cost"]
+    fit = (1.0 if c.get("bats")=="L" else 0.6)*w["fit"]
+    platoon = (1.0 if c.get("platoon_tag")=="vsR" else 0.7)*w["platoon"]
+    risk_pen = (1.0 - c.get("risk",0.0))*w["risk"]
+    return base + fit + platoon + risk_pen
+
+async def _il_injured(team: str, override: List[str]) -> List[str]:
+    il = await il_list(team)
+    injured = override or [it.player_id for it in il.items if it.status in {"IL10","IL15","IL60","DTD"}]
+    # 파일 fallback (data/il_state.json -> {team: [{player_id,...}, ...]})
+    if not injured:
+        try:
+            import json, pathlib
+            p = pathlib.Path("data/il_state.json")
+            if p.exists():
+                d = json.loads(p.read_text())
+                injured = [x.get("player_id") for x in d.get(team, []) if x.get("player_id")]
+        except Exception:
+            pass
+    return injured
+
+def _il_replacements(team: str, injured: List[str], need: Optional[Dict[str, str]] = None,
+                     weights: Optional[Dict[str, float]] = None, ndigits: int = 4) -> List[Dict]:
+    idx = _repl_index()
+    if not len(idx):
+        return _il_replacements_fallback(injured, ndigits)
+    recs = {**_STATE.team_records("roster", team), **_il_bucket(team)}
+    taken = set(recs) | set(injured)
+    repls = []
+    for pid in injured:
+        need_pos = ((need or {}).get(pid) or (recs.get(pid) or {}).get("pos") or idx.pos_of(pid)
+                    or _IL_NEED_MAP.get(pid, "UTL"))
+        used, rows = idx.rank(need_pos, 1, mode="score", weights=weights, min_war=0.0, exclude=sorted(taken))
+        if not rows:
+            continue
+        top = rows[0]
+        taken.add(top["player_id"])
+        repls.append({"injured": pid, "need_pos": need_pos, "suggested": top["player_id"],
+                      "name": top["name"], "pool": used,
+                      "reason": f"WAR {top['proj_war']} vs ${top['expected_cost']:,.0f}",
+                      "score": round(top["score"], ndigits)})
+    return repls
+
+def _il_replacements_fallback(injured: List[str], ndigits: int = 4) -> List[Dict]:
+    repls = []
+    for pid in injured:
+        need_pos = _IL_NEED_MAP.get(pid, "UTL")
+        cands = _IL_FALLBACK_POOL.get(need_pos, [])
+        if not cands:
+            continue
+        top = max(cands, key=_il_fallback_score)
+        repls.append({"injured": pid, "need_pos": need_pos, "suggested": top["player_id"],
+                      "reason": f"WAR {top['proj_war']} vs ${top['expected_cost']:,}",
+                      "score": round(_il_fallback_score(top), ndigits)})
+    return repls
+
 class ILReplacementResponse(BaseModel):
     team: str
     replacements: List[Dict]
@@ -3561,11 +4247,14 @@ class ILReplacementResponse(BaseModel):
 @router.post("/reports/il_replacements", response_model=ILReplacementResponse)
 async def il_replacements(q: Dict):
     team = q.get("team")
-    # 스텁: 실제 구현시 roster/il/list & roster/replacement_suggestions_v2 연동
-    replacements = [
-        {"injured":"p2","need_pos":"1B","suggested":"A","reason":"WAR 2.4 vs cost 8M"},
-        {"injured":"p4","need_pos":"CF","suggested":"B","reason":"Glove+Speed, budget fit"}
-    ]
+    injured = await _il_injured(team, q.get("injured") or [])
+    replacements = _il_replacements(team, injured, q.get("need"))
+    if not replacements and not len(_repl_index()):
+        # 스텁: 인덱스도 IL 도 없을 때의 예전 응답
+        replacements = [
+            {"injured":"p2","need_pos":"1B","suggested":"A","reason":"WAR 2.4 vs cost 8M"},
+            {"injured":"p4","need_pos":"CF","suggested":"B","reason":"Glove+Speed, budget fit"}
+        ]
     return ILReplacementResponse(team=team, replacements=replacements)
 
 # ========= Day35: IL 연동 대체추천 v2 (real hook) =========
@@ -3575,108 +4264,16 @@ class ILReplacementV2Response(BaseModel):
     team: str
     replacements: List[Dict]
 
-@router.post("/reports/il_replacements_v2", response_model=ILReplacementV2Response)
-async def il_replacements_v2(q: _D):
-    team = q.get("team")
-
-    # 1) 현재 IL/DTD 목록
-    il = await il_list(team)
-    injured = [it.player_id for it in il.items if it.status in {"IL10","IL15","IL60","DTD"}]
-
-    # 2) 간단 need 매핑 (실전은 포지션 테이블/뎁스차트로 대체)
-    need_map = {"p2": "1B", "p4": "CF"}
-
-    # 3) 후보 풀 (임시). 운영시엔 내부 DB/스카우팅 연동
-    candidate_pool = {
-        "1B": [
-            {"player_id":"A","pos":"1B","proj_war":2.4,"expected_cost":8_000_000,"bats":"L","platoon_tag":"vsR","risk":0.10},
-            {"player_id":"B","pos":"1B","proj_war":1.1,"expected_cost":1_500_000,"bats":"R","platoon_tag":"vsL","risk":0.05},
-        ],
-        "CF": [
-            {"player_id":"B","pos":"CF","proj_war":1.6,"expected_cost":3_500_000,"bats":"R","platoon_tag":"vsL","risk":0.12},
-            {"player_id":"C","pos":"CF","proj_war":1.3,"expected_cost":2_100_000,"bats":"L","platoon_tag":"vsR","risk":0.08},
-        ],
-    }
-
-    # 4) v2 스코어러 (weights 고정)
-    weights = {"war":1.0,"cost":0.6,"fit":0.4,"platoon":0.3,"risk":0.5}
-    def _score(c):
-        base = c["proj_war"]*weights["war"] - (c["expected_cost"]/10_000_000.0)*weights["cost"]
-        fit = (1.0 if c.get("bats")=="L" else 0.6)*weights["fit"]
-        platoon = (1.0 if c.get("platoon_tag")=="vsR" else 0.7)*weights["platoon"]
-        risk_pen = (1.0 - c.get("risk",0.0))*weights["risk"]
-        return round(base + fit + platoon + risk_pen, 4)
-
-    repls = []
-    for pid in injured:
-        need_pos = need_map.get(pid, "UTL")
-        cands = candidate_pool.get(need_pos, [])
-        if not cands:
-            continue
-        top = sorted(cands, key=_score, reverse=True)[0]
-        repls.append({
-            "injured": pid,
-            "need_pos": need_pos,
-            "suggested": top["player_id"],
-            "reason": f"WAR {top['proj_war']} vs ${top['expected_cost']:,}",
-            "score": _score(top),
-        })
-    return ILReplacementV2Response(team=team, replacements=repls)
-
 # --- IL 대체추천 v2 (injured override + 파일 fallback) ---
 @router.post("/reports/il_replacements_v2", response_model=ILReplacementV2Response)
 async def il_replacements_v2(q: _D):
     team = q.get("team")
-    override_inj = q.get("injured") or []
-
-    il = await il_list(team)
-    injured = override_inj or [it.player_id for it in il.items if it.status in {"IL10","IL15","IL60","DTD"}]
-
-    # 파일 fallback (data/il_state.json -> {team: [{player_id,...}, ...]})
-    if not injured:
-        try:
-            import json, pathlib
-            p = pathlib.Path("data/il_state.json")
-            if p.exists():
-                d = json.loads(p.read_text())
-                injured = [x.get("player_id") for x in d.get(team, []) if x.get("player_id")]
-        except Exception:
-            pass
-
-    need_map = {"p2":"1B", "p4":"CF"}  # 임시 매핑
-    candidate_pool = {
-        "1B": [
-            {"player_id":"A","pos":"1B","proj_war":2.4,"expected_cost":8_000_000,"bats":"L","platoon_tag":"vsR","risk":0.10},
-            {"player_id":"B","pos":"1B","proj_war":1.1,"expected_cost":1_500_000,"bats":"R","platoon_tag":"vsL","risk":0.05},
-        ],
-        "CF": [
-            {"player_id":"B","pos":"CF","proj_war":1.6,"expected_cost":3_500_000,"bats":"R","platoon_tag":"vsL","risk":0.12},
-            {"player_id":"C","pos":"CF","proj_war":1.3,"expected_cost":2_100_000,"bats":"L","platoon_tag":"vsR","risk":0.08},
-        ],
-    }
-    weights = {"war":1.0,"cost":0.6,"fit":0.4,"platoon":0.3,"risk":0.5}
-    def _score(c):
-        base = c["proj_war"]*weights["war"] - (c["expected_cost"]/10_000_000.0)*weights["cost"]
-        fit = (1.0 if c.get("bats")=="L" else 0.6)*weights["fit"]
-        platoon = (1.0 if c.get("platoon_tag")=="vsR" else 0.7)*weights["platoon"]
-        risk_pen = (1.0 - c.get("risk",0.0))*weights["risk"]
-        return round(base + fit + platoon + risk_pen, 4)
-
-    repls = []
-    for pid in injured:
-        need_pos = need_map.get(pid, "UTL")
-        cands = candidate_pool.get(need_pos, [])
-        if not cands:
-            continue
-        top = sorted(cands, key=_score, reverse=True)[0]
-        repls.append({"injured": pid, "need_pos": need_pos,
-                      "suggested": top["player_id"],
-                      "reason": f"WAR {top['proj_war']} vs ${top['expected_cost']:,}",
-                      "score": _score(top)})
-    return ILReplacementV2Response(team=team, replacements=repls)
+    injured = await _il_injured(team, q.get("injured") or [])
+    return ILReplacementV2Response(team=team, replacements=_il_replacements(team, injured, q.get("need"),
+                                                                            q.get("weights")))
 
 # ========= Day35 hotfix: IL replacement v3 (self-contained) =========
-from typing import Dict as _D, List as _L, Any as _A
+from typing import Dict as _D, List as _L
 
 class ILReplacementV3Response(BaseModel):
     team: str
@@ -3685,51 +4282,9 @@ class ILReplacementV3Response(BaseModel):
 @router.post("/reports/il_replacements_v3", response_model=ILReplacementV3Response)
 async def il_replacements_v3(q: _D):
     team = q.get("team")
-    override_inj = q.get("injured") or []
-
-    # 1) IL/DTD 수집
-    il = await il_list(team)
-    injured = override_inj or [it.player_id for it in il.items if it.status in {"IL10","IL15","IL60","DTD"}]
-
-    # 2) 필요 포지션 매핑(임시). 운영시엔 내부 뎁스차트로 대체
-    need_map = {"p2": "1B", "p4": "CF"}
-
-    # 3) 후보 풀(임시). 운영시엔 DB/스카우팅 연동
-    candidate_pool = {
-        "1B": [
-            {"player_id":"A","pos":"1B","proj_war":2.4,"expected_cost":8_000_000,"bats":"L","platoon_tag":"vsR","risk":0.10},
-            {"player_id":"B","pos":"1B","proj_war":1.1,"expected_cost":1_500_000,"bats":"R","platoon_tag":"vsL","risk":0.05},
-        ],
-        "CF": [
-            {"player_id":"B","pos":"CF","proj_war":1.6,"expected_cost":3_500_000,"bats":"R","platoon_tag":"vsL","risk":0.12},
-            {"player_id":"C","pos":"CF","proj_war":1.3,"expected_cost":2_100_000,"bats":"L","platoon_tag":"vsR","risk":0.08},
-        ],
-    }
-
-    # 4) 고정 스코어러
-    weights = {"war":1.0,"cost":0.6,"fit":0.4,"platoon":0.3,"risk":0.5}
-    def _score(c: _A) -> float:
-        base = c["proj_war"]*weights["war"] - (c["expected_cost"]/10_000_000.0)*weights["cost"]
-        fit = (1.0 if c.get("bats")=="L" else 0.6)*weights["fit"]
-        platoon = (1.0 if c.get("platoon_tag")=="vsR" else 0.7)*weights["platoon"]
-        risk_pen = (1.0 - c.get("risk",0.0))*weights["risk"]
-        return round(base + fit + platoon + risk_pen, 3)
-
-    repls = []
-    for pid in injured:
-        need_pos = need_map.get(pid, "UTL")
-        cands = candidate_pool.get(need_pos, [])
-        if not cands:
-            continue
-        top = sorted(cands, key=_score, reverse=True)[0]
-        repls.append({
-            "injured": pid,
-            "need_pos": need_pos,
-            "suggested": top["player_id"],
-            "reason": f"WAR {top['proj_war']} vs ${top['expected_cost']:,}",
-            "score": _score(top),
-        })
-    return ILReplacementV3Response(team=team, replacements=repls)
+    injured = await _il_injured(team, q.get("injured") or [])
+    return ILReplacementV3Response(team=team, replacements=_il_replacements(team, injured, q.get("need"),
+                                                                            q.get("weights"), ndigits=3))
 # === Co-GM append start (Week6 selfcheck) ===
 from typing import Dict, List
 from fastapi import Request
@@ -3821,8 +4376,8 @@ curl -s -X POST http://127.0.0.1:8000/ops/watchlist/set \
 curl -s -X POST http://127.0.0.1:8000/ops/alerts/set_rules \
   -H "Content-Type: application/json" \
   -d '{"team":"SEA","rules":[
-        {"metric":"OPS_plus","op":"gt","threshold":130},
-        {"metric":"ERA_plus","op":"lt","threshold":90},
+        {"metric":"wrc_plus","op":"gt","threshold":130},
+        {"metric":"era","op":"gt","threshold":4.8},
         {"metric":"injury_flag","op":"eq","threshold":1}
       ]}' | python -m json.tool
 
@@ -3964,8 +4519,8 @@ curl -s -X POST http://127.0.0.1:8000/ops/watchlist/set \
 curl -s -X POST http://127.0.0.1:8000/ops/alerts/set_rules \
   -H "Content-Type: application/json" \
   -d '{"team":"SEA","rules":[
-        {"metric":"OPS_plus","op":"gt","threshold":130},
-        {"metric":"ERA_plus","op":"lt","threshold":90},
+        {"metric":"wrc_plus","op":"gt","threshold":130},
+        {"metric":"era","op":"gt","threshold":4.8},
         {"metric":"injury_flag","op":"eq","threshold":1}
       ]}' | python -m json.tool
 
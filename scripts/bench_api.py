@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+# API 부하 벤치마크(반복 가능)
+#   - 고정 시드 픽스처: 임시 작업 디렉터리에 Lahman SQLite(People/Batting/Pitching) + 선수/계약 CSV 생성
+#     → 앱은 그 디렉터리를 cwd/LAHMAN_DB/ROSTER_SNAPSHOT_PATH/COGM_STATE_DB 로 사용(실데이터/로스터 상태/레디스 영향 없음)
+#   - 대상: 기본 in-process(httpx ASGITransport) / --uvicorn: 로컬 uvicorn 1프로세스 기동 / --url: 이미 떠 있는 서버
+#   - 요청 믹스(leaderboards, player_stats, batch_stats, contracts, roster_ops)를 고정 동시성으로 N건씩 실행
+#     → 믹스·엔드포인트별 p50/p95/p99(ms), RPS, 오류 수
+#   - 결과 JSON: logs/bench/api_<UTC>.json, 기준선(--baseline) 대비 p95 증가/RPS 감소가 --tolerance 넘으면 exit 1
+# 사용: python scripts/bench_api.py [--mix all|leaderboards,...] [--requests 300] [--concurrency 8]
+#       python scripts/bench_api.py --save-baseline          (현재 결과를 기준선으로 저장)
+#       python scripts/bench_api.py --uvicorn --workers 1    /  --url http://127.0.0.1:8000 (픽스처 미사용)
+import os, sys, json, time, random, socket, sqlite3, asyncio, tempfile, argparse, subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import httpx
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+SEED = 20240401
+SEASONS = (2022, 2023, 2024)
+N_TEAMS, N_PER_TEAM = 30, 40
+RESULT_DIR = ROOT / "logs" / "bench"
+BASELINE = RESULT_DIR / "api_baseline.json"
+
+# ---------- 픽스처 ----------
+def build_fixtures(work: Path) -> Dict[str, Path]:
+    """고정 시드 → 매번 같은 DB/CSV."""
+    rng = np.random.default_rng(SEED)
+    (work / "data").mkdir(parents=True, exist_ok=True)
+    (work / "fixtures").mkdir(exist_ok=True)
+    teams = [f"T{i:02d}" for i in range(N_TEAMS)]
+    n = N_TEAMS * N_PER_TEAM
+    people = pd.DataFrame({"playerID": [f"fx{i:05d}01" for i in range(n)],
+                           "nameFirst": [f"First{i}" for i in range(n)],
+                           "nameLast": [f"Last{i}" for i in range(n)]})
+    team_of = np.repeat(teams, N_PER_TEAM)
+    bat, pit = [], []
+    for y in SEASONS:
+        ab = rng.integers(50, 650, n)
+        h = (ab * rng.uniform(0.2, 0.32, n)).astype(int)
+        d2 = (h * 0.2).astype(int); d3 = (h * 0.02).astype(int); hr = (h * rng.uniform(0.05, 0.25, n)).astype(int)
+        bat.append(pd.DataFrame({"playerID": people.playerID, "yearID": y, "teamID": team_of,
+                                 "lgID": np.where(np.arange(n) < n // 2, "AL", "NL"),
+                                 "AB": ab, "H": h, "2B": d2, "3B": d3, "HR": hr,
+                                 "BB": (ab * 0.09).astype(int), "HBP": rng.integers(0, 12, n), "SF": rng.integers(0, 8, n)}))
+        pm = np.arange(n) % 3 == 0                                   # 1/3 은 투수 기록
+        ipo = rng.integers(30, 600, pm.sum())
+        pit.append(pd.DataFrame({"playerID": people.playerID[pm].values, "yearID": y, "teamID": team_of[pm],
+                                 "ER": (ipo / 3 * rng.uniform(0.3, 0.6, pm.sum())).astype(int), "IPouts": ipo}))
+    db = work / "data" / "lahman.sqlite"
+    if db.exists():
+        db.unlink()
+    with sqlite3.connect(db) as con:
+        people.to_sql("People", con, index=False)
+        pd.concat(bat).to_sql("Batting", con, index=False)
+        pd.concat(pit).to_sql("Pitching", con, index=False)
+        con.execute("CREATE INDEX ix_bat_year ON Batting(yearID)")
+        con.execute("CREATE INDEX ix_bat_pid ON Batting(playerID, yearID)")
+        con.execute("CREATE INDEX ix_pit_year ON Pitching(yearID)")
+        con.execute("CREATE INDEX ix_pit_pid ON Pitching(playerID, yearID)")
+    players = people.assign(team=team_of, pos=rng.choice(["C", "1B", "2B", "SS", "3B", "OF", "SP", "RP"], n),
+                            proj_war=rng.normal(1.5, 1.5, n).round(2), salary=rng.integers(740_000, 35_000_000, n))
+    players.to_csv(work / "fixtures" / "players.csv", index=False)
+    return {"db": db, "players": work / "fixtures" / "players.csv"}
+
+# ---------- 요청 믹스 ----------
+Req = Tuple[str, str, str, Optional[dict], Optional[dict]]    # (label, method, path, params, json)
+
+def _contract(rng, p) -> List[dict]:
+    years = rng.randint(1, 6)
+    return [{"year": 2025 + i, "salary": float(p.salary) * (1 + 0.05 * i), "proj_war": round(float(p.proj_war) - 0.3 * i, 2)}
+            for i in range(years)]
+
+def build_mixes(players: pd.DataFrame) -> Dict[str, List[Tuple[float, callable]]]:
+    """믹스 → [(가중치, rng → Req)]"""
+    name = lambda p: f"{p.nameFirst} {p.nameLast}"
+    pick = lambda rng: players.iloc[rng.randrange(len(players))]
+    teams = sorted(players.team.unique())
+    season = lambda rng: rng.choice(SEASONS)
+    return {
+        "leaderboards": [
+            (3, lambda r: ("team_leaderboard", "GET", "/team_leaderboard", {"season": season(r), "limit": 10}, None)),
+            (1, lambda r: ("team_power_rankings", "GET", "/team_power_rankings", {"season": season(r), "limit": 10}, None)),
+        ],
+        "player_stats": [
+            (3, lambda r: ("get_player_stats", "GET", "/get_player_stats", {"name": name(pick(r)), "season": season(r)}, None)),
+            (1, lambda r: ("get_pitching_stats", "GET", "/get_pitching_stats",
+                           {"name": name(players.iloc[3 * r.randrange(len(players) // 3)]), "season": season(r)}, None)),
+            (1, lambda r: ("get_player_trend", "GET", "/get_player_trend", {"name": name(pick(r)), "season": 2024, "years": 3}, None)),
+            (2, lambda r: ("player.get_player_stats", "POST", "/player/get_player_stats", None,
+                           {"player_id": pick(r).playerID, "season": season(r)})),
+        ],
+        "batch_stats": [
+            (2, lambda r: ("compare_players", "GET", "/compare_players",
+                           {"name1": name(pick(r)), "name2": name(pick(r)), "season": season(r)}, None)),
+            (2, lambda r: ("player.compare_players2", "POST", "/player/compare_players2", None,
+                           {"player_ids": [pick(r).playerID for _ in range(3)], "season": season(r)})),
+        ],
+        "contracts": [
+            (2, lambda r: ("contracts.compare", "POST", "/contracts/compare", None,
+                           {"items": [{"player_id": p.playerID, "contract": _contract(r, p)} for p in (pick(r) for _ in range(8))]})),
+            (1, lambda r: ("contracts.compare_v2", "POST", "/contracts/compare_v2", None,
+                           {"budget_cap": 60_000_000.0, "items": [{"player_id": p.playerID, "contract": _contract(r, p)}
+                                                                   for p in (pick(r) for _ in range(8))]})),
+            (2, lambda r: ("roster.contract_roi_v2", "POST", "/roster/contract_roi_v2", None,
+                           {"contract": _contract(r, pick(r))})),
+        ],
+        "roster_ops": [
+            (2, lambda r: ("roster.bulk_upsert", "POST", "/roster/bulk_upsert", None,
+                           {"team": r.choice(teams), "items": [{"player_id": p.playerID, "on40": r.random() < 0.7,
+                                                                 "option_years_used": r.randint(0, 3), "service_time": round(r.uniform(0, 6), 3)}
+                                                                for p in (pick(r) for _ in range(25))]})),
+            (3, lambda r: ("roster.overview", "GET", "/roster/overview", {"team": r.choice(teams)}, None)),
+            (1, lambda r: ("roster.il_set", "POST", "/roster/il/set", None,
+                           {"team": r.choice(teams), "items": [{"player_id": pick(r).playerID, "status": r.choice(["IL10", "IL15", "IL60"]),
+                                                                 "start_date": "2025-05-01", "est_return_date": "2025-06-01"}]})),
+            (1, lambda r: ("roster.il_list", "GET", "/roster/il/list", {"team": r.choice(teams)}, None)),
+        ],
+    }
+
+def plan(mix: List[Tuple[float, callable]], n: int, seed: int) -> List[Req]:
+    rng = random.Random(seed)
+    weights = [w for w, _ in mix]
+    return [rng.choices(mix, weights)[0][1](rng) for _ in range(n)]
+
+# ---------- 실행 ----------
+async def drive(client: httpx.AsyncClient, reqs: List[Req], concurrency: int) -> Tuple[List[Tuple[str, float, int]], float]:
+    out: List[Tuple[str, float, int]] = []
+    it = iter(reqs)
+
+    async def worker():
+        for label, method, path, params, body in it:        # 공유 이터레이터 → 워커가 다음 요청을 가져감
+            t0 = time.perf_counter()
+            try:
+                r = await client.request(method, path, params=params, json=body)
+                code = r.status_code
+            except httpx.HTTPError:
+                code = 599
+            out.append((label, (time.perf_counter() - t0) * 1000.0, code))
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return out, time.perf_counter() - t0
+
+def _pcts(ms: List[float]) -> Dict[str, float]:
+    a = np.asarray(ms)
+    return {"p50_ms": round(float(np.percentile(a, 50)), 3), "p95_ms": round(float(np.percentile(a, 95)), 3),
+            "p99_ms": round(float(np.percentile(a, 99)), 3), "mean_ms": round(float(a.mean()), 3)}
+
+def summarize(samples: List[Tuple[str, float, int]], wall: float) -> dict:
+    errors = sum(1 for _, _, c in samples if c >= 400)
+    eps = {}
+    for label in sorted({s[0] for s in samples}):
+        xs = [s for s in samples if s[0] == label]
+        eps[label] = {"n": len(xs), "errors": sum(1 for _, _, c in xs if c >= 400), **_pcts([s[1] for s in xs])}
+    return {"n": len(samples), "errors": errors, "wall_sec": round(wall, 3), "rps": round(len(samples) / wall, 1),
+            **_pcts([s[1] for s in samples]), "endpoints": eps}
+
+async def run_mixes(client, mixes, names, n, concurrency, warmup) -> Dict[str, dict]:
+    res = {}
+    for i, m in enumerate(names):
+        if warmup:
+            await drive(client, plan(mixes[m], warmup, SEED + 1000 + i), concurrency)
+        samples, wall = await drive(client, plan(mixes[m], n, SEED + i), concurrency)
+        res[m] = summarize(samples, wall)
+        s = res[m]
+        print(f"[BENCH] {m:<13} n={s['n']:<5} rps={s['rps']:>8.1f} p50={s['p50_ms']:>8.2f} p95={s['p95_ms']:>8.2f} "
+              f"p99={s['p99_ms']:>8.2f} ms errors={s['errors']}", flush=True)
+    return res
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _wait_up(url: str, proc, timeout: float = 60.0):
+    t0 = time.time()
+    while time.time() - t0 < timeout:
+        if proc.poll() is not None:
+            raise RuntimeError(f"uvicorn exited rc={proc.returncode}")
+        try:
+            if httpx.get(url + "/_ping", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("uvicorn did not come up")
+
+# ---------- 기준선 비교 ----------
+def compare(cur: Dict[str, dict], base: Dict[str, dict], tol: float, min_ms: float = 2.0) -> List[str]:
+    bad = []
+    for m, s in cur.items():
+        b = base.get(m)
+        if not b:
+            continue
+        if s["p95_ms"] > b["p95_ms"] * (1 + tol) and s["p95_ms"] - b["p95_ms"] >= min_ms:   # ms 단위 잡음 제외
+            bad.append(f"{m}: p95 {b['p95_ms']:.2f} -> {s['p95_ms']:.2f} ms (+{100 * (s['p95_ms'] / b['p95_ms'] - 1):.0f}%)")
+        if s["rps"] < b["rps"] * (1 - tol):
+            bad.append(f"{m}: rps {b['rps']:.1f} -> {s['rps']:.1f} ({100 * (s['rps'] / b['rps'] - 1):.0f}%)")
+        if s["errors"] > b.get("errors", 0):
+            bad.append(f"{m}: errors {b.get('errors', 0)} -> {s['errors']}")
+    return bad
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mix", default="all", help="쉼표 구분 믹스 이름 또는 all")
+    ap.add_argument("--requests", type=int, default=300, help="믹스당 측정 요청 수")
+    ap.add_argument("--warmup", type=int, default=30)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--uvicorn", action="store_true", help="로컬 uvicorn 을 띄워 측정(기본은 in-process)")
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--url", default=None, help="이미 떠 있는 서버(픽스처 미적용)")
+    ap.add_argument("--baseline", default=str(BASELINE))
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="p95 증가/RPS 감소 허용 비율")
+    ap.add_argument("--min-delta-ms", type=float, default=2.0, help="p95 증가가 이 값 미만이면 무시")
+    ap.add_argument("--out", default=None)
+    a = ap.parse_args()
+
+    work = Path(tempfile.mkdtemp(prefix="cogm_bench_"))
+    fx = build_fixtures(work)
+    players = pd.read_csv(fx["players"])
+    mixes = build_mixes(players)
+    names = list(mixes) if a.mix == "all" else [m for m in a.mix.split(",") if m]
+    unknown = set(names) - set(mixes)
+    if unknown:
+        sys.exit(f"[ERR] unknown mix: {sorted(unknown)} (choices: {', '.join(mixes)})")
+
+    # 로스터/IL 상태(스냅샷 JSON·SQLite 저장소)도 작업 디렉터리로 — 실 data/roster_state.json 에 픽스처가 쓰이지 않게
+    env = {**os.environ, "LAHMAN_DB": str(fx["db"]), "DB_PATH": str(fx["db"]), "REDIS_URL": "",
+           "ROSTER_SNAPSHOT_PATH": str(work / "data" / "roster_state.json"),
+           "COGM_STATE_DB": str(work / "data" / "cogm_state.sqlite3"),
+           "EXT_DISK_CACHE": "0", "COGM_PERF": "0", "PYTHONPATH": str(ROOT)}
+    proc = None
+    mode = "url" if a.url else ("uvicorn" if a.uvicorn else "inprocess")
+    try:
+        if a.url:
+            client = httpx.AsyncClient(base_url=a.url, timeout=30.0)
+        elif a.uvicorn:
+            port = _free_port()
+            proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--app-dir", str(ROOT),
+                                     "--host", "127.0.0.1", "--port", str(port), "--workers", str(a.workers),
+                                     "--log-level", "warning"], cwd=work, env=env)
+            _wait_up(f"http://127.0.0.1:{port}", proc)
+            client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30.0,
+                                       limits=httpx.Limits(max_connections=a.concurrency))
+        else:
+            os.environ.update({k: env[k] for k in ("LAHMAN_DB", "DB_PATH", "REDIS_URL", "ROSTER_SNAPSHOT_PATH",
+                                               "COGM_STATE_DB", "EXT_DISK_CACHE", "COGM_PERF")})
+            os.chdir(work)                                          # 앱의 상대 경로(data/, output/)를 픽스처로
+            from app.main import app
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=30.0)
+
+        async def _go():
+            async with client:
+                return await run_mixes(client, mixes, names, a.requests, a.concurrency, a.warmup)
+        res = asyncio.run(_go())
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        os.chdir(ROOT)
+
+    report = {"ran_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "mode": mode,
+              "concurrency": a.concurrency, "requests": a.requests, "seed": SEED, "python": sys.version.split()[0],
+              "host": socket.gethostname(), "mixes": res}
+    RESULT_DIR.mkdir(parents=True, exist_ok=True)
+    out = Path(a.out) if a.out else RESULT_DIR / f"api_{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}.json"
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"[BENCH] result -> {out}")
+
+    errors = sum(s["errors"] for s in res.values())
+    if a.save_baseline:
+        Path(a.baseline).parent.mkdir(parents=True, exist_ok=True)
+        Path(a.baseline).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"[BENCH] baseline saved -> {a.baseline}")
+        sys.exit(1 if errors else 0)
+    if not Path(a.baseline).exists():
+        print(f"[BENCH][WARN] baseline 없음: {a.baseline} (--save-baseline 로 생성)")
+        sys.exit(1 if errors else 0)
+    base = json.loads(Path(a.baseline).read_text(encoding="utf-8"))
+    if base.get("mode") != mode or base.get("concurrency") != a.concurrency:
+        sys.exit(f"[BENCH][ERR] baseline 조건 다름: mode={base.get('mode')} c={base.get('concurrency')} "
+                 f"(현재 mode={mode} c={a.concurrency}) — 같은 조건으로 --save-baseline")
+    bad = compare(res, base.get("mixes", {}), a.tolerance, a.min_delta_ms)
+    for b in bad:
+        print(f"[BENCH][REGRESSION] {b}")
+    if errors:
+        print(f"[BENCH][FAIL] {errors} error responses")
+    sys.exit(1 if bad or errors else 0)
+
+if __name__ == "__main__":
+    main()
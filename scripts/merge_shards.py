@@ -1,12 +1,173 @@
-import glob, pandas as pd
+# 샤드 병합(스트리밍 + 증분)
+#   - shards/<year>/ 를 연도 순으로 청크 단위 읽기(정수 열은 Int64 로 타입 지정)
+#   - 중복 제거는 키 열의 64-bit 해시만 보관, 같은 키는 마지막 기록 우선(last-write-wins)
+#   - merge_manifest.json 에 샤드별 (mtime_ns, size, crc32) 기록 → 바뀐/새 샤드만 다시 읽음
+#     (앞부분이 그대로인 이어쓰기 샤드는 지난번 길이 이후 꼬리만 읽음)
+#   - 새 키만 있으면 기존 출력 뒤에 이어쓰기, 기존 키를 덮어쓰면 출력 1회 스트리밍 재작성
+#   - 증분은 '순서상 맨 뒤 샤드들의 이어쓰기/새 샤드 추가'일 때만(그래야 결과가 --full 과 같음)
+#     앞 연도 샤드 수정·꼬리 아닌 변경·샤드 삭제가 있으면 전체 샤드를 순서대로 다시 병합
+# 사용: python scripts/merge_shards.py [--full] [--out output]
+import os, glob, json, zlib, argparse
 from pathlib import Path
-out=Path("output"); shards=Path("output/shards")
-def merge(pattern, out_fp, subset):
-    files=sorted(glob.glob(str(shards/"*"/pattern)))
+import numpy as np
+import pandas as pd
+
+CHUNK = 250_000
+MANIFEST = "merge_manifest.json"
+STATE_DIR = "merge_state"
+SPECS = {
+    "games.csv":      {"keys": ["game_pk"], "ints": ["game_pk", "home_runs", "away_runs"]},
+    "team_box.csv":   {"keys": ["game_pk", "team"], "ints": ["game_pk", "hits", "runs", "hr", "so_p", "bb_p"]},
+    "player_box.csv": {"keys": ["game_pk", "team", "mlb_id", "name"],
+                       "ints": ["game_pk", "mlb_id", "PA", "H", "HR", "BB", "SO", "IP_outs", "K_p", "BB_p", "ER"]},
+}
+
+def _year_key(fp: str):
+    y = Path(fp).parent.name
+    return (0, int(y), "") if y.isdigit() else (1, 0, y)
+
+def _crc(fp, upto=None) -> int:
+    c, left = 0, upto
+    with open(fp, "rb") as f:
+        while left is None or left > 0:
+            b = f.read(1 << 20 if left is None else min(1 << 20, left))
+            if not b: break
+            c = zlib.crc32(b, c)
+            if left is not None: left -= len(b)
+    return c
+
+def _chunks(fp, ints, columns=None, offset=0):
+    with open(fp, "rb") as fh:
+        names = fh.readline().decode("utf-8").strip().split(",")
+        if offset: fh.seek(offset)
+        for ch in pd.read_csv(fh, header=None, names=names, dtype=str, keep_default_na=False, na_values=[""], chunksize=CHUNK):
+            if columns is not None:
+                ch = ch.reindex(columns=columns)
+            for c in ints:
+                if c in ch.columns:
+                    ch[c] = pd.to_numeric(ch[c], errors="coerce").astype("Int64")
+            yield ch
+
+def _hash(df, keys) -> np.ndarray:
+    return pd.util.hash_pandas_object(df[keys], index=False).to_numpy(np.uint64)
+
+def _last_wins(h: np.ndarray) -> np.ndarray:
+    # 같은 해시 중 마지막 위치만 True
+    keep = np.zeros(len(h), bool)
+    if len(h):
+        _, idx = np.unique(h[::-1], return_index=True)
+        keep[len(h) - 1 - idx] = True
+    return keep
+
+def _atomic_write(fp: Path, write):
+    tmp = fp.with_name(fp.name + ".tmp")
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, fp)
+
+def merge(pattern, out: Path, shards: Path, manifest: dict, full: bool = False):
+    spec = SPECS[pattern]; keys, ints = spec["keys"], spec["ints"]
+    files = sorted(glob.glob(str(shards/"*"/pattern)), key=_year_key)
     if not files: print("[WARN] no shards for", pattern); return
-    df=pd.concat([pd.read_csv(f, dtype=str, low_memory=True) for f in files], ignore_index=True)
-    before=len(df); df=df.drop_duplicates(subset=subset, keep="last"); df.to_csv(out/out_fp, index=False)
-    print(f"[MERGE] {pattern} -> {out_fp} {before}->{len(df)}")
-merge("games.csv","games.csv",["game_pk"])
-merge("team_box.csv","team_box.csv",["game_pk","team"])
-merge("player_box.csv","player_box.csv",["game_pk","team","mlb_id","name"])
+    out_fp = out/pattern
+    hash_fp = out/STATE_DIR/(Path(pattern).stem + ".hashes.npy")
+    ent = manifest.get(pattern)
+    old = (ent or {}).get("shards", {})
+    sig = {}
+    for f in files:
+        rel = os.path.relpath(f, shards); st = os.stat(f)
+        prev = old.get(rel)
+        sig[rel] = prev if prev and prev[:2] == [st.st_mtime_ns, st.st_size] else [st.st_mtime_ns, st.st_size, _crc(f)]
+
+    incr = (not full and ent is not None and out_fp.exists() and hash_fp.exists()
+            and out_fp.stat().st_size >= ent["bytes"])
+    reason = None
+    if incr:
+        todo, last_same = [], -1
+        for i, f in enumerate(files):
+            rel = os.path.relpath(f, shards); prev = old.get(rel)
+            if prev == sig[rel]:
+                last_same = i
+                continue
+            # 이어쓰기만 된 샤드: 이전 길이까지의 crc 가 같으면 꼬리만. 새 샤드는 처음부터
+            tail = prev is not None and sig[rel][1] > prev[1] and _crc(f, prev[1]) == prev[2]
+            if prev is not None and not tail:
+                reason = f"rewritten shard {rel}"
+            todo.append((i, f, prev[1] if tail else 0))
+        gone = sorted(set(old) - set(sig))
+        if gone:
+            reason = f"removed shard {gone[0]}"
+        elif todo and todo[0][0] < last_same:
+            # 뒤 샤드가 그대로인데 앞 샤드가 바뀜 → 바뀐 행이 '최근 기록'으로 잘못 적용되므로 증분 불가
+            reason = f"older shard changed {os.path.relpath(todo[0][1], shards)}"
+        incr = reason is None
+    if incr:
+        if out_fp.stat().st_size > ent["bytes"]:
+            # 직전 실행이 이어쓰기 도중 중단 → 기록된 길이로 되돌림
+            with open(out_fp, "r+b") as f: f.truncate(ent["bytes"])
+        todo = [(f, off) for _, f, off in todo]
+        existing = np.load(hash_fp)
+        columns = ent["columns"]
+    else:
+        if reason:
+            print(f"[MERGE] {pattern} full rebuild: {reason}")
+        todo, existing, columns = [(f, 0) for f in files], np.empty(0, np.uint64), None
+    if not todo:
+        print(f"[MERGE] {pattern} up-to-date ({ent['rows']} rows)"); return
+
+    # 1패스: 새/변경 샤드의 키 해시 → 마지막 기록 위치
+    hs = []
+    for f, off in todo:
+        for ch in _chunks(f, ints, columns, off):
+            if columns is None: columns = list(ch.columns)
+            hs.append(_hash(ch, keys))
+    allh = np.concatenate(hs) if hs else np.empty(0, np.uint64)
+    keep = _last_wins(allh)
+    new_h = np.sort(allh[keep])
+    clash = np.isin(existing, new_h, assume_unique=True) if existing.size else np.zeros(0, bool)
+
+    def _write_new(f):
+        pos = 0
+        for fp, off in todo:
+            for ch in _chunks(fp, ints, columns, off):
+                m = keep[pos:pos + len(ch)]; pos += len(ch)
+                if m.any():
+                    f.write(ch[m].to_csv(header=False, index=False).encode("utf-8"))
+
+    header = (",".join(columns) + "\n").encode("utf-8")
+    replaced = int(clash.sum())
+    if incr and not replaced:
+        mode = "append"
+        with open(out_fp, "ab") as f: _write_new(f)
+    else:
+        mode = "rewrite" if incr else "full"
+        def _write_all(f):
+            f.write(header)
+            if incr:
+                # 2패스: 기존 출력에서 덮어써질 키만 빼고 스트리밍 복사
+                for ch in _chunks(out_fp, ints, columns):
+                    m = ~np.isin(_hash(ch, keys), new_h)
+                    if m.any():
+                        f.write(ch[m].to_csv(header=False, index=False).encode("utf-8"))
+            _write_new(f)
+        _atomic_write(out_fp, _write_all)
+
+    final_h = np.sort(np.concatenate([existing[~clash], new_h])) if existing.size else new_h
+    hash_fp.parent.mkdir(parents=True, exist_ok=True)
+    _atomic_write(hash_fp, lambda f: np.save(f, final_h))
+    manifest[pattern] = {"shards": sig, "bytes": out_fp.stat().st_size, "rows": int(len(final_h)), "columns": columns}
+    print(f"[MERGE] {pattern} -> {out_fp} mode={mode} shards={len(todo)} rows_in={len(allh)} "
+          f"new={len(new_h) - replaced} replaced={replaced} total={len(final_h)}")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--out", default="output")
+    ap.add_argument("--full", action="store_true", help="매니페스트 무시하고 전체 재병합")
+    a = ap.parse_args()
+    out = Path(a.out); shards = out/"shards"
+    man_fp = out/MANIFEST
+    manifest = {} if a.full or not man_fp.exists() else json.loads(man_fp.read_text(encoding="utf-8"))
+    for pattern in SPECS:
+        merge(pattern, out, shards, manifest, a.full)
+        # 출력마다 매니페스트 갱신(중간 중단 시에도 끝난 출력은 유지)
+        _atomic_write(man_fp, lambda f: f.write(json.dumps(manifest, ensure_ascii=False, indent=1).encode("utf-8")))
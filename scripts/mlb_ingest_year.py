@@ -1,21 +1,22 @@
-import os, csv, time, requests, argparse
+import os, sys, csv, json, argparse
 from pathlib import Path
 
-SPORT_ID=1; TIMEOUT=30; RETRIES=3; BACKOFF=0.6
-WORKERS=int(os.environ.get("MLB_WORKERS","16"))
-SLEEP_BETWEEN=0.05
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 직접 실행 시 tools/ 임포트
+from tools.bulk_fetch import BulkFetcher, Manifest, WORKERS, RATE_PER_HOST
 
-def get_json(url, retries=RETRIES):
-    last=None
-    for i in range(retries):
-        try:
-            r=requests.get(url, timeout=TIMEOUT)
-            if r.ok: return r.json()
-            last=f"HTTP {r.status_code}"
-        except Exception as e:
-            last=repr(e)
-        time.sleep(BACKOFF*(2**i))
-    raise RuntimeError(f"GET fail: {url} :: {last}")
+SPORT_ID=1
+# tools/stats_routes.json 에 없으면 기본 라우트 사용(MLB_API_BASE 로 호스트 교체 가능)
+ROUTE_DEFAULTS={
+    "schedule": "https://statsapi.mlb.com/api/v1/schedule?sportId=1&startDate={start}&endDate={end}&gameType=R",
+    "linescore": "https://statsapi.mlb.com/api/v1/game/{pk}/linescore",
+    "boxscore": "https://statsapi.mlb.com/api/v1/game/{pk}/boxscore",
+}
+
+def load_routes():
+    try:
+        return {**ROUTE_DEFAULTS, **json.load(open("tools/stats_routes.json"))}
+    except Exception:
+        return dict(ROUTE_DEFAULTS)
 
 def safe(d,*ks,default=None):
     for k in ks:
@@ -27,48 +28,51 @@ def ensure_header(fp, header):
     if not fp.exists():
         with fp.open("w", newline="") as f: csv.writer(f).writerow(header)
 
-def main(year:int):
-    from concurrent.futures import ThreadPoolExecutor, as_completed
+def main(year:int, workers:int=WORKERS, rate:float=RATE_PER_HOST, use_cache:bool=False):
     out = Path(f"output/shards/{year}"); out.mkdir(parents=True, exist_ok=True)
-    games_fp=out/"games.csv"; team_box_fp=out/"team_box.csv"; player_box_fp=out/"player_box.csv"; seen_fp=out/"seen_games.txt"
+    games_fp=out/"games.csv"; team_box_fp=out/"team_box.csv"; player_box_fp=out/"player_box.csv"; ump_fp=out/"umpires.csv"
     ensure_header(games_fp,["game_pk","date","venue","home","away","home_runs","away_runs"])
     ensure_header(team_box_fp,["game_pk","team","hits","runs","hr","so_p","bb_p"])
     ensure_header(player_box_fp,["game_pk","team","mlb_id","name","PA","H","HR","BB","SO","IP_outs","K_p","BB_p","ER"])
+    ensure_header(ump_fp,["game_pk","plate_ump"])
 
-    seen=set()
-    if seen_fp.exists(): seen.update(x.strip() for x in seen_fp.read_text().splitlines() if x.strip())
+    # 진행 상황: manifest.jsonl(게임별 성공/실패). 예전 seen_games.txt 는 완료분으로 읽음
+    manifest=Manifest(out/"manifest.jsonl", legacy=out/"seen_games.txt")
+    cache=None
+    if use_cache:
+        from tools.http_cache import get_http_cache
+        cache=get_http_cache()
+    fetcher=BulkFetcher(workers=workers, rate=rate, cache=cache)
 
     # 스케줄 일괄
-    routes = __import__("json").load(open("tools/stats_routes.json"))
-    url = routes["schedule"].format(start=f"{year}-01-01", end=f"{year}-12-31")
-    data = get_json(url)
+    routes = load_routes()
+    data = fetcher.get_json(routes["schedule"].format(start=f"{year}-01-01", end=f"{year}-12-31"))
     games=[]
     for dd in data.get("dates", []):
         ds=dd.get("date","")[:10]
         for g in dd.get("games", []):
             pk=str(g.get("gamePk"))
-            if not pk or pk in seen: continue
+            if not pk or pk in manifest.done: continue
             games.append({"pk":pk,"g":g,"d":ds})
     if not games:
         print(f"[{year}] no new games"); return
 
     def fetch_one(item):
         pk=item["pk"]; g=item["g"]; dstr=item["d"]
-        routes = __import__("json").load(open("tools/stats_routes.json"))
-        try: line=get_json(routes["linescore"].format(pk=pk))
+        try: line=fetcher.get_json(routes["linescore"].format(pk=pk))
         except Exception: line={}
-        try: box=get_json(routes["boxscore"].format(pk=pk))
-        except Exception: box={}
+        # 박스스코어 실패는 예외 → manifest 에 실패로 남고 다음 실행에서 재시도
+        box=fetcher.get_json(routes["boxscore"].format(pk=pk))
         home_runs=safe(line,"teams","home","runs", default=0)
         away_runs=safe(line,"teams","away","runs", default=0)
         game_date=safe(g,"gameDate", default=dstr)[:10]
-        venue=safe(g,"venue","name","default")
-        home_team=safe(g,"teams","home","team","name","default")
-        away_team=safe(g,"teams","away","team","name","default")
+        venue=safe(g,"venue","name")
+        home_team=safe(g,"teams","home","team","name")
+        away_team=safe(g,"teams","away","team","name")
 
         team_rows=[]
         for side in ("home","away"):
-            team_name=safe(box,"teams",side,"team","name","default")
+            team_name=safe(box,"teams",side,"team","name")
             tstats=safe(box,"teams",side,"teamStats","batting", default={}) or {}
             pstats=safe(box,"teams",side,"teamStats","pitching", default={}) or {}
             team_rows.append([pk,team_name,tstats.get("hits",0),tstats.get("runs",0),tstats.get("homeRuns",0),pstats.get("strikeOuts",0),pstats.get("baseOnBalls",0)])
@@ -76,7 +80,7 @@ def main(year:int):
         player_rows=[]
         for side in ("home","away"):
             players=safe(box,"teams",side,"players", default={}) or {}
-            team_name=safe(box,"teams",side,"team","name","default")
+            team_name=safe(box,"teams",side,"team","name")
             for _, pdata in players.items():
                 person=safe(pdata,"person", default={}) or {}
                 pid=person.get("id"); name=person.get("fullName")
@@ -86,24 +90,36 @@ def main(year:int):
                 IP_outs=pit.get("outs"); K_p=pit.get("strikeOuts"); BB_p=pit.get("baseOnBalls"); ER=pit.get("earnedRuns")
                 if not any(v not in (None,0) for v in [PA,H,HR,BB,SO,IP_outs,K_p,BB_p,ER]): continue
                 player_rows.append([pk,team_name,pid,name,PA,H,HR,BB,SO,IP_outs,K_p,BB_p,ER])
-        return pk,[pk,game_date,venue,home_team,away_team,home_runs,away_runs],team_rows,player_rows
+        # 홈플레이트 심판(EUZ 인덱스 조인용)
+        plate=None
+        for o in (safe(box,"officials", default=[]) or []):
+            if "plate" in (o.get("officialType") or "").lower():
+                plate=safe(o,"official","fullName"); break
+        return pk,[pk,game_date,venue,home_team,away_team,home_runs,away_runs],team_rows,player_rows,plate
 
-    new_cnt=0
-    with games_fp.open("a", newline="") as g_f, team_box_fp.open("a", newline="") as tb_f, player_box_fp.open("a", newline="") as pb_f, seen_fp.open("a") as seen_out, ThreadPoolExecutor(max_workers=WORKERS) as ex:
-        g_w=csv.writer(g_f); tb_w=csv.writer(tb_f); pb_w=csv.writer(pb_f)
-        futs={ex.submit(fetch_one, it): it["pk"] for it in games}
-        for fut in __import__("concurrent.futures").as_completed(futs):
-            pk=futs[fut]
-            try:
-                pk_out, g_row, t_rows, p_rows = fut.result()
-            except Exception:
+    new_cnt=0; fail_cnt=0
+    with games_fp.open("a", newline="") as g_f, team_box_fp.open("a", newline="") as tb_f, player_box_fp.open("a", newline="") as pb_f, ump_fp.open("a", newline="") as u_f:
+        g_w=csv.writer(g_f); tb_w=csv.writer(tb_f); pb_w=csv.writer(pb_f); u_w=csv.writer(u_f)
+        for item, res, err in fetcher.run(games, fetch_one, key=lambda it: it["pk"], manifest=manifest):
+            if err is not None:
+                fail_cnt += 1
                 continue
+            pk_out, g_row, t_rows, p_rows, plate = res
             g_w.writerow(g_row)
             for r in t_rows: tb_w.writerow(r)
             for r in p_rows: pb_w.writerow(r)
-            print(pk, file=seen_out, flush=True)
+            if plate: u_w.writerow([pk_out, plate])
+            for f in (g_f, tb_f, pb_f, u_f): f.flush()
+            # 행 기록 후 완료 표시(중간 중단 시 최대 1경기 중복 → merge_shards 에서 game_pk 기준 제거)
+            manifest.mark(pk_out, True)
             new_cnt += 1
-            time.sleep(SLEEP_BETWEEN)
-    print(f"[{year}] new_games={new_cnt}")
+    st=fetcher.stats
+    print(f"[{year}] new_games={new_cnt} failed={fail_cnt} requests={st['requests']} retries={st['retries']} cache={st['cache']} throttled={st['throttled_sec']:.1f}s")
+
 if __name__=="__main__":
-    ap=argparse.ArgumentParser(); ap.add_argument("--year", type=int, required=True); args=ap.parse_args(); main(args.year)
+    ap=argparse.ArgumentParser()
+    ap.add_argument("--year", type=int, required=True)
+    ap.add_argument("--workers", type=int, default=WORKERS)
+    ap.add_argument("--rate", type=float, default=RATE_PER_HOST, help="호스트당 초당 요청 수")
+    ap.add_argument("--cache", action="store_true", help="디스크 HTTP 캐시 경유(tools.http_cache)")
+    args=ap.parse_args(); main(args.year, args.workers, args.rate, args.cache)
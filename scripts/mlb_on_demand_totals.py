@@ -1,15 +1,18 @@
-import os, json, time, argparse, hashlib, re
+import os, sys, argparse, re
 from typing import Dict, Any, List
-import requests, pandas as pd
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 직접 실행 시 tools/ 임포트
+from tools.http_cache import get_http_cache
+from tools.bulk_fetch import BulkFetcher, WORKERS
 
 # ---- Config ----
 ROUTES = {
     # 검색 라우트는 사용하지 않는다 (전량 금지)
     "people_stats_career": "https://statsapi.mlb.com/api/v1/people/{id}/stats?group={group}&stats=career&gameType=R"
 }
-CACHE_DIR = "output/cache/statsapi"
-os.makedirs(CACHE_DIR, exist_ok=True)
 TTL_SEC = 14*24*3600  # 14 days
+_FETCHER = BulkFetcher(cache=get_http_cache(), ns="statsapi", ttl=TTL_SEC)
 
 # ---- Utils ----
 def _norm(s:str)->str:
@@ -18,31 +21,13 @@ def _norm(s:str)->str:
     s = re.sub(r"\s+"," ", s).strip().upper()
     return s
 
-def _cache_path(url:str)->str:
-    h = hashlib.sha1(url.encode()).hexdigest()
-    return os.path.join(CACHE_DIR, f"{h}.json")
-
-def _get_json(url:str, retries=3, backoff=0.7)->Dict[str,Any]:
-    cp = _cache_path(url)
-    if os.path.exists(cp) and (time.time()-os.path.getmtime(cp) < TTL_SEC):
-        try:
-            return json.load(open(cp))
-        except Exception:
-            pass
-    last=None
-    for i in range(retries):
-        try:
-            r = requests.get(url, timeout=30)
-            if r.ok:
-                data = r.json()
-                json.dump(data, open(cp,"w"))
-                return data
-            last=f"HTTP {r.status_code}"
-        except Exception as e:
-            last=repr(e)
-        time.sleep(backoff*(2**i))
-    # 실패해도 빈 dict로 돌려 안정화
-    return {}
+def _get_json(url:str)->Dict[str,Any]:
+    # 호스트별 속도 제한 + 지터 재시도 + 디스크 캐시(14일 이내는 네트워크 없이, 만료 후 ETag 조건부 요청)
+    try:
+        return _FETCHER.get_json(url)
+    except Exception:
+        # 실패해도 빈 dict로 돌려 안정화
+        return {}
 
 def _ip_to_float(ip_str:str)->float:
     if not ip_str:
@@ -117,6 +102,7 @@ def main():
     ap.add_argument("--names-col",  help="column name for names", default="mlb_name")
     ap.add_argument("--ids-file",   help="CSV with mlb_id column", default="")
     ap.add_argument("--limit", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=WORKERS)
     args = ap.parse_args()
 
     names:List[str]=[]
@@ -138,25 +124,33 @@ def main():
     if args.limit>0:
         targets = targets[:args.limit]
 
-    bat_rows=[]; pit_rows=[]
-
+    # 이름 → ID 는 로컬 인덱스로 먼저 해결, 통산 기록 조회는 워커 풀로 병렬
+    resolved=[]
     for typ, val in targets:
         if typ=="name":
             mlb_id = resolve_id_by_name(val)
             if not mlb_id:
                 print(f"[WARN] name not resolved: {val}")
                 continue
-            disp = val
+            resolved.append((mlb_id, val))
         else:
-            mlb_id = val
-            disp = ""
+            resolved.append((val, ""))
+
+    _FETCHER.workers = args.workers
+    jobs = [(mlb_id, group) for mlb_id, _ in resolved for group in ("hitting", "pitching")]
+    stats: Dict[tuple, Dict[str, Any]] = {}
+    for job, res, err in _FETCHER.run(jobs, lambda j: career_stats(*j), key=lambda j: f"{j[0]}:{j[1]}"):
+        stats[job] = res or {}
 
+    def f(x):
+        try: return float(x)
+        except: return 0.0
+
+    bat_rows=[]; pit_rows=[]
+    for mlb_id, disp in resolved:
         # hitting
-        bat = career_stats(mlb_id, "hitting")
+        bat = stats.get((mlb_id, "hitting"))
         if isinstance(bat, dict) and bat:
-            def f(x): 
-                try: return float(x)
-                except: return 0.0
             pa = f(bat.get("plateAppearances",0))
             h  = f(bat.get("hits",0))
             hr = f(bat.get("homeRuns",0))
@@ -171,11 +165,8 @@ def main():
             })
 
         # pitching
-        pit = career_stats(mlb_id, "pitching")
+        pit = stats.get((mlb_id, "pitching"))
         if isinstance(pit, dict) and pit:
-            def f(x): 
-                try: return float(x)
-                except: return 0.0
             ip = _ip_to_float(pit.get("inningsPitched","0"))
             er = f(pit.get("earnedRuns",0))
             k  = f(pit.get("strikeOuts",0))
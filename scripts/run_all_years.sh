@@ -7,8 +7,10 @@ START=1901
 END=$(date +%Y)
 # 워커 수 조절(기본 16). 네트워크가 좋으면 24, 불안정하면 8 추천.
 export MLB_WORKERS=${MLB_WORKERS:-16}
+# 호스트당 초당 요청 수(토큰버킷). 429 가 잦으면 낮출 것.
+export MLB_RATE=${MLB_RATE:-10}
 
-# 연도별로 순차 실행(세션 끊겨도 다음에 다시 실행하면 이어서 처리)
+# 연도별로 순차 실행(세션 끊겨도 다음에 다시 실행하면 shards/<year>/manifest.jsonl 기준으로 이어서 처리)
 for Y in $(seq $START $END); do
   echo "[RUN] YEAR=$Y (workers=$MLB_WORKERS)"
   python3 scripts/mlb_ingest_year.py --year "$Y" | tee -a "output/logs/year_${Y}.log"
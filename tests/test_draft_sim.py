@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# tools/draft_sim — 픽 수가 후보 수보다 많을 때(후보 소진) 빈 픽이 0번 후보로 기록되지 않는지
+import numpy as np
+
+from tools import draft_sim
+
+
+def test_picks_outnumber_candidates():
+    P, T = 12, 10
+    teams = list(range(T))
+    order = draft_sim.pick_order(teams, rounds=2, snake=False)       # 20픽 > 후보 12명
+    res = draft_sim.simulate(base=np.linspace(60, 50, P), team_bonus=np.zeros((T, P)),
+                             pos_idx=np.zeros(P, int), team_need=np.zeros((T, 1), bool), need_bonus=0.0,
+                             order=order, our_team=9, sims=200, seed=0)
+    assert list(res["our_picks"]) == [10, 20]
+    # 10번 픽: 앞 9픽 후 3명 남음 → 생존 합 3, 지명 합 1
+    assert np.isclose(res["available"][0].sum(), 3.0)
+    assert np.isclose(res["chosen"][0].sum(), 1.0)
+    # 20번 픽: 후보 전원 소진 → 생존 0, 지명 0(0번 후보로 오인 금지)
+    assert res["available"][1].sum() == 0.0
+    assert res["chosen"][1].sum() == 0.0
+    assert (res["chosen"] <= res["available"] + 1e-12).all()
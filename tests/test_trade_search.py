@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# tools/trade_search — 시간 예산으로 열거가 중간에 끊겨도(크기별 열거 도중) 오류 없이 truncated 로 반환되는지
+import itertools
+
+import numpy as np
+
+from tools import trade_search
+
+
+def test_search_cut_short_by_time_budget(monkeypatch):
+    tick = itertools.count()
+    monkeypatch.setattr(trade_search.time, "monotonic", lambda: float(next(tick)))   # 호출마다 1초
+    monkeypatch.setattr(trade_search, "_CHUNK", 8)                                   # 청크 여러 개로 쪼개지게
+    rng = np.random.default_rng(0)
+    n = 12
+    a, b = rng.uniform(0, 2e7, n), rng.uniform(0, 2e7, n)
+    res = trade_search.search(a, rng.uniform(0, 1, n), b, rng.uniform(0, 1, n), tolerance=0.0, max_size=3,
+                              time_budget_sec=6.0)
+    assert res["truncated"] is True
+    assert res["subsets_a"] < sum(len(list(itertools.combinations(range(n), k))) for k in (1, 2, 3))
+    for p in res["packages"]:
+        assert abs(len(p["a_idx"]) - len(p["b_idx"])) <= 1
+
+
+def test_search_untruncated_with_ample_budget():
+    rng = np.random.default_rng(1)
+    n = 8
+    a, b = rng.uniform(0, 2e7, n), rng.uniform(0, 2e7, n)
+    res = trade_search.search(a, rng.uniform(0, 1, n), b, rng.uniform(0, 1, n), time_budget_sec=60.0)
+    assert res["truncated"] is False
+    scores = [p["score"] for p in res["packages"]]
+    assert scores == sorted(scores, reverse=True)
+    assert all(abs(p["delta"]) <= 3_000_000.0 for p in res["packages"])
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+# 워치리스트 알람 엔진(증분 평가)
+#   - 지표 테이블: mart/fact_batting·fact_pitching·fact_war + output/statcast_features_player_year + output/injury_risk_flags
+#     → 선수별 최신 시즌 1행(열 = 지표). 마트 player_uid·Statcast mlbam 모두 tools/id_xwalk 로 MLBAM 하나로 맞춘 뒤 합침
+#     (매핑 없는 id 는 원래 값). 워치리스트 id(Lahman 등)도 같은 변환으로 조회
+#   - publish(파이프라인 단계 alert_metrics): 행 해시가 바뀐 선수만 상태 저장소에 새 버전으로 기록 = 변경 피드(CDC)
+#   - 규칙 컴파일: (metric, op, threshold) 목록 → 열 인덱스/연산 코드/임계값 배열
+#     평가 = (선수 × 규칙) 값 행렬에 비교 한 번(지표 없음 = NaN → 미발화)
+#   - evaluate: 팀 커서 이후 버전이 바뀐 워치리스트 선수만 평가(규칙/워치리스트가 바뀌면 전체 재평가)
+#   - 발화 기록(team, player_id, 규칙 키)으로 중복 제거 + 쿨다운(같은 알람은 cooldown_sec 안에 다시 내보내지 않음)
+# 사용: python -m tools.alert_engine publish [--root .]
+#       python -m tools.alert_engine evaluate --team ARI [--full] [--cooldown 86400]
+import argparse
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from tools.artifact_io import read_artifact
+from tools.id_xwalk import map_ids
+from tools.state_store import StateStore, get_state_store
+
+# (경로, id 열, 시즌 열, 지표 열 — None 이면 숫자 열 전부)
+SOURCES: List[Tuple[str, str, str, Optional[List[str]]]] = [
+    ("mart/fact_batting.csv", "player_uid", "season",
+     ["avg", "obp", "slg", "woba", "wrc_plus", "bb_pct", "k_pct", "iso", "babip", "pa"]),
+    ("mart/fact_pitching.csv", "player_uid", "season", ["era", "fip", "xfip", "k9", "bb9", "hr9"]),
+    ("mart/fact_war.csv", "player_uid", "season", ["war", "wraa"]),
+    ("output/statcast_features_player_year.csv", "mlbam", "year", None),
+    ("output/injury_risk_flags.csv", "mlbam", "year", ["injury_risk_flag", "hardhit_z", "whiff_z", "csw_z"]),
+]
+# 예전 규칙 이름 → 테이블 열
+ALIASES = {"injury_flag": "injury_risk_flag"}
+# 스텁 지표(피드에 없는 열) — 피드 모드에서는 절대 발화하지 않으므로 규칙 등록 시 거부
+STUB_METRICS = {"OPS_plus": "wrc_plus", "ERA_plus": "era"}   # → 피드의 가장 가까운 열(안내용)
+FEED_LOG = "logs/alert_feed.json"
+
+OPS = {"gt": 0, "lt": 1, "eq": 2}
+_EQ_TOL = 1e-9
+
+def _ids(s: pd.Series) -> pd.Series:
+    # mlbam 이 float 로 읽히면 "605152.0" → "605152"
+    num = pd.to_numeric(s, errors="coerce")
+    out = s.astype(str).str.strip()
+    whole = num.notna() & (num == num.round())
+    out[whole] = num[whole].astype("int64").astype(str)
+    return out
+
+def canonical_ids(ids: Sequence[str]) -> Dict[str, str]:
+    """id → 피드 키(MLBAM, 매핑 없으면 원래 값)."""
+    ids = [str(i) for i in ids]
+    m = map_ids(dict.fromkeys(ids))
+    return {i: m.get(i) or i for i in ids}
+
+def _latest(df: pd.DataFrame, id_col: str, season_col: str, cols: Optional[List[str]]) -> pd.DataFrame:
+    if id_col not in df or season_col not in df:
+        return pd.DataFrame()
+    if cols is None:
+        cols = [c for c in df.columns if c not in (id_col, season_col) and pd.api.types.is_numeric_dtype(df[c])]
+    cols = [c for c in cols if c in df]
+    out = df[[id_col, season_col] + cols].copy()
+    out[cols] = out[cols].apply(pd.to_numeric, errors="coerce")
+    raw = _ids(out[id_col])
+    out["player_id"] = raw.map(canonical_ids(raw.unique()))
+    out["season"] = pd.to_numeric(out[season_col], errors="coerce")
+    # 같은 시즌 여러 행(이적 등)은 타석/이닝이 많은 행
+    keys = ["season"] + (["pa"] if "pa" in cols else [])
+    out = out.sort_values(keys, kind="stable").drop_duplicates("player_id", keep="last")
+    return out.set_index("player_id")[["season"] + cols]
+
+def build_metrics(root: Path = None, sources: Sequence[tuple] = SOURCES) -> pd.DataFrame:
+    """player_id 인덱스, season + 지표 열. 소스 간 같은 열은 앞 소스 우선, 같은 선수는 열 방향으로 합침."""
+    root = Path(root) if root else Path.cwd()
+    frames = []
+    for rel, id_col, season_col, cols in sources:
+        p = root / rel
+        if not p.exists() and not p.with_suffix(".parquet").exists():
+            continue
+        part = _latest(read_artifact(p), id_col, season_col, cols)
+        if len(part):
+            frames.append(part)
+    if not frames:
+        return pd.DataFrame(columns=["season"])
+    out = frames[0]
+    for f in frames[1:]:
+        new = [c for c in f.columns if c not in out.columns]
+        out = out.join(f[new], how="outer")
+        out["season"] = np.fmax(out["season"], f["season"].reindex(out.index))
+    return out.sort_index()
+
+def publish(store: StateStore, metrics: pd.DataFrame, source: str = "") -> Tuple[int, int]:
+    """지표 테이블 → 상태 저장소. 반환 (현재 버전, 바뀐 선수 수)."""
+    if metrics.empty:
+        return store.metrics_version(), 0
+    digest = pd.util.hash_pandas_object(metrics, index=True).astype(str)
+    vals = metrics.drop(columns="season").to_numpy(float)
+    cols = [c for c in metrics.columns if c != "season"]
+    seasons = metrics["season"].to_numpy(float)
+    rows = []
+    for i, pid in enumerate(metrics.index):
+        ok = np.isfinite(vals[i])
+        m = {cols[j]: float(vals[i, j]) for j in np.flatnonzero(ok)}
+        rows.append((str(pid), digest.iat[i], int(seasons[i]) if np.isfinite(seasons[i]) else None,
+                     json.dumps(m, separators=(",", ":"))))
+    return store.metrics_publish(rows, source)
+
+def sources_present(root: Path = None, sources: Sequence[tuple] = SOURCES) -> bool:
+    """지표 소스 파일이 하나라도 있으면 True(= 피드 모드로 평가될 환경)."""
+    root = Path(root) if root else Path.cwd()
+    return any((root / rel).exists() or (root / rel).with_suffix(".parquet").exists() for rel, *_ in sources)
+
+def stub_only(rules: Sequence[Dict[str, Any]]) -> List[str]:
+    """피드 모드에서 발화할 수 없는 스텁 지표 규칙 이름."""
+    return [r["metric"] for r in rules if r["metric"] in STUB_METRICS]
+
+def publish_from(root: Path = None, store: Optional[StateStore] = None) -> Dict[str, Any]:
+    store = store or get_state_store()
+    t0 = time.monotonic()
+    m = build_metrics(root)
+    v, n = publish(store, m, source="files")
+    return {"version": v, "changed": n, "players": int(len(m)), "metrics": int(max(0, m.shape[1] - 1)),
+            "elapsed_sec": round(time.monotonic() - t0, 4)}
+
+# ---------- 규칙 ----------
+def rule_key(r: Dict[str, Any]) -> str:
+    return f"{r['metric']}|{r['op']}|{float(r['threshold']):g}"
+
+def compile_rules(rules: Sequence[Dict[str, Any]], aliases: Dict[str, str] = ALIASES) -> Dict[str, Any]:
+    """규칙 목록 → metrics(필요한 열), col/op/threshold (R,) 배열. 모르는 op 은 -1(항상 미발화)."""
+    cols = list(dict.fromkeys(aliases.get(r["metric"], r["metric"]) for r in rules))
+    pos = {c: i for i, c in enumerate(cols)}
+    return {"rules": list(rules), "metrics": cols,
+            "col": np.array([pos[aliases.get(r["metric"], r["metric"])] for r in rules], dtype=int),
+            "op": np.array([OPS.get(r["op"], -1) for r in rules], dtype=int),
+            "threshold": np.array([float(r.get("threshold", 0.0)) for r in rules], dtype=float),
+            "keys": [rule_key(r) for r in rules]}
+
+def evaluate_matrix(metrics: Dict[str, Dict[str, float]], compiled: Dict[str, Any], pids: Sequence[str],
+                    fill: float = np.nan) -> Tuple[np.ndarray, np.ndarray]:
+    """pids 순서의 (n, R) 발화 행렬과 값 행렬. 지표가 없으면 fill(기본 NaN → 미발화)."""
+    R = len(compiled["keys"])
+    if not len(pids) or not R:
+        return np.zeros((len(pids), R), dtype=bool), np.zeros((len(pids), R))
+    X = (pd.DataFrame.from_dict({p: metrics.get(p) or {} for p in pids}, orient="index")
+         .reindex(index=list(pids), columns=compiled["metrics"]).to_numpy(float))
+    if not np.isnan(fill):
+        X = np.where(np.isnan(X), fill, X)
+    V = X[:, compiled["col"]]
+    T, op = compiled["threshold"], compiled["op"]
+    with np.errstate(invalid="ignore"):
+        hit = np.where(op == 0, V > T, np.where(op == 1, V < T, (op == 2) & (np.abs(V - T) < _EQ_TOL)))
+    return hit, V
+
+def signature(rules: Sequence[Dict[str, Any]], pids: Sequence[str]) -> str:
+    h = hashlib.sha1(json.dumps([[rule_key(r) for r in rules], list(pids)]).encode())
+    return h.hexdigest()
+
+def hits_list(pids: Sequence[str], compiled: Dict[str, Any], hit: np.ndarray, V: np.ndarray) -> List[Dict[str, Any]]:
+    """선수 순서 → 규칙 순서로 발화 목록."""
+    out = []
+    for i, j in zip(*np.nonzero(hit)):
+        r = compiled["rules"][j]
+        out.append({"player_id": pids[i], "metric": r["metric"], "op": r["op"], "value": float(V[i, j]),
+                    "threshold": float(compiled["threshold"][j]), "rule": compiled["keys"][j]})
+    return out
+
+def evaluate(store: StateStore, team: str, rules: Sequence[Dict[str, Any]], pids: Sequence[str],
+             full: bool = False, cooldown_sec: float = 86400.0, now: Optional[float] = None) -> Dict[str, Any]:
+    """팀 커서 이후 바뀐 선수만 평가 → 쿨다운 통과한 발화만 반환하고 커서 전진."""
+    pids = list(dict.fromkeys(pids))
+    upto = store.metrics_version()
+    cur_v, cur_sig = store.alert_cursor(team)
+    sig = signature(rules, pids)
+    since = 0 if (full or sig != cur_sig or cur_v > upto) else cur_v
+    key = canonical_ids(pids)
+    got = store.metrics_for(list(dict.fromkeys(key.values())), since, upto)
+    metrics = {p: got[key[p]] for p in pids if key[p] in got}
+    todo = [p for p in pids if p in metrics]
+    compiled = compile_rules(rules)
+    hit, V = evaluate_matrix(metrics, compiled, todo)
+    cand = hits_list(todo, compiled, hit, V)
+    fired = store.alert_fire(team, [(h["player_id"], h["rule"], h["value"]) for h in cand], cooldown_sec, now)
+    store.alert_cursor_set(team, upto, sig)
+    return {"team": team, "mode": "full" if since == 0 else "incremental", "version": upto, "since": since,
+            "evaluated": len(todo), "watchlist": len(pids),
+            "hits": [h for h, ok in zip(cand, fired) if ok], "suppressed": int(len(cand) - sum(fired))}
+
+def main():
+    ap = argparse.ArgumentParser(prog="alert_engine")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("publish", help="지표 테이블 → 변경 피드")
+    p.add_argument("--root", default=".")
+    p.add_argument("--log", default=FEED_LOG)
+    e = sub.add_parser("evaluate", help="팀 워치리스트 증분 평가")
+    e.add_argument("--team", required=True)
+    e.add_argument("--full", action="store_true")
+    e.add_argument("--cooldown", type=float, default=86400.0)
+    a = ap.parse_args()
+    store = get_state_store()
+    if a.cmd == "publish":
+        res = publish_from(Path(a.root), store)
+        Path(a.log).parent.mkdir(parents=True, exist_ok=True)
+        Path(a.log).write_text(json.dumps({**res, "at": time.strftime("%Y-%m-%dT%H:%M:%S")}, ensure_ascii=False, indent=2))
+        print(f"[alert_engine] v{res['version']} changed={res['changed']} players={res['players']}")
+    else:
+        res = evaluate(store, a.team, store.alert_rules(a.team), store.watchlist(a.team), full=a.full,
+                       cooldown_sec=a.cooldown)
+        print(json.dumps(res, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
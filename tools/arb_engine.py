@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+# 연봉조정(arb) 일괄 추정 엔진 — 리그 전체 arb 대상자를 배열로 한 번에
+#   - 대상자: data/arb_class.csv(ARB_CLASS_PATH; player_id, team, role, service_years, prev_salary, save_count, awards "AS|GG",
+#     ops_plus/era_plus 선택) + 상태 저장소 로스터(service_time 3.000 이상 6.000 미만, super_two_cut 이상이면 포함)
+#   - 성과: mart(fact_batting wrc_plus → OPS+ 대용, fact_pitching era → ERA+ = 100·리그ERA/ERA, fact_war war),
+#     대상자 파일에 값이 있으면 그 값 우선
+#   - 추정식은 /roster/arb_estimate_v2 와 같음(역할별 기본 인상률 + 성과 + 마무리/수상 프리미엄) × 브래킷 계수, -5~80% 제한
+#     가정(Assumptions)만 바꿔 같은 대상자를 반복 계산 → 시즌 × 가정 × (로스터 + 소스 파일 mtime) 지문 단위 캐시
+#   - 비교 선수: 역할 × 브래킷 파티션별 표준화 성과 특성(perf, war) 최근접 이웃(청크 거리 + argpartition)
+#     data/arb_history.csv(ARB_HISTORY_PATH; 과거 조정 결과 salary 포함)가 있으면 과거 사례에서 찾고
+#     comp_weight 만큼 비교 선수 인상률 중앙값과 섞음, 없으면 같은 해 대상자끼리 참고용
+# 사용: python -m tools.arb_engine --season 2024 [--team SEA] [--out output/arb_class_estimates.csv]
+import argparse
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+CLASS_FILE = os.getenv("ARB_CLASS_PATH", "data/arb_class.csv")
+HISTORY_FILE = os.getenv("ARB_HISTORY_PATH", "data/arb_history.csv")
+MART_FILES = ("mart/fact_batting.csv", "mart/fact_pitching.csv", "mart/fact_war.csv")
+_CHUNK = 2048
+
+@dataclass(frozen=True)
+class Assumptions:
+    base_raise_bat: float = 25.0
+    base_raise_pit: float = 22.0
+    perf_slope: float = 0.6                          # 100 기준 초과 1점당 %p
+    perf_floor: float = -10.0
+    perf_cap: float = 40.0
+    bracket_mult: Tuple[float, float, float] = (1.00, 1.15, 1.30)   # arb 1/2/3년차
+    raise_floor: float = -5.0
+    raise_cap: float = 80.0
+    baseline_salary: float = 900_000.0               # prev_salary 없을 때
+    super_two_cut: Optional[float] = None            # 예: 2.130 (Y.ddd) — None 이면 3.000 이상만
+    comp_k: int = 5
+    comp_weight: float = 0.0                         # 과거 사례 비교 선수 인상률과 섞는 비율(0~1)
+    awards_points: Dict[str, float] = field(default_factory=lambda: {
+        "MVP": 5.0, "CY": 5.0, "AS": 2.0, "GG": 2.0, "SS": 2.0, "ROY": 2.0, "ASG": 2.0})
+    awards_cap: float = 12.0
+
+    def key(self) -> str:
+        return hashlib.sha1(json.dumps(asdict(self), sort_keys=True).encode()).hexdigest()[:16]
+
+def bracket(service: np.ndarray) -> np.ndarray:
+    """0: arb 1년차(4년 미만), 1: 2년차, 2: 3년차."""
+    s = np.asarray(service, float)
+    return np.where(s < 4.0, 0, np.where(s < 5.0, 1, 2))
+
+def closer_premium(saves: np.ndarray) -> np.ndarray:
+    s = np.nan_to_num(np.asarray(saves, float))
+    return np.select([s >= 35, s >= 20, s > 0], [6.0, 3.0, 1.0], 0.0)
+
+def awards_premium(awards: Iterable, points: Dict[str, float], cap: float = 12.0) -> np.ndarray:
+    """awards: 'AS|GG' 문자열 또는 목록."""
+    out = []
+    for a in awards:
+        items = a if isinstance(a, (list, tuple)) else (str(a).replace(",", "|").split("|") if isinstance(a, str) else [])
+        out.append(min(cap, sum(points.get(x.strip().upper(), 0.0) for x in items if x and x.strip())))
+    return np.asarray(out, float)
+
+def estimate(role: Sequence[str], service: np.ndarray, base_salary: np.ndarray, ops_plus: np.ndarray,
+             era_plus: np.ndarray, saves: np.ndarray, awards: np.ndarray,
+             a: Assumptions = Assumptions()) -> Dict[str, np.ndarray]:
+    """전 선수 한 번에. awards 는 프리미엄(%p) 배열. 성과 지표가 NaN 이면 100(평균)."""
+    low = np.char.lower(np.asarray(role, dtype=str))
+    bat = np.char.startswith(low, "bat")
+    base_raise = np.where(bat, a.base_raise_bat, a.base_raise_pit)
+    v = np.where(bat, np.nan_to_num(np.asarray(ops_plus, float), nan=100.0),
+                 np.nan_to_num(np.asarray(era_plus, float), nan=100.0)) - 100.0
+    perf = np.clip(a.perf_slope * v, a.perf_floor, a.perf_cap)
+    mult = np.asarray(a.bracket_mult, float)[bracket(service)]
+    closer = np.where(np.char.startswith(low, "pit"), closer_premium(saves), 0.0)   # 단건 API 와 같게 "pit*" 역할만
+    raise_pct = np.clip((base_raise + perf + closer + awards) * mult, a.raise_floor, a.raise_cap)
+    est = np.round(np.asarray(base_salary, float) * (1.0 + raise_pct / 100.0))
+    return {"raise_pct": raise_pct, "est_salary": est, "base_raise": base_raise, "perf": perf,
+            "bracket_mult": mult, "closer_premium": closer, "awards_premium": np.asarray(awards, float)}
+
+# ---------- 비교 선수(최근접 이웃) ----------
+class CompIndex:
+    """(role, bracket) 파티션별 표준화 특성 행렬. 질의는 같은 파티션에서만."""
+    def __init__(self, X: np.ndarray, role: np.ndarray, brk: np.ndarray):
+        X = np.nan_to_num(np.asarray(X, float))
+        self.mu = X.mean(0) if len(X) else np.zeros(X.shape[1])
+        sd = X.std(0) if len(X) else np.ones(X.shape[1])
+        self.sd = np.where(sd > 1e-9, sd, 1.0)
+        self.Z = (X - self.mu) / self.sd
+        self.parts = {}
+        for key in set(zip(role.tolist(), brk.tolist())):
+            self.parts[key] = np.flatnonzero((role == key[0]) & (brk == key[1]))
+
+    def query(self, X: np.ndarray, role: np.ndarray, brk: np.ndarray, k: int,
+              self_ix: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """반환 (n, k) 이웃 인덱스(-1 = 없음)와 거리. self_ix: 질의가 인덱스 자신이면 자기 자신 제외."""
+        Q = (np.nan_to_num(np.asarray(X, float)) - self.mu) / self.sd
+        n = len(Q)
+        nb = np.full((n, k), -1, dtype=np.int64)
+        dist = np.full((n, k), np.inf)
+        for key in set(zip(role.tolist(), brk.tolist())):
+            cand = self.parts.get(key)
+            if cand is None or not len(cand):
+                continue
+            qi = np.flatnonzero((role == key[0]) & (brk == key[1]))
+            C = self.Z[cand]
+            for lo in range(0, len(qi), _CHUNK):
+                rows = qi[lo:lo + _CHUNK]
+                d = ((Q[rows, None, :] - C[None, :, :]) ** 2).sum(2)
+                if self_ix is not None:
+                    d[cand[None, :] == self_ix[rows][:, None]] = np.inf
+                kk = min(k, len(cand))
+                part = np.argpartition(d, kk - 1, axis=1)[:, :kk]
+                pd_ = np.take_along_axis(d, part, 1)
+                o = np.argsort(pd_, axis=1, kind="stable")
+                part, pd_ = np.take_along_axis(part, o, 1), np.take_along_axis(pd_, o, 1)
+                ok = np.isfinite(pd_)
+                nb[rows, :kk] = np.where(ok, cand[part], -1)
+                dist[rows, :kk] = np.sqrt(pd_)
+        return nb, dist
+
+# ---------- 대상자/성과 로드 ----------
+def _read(root: Path, rel: str) -> Optional[pd.DataFrame]:
+    p = Path(rel) if Path(rel).is_absolute() else root / rel
+    if not p.exists():
+        return None
+    try:
+        return pd.read_csv(p, low_memory=False)
+    except Exception:
+        return None
+
+def mart_stats(season: int, root: Path = None) -> pd.DataFrame:
+    """player_id → ops_plus(wrc_plus 대용), era_plus, war, mart_role (해당 시즌)."""
+    root = Path(root) if root else Path.cwd()
+    bat, pit, war = (_read(root, f) for f in MART_FILES)
+    out = pd.DataFrame(columns=["player_id", "ops_plus", "era_plus", "war", "mart_role"])
+    frames = []
+    if bat is not None and {"player_uid", "season", "wrc_plus"} <= set(bat.columns):
+        b = bat[bat["season"] == season]
+        frames.append(pd.DataFrame({"player_id": b["player_uid"].astype(str),
+                                    "ops_plus": pd.to_numeric(b["wrc_plus"], errors="coerce"),
+                                    "mart_role": "batter"}))
+    if pit is not None and {"player_uid", "season", "era"} <= set(pit.columns):
+        p = pit[pit["season"] == season]
+        era = pd.to_numeric(p["era"], errors="coerce")
+        lg = float(era.mean()) if era.notna().any() else np.nan
+        frames.append(pd.DataFrame({"player_id": p["player_uid"].astype(str),
+                                    "era_plus": 100.0 * lg / era.where(era > 0), "mart_role": "pitcher"}))
+    if frames:
+        out = pd.concat(frames, ignore_index=True, sort=False).groupby("player_id", as_index=False).first()
+    if war is not None and {"player_uid", "season", "war"} <= set(war.columns):
+        w = war[war["season"] == season]
+        w = pd.DataFrame({"player_id": w["player_uid"].astype(str), "war": pd.to_numeric(w["war"], errors="coerce")})
+        out = out.drop(columns=["war"], errors="ignore").merge(w.drop_duplicates("player_id", keep="last"),
+                                                              on="player_id", how="outer")
+    return out
+
+def load_class(season: int, roster: Optional[Dict[str, Dict[str, dict]]] = None, root: Path = None,
+               super_two_cut: Optional[float] = None) -> pd.DataFrame:
+    """대상자 표: player_id, team, role, service_years, prev_salary, save_count, awards, ops_plus, era_plus, war."""
+    root = Path(root) if root else Path.cwd()
+    rows = []
+    cls = _read(root, CLASS_FILE)
+    if cls is not None and len(cls):
+        rows.append(cls.rename(columns={"service_time": "service_years", "salary": "prev_salary"}))
+    if roster:
+        rec = [{"player_id": pid, "team": team, "service_years": r.get("service_time"),
+                "role": r.get("role"), "prev_salary": r.get("salary"), "save_count": r.get("save_count"),
+                "awards": "|".join(r.get("awards") or []) if isinstance(r.get("awards"), list) else r.get("awards")}
+               for team, recs in roster.items() for pid, r in recs.items()]
+        if rec:
+            rows.append(pd.DataFrame(rec))
+    cols = ["player_id", "team", "role", "service_years", "prev_salary", "save_count", "awards",
+            "ops_plus", "era_plus", "war"]
+    if not rows:
+        return pd.DataFrame(columns=cols)
+    df = pd.concat(rows, ignore_index=True, sort=False)
+    for c in cols:
+        if c not in df:
+            df[c] = np.nan
+    df["player_id"] = df["player_id"].astype(str)
+    df = df.drop_duplicates("player_id", keep="first")                 # 대상자 파일 우선
+    df["service_years"] = pd.to_numeric(df["service_years"], errors="coerce")
+    lo = 3.0 if super_two_cut is None else min(3.0, float(super_two_cut))
+    df = df[(df["service_years"] >= lo) & (df["service_years"] < 6.0)].copy()
+    st = mart_stats(season, root)
+    df = df.merge(st.rename(columns={c: f"m_{c}" for c in st.columns if c != "player_id"}), on="player_id", how="left")
+    for c in ("ops_plus", "era_plus", "war"):
+        df[c] = pd.to_numeric(df[c], errors="coerce").fillna(df.get(f"m_{c}"))
+    df["role"] = df["role"].where(df["role"].notna() & (df["role"].astype(str) != ""), df.get("m_mart_role"))
+    df["role"] = df["role"].fillna("batter").astype(str).str.lower()
+    df = df.drop(columns=[c for c in df.columns if c.startswith("m_")])
+    df["season"] = season
+    return df[["season"] + cols].reset_index(drop=True)
+
+def _features(role: np.ndarray, ops_plus: np.ndarray, era_plus: np.ndarray, war: np.ndarray) -> np.ndarray:
+    """(n, 2): 역할별 성과(+ 지표, 없으면 100), WAR(없으면 0)."""
+    bat = np.char.startswith(role.astype(str), "bat")
+    perf = np.nan_to_num(np.where(bat, ops_plus, era_plus), nan=100.0)
+    return np.column_stack([perf, np.nan_to_num(war)])
+
+def run(cls: pd.DataFrame, a: Assumptions = Assumptions(), history: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """대상자 표 → 추정 표(한 번의 배열 계산 + 비교 선수)."""
+    if cls.empty:
+        return cls.assign(est_raise_pct=[], est_salary=[], comps=[])
+    role = cls["role"].astype(str).str.lower().to_numpy()
+    svc = cls["service_years"].to_numpy(float)
+    base = pd.to_numeric(cls["prev_salary"], errors="coerce").fillna(a.baseline_salary).to_numpy(float)
+    ops, era = (pd.to_numeric(cls[c], errors="coerce").to_numpy(float) for c in ("ops_plus", "era_plus"))
+    saves = pd.to_numeric(cls["save_count"], errors="coerce").to_numpy(float)
+    aw = awards_premium(cls["awards"].tolist(), a.awards_points, a.awards_cap)
+    res = estimate(role, svc, base, ops, era, saves, aw, a)
+
+    kind = np.where(np.char.startswith(role.astype(str), "bat"), "batter", "pitcher")
+    brk = bracket(svc)
+    X = _features(role, ops, era, pd.to_numeric(cls["war"], errors="coerce").to_numpy(float))
+    raise_pct = res["raise_pct"]
+    if history is not None and len(history):
+        h = history
+        h_role = np.where(h["role"].astype(str).str.lower().str.startswith("bat"), "batter", "pitcher")
+        num = lambda c: pd.to_numeric(h[c], errors="coerce").to_numpy(float) if c in h else np.full(len(h), np.nan)
+        hX = _features(h_role, num("ops_plus"), num("era_plus"), num("war"))
+        idx = CompIndex(hX, h_role, bracket(pd.to_numeric(h["service_years"], errors="coerce").to_numpy(float)))
+        nb, dist = idx.query(X, kind, brk, a.comp_k)
+        comp_ids = h["player_id"].astype(str).to_numpy()
+        h_raise = (pd.to_numeric(h["salary"], errors="coerce") / pd.to_numeric(h["prev_salary"], errors="coerce")
+                   - 1.0).to_numpy(float) * 100.0
+        comp_raise = np.nanmedian(np.where(nb >= 0, h_raise[np.maximum(nb, 0)], np.nan), axis=1) \
+            if nb.shape[1] else np.full(len(X), np.nan)
+        w = np.where(np.isfinite(comp_raise), a.comp_weight, 0.0)
+        raise_pct = np.clip((1 - w) * raise_pct + w * np.nan_to_num(comp_raise), a.raise_floor, a.raise_cap)
+        src = "history"
+    else:
+        idx = CompIndex(X, kind, brk)
+        nb, dist = idx.query(X, kind, brk, a.comp_k, self_ix=np.arange(len(X)))
+        comp_ids = cls["player_id"].astype(str).to_numpy()
+        comp_raise = np.full(len(X), np.nan)
+        src = "class"
+    out = cls.copy()
+    out["bracket"] = brk + 1
+    out["est_raise_pct"] = np.round(raise_pct, 1)
+    out["est_salary"] = np.round(base * (1.0 + raise_pct / 100.0))
+    out["base_used"] = base
+    for k in ("base_raise", "perf", "bracket_mult", "closer_premium", "awards_premium"):
+        out[k] = np.round(res[k], 2)
+    out["comp_raise_pct"] = np.round(comp_raise, 1)
+    out["comps"] = ["|".join(comp_ids[j] for j in row if j >= 0) for row in nb]
+    out["comp_dist"] = [round(float(d[np.isfinite(d)].mean()), 3) if np.isfinite(d).any() else None for d in dist]
+    out["comp_source"] = src
+    return out
+
+# ---------- 시즌 × 가정 캐시 ----------
+_CACHE: Dict[tuple, pd.DataFrame] = {}
+_LOCK = threading.Lock()
+_CACHE_MAX = 64
+
+def _fingerprint(roster: Optional[Dict[str, Dict[str, dict]]], root: Path) -> str:
+    """대상자 파일·mart·이력 mtime + 로스터 내용 → 지문(CSV 를 읽지 않고 계산)."""
+    h = hashlib.sha1(json.dumps(roster or {}, sort_keys=True, default=str).encode())
+    for rel in (CLASS_FILE,) + MART_FILES + (HISTORY_FILE,):
+        p = Path(rel) if Path(rel).is_absolute() else root / rel
+        try:
+            h.update(f"{rel}:{p.stat().st_mtime_ns}".encode())
+        except OSError:
+            pass
+    return h.hexdigest()
+
+def run_season(season: int, a: Assumptions = Assumptions(), roster: Optional[Dict[str, Dict[str, dict]]] = None,
+               root: Path = None) -> Tuple[pd.DataFrame, bool]:
+    """시즌 대상자 전체 추정. 반환 (표, 캐시 적중 여부). 키 = (시즌, 가정, 로스터·소스 mtime 지문) — 적중 시 CSV 재로드 없음."""
+    root = Path(root) if root else Path.cwd()
+    key = (int(season), a.key(), _fingerprint(roster, root))
+    with _LOCK:
+        hit = _CACHE.get(key)
+    if hit is not None:
+        return hit, True
+    cls = load_class(season, roster, root, a.super_two_cut)
+    hist = _read(root, HISTORY_FILE)
+    if hist is not None and "salary" in hist and "prev_salary" in hist:
+        hist = hist[pd.to_numeric(hist.get("season"), errors="coerce") < season] if "season" in hist else hist
+    else:
+        hist = None
+    out = run(cls, a, hist)
+    with _LOCK:
+        if len(_CACHE) >= _CACHE_MAX:
+            _CACHE.pop(next(iter(_CACHE)))
+        _CACHE[key] = out
+    return out, False
+
+def main():
+    ap = argparse.ArgumentParser(prog="arb_engine")
+    ap.add_argument("--season", type=int, required=True, help="플랫폼(직전) 시즌")
+    ap.add_argument("--team", default=None)
+    ap.add_argument("--comp_weight", type=float, default=0.0)
+    ap.add_argument("--super_two_cut", type=float, default=None)
+    ap.add_argument("--out", default="output/arb_class_estimates.csv")
+    a = ap.parse_args()
+    roster = None
+    try:
+        from tools.state_store import get_state_store
+        st = get_state_store()
+        roster = {t: st.team_records("roster", t) for t in st.teams("roster")}
+    except Exception:
+        pass
+    out, _ = run_season(a.season, Assumptions(comp_weight=a.comp_weight, super_two_cut=a.super_two_cut), roster)
+    if a.team:
+        out = out[out["team"].astype(str) == a.team]
+    out.to_csv(a.out, index=False)
+    print(f"[arb_engine] season={a.season} players={len(out)} total=${out['est_salary'].sum():,.0f} -> {a.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# 파이프라인 산출물 I/O(공용)
+#   - write_artifact: CSV(기존 소비자 호환) + 같은 이름의 .parquet(zstd, 열 타입 유지)를 원자적으로 기록
+#     COGM_ARTIFACT_FORMATS="csv,parquet"(기본) | "parquet"(CSV 생략) | "csv"
+#   - read_artifact: .parquet 가 CSV 보다 새것(mtime)이면 Parquet, 아니면 CSV(+선택적으로 Parquet 재생성)
+#   - snapshot: output/snapshots/<stem>/<stem>@<UTC>.parquet 버전 사본(.bak.gz 대체), 최근 N개 유지
+# pyarrow 미설치 시 CSV 만 사용
+# 사용: python -m tools.artifact_io convert output/mart_star.csv ...   (기존 CSV → Parquet)
+#       python -m tools.artifact_io snapshot output/mart_star.csv      /  ls mart_star
+import os, sys, glob, time, argparse
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  선택 의존성
+    HAVE_PARQUET = True
+except Exception:
+    HAVE_PARQUET = False
+
+OUTPUT_DIR = os.getenv("COGM_OUTPUT_DIR", "output")
+FORMATS = [f.strip() for f in os.getenv("COGM_ARTIFACT_FORMATS", "csv,parquet").split(",") if f.strip()]
+SNAPSHOT_DIR = "snapshots"
+SNAPSHOT_KEEP = int(os.getenv("COGM_SNAPSHOT_KEEP", "10"))
+COMPRESSION = "zstd"
+
+PathLike = Union[str, Path]
+
+def _paths(path: PathLike):
+    p = Path(path)
+    base = p.with_suffix("") if p.suffix in (".csv", ".parquet") else p
+    return base.with_suffix(".csv"), base.with_suffix(".parquet")
+
+def _arrow_ready(df: pd.DataFrame) -> pd.DataFrame:
+    # 숫자/문자 섞인 object 열은 Arrow 가 거부 → 문자열 열로 고정(NaN 유지)
+    fix = {}
+    for c in df.columns:
+        if df[c].dtype == object:
+            kinds = {type(v) for v in df[c].dropna().head(10000)}
+            if len(kinds) > 1:
+                fix[c] = df[c].map(lambda v: v if pd.isna(v) else str(v))
+    return df.assign(**fix) if fix else df
+
+def _atomic(dst: Path, write):
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+    try:
+        write(tmp)
+        os.replace(tmp, dst)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+def _write_parquet(df: pd.DataFrame, dst: Path):
+    _atomic(dst, lambda t: _arrow_ready(df).to_parquet(t, index=False, compression=COMPRESSION))
+
+def write_artifact(df: pd.DataFrame, path: PathLike, formats: Optional[Iterable[str]] = None,
+                   snapshot: bool = False) -> List[Path]:
+    """df → path(.csv 기준 이름). 반환: 기록한 파일 경로들."""
+    csv_p, pq_p = _paths(path)
+    fmts = list(formats or FORMATS)
+    if not HAVE_PARQUET or "parquet" not in fmts:
+        fmts = ["csv"]
+    out: List[Path] = []
+    if "csv" in fmts:
+        _atomic(csv_p, lambda t: df.to_csv(t, index=False))
+        out.append(csv_p)
+    elif csv_p.exists():
+        csv_p.unlink()                                            # 오래된 CSV 가 남아 있으면 혼동
+    if "parquet" in fmts:
+        _write_parquet(df, pq_p)                                  # CSV 다음에 써서 항상 더 새것
+        out.append(pq_p)
+    if snapshot:
+        take_snapshot(df, csv_p)
+    return out
+
+def parquet_fresh(path: PathLike) -> bool:
+    csv_p, pq_p = _paths(path)
+    if not (HAVE_PARQUET and pq_p.exists()):
+        return False
+    return not csv_p.exists() or pq_p.stat().st_mtime_ns >= csv_p.stat().st_mtime_ns
+
+def read_artifact(path: PathLike, columns: Optional[List[str]] = None, cache: bool = False, **csv_kw) -> pd.DataFrame:
+    """Parquet 가 최신이면 Parquet(열 선택 포함), 아니면 CSV. cache=True 면 CSV 를 읽은 김에 Parquet 생성.
+    dtype 등 CSV 전용 해석 옵션이 있으면 의미 보존을 위해 CSV 를 읽음."""
+    csv_p, pq_p = _paths(path)
+    cols = columns or csv_kw.pop("usecols", None)
+    if parquet_fresh(path) and "dtype" not in csv_kw and not callable(cols):
+        return pd.read_parquet(pq_p, columns=list(cols) if cols is not None else None)
+    csv_kw.setdefault("low_memory", False)
+    df = pd.read_csv(csv_p, usecols=cols, **csv_kw)
+    if cache and HAVE_PARQUET and cols is None and not csv_kw.get("nrows"):
+        try:
+            _write_parquet(df, pq_p)
+        except Exception:
+            pass
+    return df
+
+# ---------- 스냅샷 ----------
+def _snap_dir(stem: str, out_dir: str = OUTPUT_DIR) -> Path:
+    return Path(out_dir) / SNAPSHOT_DIR / stem
+
+def take_snapshot(df: pd.DataFrame, path: PathLike, keep: int = SNAPSHOT_KEEP, out_dir: str = OUTPUT_DIR) -> Optional[Path]:
+    if not HAVE_PARQUET:
+        return None
+    stem = _paths(path)[0].stem
+    d = _snap_dir(stem, out_dir)
+    dst = d / f"{stem}@{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}.parquet"
+    _write_parquet(df, dst)
+    for old in list_snapshots(stem, out_dir)[:-keep] if keep > 0 else []:
+        old.unlink()
+    return dst
+
+def snapshot(path: PathLike, keep: int = SNAPSHOT_KEEP, out_dir: str = OUTPUT_DIR) -> Optional[Path]:
+    """현재 산출물(파일)을 버전 사본으로 남김 — 덮어쓰기 전 백업용."""
+    csv_p, pq_p = _paths(path)
+    if not (csv_p.exists() or pq_p.exists()):
+        return None
+    try:
+        return take_snapshot(read_artifact(path), csv_p, keep, out_dir)
+    except pd.errors.EmptyDataError:
+        return None
+
+def list_snapshots(stem: str, out_dir: str = OUTPUT_DIR) -> List[Path]:
+    return sorted(_snap_dir(stem, out_dir).glob(f"{stem}@*.parquet"))
+
+def read_snapshot(stem: str, version: Optional[str] = None, out_dir: str = OUTPUT_DIR) -> pd.DataFrame:
+    """version: '20250101T000000' 접두어(없으면 최신)."""
+    snaps = [p for p in list_snapshots(stem, out_dir) if version is None or p.stem.split("@", 1)[1].startswith(version)]
+    if not snaps:
+        raise FileNotFoundError(f"no snapshot: {stem}@{version or 'latest'}")
+    return pd.read_parquet(snaps[-1])
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("convert"); c.add_argument("paths", nargs="+")
+    s = sub.add_parser("snapshot"); s.add_argument("paths", nargs="+"); s.add_argument("--keep", type=int, default=SNAPSHOT_KEEP)
+    l = sub.add_parser("ls"); l.add_argument("stem")
+    a = ap.parse_args()
+    if not HAVE_PARQUET and a.cmd != "ls":
+        sys.exit("[ERR] pyarrow 필요")
+    if a.cmd == "convert":
+        for p in [x for pat in a.paths for x in (glob.glob(pat) or [pat])]:
+            try:
+                df = pd.read_csv(p, low_memory=False)
+            except (OSError, pd.errors.EmptyDataError) as e:
+                print(f"[SKIP] {p}: {type(e).__name__}"); continue
+            _write_parquet(df, _paths(p)[1])
+            print(f"[OK] {_paths(p)[1]} rows={len(df)}")
+    elif a.cmd == "snapshot":
+        for p in a.paths:
+            print(f"[OK] {snapshot(p, a.keep) or '(skip)'}")
+    else:
+        for p in list_snapshots(a.stem):
+            print(p, p.stat().st_size)
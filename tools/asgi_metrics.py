@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+# API 요청 계측 ASGI 미들웨어(app/main.py 에서 부착)
+#   - 라우트 템플릿(/player/{pid} 형태) × 메서드 × 상태코드 단위로 지연시간 고정 버킷 히스토그램
+#   - 라우트별 동시 처리 중(in-flight) 게이지, 요청/응답 바이트 합계
+#   - 캐시 적중 귀속: 요청 처리 중 note_cache(layer, source) 호출을 contextvar 로 현재 요청에 기록
+#     (app 메모리/Redis 캐시, player_intel_core 캐시, 외부 페치 async_fetch source)
+#   - /_metrics?format=prom (또는 Accept: text/plain) 에서 Prometheus text(0.0.4) 로 노출: render_prometheus() — 기본은 JSON
+#   - 느린 요청 샘플링 프로파일(옵트인): COGM_SLOW_PROFILE_MS=500 이면 500ms 를 넘긴 요청이 끝날 때까지
+#     전체 스레드 스택을 5ms 간격으로 샘플 → logs/perf/slow/<UTC>_<route>.folded (flamegraph.pl / speedscope 호환)
+#     ※ 동시 요청이 있으면 다른 요청의 스택도 섞일 수 있음(프로세스 단위 샘플링)
+import os, re, sys, time, threading, contextvars
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_MS = float(os.getenv("COGM_SLOW_PROFILE_MS", "0") or 0)
+SLOW_DIR = Path(os.getenv("COGM_SLOW_PROFILE_DIR", "logs/perf/slow"))
+SAMPLE_SEC = 0.005
+MAX_SLOW_FILES = int(os.getenv("COGM_SLOW_PROFILE_KEEP", "200"))
+
+_CUR: contextvars.ContextVar[Optional[Counter]] = contextvars.ContextVar("cogm_req_cache", default=None)
+
+def note_cache(layer: str, source: str) -> None:
+    """요청 처리 중 캐시 조회 결과 기록. source: hit|miss|stale|revalidated|network ... (요청 밖이면 무시)"""
+    c = _CUR.get()
+    if c is not None:
+        c[(layer, source)] += 1
+
+class _Hist:
+    __slots__ = ("counts", "sum", "n")
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.n = 0
+
+    def observe(self, v: float):
+        i = 0
+        while i < len(BUCKETS) and v > BUCKETS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.sum += v
+        self.n += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """버킷 상한 기준 근사 분위수."""
+        if not self.n:
+            return None
+        rank, acc = q * self.n, 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= rank:
+                return BUCKETS[i] if i < len(BUCKETS) else float("inf")
+        return float("inf")
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hist: Dict[Tuple[str, str, str], _Hist] = {}
+        self.inflight: Counter = Counter()
+        self.req_bytes: Counter = Counter()
+        self.resp_bytes: Counter = Counter()
+        self.cache: Counter = Counter()
+        self.slow_profiles = 0
+        self.started = time.time()
+
+    def begin(self, method: str, path_key: str):
+        with self.lock:
+            self.inflight[(method, path_key)] += 1
+
+    def end(self, method: str, begin_key: str, route: str, status: int, sec: float, nin: int, nout: int, cache: Counter):
+        with self.lock:
+            self.inflight[(method, begin_key)] -= 1
+            if not self.inflight[(method, begin_key)]:
+                del self.inflight[(method, begin_key)]
+            h = self.hist.get((method, route, str(status)))
+            if h is None:
+                h = self.hist[(method, route, str(status))] = _Hist()
+            h.observe(sec)
+            self.req_bytes[(method, route)] += nin
+            self.resp_bytes[(method, route)] += nout
+            for (layer, src), n in cache.items():
+                self.cache[(route, layer, src)] += n
+
+    def snapshot(self) -> List[dict]:
+        """라우트별 요약(JSON 용): count, p50/p95/p99(버킷 근사), mean."""
+        with self.lock:
+            agg: Dict[Tuple[str, str], _Hist] = {}
+            for (m, r, _), h in self.hist.items():
+                a = agg.setdefault((m, r), _Hist())
+                a.counts = [x + y for x, y in zip(a.counts, h.counts)]
+                a.sum += h.sum; a.n += h.n
+        return sorted(({"method": m, "route": r, "count": h.n, "mean_ms": round(1000 * h.sum / h.n, 2),
+                        "p50_s": h.quantile(0.5), "p95_s": h.quantile(0.95), "p99_s": h.quantile(0.99)}
+                       for (m, r), h in agg.items()), key=lambda x: -x["mean_ms"] * x["count"])
+
+REGISTRY = Registry()
+
+def _esc(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(**kw) -> str:
+    return "{" + ",".join(f'{k}="{_esc(v)}"' for k, v in kw.items()) + "}"
+
+def render_prometheus(reg: Registry = REGISTRY, extra: Optional[Dict[str, float]] = None) -> str:
+    """Prometheus text exposition. extra: {"metric_name": value} 추가 게이지/카운터."""
+    out: List[str] = []
+    with reg.lock:
+        out += ["# HELP cogm_http_request_duration_seconds Request latency by route template.",
+                "# TYPE cogm_http_request_duration_seconds histogram"]
+        for (m, r, s), h in sorted(reg.hist.items()):
+            acc = 0
+            for b, c in zip(BUCKETS, h.counts):
+                acc += c
+                out.append(f"cogm_http_request_duration_seconds_bucket{_labels(method=m, route=r, status=s, le=b)} {acc}")
+            out.append(f"cogm_http_request_duration_seconds_bucket{_labels(method=m, route=r, status=s, le='+Inf')} {h.n}")
+            out.append(f"cogm_http_request_duration_seconds_sum{_labels(method=m, route=r, status=s)} {h.sum:.6f}")
+            out.append(f"cogm_http_request_duration_seconds_count{_labels(method=m, route=r, status=s)} {h.n}")
+        out += ["# HELP cogm_http_requests_in_flight Requests currently being served.",
+                "# TYPE cogm_http_requests_in_flight gauge"]
+        for (m, p), n in sorted(reg.inflight.items()):
+            out.append(f"cogm_http_requests_in_flight{_labels(method=m, path=p)} {n}")
+        for name, cnt, desc in (("cogm_http_request_bytes_total", reg.req_bytes, "Request body bytes."),
+                                ("cogm_http_response_bytes_total", reg.resp_bytes, "Response body bytes.")):
+            out += [f"# HELP {name} {desc}", f"# TYPE {name} counter"]
+            for (m, r), n in sorted(cnt.items()):
+                out.append(f"{name}{_labels(method=m, route=r)} {n}")
+        out += ["# HELP cogm_http_cache_lookups_total Cache lookups attributed to the route that triggered them.",
+                "# TYPE cogm_http_cache_lookups_total counter"]
+        for (r, layer, src), n in sorted(reg.cache.items()):
+            out.append(f"cogm_http_cache_lookups_total{_labels(route=r, layer=layer, source=src)} {n}")
+        out += ["# TYPE cogm_slow_profiles_total counter", f"cogm_slow_profiles_total {reg.slow_profiles}",
+                "# TYPE cogm_process_start_time_seconds gauge", f"cogm_process_start_time_seconds {reg.started:.3f}"]
+    for k, v in (extra or {}).items():
+        out.append(f"{k} {v}")
+    return "\n".join(out) + "\n"
+
+# ---------- 느린 요청 샘플링 ----------
+class _SlowSampler:
+    """활성 창(느린 요청 진행 중)이 있을 때만 스택 샘플링 — 평소엔 스레드 대기만."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.windows: Dict[int, Counter] = {}
+        self.wake = threading.Event()
+        self._seq = 0
+        self._th = None
+
+    def open(self) -> int:
+        with self.lock:
+            self._seq += 1
+            self.windows[self._seq] = Counter()
+            if self._th is None:
+                self._th = threading.Thread(target=self._run, daemon=True, name="cogm-slow-sampler")
+                self._th.start()
+        self.wake.set()
+        return self._seq
+
+    def close(self, wid: int) -> Counter:
+        with self.lock:
+            c = self.windows.pop(wid, Counter())
+            if not self.windows:
+                self.wake.clear()
+        return c
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            self.wake.wait()
+            time.sleep(SAMPLE_SEC)
+            stacks = []
+            for tid, fr in sys._current_frames().items():
+                if tid == me:
+                    continue
+                parts = []
+                while fr is not None:
+                    co = fr.f_code
+                    parts.append(f"{os.path.basename(co.co_filename)}:{co.co_name}:{fr.f_lineno}")
+                    fr = fr.f_back
+                if parts:
+                    stacks.append(";".join(reversed(parts)))
+            with self.lock:
+                for c in self.windows.values():
+                    c.update(stacks)
+
+_SAMPLER = _SlowSampler()
+
+def _dump_slow(route: str, method: str, ms: float, samples: Counter) -> Optional[Path]:
+    if not samples:
+        return None
+    SLOW_DIR.mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_")[:60] or "root"
+    dst = SLOW_DIR / f"{stamp}_{int(ms)}ms_{method}_{slug}.folded"
+    with open(dst, "w", encoding="utf-8") as f:
+        f.write(f"# {method} {route} {ms:.1f}ms samples={sum(samples.values())} interval={SAMPLE_SEC}s\n")
+        for stack, n in samples.most_common():
+            f.write(f"{stack} {n}\n")
+    olds = sorted(SLOW_DIR.glob("*.folded"))
+    for p in olds[:-MAX_SLOW_FILES] if MAX_SLOW_FILES > 0 else []:
+        p.unlink(missing_ok=True)
+    return dst
+
+# ---------- 미들웨어 ----------
+def _route_of(scope) -> Optional[str]:
+    r = scope.get("route")
+    path = getattr(r, "path", None) or getattr(r, "path_format", None)
+    if path:
+        return path
+    ep = scope.get("endpoint")
+    return f"<{getattr(ep, '__name__', 'endpoint')}>" if ep is not None else None
+
+class MetricsMiddleware:
+    """순수 ASGI 미들웨어(BaseHTTPMiddleware 보다 오버헤드 작음, 스트리밍 응답 유지)."""
+    def __init__(self, app, registry: Registry = REGISTRY, slow_ms: float = SLOW_MS, skip=("/_metrics",)):
+        self.app = app
+        self.reg = registry
+        self.slow_ms = slow_ms
+        self.skip = set(skip)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in self.skip:
+            return await self.app(scope, receive, send)
+        method = scope.get("method", "GET")
+        # 진행 중 게이지는 라우팅 전이라 템플릿을 모름 → 최상위 경로 조각으로 묶음(카디널리티 제한)
+        begin_key = "/" + scope.get("path", "/").lstrip("/").split("/", 1)[0]
+        status, nin, nout = [500], [0], [0]
+        cache = Counter()
+        token = _CUR.set(cache)
+        t0 = time.perf_counter()
+        timer, win = None, {"done": False, "wid": None}
+        if self.slow_ms > 0:
+            lk = threading.Lock()
+            def _open():
+                with lk:                                          # 요청 종료와 경합 시 창을 열지 않음
+                    if not win["done"]:
+                        win["wid"] = _SAMPLER.open()
+            timer = threading.Timer(self.slow_ms / 1000.0, _open)
+            timer.daemon = True
+            timer.start()
+
+        async def _recv():
+            msg = await receive()
+            if msg["type"] == "http.request":
+                nin[0] += len(msg.get("body", b""))
+            return msg
+
+        async def _send(msg):
+            if msg["type"] == "http.response.start":
+                status[0] = msg["status"]
+            elif msg["type"] == "http.response.body":
+                nout[0] += len(msg.get("body", b""))
+            await send(msg)
+
+        self.reg.begin(method, begin_key)
+        try:
+            await self.app(scope, _recv, _send)
+        finally:
+            sec = time.perf_counter() - t0
+            _CUR.reset(token)
+            route = _route_of(scope) or ("<unmatched>" if status[0] == 404 else begin_key)
+            self.reg.end(method, begin_key, route, status[0], sec, nin[0], nout[0], cache)
+            if timer is not None:
+                timer.cancel()
+                with lk:
+                    win["done"] = True
+                if win["wid"] is not None:
+                    samples = _SAMPLER.close(win["wid"])
+                    try:
+                        if _dump_slow(route, method, sec * 1000.0, samples):
+                            with self.reg.lock:
+                                self.reg.slow_profiles += 1
+                    except OSError:
+                        pass
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+# 비동기 외부 페치 계층(API 전용)
+#   - keep-alive 커넥션 풀(httpx.AsyncClient; 미설치 시 urllib 을 스레드로 실행)
+#   - 네임스페이스별 동시성 제한(EXT_NS_LIMITS="news/rss=4,weather=2", 기본 EXT_NS_DEFAULT_LIMIT)
+#   - 동일 URL 동시 요청 합치기(in-flight coalescing)
+#   - stale-while-revalidate: TTL 지난 캐시는 즉시 반환 + 백그라운드 갱신(EXT_MAX_STALE_SEC 까지)
+#   - disk(tools.http_cache) 지정 시: 메모리 미스 → 디스크 조회(재시작 후 웜 스타트), 갱신은 ETag 조건부 요청
+# 반환 dict 형태는 기존 _ext_fetch 와 동일(source/cache_hit/status/fetched_at/ttl/text[, error, stale])
+import os, json, time, asyncio, hashlib
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import httpx  # 선택 의존성
+except Exception:
+    httpx = None
+
+DEFAULT_TIMEOUT = float(os.getenv("EXT_TIMEOUT_SEC", "10"))
+DEFAULT_NS_LIMIT = int(os.getenv("EXT_NS_DEFAULT_LIMIT", "8"))
+MAX_STALE_SEC = int(os.getenv("EXT_MAX_STALE_SEC", "86400"))
+
+def _parse_limits(spec: str) -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    for part in (spec or "").split(","):
+        k, _, v = part.partition("=")
+        if k.strip() and v.strip().isdigit():
+            out[k.strip()] = int(v)
+    return out
+
+def cache_key(url: str, headers: Optional[Dict[str, str]]) -> str:
+    return json.dumps({"url": url, "headers": headers or {}}, sort_keys=True)
+
+def _disk_key(key: str) -> str:
+    # 메모리 키(json) → 디스크 키(sha256); tools.http_cache.request_key 와 동일 규칙
+    return hashlib.sha256(key.encode()).hexdigest()
+
+class _LoopState:
+    """이벤트 루프마다 별도(클라이언트/세마포어/in-flight 는 루프에 묶임)."""
+    def __init__(self, timeout: float, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop
+        self.client = httpx.AsyncClient(timeout=timeout, follow_redirects=True,
+                                        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)) if httpx else None
+        self.sems: Dict[str, asyncio.Semaphore] = {}
+        self.inflight: Dict[str, asyncio.Task] = {}
+        self.bg: set = set()
+
+class AsyncFetcher:
+    def __init__(self, cache: Optional[Dict[str, Dict[str, Any]]] = None, timeout: float = DEFAULT_TIMEOUT,
+                 ns_limits: Optional[Dict[str, int]] = None, max_stale_sec: int = MAX_STALE_SEC,
+                 on_result: Optional[Callable[[str, bool], None]] = None, disk=None):
+        self.cache = cache if cache is not None else {}
+        self.disk = disk
+        self.timeout = timeout
+        self.ns_limits = ns_limits if ns_limits is not None else _parse_limits(os.getenv("EXT_NS_LIMITS", ""))
+        self.max_stale_sec = max_stale_sec
+        self.on_result = on_result
+        self._loops: Dict[int, _LoopState] = {}
+        self.stats = {"network": 0, "cache": 0, "disk": 0, "revalidated": 0, "stale": 0, "coalesced": 0, "error": 0}
+
+    # ----- 내부 -----
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        st = self._loops.get(id(loop))
+        if st is None or st.loop is not loop:
+            # 돌고 있지 않은(닫힌/멈춘) 루프의 상태는 정리 + 그 클라이언트는 닫음(테스트 클라이언트 등 루프 재생성 대비)
+            old = [v for k, v in self._loops.items() if k == id(loop) or v.loop is None or not v.loop.is_running()]
+            self._loops = {k: v for k, v in self._loops.items() if all(v is not o for o in old)}
+            st = self._loops[id(loop)] = _LoopState(self.timeout, loop)
+            for o in old:
+                if o.client is not None:
+                    t = asyncio.ensure_future(self._close_client(o.client))
+                    st.bg.add(t); t.add_done_callback(st.bg.discard)
+        return st
+
+    @staticmethod
+    async def _close_client(client):
+        try:
+            await client.aclose()
+        except Exception:
+            pass  # 이미 닫힌 루프에 묶인 커넥션은 정리 중 오류가 날 수 있음 — 풀은 닫힘 처리됨
+
+    def _sem(self, st: _LoopState, ns: str) -> asyncio.Semaphore:
+        sem = st.sems.get(ns)
+        if sem is None:
+            sem = st.sems[ns] = asyncio.Semaphore(self.ns_limits.get(ns, DEFAULT_NS_LIMIT))
+        return sem
+
+    def _touch(self, ns: str, ok: bool):
+        if self.on_result:
+            try:
+                self.on_result(ns, ok)
+            except Exception:
+                pass
+
+    async def _get(self, st: _LoopState, url: str, headers: Dict[str, str]):
+        if st.client is not None:
+            r = await st.client.get(url, headers=headers)
+            return r.status_code, r.content, {k.lower(): v for k, v in r.headers.items()}
+        from urllib.request import Request as _UrlRequest, urlopen
+        from urllib.error import HTTPError
+        def _blocking():
+            try:
+                with urlopen(_UrlRequest(url, headers=headers), timeout=self.timeout) as r:
+                    return getattr(r, "status", 200), r.read(), {k.lower(): v for k, v in r.headers.items()}
+            except HTTPError as e:
+                return e.code, e.read() or b"", {}
+        return await asyncio.to_thread(_blocking)
+
+    async def _disk_lookup(self, key: str):
+        if self.disk is None:
+            return None
+        try:
+            return await asyncio.to_thread(self.disk.lookup, _disk_key(key))
+        except Exception:
+            return None
+
+    async def _refresh(self, st: _LoopState, key: str, url: str, headers: Dict[str, str], ns: str) -> Dict[str, Any]:
+        dent = await self._disk_lookup(key)
+        req_h = dict(headers)
+        if dent is not None:
+            req_h.update(self.disk.conditional_headers(dent))
+        async with self._sem(st, ns):
+            now = time.time()
+            try:
+                status, body, rh = await self._get(st, url, req_h)
+            except Exception as e:
+                self.stats["error"] += 1
+                self._touch(ns, False)
+                return {"source": "error", "cache_hit": False, "status": 599, "error": f"{type(e).__name__}: {e}"}
+        if status == 304 and dent is not None:
+            # 변경 없음: 디스크 본문 재사용
+            text = dent["body"].decode("utf-8", errors="replace")
+            self.cache[key] = {"t0": now, "text": text, "status": dent["status"]}
+            await asyncio.to_thread(self.disk.revalidated, _disk_key(key))
+            self.stats["revalidated"] += 1
+            self._touch(ns, True)
+            return {"source": "revalidated", "cache_hit": True, "status": dent["status"], "fetched_at": now, "text": text}
+        if status >= 400:
+            self.stats["error"] += 1
+            self._touch(ns, False)
+            return {"source": "error", "cache_hit": False, "status": status, "error": f"HTTP {status}"}
+        text = body.decode("utf-8", errors="replace")
+        self.cache[key] = {"t0": now, "text": text, "status": status}
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(self.disk.store, _disk_key(key), url, ns, status, body,
+                                        rh.get("etag"), rh.get("last-modified"), rh.get("content-type"))
+            except Exception:
+                pass
+        self.stats["network"] += 1
+        self._touch(ns, True)
+        return {"source": "network", "cache_hit": False, "status": status, "fetched_at": now, "text": text}
+
+    def _coalesced(self, st: _LoopState, key: str, url: str, headers: Dict[str, str], ns: str) -> "asyncio.Task":
+        task = st.inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return task
+        task = asyncio.ensure_future(self._refresh(st, key, url, headers, ns))
+        st.inflight[key] = task
+        task.add_done_callback(lambda _t: st.inflight.pop(key, None))
+        return task
+
+    # ----- 공개 -----
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None, ttl_sec: int = 300, ns: str = "generic") -> Dict[str, Any]:
+        headers = headers or {}
+        key = cache_key(url, headers)
+        now = time.time()
+        st = self._state()
+        ent = self.cache.get(key)
+        if ent is None and self.disk is not None:
+            # 재시작 직후 등 메모리 미스 → 디스크(신선도 판단은 아래 공통 로직)
+            dent = await self._disk_lookup(key)
+            if dent is not None:
+                ent = self.cache[key] = {"t0": float(dent["fetched_at"]), "text": dent["body"].decode("utf-8", errors="replace"), "status": dent["status"]}
+                self.stats["disk"] += 1
+        if ent:
+            age = now - ent["t0"]
+            if age < ttl_sec:
+                self.stats["cache"] += 1
+                self._touch(ns, True)
+                return {"source": "cache", "cache_hit": True, "status": 200, "fetched_at": ent["t0"], "ttl": ttl_sec, "text": ent["text"]}
+            if age < ttl_sec + self.max_stale_sec:
+                # stale-while-revalidate: 바로 반환, 갱신은 백그라운드(중복 갱신은 합쳐짐)
+                t = self._coalesced(st, key, url, headers, ns)
+                st.bg.add(t); t.add_done_callback(st.bg.discard)
+                self.stats["stale"] += 1
+                return {"source": "cache_stale", "cache_hit": True, "stale": True, "status": 200, "fetched_at": ent["t0"], "ttl": ttl_sec, "text": ent["text"]}
+        r = await asyncio.shield(self._coalesced(st, key, url, headers, ns))
+        if r["source"] == "error" and ent:
+            # 네트워크 실패시 캐시 폴백
+            return {"source": "cache_fallback", "cache_hit": True, "status": r["status"], "error": r.get("error"), "fetched_at": ent["t0"], "ttl": ttl_sec, "text": ent["text"]}
+        return {**r, "ttl": ttl_sec}
+
+    async def aclose(self):
+        for st in list(self._loops.values()):
+            if st.client is not None:
+                try:
+                    await st.client.aclose()
+                except Exception:
+                    pass
+        self._loops.clear()
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+# MLB Stats API 대량 수집기(스크립트 전용, 동기 + 스레드 풀)
+#   - 워커 수 제한(MLB_WORKERS), 호스트별 토큰버킷(MLB_RATE 초당 요청, MLB_BURST)
+#   - 재시도: 예외/429/5xx 만, full-jitter 지수 백오프(+Retry-After 존중)
+#   - 진행 상황은 manifest.jsonl 에 키별로 추가 기록 → 중단 후 재실행 시 완료분 건너뜀
+#   - MLB_API_BASE 로 호스트 교체(로컬 스텁 서버 테스트용)
+#   - cache(tools.http_cache) 지정 시 디스크 캐시 경유
+import os, json, time, random, threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+from tools.http_cache import request_key
+
+WORKERS = int(os.getenv("MLB_WORKERS", "16"))
+RATE_PER_HOST = float(os.getenv("MLB_RATE", "10"))
+BURST = int(os.getenv("MLB_BURST", "0")) or None
+API_BASE = os.getenv("MLB_API_BASE", "").rstrip("/")
+STATSAPI = "https://statsapi.mlb.com"
+TIMEOUT = 30; RETRIES = 4; BACKOFF = 0.6; MAX_BACKOFF = 30.0
+
+def rebase(url: str) -> str:
+    """statsapi 호스트를 MLB_API_BASE 로 교체(미설정 시 그대로)."""
+    if API_BASE and url.startswith(STATSAPI):
+        return API_BASE + url[len(STATSAPI):]
+    return url
+
+class FetchError(RuntimeError):
+    def __init__(self, url: str, status: Optional[int], msg: str):
+        super().__init__(f"GET fail: {url} :: {msg}")
+        self.url, self.status = url, status
+
+class TokenBucket:
+    """초당 rate 개, 최대 burst 개까지 누적. acquire 는 토큰이 생길 때까지 대기."""
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = max(rate, 1e-6)
+        self.capacity = float(burst or max(1, int(rate)))
+        self.tokens = self.capacity
+        self.t = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.t) * self.rate)
+                self.t = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return waited
+                wait = (1.0 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+class Manifest:
+    """키별 처리 결과를 JSONL 로 추가 기록(마지막 기록 우선). legacy: 예전 seen_games.txt(완료 키 목록)."""
+    def __init__(self, path: Path, legacy: Optional[Path] = None):
+        self.path = Path(path)
+        self.done: set = set()
+        self.failed: Dict[str, str] = {}
+        self.lock = threading.Lock()
+        if legacy is not None and Path(legacy).exists():
+            self.done.update(x.strip() for x in Path(legacy).read_text().splitlines() if x.strip())
+        if self.path.exists():
+            for line in self.path.read_text(encoding="utf-8").splitlines():
+                try:
+                    r = json.loads(line)
+                except ValueError:
+                    continue                                      # 중단으로 잘린 마지막 줄
+                self._apply(str(r.get("key")), bool(r.get("ok")), r.get("error"))
+
+    def _apply(self, key: str, ok: bool, error: Optional[str]):
+        if ok:
+            self.done.add(key); self.failed.pop(key, None)
+        elif key not in self.done:
+            self.failed[key] = error or "error"
+
+    def pending(self, keys: Iterable[str]) -> list:
+        return [k for k in keys if str(k) not in self.done]
+
+    def mark(self, key: str, ok: bool = True, **info):
+        rec = {"key": str(key), "ok": ok, "ts": int(time.time()), **info}
+        with self.lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                f.flush()
+            self._apply(str(key), ok, info.get("error"))
+
+class BulkFetcher:
+    def __init__(self, workers: int = WORKERS, rate: float = RATE_PER_HOST, burst: Optional[int] = BURST,
+                 retries: int = RETRIES, backoff: float = BACKOFF, timeout: float = TIMEOUT,
+                 cache=None, ns: str = "statsapi", ttl: Optional[int] = None):
+        self.workers, self.rate, self.burst = workers, rate, burst
+        self.retries, self.backoff, self.timeout = retries, backoff, timeout
+        self.cache, self.ns, self.ttl = cache, ns, ttl
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = {"requests": 0, "retries": 0, "errors": 0, "cache": 0, "throttled_sec": 0.0}
+
+    def _session(self) -> requests.Session:
+        s = getattr(self._local, "session", None)
+        if s is None:
+            s = self._local.session = requests.Session()
+        return s
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc
+        with self._lock:
+            b = self._buckets.get(host)
+            if b is None:
+                b = self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return b
+
+    def _bump(self, k: str, v=1):
+        with self._lock:
+            self.stats[k] += v
+
+    def _once(self, url: str) -> Tuple[int, bytes, Dict[str, str]]:
+        if self.cache is not None:
+            ent = self.cache.lookup(request_key(url), with_body=False)
+            if ent is not None and ent.age() < self.cache.ttl_for(self.ns, self.ttl):
+                self._bump("cache")                               # 신선한 디스크 사본: 토큰 소비 없음
+            else:
+                self._bump("throttled_sec", self._bucket(url).acquire())
+                self._bump("requests")
+            r = self.cache.get(url, ns=self.ns, ttl=self.ttl, timeout=self.timeout, session=self._session())
+            return r["status"], r["body"], {}
+        self._bump("throttled_sec", self._bucket(url).acquire())
+        self._bump("requests")
+        r = self._session().get(url, timeout=self.timeout)
+        return r.status_code, r.content, {k.lower(): v for k, v in r.headers.items()}
+
+    def get_json(self, url: str) -> Any:
+        url = rebase(url)
+        last, status = "", None
+        for i in range(self.retries):
+            try:
+                status, body, h = self._once(url)
+                if status < 400:
+                    return json.loads(body.decode("utf-8"))
+                last = f"HTTP {status}"
+                if status != 429 and status < 500:
+                    break                                         # 4xx 는 재시도 무의미
+                ra = h.get("retry-after", "")
+                delay = float(ra) if ra.replace(".", "", 1).isdigit() else None
+            except (requests.RequestException, OSError, ValueError) as e:
+                last, status, delay = repr(e), None, None
+            if i + 1 < self.retries:
+                self._bump("retries")
+                time.sleep(delay if delay is not None else random.uniform(0, min(MAX_BACKOFF, self.backoff * (2 ** i))))
+        self._bump("errors")
+        raise FetchError(url, status, last)
+
+    def run(self, items: Iterable[Any], fn: Callable[[Any], Any], key: Callable[[Any], str] = str,
+            manifest: Optional[Manifest] = None) -> Iterator[Tuple[Any, Any, Optional[str]]]:
+        """items 를 워커 풀로 처리, 완료 순서대로 (item, result, error) 반환.
+        manifest 가 있으면 완료 키는 건너뛰고, 실패는 기록(성공 기록은 호출 측이 결과 저장 후 mark)."""
+        todo = [it for it in items if manifest is None or str(key(it)) not in manifest.done]
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as ex:
+            futs = {ex.submit(fn, it): it for it in todo}
+            for fut in as_completed(futs):
+                it = futs[fut]
+                try:
+                    yield it, fut.result(), None
+                except Exception as e:
+                    err = str(e) or type(e).__name__
+                    if manifest is not None:
+                        manifest.mark(key(it), False, error=err)
+                    yield it, None, err
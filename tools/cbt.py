@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# CBT(사치세) 기준선 테이블 — pipeline/payroll_sim.py 와 API(시나리오 플래너 등)가 같은 값을 쓰도록 분리
+#   - data/cbt_thresholds.csv|json 이 있으면 그것(year/yearID, threshold), 없으면 기본 테이블
+#   - 테이블 범위 밖 연도는 가장 가까운 연도 값(미래 연도 = 마지막 기준선 유지)
+#   - flat_tax: 초과분 × 고정세율(예전 payroll_sim.py 의 단순 규칙)
+#   - tax_matrix: 실제 CBA 규칙 — 연속 초과 연수(반복 위반)별 기본세율 + 초과 구간별 추가세(surcharge)
+#     (팀 T × 연도 Y) 배열을 한 번에 계산. 연도 축만 루프(연속 초과 연수는 전년에 의존), 팀 축은 벡터
+#     한 해라도 기준선 아래면 연속 연수 초기화(= 다음 초과는 첫 위반 세율)
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_THRESHOLDS: Dict[int, float] = dict(zip(
+    range(2003, 2026),
+    [117e6, 120e6, 128e6, 136e6, 148e6, 155e6, 162e6, 170e6, 178e6, 178e6, 189e6, 189e6,
+     189e6, 189e6, 195e6, 206e6, 208e6, 210e6, 210e6, 230e6, 233e6, 237e6, 241e6]))
+
+def threshold_file(root: Path = None) -> Optional[Path]:
+    root = Path(root) if root else Path.cwd()
+    return next((p for p in [root/'data'/'cbt_thresholds.csv', root/'data'/'cbt_thresholds.json'] if p.exists()), None)
+
+def load_table(root: Path = None) -> pd.DataFrame:
+    """year, threshold 데이터프레임."""
+    f = threshold_file(root)
+    if f is None:
+        return pd.DataFrame({'year': list(DEFAULT_THRESHOLDS), 'threshold': list(DEFAULT_THRESHOLDS.values())})
+    if str(f).endswith('.csv'):
+        cbt = pd.read_csv(f)
+    else:
+        cbt = pd.DataFrame(json.loads(f.read_text()))
+    return cbt.rename(columns={'yearID': 'year'})
+
+def thresholds(years: Iterable[int], root: Path = None, override: Dict[int, float] = None) -> Dict[int, float]:
+    """연도 → 기준선. override 가 우선, 범위 밖 연도는 가장 가까운 연도 값."""
+    t = load_table(root).dropna(subset=['threshold'])
+    table = {int(y): float(v) for y, v in zip(t['year'], t['threshold'])} or dict(DEFAULT_THRESHOLDS)
+    out = {}
+    for y in years:
+        y = int(y)
+        if override and y in override:
+            out[y] = float(override[y])
+        elif y in table:
+            out[y] = table[y]
+        else:
+            out[y] = table[min(table, key=lambda k: (abs(k - y), -k))]
+    return out
+
+FLAT_TAX_RATE = 0.20   # payroll_sim.py 와 같은 단순 고정세율
+
+def flat_tax(payroll, threshold, rate: float = FLAT_TAX_RATE):
+    """기준선 초과분 × 고정세율. 스칼라/NumPy 배열 모두(브로드캐스트)."""
+    return rate * np.clip(np.asarray(payroll, dtype=float) - np.asarray(threshold, dtype=float), 0.0, None)
+
+@dataclass(frozen=True)
+class TaxRules:
+    """base: 연속 초과 1·2·3…년차 기본세율(마지막 값이 이후 계속).
+    tiers: (초과액 하한, 첫 위반 추가세율, 반복 위반 추가세율) — 하한~다음 하한 구간 금액에만 적용."""
+    base: Tuple[float, ...]
+    tiers: Tuple[Tuple[float, float, float], ...] = ()
+
+# CBA 시기별 규칙(연도 하한 → 규칙). 2003~2011 은 구간 추가세 없음
+TAX_ERAS: List[Tuple[int, TaxRules]] = [
+    (2003, TaxRules(base=(0.225, 0.30, 0.40))),
+    (2012, TaxRules(base=(0.175, 0.30, 0.40, 0.50))),
+    (2017, TaxRules(base=(0.20, 0.30, 0.50), tiers=((20e6, 0.12, 0.12), (40e6, 0.425, 0.45)))),
+    (2022, TaxRules(base=(0.20, 0.30, 0.50), tiers=((20e6, 0.12, 0.12), (40e6, 0.425, 0.425), (60e6, 0.60, 0.60)))),
+]
+
+def rules_for(year: int) -> TaxRules:
+    """연도 → 규칙. 첫 시기 이전은 첫 시기, 미래 연도는 마지막 CBA 유지."""
+    out = TAX_ERAS[0][1]
+    for y0, r in TAX_ERAS:
+        if int(year) >= y0:
+            out = r
+    return out
+
+def offender_streak(over: np.ndarray, years: Sequence[int] = None, prior: Optional[np.ndarray] = None) -> np.ndarray:
+    """(T, Y) 초과 여부 → 연속 초과 연수(초과 아닌 칸은 0). prior (T,): 첫 연도 직전까지의 연속 연수.
+    years 가 1년 넘게 비면(연도 누락) 연속 연수 초기화."""
+    over = np.atleast_2d(np.asarray(over, dtype=bool))
+    T, Y = over.shape
+    run = np.zeros(T, dtype=int) if prior is None else np.broadcast_to(np.asarray(prior, dtype=int), (T,)).copy()
+    gap = np.zeros(Y, dtype=bool)
+    if years is not None and Y > 1:
+        gap[1:] = np.diff(np.asarray(years, dtype=int)) != 1
+    out = np.zeros((T, Y), dtype=int)
+    for j in range(Y):
+        if gap[j]:
+            run[:] = 0
+        run = np.where(over[:, j], run + 1, 0)
+        out[:, j] = run
+    return out
+
+def tax_matrix(payroll, threshold, years: Sequence[int], prior_streak=None,
+               rules: Optional[TaxRules] = None) -> Dict[str, np.ndarray]:
+    """payroll (T, Y), threshold (Y,) 또는 (T, Y) — NaN 기준선은 과세 없음. years (Y,) 로 시기별 규칙 선택
+    (rules 를 주면 전 연도 고정). 반환 (T, Y): over, streak, base_rate, surcharge, tax, rate(실효세율), tier
+    (0 = 기준선 이하, 1 = 기본, 2.. = 추가세 구간)."""
+    P = np.atleast_2d(np.asarray(payroll, dtype=float))
+    thr = np.broadcast_to(np.asarray(threshold, dtype=float), P.shape)
+    years = [int(y) for y in years]
+    over = np.where(np.isnan(thr), 0.0, np.clip(P - np.nan_to_num(thr), 0.0, None))
+    streak = offender_streak(over > 0, years, prior_streak)
+    base_rate = np.zeros(P.shape)
+    surcharge = np.zeros(P.shape)
+    tier = (over > 0).astype(int)
+    era = [rules or rules_for(y) for y in years]
+    for r in dict.fromkeys(era):
+        cols = [j for j, e in enumerate(era) if e is r]
+        o, st = over[:, cols], streak[:, cols]
+        b = np.asarray(r.base, dtype=float)
+        base_rate[:, cols] = np.where(st > 0, b[np.clip(st, 1, len(b)) - 1], 0.0)
+        los = [t[0] for t in r.tiers] + [np.inf]
+        for k, (lo, first, repeat) in enumerate(r.tiers):
+            amt = np.clip(o - lo, 0.0, los[k + 1] - lo)
+            surcharge[:, cols] += amt * np.where(st > 1, repeat, first)
+            tier[:, cols] += (o > lo).astype(int)
+    tax = base_rate * over + surcharge
+    rate = np.divide(tax, over, out=np.zeros_like(tax), where=over > 0)
+    return {"over": over, "streak": streak, "base_rate": base_rate, "surcharge": surcharge,
+            "tax": tax, "rate": rate, "tier": tier}
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# 계약 가치 평가 엔진(NumPy, 계약 × 연도 행렬)
+#   - to_matrix: 연도 길이가 다른 계약들을 (C, Y) 배열 + mask 로 패딩
+#   - npv: 연 단위 할인(start=1: 첫 해부터 할인, start=0: 첫 해는 현재가치 그대로)
+#   - evaluate: 결정론 평가(value/surplus/NPV/ROI), $/WAR 연 성장·WAR 신뢰계수 반영
+#   - simulate: 몬테카를로 — 선수별 WAR 경로(선수 공통 충격 + 연도 충격) × 리그 공통 $/WAR 경로(곱셈 랜덤워크)
+#     → 계약별 NPV 서플러스 분포(평균/표준편차/분위수/양수 확률). 추첨은 청크 단위라 메모리 상한 고정
+#   200+ 오퍼 × 5,000 추첨도 한 번 호출로 평가(루프는 청크 단위만)
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_DPW = 9_000_000.0
+PCTS = (5, 25, 50, 75, 95)
+_CHUNK_CELLS = 4_000_000           # 청크당 draws × C × Y 원소 수 상한(float64 ≈ 32MB)
+
+def discount(n_years: int, rate: float, start: int = 1) -> np.ndarray:
+    return (1.0 + rate) ** -np.arange(start, start + n_years, dtype=float)
+
+def npv(values: Sequence[float], rate: float, start: int = 1) -> float:
+    v = np.asarray(values, dtype=float)
+    return float(v @ discount(len(v), rate, start)) if v.size else 0.0
+
+def to_matrix(rows: Sequence[Sequence[float]], fill: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """[[y1, y2, ...], ...] → (C, Y) 배열, (C, Y) bool mask."""
+    y = max((len(r) for r in rows), default=0)
+    out = np.full((len(rows), y), fill, dtype=float)
+    mask = np.zeros((len(rows), y), dtype=bool)
+    for i, r in enumerate(rows):
+        out[i, :len(r)] = r
+        mask[i, :len(r)] = True
+    return out, mask
+
+def dpw_path(n_years: int, dpw: float = DEFAULT_DPW, growth: float = 0.0) -> np.ndarray:
+    return dpw * (1.0 + growth) ** np.arange(n_years, dtype=float)
+
+def evaluate(salary: np.ndarray, war: np.ndarray, dpw: float = DEFAULT_DPW, rate: float = 0.08, start: int = 1,
+             dpw_growth: float = 0.0, war_confidence: float = 1.0, mask: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """결정론 평가. 입력 (C, Y) → 연도별 value/surplus (C, Y) 와 계약별 합계/NPV (C,)."""
+    salary = np.atleast_2d(np.asarray(salary, dtype=float))
+    war = np.atleast_2d(np.asarray(war, dtype=float))
+    if mask is None:
+        mask = np.ones(salary.shape, dtype=bool)
+    dpw_y = dpw_path(salary.shape[1], dpw, dpw_growth)
+    value = np.where(mask, war * dpw_y * war_confidence, 0.0)
+    salary = np.where(mask, salary, 0.0)
+    disc = discount(salary.shape[1], rate, start)
+    tot_s, tot_v = salary.sum(1), value.sum(1)
+    npv_s, npv_v = salary @ disc, value @ disc
+    return {"dpw": dpw_y, "value": value, "surplus": value - salary,
+            "salary_total": tot_s, "value_total": tot_v, "surplus_total": tot_v - tot_s,
+            "war_total": np.where(mask, war, 0.0).sum(1),
+            "npv_salary": npv_s, "npv_value": npv_v, "npv_surplus": npv_v - npv_s,
+            "roi": np.divide(tot_v, tot_s, out=np.zeros_like(tot_v), where=tot_s > 0)}
+
+def simulate(salary: np.ndarray, war: np.ndarray, mask: Optional[np.ndarray] = None, dpw: float = DEFAULT_DPW,
+             rate: float = 0.08, start: int = 1, draws: int = 2000, war_sd: float = 0.35, war_sd_abs: float = 0.5,
+             war_rho: float = 0.6, age_sd_growth: float = 0.10, dpw_growth: float = 0.03, dpw_vol: float = 0.08,
+             seed: Optional[int] = 0, pcts: Sequence[int] = PCTS, keep_draws: bool = False) -> Dict[str, np.ndarray]:
+    """WAR·$/WAR 불확실성 몬테카를로.
+    WAR_t = proj_t + sd_t·(ρ·z_player + √(1-ρ²)·z_t),  sd_t = (war_sd·|proj_t| + war_sd_abs)·(1 + age_sd_growth·t)
+    $/WAR_t = dpw·Π(1 + growth + vol·ε)  (모든 계약에 공통 — 시장 충격은 보드 전체에 같이 작용)
+    반환: 계약별 (C,) mean/std/prob_positive, (len(pcts), C) 분위수, 원하면 (draws, C) npv_surplus."""
+    salary = np.atleast_2d(np.asarray(salary, dtype=float))
+    war = np.atleast_2d(np.asarray(war, dtype=float))
+    C, Y = salary.shape
+    if mask is None:
+        mask = np.ones((C, Y), dtype=bool)
+    rng = np.random.default_rng(seed)
+    disc = discount(Y, rate, start)
+    m = mask.astype(float)
+    npv_sal = (salary * m) @ disc                                 # 연봉은 계약상 확정
+    sd = (war_sd * np.abs(war) + war_sd_abs) * (1.0 + age_sd_growth * np.arange(Y))
+    a, b = war_rho, np.sqrt(max(0.0, 1.0 - war_rho ** 2))
+    out = np.empty((draws, C))
+    step = max(1, _CHUNK_CELLS // max(1, C * Y))
+    for lo in range(0, draws, step):
+        n = min(step, draws - lo)
+        w = rng.standard_normal((n, C, Y))
+        w *= b
+        w += a * rng.standard_normal((n, C, 1))
+        w *= sd
+        w += war                                                  # (n, C, Y) WAR 경로
+        g = 1.0 + dpw_growth + dpw_vol * rng.standard_normal((n, Y))
+        g[:, 0] = 1.0                                             # 첫 해 $/WAR 은 현재 시장가
+        d = dpw * np.cumprod(g, axis=1)                           # (n, Y)
+        w *= m
+        out[lo:lo + n] = np.matmul(w, (d * disc)[:, :, None])[:, :, 0] - npv_sal
+    res = {"npv_salary": npv_sal, "mean": out.mean(0), "std": out.std(0),
+           "prob_positive": (out > 0).mean(0), "pcts": np.percentile(out, pcts, axis=0), "pct_levels": np.asarray(pcts)}
+    if keep_draws:
+        res["draws"] = out
+    return res
+
+def summarize(sim: Dict[str, np.ndarray], i: int, ndigits: int = 2) -> Dict[str, float]:
+    """simulate 결과에서 계약 i 의 요약 dict(JSON 응답용)."""
+    d = {"npv_surplus_mean": round(float(sim["mean"][i]), ndigits), "npv_surplus_std": round(float(sim["std"][i]), ndigits),
+         "prob_positive": round(float(sim["prob_positive"][i]), 4)}
+    for p, v in zip(sim["pct_levels"], sim["pcts"][:, i]):
+        d[f"p{int(p)}"] = round(float(v), ndigits)
+    return d
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# 멀티팀 모의 드래프트 시뮬레이터(보드 = 배열, 팀별 점수 행렬, 시뮬레이션 축 벡터화)
+#   - base (P,): 후보 보드 점수(툴 가중합), team_bonus (T, P): 팀 고정 가점(손잡이/선호 툴)
+#   - pos_idx (P,), team_need (T, NPOS): 포지션 니즈 가점 need_bonus — 그 팀이 해당 포지션을 뽑으면 이후 가점 소멸
+#   - 시뮬레이션마다 선호 잡음: 보드 공통 board_sd(컨센서스 흔들림) + 팀별 team_sd(팀 스카우팅 차이)
+#   - 픽 순서: snake/고정 × rounds. 픽마다 (sims,) argmax 한 번 — 파이썬 루프는 픽 수만큼
+#   - 결과: 우리 팀 각 픽 시점 후보별 생존 확률, 우리 보드 기준 지명 확률
+#   - 드래프트 당일: taken(이미 지명된 후보), start_pick 부터 이어서 시뮬레이션
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+_CHUNK_CELLS = 6_000_000            # 청크당 sims × T × P 상한(float32 ≈ 24MB)
+
+def pick_order(teams: Sequence[str], rounds: int, snake: bool = True) -> List[str]:
+    out = []
+    for r in range(rounds):
+        out.extend(reversed(teams) if (snake and r % 2) else teams)
+    return list(out)
+
+def board_scores(tool_matrix: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """(P, K) 툴(20~80) × (K,) 가중 → (P,)."""
+    return np.asarray(tool_matrix, float) @ np.asarray(weights, float)
+
+def simulate(base: np.ndarray, team_bonus: np.ndarray, pos_idx: np.ndarray, team_need: np.ndarray, need_bonus: float,
+             order: Sequence[int], our_team: int, sims: int = 2000, team_sd: float = 3.0, board_sd: float = 2.0,
+             taken: Sequence[int] = (), start_pick: int = 1, seed: Optional[int] = 0) -> Dict[str, np.ndarray]:
+    """order: 전체 픽의 팀 인덱스(1번 픽부터). 우리 픽은 잡음 없는 우리 보드(base + 우리 팀 가점)로 지명.
+    반환: our_picks (K,) 픽 번호, available (K, P) 생존 확률, chosen (K, P) 우리 지명 확률."""
+    base = np.asarray(base, np.float32)
+    bonus = np.asarray(team_bonus, np.float32)
+    pos_idx = np.asarray(pos_idx, int)
+    need = np.asarray(team_need, bool)
+    T, P = bonus.shape
+    rng = np.random.default_rng(seed)
+    picks = list(range(start_pick - 1, len(order)))
+    ours = [k for k in picks if order[k] == our_team]
+    if not ours:
+        return {"our_picks": np.zeros(0, int), "available": np.zeros((0, P)), "chosen": np.zeros((0, P))}
+    picks = [k for k in picks if k <= ours[-1]]                 # 마지막 우리 픽 이후는 볼 필요 없음
+    teams_used = sorted({order[k] for k in picks} - {our_team})
+    slot = {t: i for i, t in enumerate(teams_used)}
+    avail = np.zeros((len(ours), P))
+    chosen = np.zeros((len(ours), P))
+    step = max(1, _CHUNK_CELLS // max(1, (len(teams_used) + 1) * P))
+    for lo in range(0, sims, step):
+        n = min(step, sims - lo)
+        rows = np.arange(n)
+        # 시뮬레이션별 선호 = 보드 + 팀 가점 + 보드 공통 잡음 + 팀별 잡음
+        pref = rng.standard_normal((n, len(teams_used), P), dtype=np.float32)
+        pref *= team_sd
+        pref += board_sd * rng.standard_normal((n, 1, P), dtype=np.float32)
+        pref += base + bonus[teams_used]
+        mine = base + bonus[our_team]
+        filled = np.zeros((n, T, need.shape[1]), dtype=bool)
+        gone = np.zeros((n, P), dtype=bool)
+        gone[:, list(taken)] = True
+        j = 0
+        for k in picks:
+            t = order[k]
+            s = pref[:, slot[t]] + 0.0 if t != our_team else np.repeat(mine[None, :], n, 0)
+            if need_bonus and need[t].any():
+                s += need_bonus * (need[t][pos_idx] & ~filled[:, t][:, pos_idx])   # 채운 포지션은 가점 없음
+            s[gone] = -np.inf
+            live = ~np.isneginf(s).all(1)           # 후보가 다 지명된 시뮬레이션은 이 픽 없음(argmax 0 오인 방지)
+            r, pk = rows[live], s[live].argmax(1)
+            if t == our_team:
+                avail[j] += (~gone).sum(0)
+                np.add.at(chosen[j], pk, 1.0)
+                j += 1
+            gone[r, pk] = True
+            filled[r, t, pos_idx[pk]] = True
+    return {"our_picks": np.asarray(ours) + 1, "available": avail / sims, "chosen": chosen / sims}
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+# 디스크 HTTP 캐시(스크립트/ API 공용)
+#   - 본문은 내용 주소(sha256) blob 으로 zlib 압축 저장 → 같은 응답은 1벌만
+#   - 인덱스는 SQLite(WAL) 한 파일: 여러 프로세스(CLI + uvicorn 워커)가 동시에 사용
+#   - 쓰기 순서: blob 임시파일 → fsync → os.replace → 인덱스 upsert(트랜잭션)  ※ 인덱스에 보이면 blob 은 항상 존재
+#   - 만료 후에는 ETag/Last-Modified 조건부 요청(304 → 본문 재사용, 재다운로드 없음)
+#   - 네임스페이스별 TTL(HTTP_CACHE_TTLS="statsapi=1209600,weather=3600"), 총 용량 상한 초과 시 LRU 축출
+import os, json, time, zlib, sqlite3, hashlib, threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+CACHE_DIR = os.getenv("HTTP_CACHE_DIR", "output/cache/http")
+MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+DEFAULT_TTLS: Dict[str, int] = {
+    "statsapi": 14 * 24 * 3600,
+    "lahman": 0,              # 항상 재검증(변경 없으면 304)
+    "weather": 3600,
+    "news/rss": 600,
+}
+
+def _parse_ttls(spec: str) -> Dict[str, int]:
+    out = dict(DEFAULT_TTLS)
+    for part in (spec or "").split(","):
+        k, _, v = part.partition("=")
+        if k.strip() and v.strip().isdigit():
+            out[k.strip()] = int(v)
+    return out
+
+def request_key(url: str, headers: Optional[Dict[str, str]] = None) -> str:
+    return hashlib.sha256(json.dumps({"url": url, "headers": headers or {}}, sort_keys=True).encode()).hexdigest()
+
+class CacheEntry(dict):
+    """dict 기반(직렬화 쉬움): key,url,ns,status,etag,last_modified,fetched_at,body_sha,size + body(bytes)"""
+    def age(self) -> float:
+        return time.time() - float(self["fetched_at"])
+
+class HttpCache:
+    def __init__(self, root: str = CACHE_DIR, max_bytes: int = MAX_BYTES, ttls: Optional[Dict[str, int]] = None):
+        self.root = Path(root)
+        self.blobs = self.root / "blobs"
+        self.blobs.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttls = ttls if ttls is not None else _parse_ttls(os.getenv("HTTP_CACHE_TTLS", ""))
+        self._local = threading.local()
+        self._stores_since_check = 0
+        with self._db() as db:
+            db.executescript("""
+            CREATE TABLE IF NOT EXISTS entries(
+                key TEXT PRIMARY KEY, url TEXT, ns TEXT, status INT,
+                etag TEXT, last_modified TEXT, fetched_at REAL, accessed_at REAL,
+                body_sha TEXT, size INT, content_type TEXT
+            );
+            CREATE INDEX IF NOT EXISTS ix_entries_accessed ON entries(accessed_at);
+            CREATE INDEX IF NOT EXISTS ix_entries_body ON entries(body_sha);
+            """)
+
+    # ----- 내부 -----
+    def _db(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.root / "index.sqlite", timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _blob_path(self, sha: str) -> Path:
+        return self.blobs / sha[:2] / f"{sha}.z"
+
+    def _write_blob(self, body: bytes) -> Tuple[str, int]:
+        sha = hashlib.sha256(body).hexdigest()
+        fp = self._blob_path(sha)
+        if not fp.exists():
+            fp.parent.mkdir(parents=True, exist_ok=True)
+            tmp = fp.with_name(f".{fp.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp, "wb") as f:
+                f.write(zlib.compress(body, 6))
+                f.flush(); os.fsync(f.fileno())
+            os.replace(tmp, fp)
+        return sha, fp.stat().st_size
+
+    def ttl_for(self, ns: str, ttl: Optional[int] = None) -> int:
+        if ttl is not None:
+            return int(ttl)
+        return self.ttls.get(ns, self.ttls.get(ns.split("/")[0], 300))
+
+    # ----- 공개 -----
+    def lookup(self, key: str, with_body: bool = True) -> Optional[CacheEntry]:
+        row = self._db().execute("SELECT * FROM entries WHERE key=?", (key,)).fetchone()
+        if row is None:
+            return None
+        ent = CacheEntry(dict(row))
+        if with_body:
+            try:
+                ent["body"] = zlib.decompress(self._blob_path(ent["body_sha"]).read_bytes())
+            except (OSError, zlib.error):
+                self._db().execute("DELETE FROM entries WHERE key=?", (key,))
+                return None
+        self._db().execute("UPDATE entries SET accessed_at=? WHERE key=?", (time.time(), key))
+        return ent
+
+    def store(self, key: str, url: str, ns: str, status: int, body: bytes,
+              etag: Optional[str] = None, last_modified: Optional[str] = None, content_type: Optional[str] = None) -> CacheEntry:
+        sha, size = self._write_blob(body)
+        now = time.time()
+        self._db().execute(
+            "INSERT OR REPLACE INTO entries(key,url,ns,status,etag,last_modified,fetched_at,accessed_at,body_sha,size,content_type)"
+            " VALUES(?,?,?,?,?,?,?,?,?,?,?)",
+            (key, url, ns, status, etag, last_modified, now, now, sha, size, content_type))
+        self._maybe_evict()
+        return CacheEntry(key=key, url=url, ns=ns, status=status, etag=etag, last_modified=last_modified,
+                          fetched_at=now, body_sha=sha, size=size, content_type=content_type, body=body)
+
+    def revalidated(self, key: str):
+        """304 응답: 본문 유지, 신선도만 갱신."""
+        now = time.time()
+        self._db().execute("UPDATE entries SET fetched_at=?, accessed_at=? WHERE key=?", (now, now, key))
+
+    @staticmethod
+    def conditional_headers(ent: Optional[CacheEntry]) -> Dict[str, str]:
+        h: Dict[str, str] = {}
+        if ent:
+            if ent.get("etag"):
+                h["If-None-Match"] = ent["etag"]
+            if ent.get("last_modified"):
+                h["If-Modified-Since"] = ent["last_modified"]
+        return h
+
+    def _maybe_evict(self):
+        # blob 은 공유되므로 고유 blob 기준 합계; 초과 시 오래 안 쓴 항목부터 삭제(합계 계산은 64회 저장마다)
+        self._stores_since_check += 1
+        if self._stores_since_check < 64:
+            return
+        self._stores_since_check = 0
+        db = self._db()
+        total = db.execute("SELECT COALESCE(SUM(size),0) FROM (SELECT DISTINCT body_sha, size FROM entries)").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            for row in db.execute("SELECT key, body_sha, size FROM entries ORDER BY accessed_at").fetchall():
+                if total <= self.max_bytes * 0.9:
+                    break
+                db.execute("DELETE FROM entries WHERE key=?", (row["key"],))
+                if db.execute("SELECT 1 FROM entries WHERE body_sha=? LIMIT 1", (row["body_sha"],)).fetchone() is None:
+                    try:
+                        self._blob_path(row["body_sha"]).unlink()
+                    except OSError:
+                        pass
+                    total -= row["size"]
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        r = self._db().execute("SELECT COUNT(*) n, COALESCE(SUM(size),0) bytes FROM entries").fetchone()
+        return {"entries": r["n"], "bytes": r["bytes"], "max_bytes": self.max_bytes, "root": str(self.root)}
+
+    # ----- 동기 페치(스크립트용) -----
+    def get(self, url: str, ns: str = "generic", ttl: Optional[int] = None, headers: Optional[Dict[str, str]] = None,
+            timeout: float = 30, session=None) -> Dict[str, Any]:
+        """신선하면 디스크에서, 만료면 조건부 요청(304 재사용), 실패하면 만료본이라도 반환.
+        반환: {source, status, body(bytes), fetched_at[, error]}"""
+        key = request_key(url, headers)
+        ent = self.lookup(key)
+        if ent is not None and ent.age() < self.ttl_for(ns, ttl):
+            return {"source": "disk", "status": ent["status"], "body": ent["body"], "fetched_at": ent["fetched_at"]}
+        req_h = dict(headers or {}); req_h.update(self.conditional_headers(ent))
+        try:
+            status, body, rh = _http_get(url, req_h, timeout, session)
+        except Exception as e:
+            if ent is not None:
+                return {"source": "disk_stale", "status": ent["status"], "body": ent["body"], "fetched_at": ent["fetched_at"], "error": repr(e)}
+            raise
+        if status == 304 and ent is not None:
+            self.revalidated(key)
+            return {"source": "revalidated", "status": ent["status"], "body": ent["body"], "fetched_at": time.time()}
+        if status >= 400:
+            if ent is not None:
+                return {"source": "disk_stale", "status": ent["status"], "body": ent["body"], "fetched_at": ent["fetched_at"], "error": f"HTTP {status}"}
+            return {"source": "error", "status": status, "body": b"", "error": f"HTTP {status}"}
+        new = self.store(key, url, ns, status, body, rh.get("etag"), rh.get("last-modified"), rh.get("content-type"))
+        return {"source": "network", "status": status, "body": body, "fetched_at": new["fetched_at"]}
+
+    def get_json(self, url: str, ns: str = "generic", ttl: Optional[int] = None, **kw) -> Any:
+        r = self.get(url, ns=ns, ttl=ttl, **kw)
+        if r["status"] >= 400 or not r["body"]:
+            raise RuntimeError(f"GET fail: {url} :: {r.get('error') or r['status']}")
+        return json.loads(r["body"].decode("utf-8"))
+
+def _http_get(url: str, headers: Dict[str, str], timeout: float, session=None) -> Tuple[int, bytes, Dict[str, str]]:
+    try:
+        import requests
+    except Exception:
+        requests = None
+    if session is not None or requests is not None:
+        r = (session or requests).get(url, headers=headers, timeout=timeout)
+        return r.status_code, r.content, {k.lower(): v for k, v in r.headers.items()}
+    from urllib.request import Request as _UrlRequest, urlopen
+    from urllib.error import HTTPError
+    try:
+        with urlopen(_UrlRequest(url, headers=headers), timeout=timeout) as r:
+            return getattr(r, "status", 200), r.read(), {k.lower(): v for k, v in r.headers.items()}
+    except HTTPError as e:
+        return e.code, e.read() or b"", {k.lower(): v for k, v in (e.headers or {}).items()}
+
+_SHARED: Dict[str, HttpCache] = {}
+_SHARED_LOCK = threading.Lock()
+
+def get_http_cache(root: str = CACHE_DIR) -> HttpCache:
+    with _SHARED_LOCK:
+        c = _SHARED.get(root)
+        if c is None:
+            c = _SHARED[root] = HttpCache(root)
+        return c
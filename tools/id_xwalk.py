@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# 선수 ID 크로스워크(→ MLBAM)
+#   - output/id_map.csv (mlb_id, retro_id, bbref_id): Lahman playerID(= bbref id)·Retrosheet id → MLBAM
+#   - dim/dim_players.csv (mlbam_id, player_uid): 마트 player_uid("mlbam:592450" 등) → MLBAM
+#   - 숫자 id 는 그대로 MLBAM, "mlbam:<n>" 접두 형식은 숫자만
+#   - 파일 mtime 이 바뀌면 다시 읽음(API 프로세스 캐시). 매핑 없으면 None
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+ID_MAP_FILE = "output/id_map.csv"
+DIM_PLAYERS_FILE = "dim/dim_players.csv"
+
+_CACHE: Dict[str, tuple] = {}
+_LOCK = threading.Lock()
+
+def _num(v) -> Optional[str]:
+    try:
+        f = float(v)
+    except (TypeError, ValueError):
+        return None
+    return str(int(f)) if f == f and f > 0 else None
+
+def _load(root: Path) -> Dict[str, str]:
+    out: Dict[str, str] = {}
+    p = root / ID_MAP_FILE
+    if p.exists():
+        m = pd.read_csv(p, dtype=str, low_memory=False)
+        ml = m.get("mlb_id", pd.Series(dtype=str)).map(_num)
+        for col in ("retro_id", "bbref_id"):           # bbref 가 나중 → 같은 키면 bbref 우선
+            if col in m:
+                ok = m[col].notna() & ml.notna()
+                out.update(zip(m.loc[ok, col].str.strip(), ml[ok]))
+    p = root / DIM_PLAYERS_FILE
+    if p.exists():
+        d = pd.read_csv(p, dtype=str, low_memory=False)
+        if "player_uid" in d and "mlbam_id" in d:
+            ml = d["mlbam_id"].map(_num)
+            ok = d["player_uid"].notna() & ml.notna()
+            out.update(zip(d.loc[ok, "player_uid"].str.strip(), ml[ok]))
+    return out
+
+def _table(root: Path = None) -> Dict[str, str]:
+    root = Path(root) if root else Path.cwd()
+    mt = tuple((root / f).stat().st_mtime_ns if (root / f).exists() else 0 for f in (ID_MAP_FILE, DIM_PLAYERS_FILE))
+    with _LOCK:
+        hit = _CACHE.get(str(root))
+        if hit and hit[0] == mt:
+            return hit[1]
+        t = _load(root)
+        _CACHE[str(root)] = (mt, t)
+        return t
+
+def to_mlbam(player_id, root: Path = None) -> Optional[str]:
+    """Lahman/bbref/retro/player_uid/MLBAM 어느 것이든 → MLBAM 문자열(없으면 None)."""
+    s = str(player_id or "").strip()
+    if not s:
+        return None
+    if s.lower().startswith("mlbam:"):
+        s = s[6:]
+    n = _num(s) if s.replace(".", "", 1).isdigit() else None
+    return n or _table(root).get(s)
+
+def map_ids(ids: Iterable, root: Path = None) -> Dict[str, Optional[str]]:
+    t = _table(root)
+    out = {}
+    for v in ids:
+        s = str(v).strip()
+        k = s[6:] if s.lower().startswith("mlbam:") else s
+        out[s] = (_num(k) if k.replace(".", "", 1).isdigit() else None) or t.get(s)
+    return out
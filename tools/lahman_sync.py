@@ -25,6 +25,17 @@ CANDIDATES += [
 def log(*a): print("[lahman_sync]", *a)
 
 def http_get(url, timeout=120):
+    # 디스크 캐시 경유: 이전 zip 의 ETag/Last-Modified 로 조건부 요청 → 변경 없으면 304(재다운로드 없음)
+    try:
+        from tools.http_cache import get_http_cache
+    except Exception:
+        get_http_cache = None
+    if get_http_cache is not None:
+        r = get_http_cache().get(url, ns="lahman", headers={"User-Agent": "curl/8 lahman-sync"}, timeout=timeout)
+        log(r["source"] + ":", url)
+        if r["status"] >= 400 or not r["body"]:
+            raise RuntimeError(f"HTTP {r['status']} {r.get('error') or ''}".strip())
+        return r["body"]
     log("downloading:", url)
     ctx = ssl.create_default_context()
     req = urllib.request.Request(url, headers={"User-Agent": "curl/8 lahman-sync"})
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+# 파크팩터 엔진: Retrosheet 게임로그 전체 + games.csv(+shards) → 팀-시즌 R/HR/XBH 팩터
+#   - 게임로그는 필요한 열만 읽어 한 프레임으로 모은 뒤 groupby 1회
+#   - 같은 구장 기간 내 N년 누적 → 표본 크기 기반 1.0 방향 회귀 → 시즌별 리그평균 1.0 정규화
+#   - 결과는 output/park_factors.csv(park-season) 로 저장, API는 인메모리 dict 조회
+# 사용: python -m tools.park_factors [--retro data/retrosheet] [--years 3]
+import os, re, glob, argparse, threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from tools.team_code_utils import norm_team, norm_team_series
+from tools.venue_registry import venue_for
+
+OUTPUT_DIR = os.getenv("COGM_OUTPUT_DIR", "output")
+PF_CSV = "park_factors.csv"
+
+# Retrosheet 게임로그(0-based) 열: 날짜, 원정, 홈, 원정득점, 홈득점, 구장ID, 원정 2B/3B/HR, 홈 2B/3B/HR
+_GL_COLS = {0: "date", 3: "away", 6: "home", 9: "away_runs", 10: "home_runs", 16: "park_id",
+            23: "a2b", 24: "a3b", 25: "ahr", 51: "h2b", 52: "h3b", 53: "hhr"}
+
+# 회귀 상수(홈 경기 수 기준): 희소한 스탯일수록 크게
+SHRINK_G = {"run": 250.0, "hr": 400.0, "xbh": 350.0}
+
+def _read_gamelog(fp: Path) -> pd.DataFrame:
+    df = pd.read_csv(fp, header=None, usecols=list(_GL_COLS), dtype={0: str, 3: str, 6: str, 16: str},
+                     encoding="latin-1", on_bad_lines="skip")
+    df = df.rename(columns=_GL_COLS)
+    out = pd.DataFrame({
+        "season": pd.to_numeric(df["date"].str.slice(0, 4), errors="coerce"),
+        "home": df["home"], "away": df["away"], "park_id": df["park_id"],
+        "runs": pd.to_numeric(df["home_runs"], errors="coerce") + pd.to_numeric(df["away_runs"], errors="coerce"),
+        "hr": pd.to_numeric(df["hhr"], errors="coerce") + pd.to_numeric(df["ahr"], errors="coerce"),
+        "xbh": sum(pd.to_numeric(df[c], errors="coerce") for c in ("h2b", "h3b", "a2b", "a3b")),
+    })
+    return out
+
+def load_retrosheet(retro_dir: Optional[Path]) -> pd.DataFrame:
+    if not retro_dir or not Path(retro_dir).exists():
+        return pd.DataFrame()
+    files = [fp for fp in Path(retro_dir).rglob("*") if fp.is_file() and re.match(r"(?i)^gl.*\.(csv|txt)$", fp.name)]
+    parts = []
+    for fp in sorted(files):
+        try:
+            parts.append(_read_gamelog(fp))
+        except Exception:
+            continue
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+def load_games_csv(out_dir: str = OUTPUT_DIR) -> pd.DataFrame:
+    paths = [os.path.join(out_dir, "games.csv")] + sorted(glob.glob(os.path.join(out_dir, "shards", "*", "games.csv")))
+    parts = []
+    for p in paths:
+        try:
+            parts.append(pd.read_csv(p, usecols=["game_pk", "date", "home", "away", "home_runs", "away_runs"], dtype={"date": str}))
+        except Exception:
+            continue
+    if not parts:
+        return pd.DataFrame()
+    g = pd.concat(parts, ignore_index=True).drop_duplicates("game_pk", keep="last")
+    return pd.DataFrame({
+        "season": pd.to_numeric(g["date"].str.slice(0, 4), errors="coerce"),
+        "home": g["home"], "away": g["away"], "park_id": None,
+        "runs": pd.to_numeric(g["home_runs"], errors="coerce") + pd.to_numeric(g["away_runs"], errors="coerce"),
+        "hr": np.nan, "xbh": np.nan,
+    })
+
+def _side_totals(g: pd.DataFrame, side: str) -> pd.DataFrame:
+    # 팀-시즌별 (홈 또는 원정) 경기 합계; HR/XBH 는 값이 있는 경기 수를 따로 셈
+    agg = g.groupby(["season", side]).agg(
+        G=("runs", "size"), R=("runs", "sum"),
+        HR=("hr", "sum"), G_hr=("hr", "count"),
+        XBH=("xbh", "sum"), G_xbh=("xbh", "count"),
+    )
+    agg.index = agg.index.set_names(["season", "team"])
+    return agg
+
+def compute_park_factors(games: pd.DataFrame, years: int = 3, shrink: Dict[str, float] = SHRINK_G) -> pd.DataFrame:
+    cols = ["season", "team", "venue", "games_home", "run_factor", "hr_factor", "xbh_factor",
+            "run_raw", "hr_raw", "xbh_raw"]
+    if games is None or games.empty:
+        return pd.DataFrame(columns=cols)
+    g = games.dropna(subset=["season", "runs"]).copy()
+    g["season"] = g["season"].astype(int)
+    g["home"] = norm_team_series(g["home"])
+    g["away"] = norm_team_series(g["away"])
+    m = _side_totals(g, "home").join(_side_totals(g, "away"), lsuffix="_h", rsuffix="_r", how="outer").fillna(0.0).reset_index()
+
+    # 같은 구장 기간 안에서만 N년 누적(구장 이전 시 창을 끊음)
+    m["venue"] = [getattr(venue_for(t, s), "name", t) for t, s in zip(m["team"], m["season"])]
+    m = m.sort_values(["team", "venue", "season"])
+    num = [c for c in m.columns if c not in ("season", "team", "venue")]
+    m[num] = m.groupby(["team", "venue"])[num].transform(lambda s: s.rolling(years, min_periods=1).sum())
+
+    def _raw(stat: str, gh: str, gr: str) -> pd.Series:
+        home = m[f"{stat}_h"] / m[gh].replace(0, np.nan)
+        road = m[f"{stat}_r"] / m[gr].replace(0, np.nan)
+        return (home / road.replace(0, np.nan)).replace([np.inf, -np.inf], np.nan)
+
+    out = pd.DataFrame({"season": m["season"], "team": m["team"], "venue": m["venue"], "games_home": m["G_h"]})
+    for key, stat, gh, gr in (("run", "R", "G_h", "G_r"), ("hr", "HR", "G_hr_h", "G_hr_r"), ("xbh", "XBH", "G_xbh_h", "G_xbh_r")):
+        raw = _raw(stat, gh, gr)
+        w = m[gh] / (m[gh] + shrink[key])
+        reg = (1.0 + (raw - 1.0) * w).fillna(1.0)
+        # 시즌별 홈경기 가중 평균 = 1.0
+        wt = m[gh].where(raw.notna(), 0.0)
+        lg = (reg * wt).groupby(m["season"]).transform("sum") / wt.groupby(m["season"]).transform("sum").replace(0, np.nan)
+        out[f"{key}_factor"] = (reg / lg.fillna(1.0)).round(4)
+        out[f"{key}_raw"] = raw.round(4)
+    return out[cols].sort_values(["season", "team"]).reset_index(drop=True)
+
+def build(retro_dir: Optional[Path] = None, out_dir: str = OUTPUT_DIR, years: int = 3, write: bool = True) -> pd.DataFrame:
+    """write=False: 계산만(park_factors.csv 는 DAG 의 park_factors 단계만 씀)."""
+    retro = load_retrosheet(retro_dir)
+    games = load_games_csv(out_dir)
+    if not retro.empty and not games.empty:
+        # 같은 시즌은 Retrosheet(HR/XBH 포함) 우선
+        games = games[~games["season"].isin(set(retro["season"].dropna().unique()))]
+    parts = [x for x in (retro, games) if not x.empty]
+    pf = compute_park_factors(pd.concat(parts, ignore_index=True) if parts else None, years=years)
+    if not write:
+        return pf
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    # 임시 파일 → os.replace: API(get_park_factors)가 쓰는 도중의 반쪽 CSV 를 읽지 않게
+    dst = Path(out_dir) / PF_CSV
+    tmp = dst.with_name(dst.name + ".tmp")
+    pf.to_csv(tmp, index=False)
+    os.replace(tmp, dst)
+    return pf
+
+# ---------- 날씨 보정 ----------
+def weather_adjust(run: float, hr: float, xbh: float, temp_c: float, wind: float, precip_prob: float) -> Tuple[float, float, float]:
+    # 온도↑ → R/HR 소폭↑, 강풍↑ → HR↑, 강수↑ → R/HR↓
+    run *= (1.0 + 0.002 * (temp_c - 20.0))          # +0.2% per +1C
+    hr  *= (1.0 + 0.003 * max(0.0, wind - 2.0))     # +0.3% per wind>2m/s
+    damp = max(0.0, (precip_prob - 20.0) * 0.004)   # rain>20% → 감소
+    run *= (1.0 - damp)
+    hr  *= (1.0 - damp * 0.6)
+    xbh *= (1.0 - damp * 0.3)
+    return run, hr, xbh
+
+# ---------- 인메모리 조회 ----------
+class ParkFactorTable:
+    def __init__(self, path: Path):
+        self.rows: Dict[Tuple[str, int], dict] = {}
+        self.seasons: Dict[str, List[int]] = {}
+        if path.exists():
+            for r in pd.read_csv(path).to_dict("records"):
+                self.rows[(r["team"], int(r["season"]))] = r
+        for t, s in sorted(self.rows):
+            self.seasons.setdefault(t, []).append(s)
+
+    def lookup(self, park: str, season: int) -> Optional[dict]:
+        """park: 팀코드(별칭 포함) 또는 구장명. 해당 시즌 없으면 직전(없으면 가장 이른) 시즌."""
+        v = venue_for(park, season)
+        team = v.team if v else norm_team(park)
+        ss = self.seasons.get(team)
+        if not ss:
+            return None
+        prior = [s for s in ss if s <= season]
+        return self.rows[(team, prior[-1] if prior else ss[0])]
+
+_TABLE: Optional[ParkFactorTable] = None
+_TABLE_SIG = None
+_TABLE_LOCK = threading.Lock()
+
+def get_park_factors(out_dir: str = OUTPUT_DIR) -> ParkFactorTable:
+    global _TABLE, _TABLE_SIG
+    path = Path(out_dir) / PF_CSV
+    try:
+        st = path.stat(); sig = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        sig = None
+    with _TABLE_LOCK:
+        if _TABLE is None or sig != _TABLE_SIG:
+            _TABLE, _TABLE_SIG = ParkFactorTable(path), sig
+        return _TABLE
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--retro", default=None, help="Retrosheet 게임로그 폴더(gl*.txt)")
+    ap.add_argument("--out", default=OUTPUT_DIR)
+    ap.add_argument("--years", type=int, default=3)
+    a = ap.parse_args()
+    pf = build(Path(a.retro) if a.retro else None, a.out, a.years)
+    print(f"[OK] {PF_CSV} rows={len(pf)} seasons={pf['season'].nunique() if len(pf) else 0}")
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+# 페이롤/CBT 프로젝션 엔진(팀 T × 연도 Y 배열) — pipeline/payroll_sim.py 와 API(/roster/payroll_sim, cbt_exposure) 공용
+#   - 확정 계약: data/contracts.csv (env CONTRACTS_PATH) — team|teamID, year, aav|salary(+ player_id 선택)
+#     CBT 는 AAV 기준이라 aav 열이 있으면 그것, 없으면 salary. 같은 팀·연도는 합산
+#   - commit_matrix: 계약 행 → (T, Y) 한 번에 np.add.at. move_matrix: 가상 무브(영입/트레이드/방출) → (T, Y) 증감
+#     (from_team 이 있으면 그 팀에서 같은 금액을 뺌 = 트레이드, 무브 반영 페이롤은 0 미만이 되지 않게 자름)
+#   - 미계약 연도 채우기(선택): fill_growth 를 주면 첫 해 페이롤 × (1+g)^k 와 확정액 중 큰 값(연봉조정/최저연봉 자리 근사)
+#   - 반복 위반: output/payroll_sim.csv(파이프라인 이력)의 streak/cbt_flag 로 시작 연도 직전까지 연속 초과 연수
+#   - exposure: 기준(무브 없음)과 무브 반영을 (2T, Y) 로 쌓아 tools.cbt.tax_matrix 한 번 → 팀별 세금/구간/증감
+#   - get_book: 계약·이력 파일 mtime 이 바뀌면 다시 빌드(API 프로세스 캐시) — 무브마다 30팀 × 5년 재계산은 배열 연산만
+# 사용: python -m tools.payroll_engine --start 2025 [--horizon 5] [--fill_growth 0.03] [--out output/cbt_exposure.csv]
+import argparse
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from tools import cbt
+
+CONTRACTS_FILE = os.getenv("CONTRACTS_PATH", "data/contracts.csv")
+HISTORY_FILE = "output/payroll_sim.csv"
+EXPOSURE_OUT = "output/cbt_exposure.csv"
+DEFAULT_HORIZON = 5
+
+def growth_matrix(base, rate, years, horizon: Optional[int] = None) -> np.ndarray:
+    """항목별 base × (1+rate)^k, k < years 만(나머지 0). 입력 (N,) → (N, horizon)."""
+    base = np.asarray(base, dtype=float).reshape(-1)
+    rate = np.broadcast_to(np.asarray(rate, dtype=float), base.shape)
+    years = np.broadcast_to(np.asarray(years, dtype=int), base.shape)
+    H = int(horizon if horizon is not None else (years.max() if years.size else 0))
+    k = np.arange(H)
+    return np.where(k[None, :] < years[:, None], base[:, None] * (1.0 + rate[:, None]) ** k[None, :], 0.0)
+
+def load_commitments(root: Path = None, path: str = CONTRACTS_FILE) -> pd.DataFrame:
+    """team, player_id, year, amount. 파일이 없으면 빈 프레임."""
+    root = Path(root) if root else Path.cwd()
+    p = Path(path) if Path(path).is_absolute() else root / path
+    if not p.exists():
+        return pd.DataFrame(columns=["team", "player_id", "year", "amount"])
+    return normalize(pd.read_csv(p, low_memory=False))
+
+def normalize(df) -> pd.DataFrame:
+    """계약 표(DataFrame 또는 dict 목록) → team, player_id, year, amount."""
+    df = pd.DataFrame(df) if not isinstance(df, pd.DataFrame) else df
+    if not len(df):
+        return pd.DataFrame(columns=["team", "player_id", "year", "amount"])
+    df = df.rename(columns={"teamID": "team", "yearID": "year", "player_uid": "player_id"})
+    amt = "aav" if "aav" in df else "salary"
+    out = pd.DataFrame({"team": df["team"].astype(str),
+                        "player_id": df["player_id"].astype(str) if "player_id" in df else "",
+                        "year": pd.to_numeric(df["year"], errors="coerce"),
+                        "amount": pd.to_numeric(df[amt], errors="coerce")})
+    out = out.dropna(subset=["year", "amount"])
+    out["year"] = out["year"].astype(int)
+    return out
+
+def commit_matrix(df: pd.DataFrame, teams: Sequence[str], years: Sequence[int]) -> np.ndarray:
+    """계약 행 → (T, Y) 합계. 팀/연도 범위 밖 행은 무시."""
+    T, Y = len(teams), len(years)
+    M = np.zeros((T, Y))
+    if df is None or not len(df):
+        return M
+    ti = pd.Index(list(teams)).get_indexer(df["team"].astype(str))
+    yi = pd.Index([int(y) for y in years]).get_indexer(df["year"].astype(int))
+    ok = (ti >= 0) & (yi >= 0)
+    np.add.at(M, (ti[ok], yi[ok]), df["amount"].to_numpy(float)[ok])
+    return M
+
+def expand_moves(moves: Sequence[Dict[str, Any]], start: int) -> pd.DataFrame:
+    """무브 {team, aav, start_year?, years=1, from_team?} → 연도별 증감 행(team, year, amount)."""
+    if not moves:
+        return pd.DataFrame(columns=["team", "year", "amount"])
+    mv = pd.DataFrame(list(moves))
+    n = (pd.to_numeric(mv["years"], errors="coerce").fillna(1).clip(lower=0).astype(int).to_numpy()
+         if "years" in mv else np.ones(len(mv), dtype=int))
+    y0 = pd.to_numeric(mv["start_year"], errors="coerce").fillna(start) if "start_year" in mv else pd.Series(start, index=mv.index)
+    aav = pd.to_numeric(mv["aav"], errors="coerce").fillna(0.0).to_numpy(float)
+    rep = np.repeat(np.arange(len(mv)), n)
+    k = np.arange(len(rep)) - np.repeat(np.cumsum(n) - n, n)            # 무브 안에서 몇 년째
+    rows = pd.DataFrame({"team": mv["team"].astype(str).to_numpy()[rep],
+                         "year": y0.astype(int).to_numpy()[rep] + k, "amount": aav[rep]})
+    if "from_team" in mv:
+        src = mv["from_team"].to_numpy()[rep]
+        has = pd.notna(src) & (src != "")
+        rows = pd.concat([rows, pd.DataFrame({"team": src[has].astype(str), "year": rows["year"].to_numpy()[has],
+                                              "amount": -rows["amount"].to_numpy()[has]})], ignore_index=True)
+    return rows
+
+def move_matrix(moves: Sequence[Dict[str, Any]], teams: Sequence[str], years: Sequence[int]) -> np.ndarray:
+    return commit_matrix(expand_moves(moves, int(years[0]) if len(years) else 0), teams, years)
+
+def prior_streaks(root: Path = None, teams: Sequence[str] = (), before: int = 0) -> np.ndarray:
+    """이력(payroll_sim.csv)에서 before-1 년까지의 연속 초과 연수 (T,). 이력에 before-1 년이 없으면 0."""
+    root = Path(root) if root else Path.cwd()
+    out = np.zeros(len(teams), dtype=int)
+    p = root / HISTORY_FILE
+    if not p.exists() or not len(teams):
+        return out
+    h = pd.read_csv(p, low_memory=False)
+    last = h[pd.to_numeric(h.get("year"), errors="coerce") == before - 1]
+    if not len(last):
+        return out
+    if "streak" in last:
+        s = pd.to_numeric(last["streak"], errors="coerce")
+    else:
+        # 예전 출력(streak 열 없음): 팀별 cbt_flag 를 연도순으로 누적해 연속 연수 계산
+        h = h.sort_values("year")
+        flag = pd.to_numeric(h["cbt_flag"], errors="coerce").fillna(0).astype(int)
+        grp = (flag == 0).groupby(h["teamID"]).cumsum()
+        h = h.assign(streak=flag.groupby([h["teamID"], grp]).cumsum() * flag)
+        last = h[h["year"] == before - 1]
+        s = last["streak"]
+    got = pd.Series(s.fillna(0).astype(int).to_numpy(), index=last["teamID"].astype(str))
+    got = got[~got.index.duplicated(keep="last")]
+    return got.reindex(list(teams)).fillna(0).astype(int).to_numpy()
+
+class PayrollBook:
+    """팀 × 연도 확정 페이롤 + 시작 시점 연속 초과 연수. exposure 는 무브만 바꿔 반복 호출."""
+
+    def __init__(self, commitments: pd.DataFrame, start: int, horizon: int = DEFAULT_HORIZON,
+                 prior: Optional[Dict[str, int]] = None, teams: Optional[Sequence[str]] = None, root: Path = None):
+        self.start, self.horizon = int(start), int(horizon)
+        self.years = [self.start + k for k in range(self.horizon)]
+        self.teams = sorted(set(teams or []) | set(commitments["team"].astype(str)) | set(prior or {}))
+        self.committed = commit_matrix(commitments, self.teams, self.years)
+        hist = prior_streaks(root, self.teams, self.start)
+        if prior:
+            hist = np.array([int(prior.get(t, h)) for t, h in zip(self.teams, hist)], dtype=int)
+        self.prior = hist
+
+    def __len__(self):
+        return len(self.teams)
+
+    def with_teams(self, extra: Sequence[str]) -> "PayrollBook":
+        """무브에만 나오는 팀을 0 페이롤 행으로 추가한 사본."""
+        new = [t for t in dict.fromkeys(map(str, extra)) if t not in self.teams]
+        if not new:
+            return self
+        b = object.__new__(PayrollBook)
+        b.start, b.horizon, b.years = self.start, self.horizon, self.years
+        b.teams = self.teams + new
+        b.committed = np.vstack([self.committed, np.zeros((len(new), self.horizon))])
+        b.prior = np.concatenate([self.prior, np.zeros(len(new), dtype=int)])
+        return b
+
+    def payroll(self, fill_growth: Optional[float] = None) -> np.ndarray:
+        M = self.committed
+        if fill_growth is None or not self.horizon:
+            return M.copy()
+        trend = growth_matrix(M[:, 0], fill_growth, self.horizon, self.horizon)
+        return np.maximum(M, trend)
+
+    def exposure(self, moves: Sequence[Dict[str, Any]] = (), threshold_override: Dict[int, float] = None,
+                 fill_growth: Optional[float] = None, root: Path = None) -> Dict[str, Any]:
+        """기준/무브 반영 페이롤을 (2T, Y) 로 쌓아 세금 한 번 계산."""
+        base = self.payroll(fill_growth)
+        after = np.maximum(base + move_matrix(moves, self.teams, self.years), 0.0)   # 보낸 팀 차감이 0 아래로 가지 않게
+        thr = cbt.thresholds(self.years, root, threshold_override)
+        res = cbt.tax_matrix(np.vstack([base, after]), [thr[y] for y in self.years], self.years,
+                             np.concatenate([self.prior, self.prior]))
+        T = len(self.teams)
+        return {"teams": list(self.teams), "years": list(self.years), "thresholds": [thr[y] for y in self.years],
+                "base_payroll": base, "payroll": after, "base_tax": res["tax"][:T],
+                **{k: v[T:] for k, v in res.items()}}
+
+    def frame(self, ex: Dict[str, Any]) -> pd.DataFrame:
+        """exposure 결과 → 긴 표(team, year, ...)."""
+        T, Y = len(ex["teams"]), len(ex["years"])
+        cols = {k: ex[k].reshape(-1) for k in ("payroll", "over", "streak", "base_rate", "surcharge", "tax", "rate", "tier")}
+        return pd.DataFrame({"team": np.repeat(ex["teams"], Y), "year": np.tile(ex["years"], T),
+                             "threshold": np.tile(ex["thresholds"], T), **cols,
+                             "delta_tax": (ex["tax"] - ex["base_tax"]).reshape(-1)})
+
+_CACHE: Dict[Tuple[str, int, int], Tuple[tuple, PayrollBook]] = {}
+_LOCK = threading.Lock()
+
+def _mtimes(root: Path) -> tuple:
+    out = []
+    for rel in (CONTRACTS_FILE, HISTORY_FILE, "data/cbt_thresholds.csv", "data/cbt_thresholds.json"):
+        p = Path(rel) if Path(rel).is_absolute() else root / rel
+        out.append(p.stat().st_mtime_ns if p.exists() else 0)
+    return tuple(out)
+
+def get_book(start: int, horizon: int = DEFAULT_HORIZON, root: Path = None) -> PayrollBook:
+    """파일 기반 PayrollBook 캐시(계약/이력 mtime 기준)."""
+    root = Path(root) if root else Path.cwd()
+    key, mt = (str(root), int(start), int(horizon)), _mtimes(root)
+    with _LOCK:
+        hit = _CACHE.get(key)
+        if hit and hit[0] == mt:
+            return hit[1]
+        book = PayrollBook(load_commitments(root), start, horizon, root=root)
+        _CACHE[key] = (mt, book)
+        return book
+
+def main():
+    ap = argparse.ArgumentParser(prog="payroll_engine")
+    ap.add_argument("--start", type=int, required=True)
+    ap.add_argument("--horizon", type=int, default=DEFAULT_HORIZON)
+    ap.add_argument("--fill_growth", type=float, default=None)
+    ap.add_argument("--out", default=EXPOSURE_OUT)
+    a = ap.parse_args()
+    book = get_book(a.start, a.horizon)
+    if not len(book):
+        print(f"[payroll_engine] no commitments ({CONTRACTS_FILE})")
+        return
+    df = book.frame(book.exposure(fill_growth=a.fill_growth))
+    df.to_csv(a.out, index=False)
+    print(f"[payroll_engine] teams={len(book)} years={book.years[0]}-{book.years[-1]} "
+          f"tax=${df['tax'].sum():,.0f} -> {a.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+# 파이프라인 계측(공용)
+#   - 단계 타이머: with rec.stage("load", rows_in=n) as st: ...; st.rows_out = len(df)
+#                  @rec.timed("aggregate")  /  rec.checkpoint("lahman_load", rows_out=n)  (평면 스크립트용 구간 기록)
+#   - 같은 이름 단계는 합산(calls/sec/rows), 단계별 최대 RSS 는 백그라운드 샘플링(/proc/self/statm, 0.05초)
+#   - 실행 1회 = logs/perf/<script>.jsonl 한 줄(종료 시 atexit 로 기록, 예외 단계는 error 표시)
+#   - 프로파일: COGM_PROFILE=cprofile|pyinstrument → logs/perf/prof/<script>@<UTC>.prof|.html (그 밖의 값은 경고 후 생략)
+#               (COGM_PROFILE_STAGE=이름 이면 그 단계만)
+#   - COGM_PERF=0 이면 기록 안 함(타이머는 그대로 동작)
+# 사용: python -m tools.perf ls [script]
+#       python -m tools.perf diff <script> [--a -2] [--b -1] [--threshold 0.2]   (기본: 직전 두 실행 비교)
+import os, sys, json, time, atexit, argparse, functools, threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # 윈도우
+    resource = None
+
+PERF_DIR = Path(os.getenv("COGM_PERF_DIR", "logs/perf"))
+ENABLED = os.getenv("COGM_PERF", "1") != "0"
+PROFILE = os.getenv("COGM_PROFILE", "").strip().lower()
+PROFILE_STAGE = os.getenv("COGM_PROFILE_STAGE", "").strip()
+SAMPLE_SEC = 0.05
+
+_PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def rss_mb() -> Optional[float]:
+    """현재 RSS(MB). /proc 없으면 None."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE / 1048576.0
+    except (OSError, ValueError, IndexError):
+        return None
+
+def max_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return kb / (1048576.0 if sys.platform == "darwin" else 1024.0)
+
+class _Sampler(threading.Thread):
+    """진행 중 단계들의 최대 RSS 를 주기적으로 갱신."""
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.active: List["Stage"] = []
+        self.lock = threading.Lock()
+        self.start()
+
+    def run(self):
+        while True:
+            time.sleep(SAMPLE_SEC)
+            r = rss_mb()
+            if r is None:
+                return
+            with self.lock:
+                for st in self.active:
+                    if r > st.peak: st.peak = r
+
+    def add(self, st):
+        with self.lock: self.active.append(st)
+
+    def remove(self, st):
+        with self.lock:
+            if st in self.active: self.active.remove(st)
+
+class Stage:
+    __slots__ = ("name", "rows_in", "rows_out", "peak", "t0")
+    def __init__(self, name, rows_in=None):
+        self.name, self.rows_in, self.rows_out = name, rows_in, None
+        self.peak = rss_mb() or 0.0
+        self.t0 = time.perf_counter()
+
+def _add(a, b):
+    return b if a is None else (a if b is None else a + b)
+
+_PROFILERS = ("cprofile", "pyinstrument")
+
+def _profiler(kind: str) -> Optional["_Profiler"]:
+    """알 수 없는 COGM_PROFILE 값은 경고 후 프로파일 없이(계측은 그대로)."""
+    if kind not in _PROFILERS:
+        print(f"[PERF][WARN] COGM_PROFILE={kind!r} 알 수 없음(cprofile|pyinstrument) → 프로파일 안 함", file=sys.stderr)
+        return None
+    return _Profiler(kind)
+
+class _Profiler:
+    def __init__(self, kind: str):
+        self.kind, self.p = kind, None
+        if kind == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+                self.p = Profiler()
+            except ImportError:
+                print("[PERF][WARN] pyinstrument 미설치 → cProfile 사용", file=sys.stderr)
+                self.kind = "cprofile"
+        if self.kind == "cprofile":
+            import cProfile
+            self.p = cProfile.Profile()
+        self.p.start() if self.kind == "pyinstrument" else self.p.enable()
+
+    def stop(self, dst: Path) -> Path:
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        if self.kind == "pyinstrument":
+            self.p.stop()
+            dst = dst.with_name(dst.name + ".html")
+            dst.write_text(self.p.output_html(), encoding="utf-8")
+        else:
+            self.p.disable()
+            dst = dst.with_name(dst.name + ".prof")
+            self.p.dump_stats(str(dst))
+        return dst
+
+class Recorder:
+    def __init__(self, script: str, out_dir: Path = PERF_DIR):
+        self.script = script
+        self.out_dir = Path(out_dir)
+        self.started = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        self.t0 = time.perf_counter()
+        self.stages: Dict[str, dict] = {}
+        self.meta: Dict[str, object] = {}
+        self._last = self.t0
+        self._flushed = False
+        self._sampler = _Sampler() if rss_mb() is not None else None
+        self._window = Stage("")                                  # checkpoint 구간의 최대 RSS
+        if self._sampler: self._sampler.add(self._window)
+        self._prof = _profiler(PROFILE) if PROFILE and not PROFILE_STAGE else None
+        self.profile_path: Optional[str] = None
+
+    # ---- 기록 ----
+    def _record(self, name, sec, rows_in=None, rows_out=None, peak=None, error=None):
+        s = self.stages.setdefault(name, {"calls": 0, "sec": 0.0, "rows_in": None, "rows_out": None, "peak_rss_mb": None})
+        s["calls"] += 1
+        s["sec"] += sec
+        s["rows_in"] = _add(s["rows_in"], rows_in)
+        s["rows_out"] = _add(s["rows_out"], rows_out)
+        if peak is not None:
+            s["peak_rss_mb"] = max(s["peak_rss_mb"] or 0.0, peak)
+        if error:
+            s["error"] = error
+        self._last = time.perf_counter()
+        self._window.peak = rss_mb() or 0.0
+
+    @contextmanager
+    def stage(self, name: str, rows_in: Optional[int] = None):
+        st = Stage(name, rows_in)
+        prof = _profiler(PROFILE or "cprofile") if PROFILE_STAGE == name and self._prof is None else None
+        if self._sampler: self._sampler.add(st)
+        err = None
+        try:
+            yield st
+        except BaseException as e:
+            err = type(e).__name__
+            raise
+        finally:
+            sec = time.perf_counter() - st.t0
+            if self._sampler: self._sampler.remove(st)
+            r = rss_mb()
+            peak = max(st.peak, r) if r is not None else None
+            if prof is not None:
+                self.profile_path = str(prof.stop(self._prof_path(name)))
+            self._record(name, sec, st.rows_in, st.rows_out, peak, err)
+
+    def timed(self, name: Optional[str] = None, rows_out=None):
+        """데코레이터. rows_out 에 함수(결과→행수)를 주면 반환값 행 수도 기록(기본: len())."""
+        def deco(fn):
+            label = name or fn.__name__
+            @functools.wraps(fn)
+            def wrapper(*a, **kw):
+                with self.stage(label) as st:
+                    res = fn(*a, **kw)
+                    try:
+                        st.rows_out = rows_out(res) if rows_out else (len(res) if hasattr(res, "__len__") else None)
+                    except Exception:
+                        pass
+                    return res
+            return wrapper
+        return deco
+
+    def checkpoint(self, name: str, rows_in: Optional[int] = None, rows_out: Optional[int] = None):
+        """직전 기록(또는 시작) 이후 경과 시간을 name 단계로 기록 — 들여쓰기 없는 스크립트 구간용."""
+        now = time.perf_counter()
+        r = rss_mb()
+        peak = None if r is None else max(self._window.peak, r)
+        self._record(name, now - self._last, rows_in, rows_out, peak)
+
+    def note(self, **kw):
+        self.meta.update(kw)
+
+    # ---- 출력 ----
+    def _prof_path(self, suffix: str = "") -> Path:
+        tag = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        return self.out_dir / "prof" / f"{self.script}{'.' + suffix if suffix else ''}@{tag}"
+
+    def summary(self) -> dict:
+        stages = {k: {**v, "sec": round(v["sec"], 4),
+                      "peak_rss_mb": None if v["peak_rss_mb"] is None else round(v["peak_rss_mb"], 1)}
+                  for k, v in self.stages.items()}
+        return {"script": self.script, "started": self.started, "pid": os.getpid(),
+                "wall_sec": round(time.perf_counter() - self.t0, 4),
+                "max_rss_mb": None if max_rss_mb() is None else round(max_rss_mb(), 1),
+                "argv": sys.argv[1:], "stages": stages, **({"meta": self.meta} if self.meta else {}),
+                **({"profile": self.profile_path} if self.profile_path else {})}
+
+    def flush(self) -> Optional[dict]:
+        if self._flushed:
+            return None
+        self._flushed = True
+        if self._prof is not None:
+            self.profile_path = str(self._prof.stop(self._prof_path()))
+        rec = self.summary()
+        if ENABLED:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            # 한 줄 append(O_APPEND) — 병렬 실행끼리도 줄 단위로 섞이지 않음
+            with open(self.out_dir / f"{self.script}.jsonl", "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        return rec
+
+_RECORDERS: Dict[str, Recorder] = {}
+
+def recorder(script: Optional[str] = None) -> Recorder:
+    """스크립트별 공용 Recorder(프로세스 종료 시 자동 기록)."""
+    script = script or Path(sys.argv[0]).stem or "interactive"
+    rec = _RECORDERS.get(script)
+    if rec is None:
+        rec = _RECORDERS[script] = Recorder(script)
+        atexit.register(rec.flush)
+    return rec
+
+# ---------- 조회/비교 ----------
+def load_runs(script: str, out_dir: Path = PERF_DIR) -> List[dict]:
+    fp = Path(out_dir) / f"{script}.jsonl"
+    if not fp.exists():
+        return []
+    runs = []
+    for line in fp.read_text(encoding="utf-8").splitlines():
+        try:
+            runs.append(json.loads(line))
+        except ValueError:
+            continue                                              # 중단으로 잘린 줄
+    return runs
+
+def diff_runs(a: dict, b: dict, threshold: float = 0.2, min_sec: float = 0.05) -> List[dict]:
+    """단계별 a→b 변화. sec 가 threshold(비율) 넘게 늘고 min_sec 이상이면 regressed."""
+    rows = []
+    for name in list(a["stages"]) + [n for n in b["stages"] if n not in a["stages"]]:
+        sa, sb = a["stages"].get(name, {}), b["stages"].get(name, {})
+        ta, tb = sa.get("sec"), sb.get("sec")
+        ratio = (tb / ta - 1.0) if ta and tb is not None else None
+        rows.append({"stage": name, "sec_a": ta, "sec_b": tb, "delta_pct": None if ratio is None else round(100 * ratio, 1),
+                     "rows_out_a": sa.get("rows_out"), "rows_out_b": sb.get("rows_out"),
+                     "rss_a": sa.get("peak_rss_mb"), "rss_b": sb.get("peak_rss_mb"),
+                     "regressed": bool(ratio is not None and ratio > threshold and tb - ta >= min_sec)})
+    return rows
+
+def _fmt(v, spec):
+    width = "".join(ch for ch in spec.split(".")[0] if ch.isdigit())
+    return format("-", ">" + width) if v is None else format(v, spec)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    l = sub.add_parser("ls"); l.add_argument("script", nargs="?")
+    d = sub.add_parser("diff"); d.add_argument("script")
+    d.add_argument("--a", type=int, default=-2, help="기준 실행 인덱스(음수=뒤에서)")
+    d.add_argument("--b", type=int, default=-1)
+    d.add_argument("--threshold", type=float, default=0.2)
+    ap.add_argument("--dir", default=str(PERF_DIR))
+    a = ap.parse_args()
+    if a.cmd == "ls":
+        scripts = [a.script] if a.script else sorted(p.stem for p in Path(a.dir).glob("*.jsonl"))
+        for s in scripts:
+            runs = load_runs(s, a.dir)
+            for i, r in enumerate(runs):
+                print(f"{s:<28} {i - len(runs):>4} {r['started']} wall={r['wall_sec']:.2f}s rss={r.get('max_rss_mb')}MB stages={len(r['stages'])}")
+        sys.exit(0)
+    runs = load_runs(a.script, a.dir)
+    try:
+        ra, rb = runs[a.a], runs[a.b]
+    except IndexError:
+        sys.exit(f"[ERR] {a.script}: 실행 기록 {len(runs)}개 — 비교 불가")
+    rows = diff_runs(ra, rb, a.threshold)
+    print(f"[PERF] {a.script}  A={ra['started']} ({ra['wall_sec']:.2f}s)  B={rb['started']} ({rb['wall_sec']:.2f}s)")
+    print(f"  {'stage':<28} {'sec_a':>9} {'sec_b':>9} {'delta%':>8} {'rows_a':>10} {'rows_b':>10} {'rss_a':>8} {'rss_b':>8}")
+    for r in rows:
+        print(f"{'!' if r['regressed'] else ' '} {r['stage']:<28} {_fmt(r['sec_a'], '9.3f')} {_fmt(r['sec_b'], '9.3f')} "
+              f"{_fmt(r['delta_pct'], '8.1f')} {_fmt(r['rows_out_a'], '>10')} {_fmt(r['rows_out_b'], '>10')} "
+              f"{_fmt(r['rss_a'], '8.1f')} {_fmt(r['rss_b'], '8.1f')}")
+    sys.exit(1 if any(r["regressed"] for r in rows) else 0)
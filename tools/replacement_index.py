@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+# 대체 자원 후보 인덱스(포지션별 파티션 + 포지션·시즌 z 통계 사전 계산)
+#   - 소스: mart/fact_batting·fact_pitching·fact_war (player_uid, season) + output/player_cards.csv(age/pa_or_bf/pos/bats 등 보강)
+#     + 선택 메타 data/replacement_meta.csv(player_uid|player_id, pos "1B|LF", bats, platoon_tag, expected_cost)
+#   - 포지션: 메타/카드에 pos 가 있으면 그 포지션들, 없으면 타자 = BAT, 투수 = P 그룹(조회 포지션이 없으면 그룹으로 대체)
+#   - proj_war: war 우선, 없으면 타자 (wRAA + 20·PA/600)/10, 투수 ((리그 FIP + 1) − FIP)·(BF/4.3)/9/10 (대체 수준 근사,
+#     투수 BF 가 없으면 불펜 한 시즌 NOMINAL_BF 로 가정)
+#   - expected_cost: 메타 값, 없으면 최저연봉(콜업 비용), risk: 표본 부족 1 − min(1, PA|BF/500)
+#   - 빌드 시 파티션×시즌별 proj_war/expected_cost 평균·표준편차로 z 열을 미리 만들어 둠
+#     → 조회 = 파티션 배열에서 가중합 한 번 + argpartition top-k (후보 목록을 클라이언트가 보낼 필요 없음)
+#   - get_index: 소스 파일 mtime 이 바뀌면 다시 빌드(API 프로세스 캐시)
+# 사용: python -m tools.replacement_index --pos SS --top 10
+import argparse
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+MART_FILES = ("mart/fact_batting.csv", "mart/fact_pitching.csv", "mart/fact_war.csv")
+CARDS_FILE = "output/player_cards.csv"
+META_FILE = os.getenv("REPLACEMENT_META_PATH", "data/replacement_meta.csv")
+MIN_SALARY = 760_000.0          # MLB 최저연봉(2025)
+DOLLAR_PER_WAR = 9_000_000.0    # replacement_suggestions v1 과 같은 $/WAR
+FULL_SAMPLE = 500.0             # risk 계산용 PA/BF 기준
+NOMINAL_BF = 250.0              # 투구 수 자료 없는 투수의 가정 타자 수(≈ 60이닝)
+PITCHER_POS = {"P", "SP", "RP", "CL", "RHP", "LHP"}
+
+def pos_group(pos: str) -> str:
+    return "P" if str(pos).upper() in PITCHER_POS else "BAT"
+
+def _read(root: Path, rel: str) -> Optional[pd.DataFrame]:
+    p = root / rel
+    if not p.exists():
+        return None
+    try:
+        return pd.read_csv(p, low_memory=False)
+    except Exception:
+        return None
+
+def load_frame(root: Path = None) -> pd.DataFrame:
+    """player_uid, season 단위 후보 행(지표 + role + pos 목록 + 파생 proj_war/cost/risk)."""
+    root = Path(root) if root else Path.cwd()
+    key = ["player_uid", "season"]
+    bat, pit, war = (_read(root, f) for f in MART_FILES)
+    cards = _read(root, CARDS_FILE)
+    parts = []
+    if bat is not None and len(bat):
+        parts.append(bat.assign(role="BAT"))
+    if pit is not None and len(pit):
+        parts.append(pit.assign(role="P"))
+    if not parts and cards is not None:                          # 마트가 없으면 카드만으로
+        parts.append(cards.assign(role=np.where(cards.get("era", pd.Series(np.nan, index=cards.index)).notna(),
+                                                "P", "BAT")))
+    if not parts:
+        return pd.DataFrame()
+    df = pd.concat(parts, ignore_index=True, sort=False).drop_duplicates(key + ["role"], keep="last")
+    if war is not None and len(war):
+        w = war[key + [c for c in ("war", "wraa") if c in war]].drop_duplicates(key, keep="last")
+        df = df.drop(columns=[c for c in ("war", "wraa") if c in df]).merge(w, on=key, how="left")
+    if cards is not None and len(cards):
+        extra = [c for c in ("age", "pa_or_bf", "pos", "bats", "platoon_tag", "expected_cost")
+                 if c in cards and c not in df]
+        if extra:
+            df = df.merge(cards[key + extra].drop_duplicates(key, keep="last"), on=key, how="left")
+    meta = _read(Path("."), META_FILE) if Path(META_FILE).is_absolute() else _read(root, META_FILE)
+    if meta is not None and len(meta):
+        meta = meta.rename(columns={"player_id": "player_uid"})
+        cols = [c for c in ("pos", "bats", "platoon_tag", "expected_cost") if c in meta]
+        df = df.drop(columns=[c for c in cols if c in df]).merge(
+            meta[["player_uid"] + cols].drop_duplicates("player_uid", keep="last"), on="player_uid", how="left")
+    for c in ("war", "wraa", "pa", "pa_or_bf", "fip", "expected_cost", "age"):
+        df[c] = pd.to_numeric(df[c], errors="coerce") if c in df else np.nan
+    for c in ("pos", "bats", "platoon_tag", "name_full", "team_id"):
+        if c not in df:
+            df[c] = None
+
+    n = df["pa_or_bf"].fillna(df["pa"])
+    is_p = (df["role"] == "P").to_numpy()
+    lg_fip = df.loc[is_p].groupby("season")["fip"].transform("mean")
+    est = pd.Series(np.nan, index=df.index)
+    est[~is_p] = (df["wraa"] + 20.0 * n / 600.0)[~is_p] / 10.0
+    est[is_p] = ((lg_fip + 1.0 - df.loc[is_p, "fip"]) * (n[is_p].fillna(NOMINAL_BF) / 4.3) / 9.0 / 10.0)
+    df["proj_war"] = df["war"].fillna(est).fillna(0.0)
+    df["expected_cost"] = df["expected_cost"].fillna(MIN_SALARY)
+    df["risk"] = np.clip(1.0 - n.fillna(0.0) / FULL_SAMPLE, 0.0, 1.0)
+    df["player_id"] = df["player_uid"].astype(str)
+    return df.reset_index(drop=True)
+
+def _z(x: np.ndarray, groups: np.ndarray) -> Tuple[np.ndarray, Dict[int, Tuple[float, float]]]:
+    """그룹(시즌)별 z. 표준편차 0 이면 1 로(모두 0점)."""
+    z = np.zeros(len(x))
+    stats = {}
+    for g in np.unique(groups):
+        m = groups == g
+        mu, sd = float(x[m].mean()), float(x[m].std())
+        sd = sd if sd > 1e-9 else 1.0
+        z[m] = (x[m] - mu) / sd
+        stats[int(g)] = (mu, sd)
+    return z, stats
+
+class ReplacementIndex:
+    """포지션 파티션별 열 배열. parts[pos] = {"idx", "z_war", "z_cost", "stats"}."""
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        n = len(df)
+        self.player_id = df["player_id"].to_numpy(str) if n else np.zeros(0, str)
+        self.season = df["season"].to_numpy(int) if n else np.zeros(0, int)
+        self.war = df["proj_war"].to_numpy(float) if n else np.zeros(0)
+        self.cost = df["expected_cost"].to_numpy(float) if n else np.zeros(0)
+        self.risk = df["risk"].to_numpy(float) if n else np.zeros(0)
+        self.bats = df["bats"].fillna("").astype(str).str.upper().to_numpy() if n else np.zeros(0, str)
+        self.platoon = df["platoon_tag"].fillna("").astype(str).to_numpy() if n else np.zeros(0, str)
+        members: Dict[str, List[int]] = {}
+        for i, (role, pos) in enumerate(zip(df.get("role", []), df.get("pos", []))):
+            ps = [p.strip().upper() for p in str(pos).split("|") if p.strip()] if isinstance(pos, str) else []
+            for p in set(ps) | {role}:                          # 그룹(BAT/P)에는 항상 포함
+                members.setdefault(p, []).append(i)
+        self.parts: Dict[str, dict] = {}
+        for p, ix in members.items():
+            ix = np.asarray(ix, dtype=np.int64)
+            zw, sw = _z(self.war[ix], self.season[ix])
+            zc, sc = _z(self.cost[ix], self.season[ix])
+            self.parts[p] = {"idx": ix, "z_war": zw, "z_cost": zc,
+                             "stats": {s: {"war": sw[s], "cost": sc[s]} for s in sw}}
+
+    def __len__(self):
+        return len(self.player_id)
+
+    def pos_of(self, player_id: str) -> Optional[str]:
+        """선수의 대표 포지션(pos 첫 항목, 없으면 BAT/P 그룹). 인덱스에 없으면 None."""
+        if not hasattr(self, "_pos"):
+            self._pos = {}
+            for pid, role, pos in zip(self.player_id, self.df.get("role", []), self.df.get("pos", [])):
+                first = str(pos).split("|")[0].strip().upper() if isinstance(pos, str) and pos.strip() else ""
+                self._pos[pid] = first or role
+        return self._pos.get(str(player_id))
+
+    def partition(self, pos: str) -> Tuple[str, Optional[dict]]:
+        p = str(pos).upper()
+        if p in self.parts:
+            return p, self.parts[p]
+        g = pos_group(p)
+        return g, self.parts.get(g)
+
+    def latest_season(self) -> Optional[int]:
+        return int(self.season.max()) if len(self.season) else None
+
+    def rank(self, pos: str, k: int = 5, mode: str = "score", weights: Optional[Dict[str, float]] = None,
+             min_war: float = 0.5, budget: Optional[float] = None, season: Optional[int] = None,
+             exclude: Sequence[str] = (), prefer_bats: Optional[str] = None,
+             platoon_need: Optional[str] = None) -> Tuple[str, List[dict]]:
+        """mode="score": w.war·z_war − w.cost·z_cost + w.fit·[타석 일치] + w.platoon·[플래툰 일치] − w.risk·risk
+        mode="surplus": proj_war·$/WAR − cost (v1). 반환 (사용한 파티션, 상위 k 행)."""
+        used, part = self.partition(pos)
+        if part is None or k <= 0:
+            return used, []
+        ix = part["idx"]
+        season = self.latest_season() if season is None else int(season)
+        ok = (self.season[ix] == season) & (self.war[ix] >= min_war)
+        if exclude:
+            ok &= ~np.isin(self.player_id[ix], np.asarray(list(exclude), dtype=str))
+        if mode == "surplus":
+            score = self.war[ix] * DOLLAR_PER_WAR - self.cost[ix]
+        else:
+            w = {"war": 1.0, "cost": 0.6, "fit": 0.4, "platoon": 0.3, "risk": 0.5, **(weights or {})}
+            fit = (self.bats[ix] == prefer_bats.upper()) if prefer_bats else np.zeros(len(ix), bool)
+            plat = (self.platoon[ix] == platoon_need) if platoon_need else np.zeros(len(ix), bool)
+            score = (w["war"] * part["z_war"] - w["cost"] * part["z_cost"] + w["fit"] * fit
+                     + w["platoon"] * plat - w["risk"] * self.risk[ix])
+        cand = np.flatnonzero(ok)
+        if not len(cand):
+            return used, []
+        top = top_k(score[cand], k)
+        rows = []
+        for t in top:
+            i = ix[cand[t]]
+            reasons = [f"war={self.war[i]:.2f}", f"$={int(self.cost[i]):,}"]
+            if used != str(pos).upper():
+                reasons.append(f"pos_group:{used}")
+            if prefer_bats and self.bats[i] == prefer_bats.upper():
+                reasons.append(f"prefer_bats:{prefer_bats}")
+            if platoon_need and self.platoon[i] == platoon_need:
+                reasons.append(f"platoon:{platoon_need}")
+            if self.risk[i] > 0:
+                reasons.append(f"risk_penalty:{self.risk[i]:.2f}")
+            if budget is not None and self.cost[i] > budget:
+                reasons.append("over_budget")
+            rows.append({"player_id": self.player_id[i], "pos": used, "proj_war": round(float(self.war[i]), 2),
+                         "expected_cost": round(float(self.cost[i]), 2), "risk": round(float(self.risk[i]), 3),
+                         "score": round(float(score[cand[t]]), 4), "reasons": reasons,
+                         "name": self.df.at[i, "name_full"], "team": self.df.at[i, "team_id"]})
+        return used, rows
+
+def top_k(score: np.ndarray, k: int) -> np.ndarray:
+    """점수 상위 k 인덱스(내림차순). argpartition 으로 k 개만 고른 뒤 그 안에서만 정렬."""
+    k = min(k, len(score))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    part = np.sort(np.argpartition(-score, k - 1)[:k]) if k < len(score) else np.arange(len(score))
+    return part[np.argsort(-score[part], kind="stable")]              # 동점은 원래 순서
+
+_CACHE: Dict[str, tuple] = {}
+_LOCK = threading.Lock()
+
+def _mtimes(root: Path) -> tuple:
+    out = []
+    for rel in MART_FILES + (CARDS_FILE, META_FILE):
+        p = Path(rel) if Path(rel).is_absolute() else root / rel
+        try:
+            out.append(p.stat().st_mtime_ns)
+        except OSError:
+            out.append(None)
+    return tuple(out)
+
+def get_index(root: Path = None) -> ReplacementIndex:
+    """소스 mtime 기준 캐시. 소스가 하나도 없으면 빈 인덱스."""
+    root = Path(root) if root else Path.cwd()
+    mt = _mtimes(root)
+    with _LOCK:
+        hit = _CACHE.get(str(root))
+        if hit and hit[0] == mt:
+            return hit[1]
+        idx = ReplacementIndex(load_frame(root))
+        _CACHE[str(root)] = (mt, idx)
+        return idx
+
+def main():
+    ap = argparse.ArgumentParser(prog="replacement_index")
+    ap.add_argument("--pos", required=True)
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--min_war", type=float, default=0.0)
+    ap.add_argument("--season", type=int, default=None)
+    ap.add_argument("--mode", choices=["score", "surplus"], default="score")
+    a = ap.parse_args()
+    idx = get_index()
+    used, rows = idx.rank(a.pos, a.top, mode=a.mode, min_war=a.min_war, season=a.season)
+    print(f"[replacement_index] {len(idx)} rows, partitions={sorted(idx.parts)} → {a.pos} ({used})")
+    if rows:
+        print(pd.DataFrame(rows).drop(columns=["reasons"]).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+# 멀티시즌 시나리오 탐색(후보 무브 풀 → 승수 vs 페이롤 파레토 프런티어)
+#   - 입력: 무브 M개 × 연도 Y 의 ΔWAR/Δ연봉 행렬, 무브별 로스터 슬롯 변화, 배타 그룹(같은 선수의 대안 등), 필수 무브
+#   - 제약: 연도별 예산 상한, CBT 기준선(hard: 넘지 않기 / tax: 초과 세금을 비용에 포함), 로스터 빈 슬롯 수
+#     세금은 tools.cbt.tax_matrix(연속 초과 기본세율 + 구간 추가세) — /roster/payroll_sim·cbt_exposure 와 같은 규칙
+#   - 탐색: 그룹 단위 다차원 배낭 DP. 상태 = (연도별 Δ연봉, 슬롯, 누적 WAR) 라벨 집합
+#       · 남은 단계의 음수 델타(방출/논텐더)까지 더해도 제약을 못 맞추는 라벨은 가지치기
+#       · 다른 라벨보다 모든 연도 연봉·슬롯이 같거나 적고 WAR 는 같거나 많은 라벨만 남김(지배 제거)
+#       · 라벨 수가 max_states 를 넘으면 비용 구간별 WAR 상위만 유지(빔), 시간 예산 초과 시 빔 축소 → exact=False
+#   - 끝에서 (누적 승수 ↑, 페이롤 NPV ↓) 2차원 파레토만 반환. 1 WAR ≈ 1 승(시나리오 플래너 가정과 동일)
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from tools import contract_engine as ce
+from tools.cbt import tax_matrix
+
+_CHUNK = 512
+
+def _nondominated(D: np.ndarray, part: np.ndarray) -> np.ndarray:
+    """D (n, d), 모든 축 작을수록 좋음 → 지배되지 않는 행 bool. 완전 중복은 첫 행만.
+    part: 같은 part 끼리는 이미 서로 비지배(이전 단계 라벨의 평행이동)라 다른 part 와만 비교."""
+    n = len(D)
+    if n <= 1:
+        return np.ones(n, dtype=bool)
+    _, first = np.unique(D, axis=0, return_index=True)
+    keep = np.zeros(n, dtype=bool)
+    keep[first] = True
+    parts = {p: np.flatnonzero(keep & (part == p)) for p in np.unique(part)}
+    for a, ia in parts.items():
+        for b, ib in parts.items():
+            if a == b or not len(ia) or not len(ib):
+                continue
+            E = D[ib]
+            for lo in range(0, len(ia), _CHUNK):
+                blk = D[ia[lo:lo + _CHUNK]]
+                le = (E[None, :, :] <= blk[:, None, :]).all(2)     # j 가 i 이하(모든 축)
+                lt = (E[None, :, :] < blk[:, None, :]).any(2)      # 적어도 한 축에서 더 좋음
+                keep[ia[lo:lo + _CHUNK][(le & lt).any(1)]] = False
+    return keep
+
+def _beam(W: np.ndarray, cost: np.ndarray, safe: np.ndarray, cap: int, n_bins: int = 32) -> np.ndarray:
+    """라벨 cap 개 선택. 비용 분위 구간별로 WAR 상위를 고르게 남겨 프런티어 전 구간을 유지.
+    남은 무브 없이도 실행 가능한(safe) 라벨을 구간 안에서 우선."""
+    edges = np.quantile(cost, np.linspace(0, 1, n_bins + 1)[1:-1])
+    b = np.searchsorted(edges, cost)
+    order = np.lexsort((-W, ~safe, b))                          # 구간 → safe 우선 → WAR 내림차순
+    bs = b[order]
+    rank = np.arange(len(order)) - np.searchsorted(bs, bs)      # 구간 내 순위
+    quota = max(1, cap // n_bins)
+    pick = order[rank < quota]
+    if len(pick) < cap:                                         # 라벨 적은 구간의 남는 몫은 전체 WAR 순으로
+        rest = order[rank >= quota]
+        pick = np.concatenate([pick, rest[np.argsort(-W[rest], kind="stable")[:cap - len(pick)]]])
+    return pick[:cap]
+
+def tiered_tax(years: Sequence[int], prior_streak=None) -> Callable:
+    """tax_fn 모양(payroll (n, Y) 또는 (Y,), 기준선 (Y,) → 세금)의 실제 CBA 세금. prior_streak: 첫 해 직전 연속 초과 연수."""
+    years = [int(y) for y in years]
+    return lambda payroll, thr: tax_matrix(payroll, thr, years, prior_streak)["tax"]
+
+def _stages(groups: Sequence[Optional[str]], required: np.ndarray) -> List[List[int]]:
+    """같은 그룹은 한 단계(최대 1개 선택). 그룹 없는 무브는 각자 단계. 각 단계 옵션: -1(선택 안 함) + 무브."""
+    order, by = [], {}
+    for i, g in enumerate(groups):
+        key = ("g", g) if g else ("m", i)
+        if key not in by:
+            by[key] = []
+            order.append(key)
+        by[key].append(i)
+    out = []
+    for key in order:
+        ms = by[key]
+        req = [i for i in ms if required[i]]
+        if len(req) > 1:
+            raise ValueError(f"required moves conflict in group {key[1]}")
+        out.append(req if req else [-1] + ms)
+    return out
+
+def search(war: np.ndarray, salary: np.ndarray, base_payroll: np.ndarray, slots: Optional[np.ndarray] = None,
+           groups: Optional[Sequence[Optional[str]]] = None, required: Optional[np.ndarray] = None,
+           budget_cap: Optional[np.ndarray] = None, cbt: Optional[np.ndarray] = None, cbt_mode: str = "tax",
+           tax_fn: Optional[Callable] = None, open_slots: Optional[int] = None, rate: float = 0.08,
+           max_states: int = 1000, time_budget_sec: float = 5.0, years: Optional[Sequence[int]] = None,
+           prior_streak: int = 0) -> Dict:
+    """war/salary (M, Y), base_payroll/budget_cap/cbt (Y,). 반환: 프런티어 라벨의 선택 무브·연도별 델타·지표.
+    tax_fn 이 없으면 tiered_tax(years, prior_streak) — years 는 시기별 CBA 규칙 선택용(없으면 마지막 CBA)."""
+    t0 = time.monotonic()
+    war = np.atleast_2d(np.asarray(war, dtype=float))
+    salary = np.atleast_2d(np.asarray(salary, dtype=float))
+    M, Y = salary.shape
+    if tax_fn is None:
+        tax_fn = tiered_tax(years if years is not None else [9999 + k for k in range(Y)], [prior_streak])
+    base = np.asarray(base_payroll, dtype=float)
+    slots = np.zeros(M) if slots is None else np.asarray(slots, dtype=float)
+    required = np.zeros(M, dtype=bool) if required is None else np.asarray(required, dtype=bool)
+    groups = [None] * M if groups is None else list(groups)
+    limit = np.full(Y, np.inf)                                   # 연도별 Δ연봉 상한
+    if budget_cap is not None:
+        limit = np.minimum(limit, np.asarray(budget_cap, dtype=float) - base)
+    if cbt is not None and cbt_mode == "hard":
+        limit = np.minimum(limit, np.asarray(cbt, dtype=float) - base)
+    slot_lim = np.inf if open_slots is None else float(open_slots)
+
+    stages = _stages(groups, required)
+    # 큰 WAR 무브를 먼저 — 빔이 걸려도 상단 프런티어가 일찍 자리잡음(정확 탐색이면 순서 무관)
+    stages.sort(key=lambda st: -max((war[i].sum() for i in st if i >= 0), default=0.0))
+    K = len(stages)
+    # 단계 k 이후(k 포함)에서 얻을 수 있는 최대 감소량(음수 합) — 가지치기 하한
+    rem_s = np.zeros((K + 1, Y))
+    rem_r = np.zeros(K + 1)
+    for k in range(K - 1, -1, -1):
+        opts = [i for i in stages[k] if i >= 0]
+        none_ok = -1 in stages[k]
+        s_min = salary[opts].min(0) if opts else np.zeros(Y)
+        r_min = slots[opts].min() if opts else 0.0
+        rem_s[k] = rem_s[k + 1] + (np.minimum(s_min, 0.0) if none_ok else s_min)
+        rem_r[k] = rem_r[k + 1] + (min(r_min, 0.0) if none_ok else r_min)
+
+    disc = ce.discount(Y, rate, 0)
+    # 지배 비교 축: 제약/세금이 걸린 연도는 연도별, 나머지 연도는 NPV 하나로 합쳐도 목적함수가 같음(축 수 ↓ → 라벨 수 ↓)
+    per_year = np.isfinite(limit) | (cbt is not None and cbt_mode == "tax")
+    use_slots = np.isfinite(slot_lim)
+
+    def _dims(S_, R_, W_):
+        cols = [S_[:, per_year], (S_[:, ~per_year] @ disc[~per_year])[:, None]]
+        if use_slots:
+            cols.append(R_[:, None])
+        return np.column_stack(cols + [-W_[:, None]])
+
+    cap = max_states
+    S = np.zeros((1, Y)); W = np.zeros(1); R = np.zeros(1)
+    trail = []                                                   # 단계별 (부모 인덱스, 선택 무브)
+    exact, explored = True, 1
+    for k, opts in enumerate(stages):
+        parts_s, parts_w, parts_r, parts_p, parts_c = [], [], [], [], []
+        for o in opts:
+            if o < 0:
+                parts_s.append(S); parts_w.append(W); parts_r.append(R)
+            else:
+                parts_s.append(S + salary[o]); parts_w.append(W + war[o].sum()); parts_r.append(R + slots[o])
+            parts_p.append(np.arange(len(W))); parts_c.append(np.full(len(W), o))
+        S2, W2, R2 = np.vstack(parts_s), np.concatenate(parts_w), np.concatenate(parts_r)
+        P2, C2 = np.concatenate(parts_p), np.concatenate(parts_c)
+        explored += len(W2)
+        ok = ((S2 + rem_s[k + 1]) <= limit + 1e-6).all(1) & (R2 + rem_r[k + 1] <= slot_lim + 1e-9)
+        S2, W2, R2, P2, C2 = S2[ok], W2[ok], R2[ok], P2[ok], C2[ok]
+        if not len(W2):
+            raise ValueError("no feasible plan under the given constraints")
+        keep = _nondominated(_dims(S2, R2, W2), C2)
+        S2, W2, R2, P2, C2 = S2[keep], W2[keep], R2[keep], P2[keep], C2[keep]
+        if time.monotonic() - t0 > time_budget_sec and cap > 50:
+            cap, exact = max(50, cap // 4), False                # 시간 예산 초과 → 남은 단계는 빔 폭 축소
+        if len(W2) > cap:
+            top = _beam(W2, S2 @ disc, (S2 <= limit + 1e-6).all(1) & (R2 <= slot_lim + 1e-9), cap)
+            S2, W2, R2, P2, C2 = S2[top], W2[top], R2[top], P2[top], C2[top]
+            exact = False
+        S, W, R = S2, W2, R2
+        trail.append((P2, C2))
+
+    payroll = base + S                                           # (n, Y)
+    if cbt is not None and cbt_mode == "tax":
+        tax = tax_fn(payroll, cbt) - tax_fn(base[None, :], cbt)  # 추가 세금만
+    else:
+        tax = np.zeros_like(S)
+    cost = (S + tax) @ disc                                     # 추가 지출 NPV(t0 현재)
+    order = np.lexsort((-W, cost))
+    front, best = [], -np.inf
+    for i in order:
+        if W[i] > best + 1e-9:
+            front.append(i)
+            best = W[i]
+
+    def _moves(i):
+        out = []
+        for P, C in reversed(trail):
+            if C[i] >= 0:
+                out.append(int(C[i]))
+            i = P[i]
+        return sorted(out)
+
+    points = []
+    for i in front:
+        mv = _moves(i)
+        points.append({"moves": mv, "wins_added": float(W[i]), "npv_cost": float(cost[i]),
+                       "delta_war": war[mv].sum(0).tolist() if mv else [0.0] * Y, "delta_salary": S[i].tolist(),
+                       "payroll": payroll[i].tolist(), "cbt_tax": tax[i].tolist(), "slots": float(R[i])})
+    return {"points": points, "exact": exact, "states_explored": int(explored), "states_final": int(len(W)),
+            "stages": K, "elapsed_sec": round(time.monotonic() - t0, 4)}
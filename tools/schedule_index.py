@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+# 일정 인덱스: games.csv(+shards) 1회 로드 → 팀별 정렬 배열 + 누적합으로 임의 구간 질의
+#   - 휴식일/백투백/원정 연속 길이/시차 이동/누적 이동거리(km, 시즌별 구장 기준)
+#   - 구간 질의는 bisect 2회 + 누적합 차이 → 팀 30개 × 시즌 전체도 ms 단위
+import os, csv, glob, threading
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from tools.team_code_utils import norm_team
+from tools.venue_registry import distance_km, tz_offset
+
+OUTPUT_DIR = os.getenv("COGM_OUTPUT_DIR", "output")
+
+def _to_int(v) -> Optional[int]:
+    try:
+        return int(float(v))
+    except (TypeError, ValueError):
+        return None
+
+
+class _TeamSchedule:
+    """팀 1개의 경기 배열(날짜순) + 누적합."""
+    __slots__ = ("ords", "home", "opp", "park", "cum_km", "cum_tz", "cum_b2b",
+                 "cum_newdate", "cum_win", "cum_dec", "away_run")
+
+    def __init__(self, rows: List[Tuple[int, bool, str, str, Optional[bool]]]):
+        rows.sort(key=lambda r: r[0])
+        self.ords = [r[0] for r in rows]
+        self.home = [r[1] for r in rows]
+        self.opp = [r[2] for r in rows]
+        self.park = [r[3] for r in rows]
+        n = len(rows)
+        self.cum_km = [0.0] * (n + 1)
+        self.cum_tz = [0] * (n + 1)
+        self.cum_b2b = [0] * (n + 1)      # 전일 경기 후 연속일 경기(날짜 단위)
+        self.cum_newdate = [0] * (n + 1)  # 고유 경기일 수
+        self.cum_win = [0] * (n + 1)
+        self.cum_dec = [0] * (n + 1)      # 결과 확정 경기 수
+        self.away_run = [0] * n           # i번째 경기까지 연속 원정 경기 수
+        prev_ord = None
+        for i, (o, is_home, _opp, park, won) in enumerate(rows):
+            km = tz = b2b = new = 0
+            if i > 0:
+                # 구장 좌표는 도착 경기 시즌 기준(레지스트리 연도별 행렬 캐시)
+                yr = date.fromordinal(o).year
+                km = distance_km(self.park[i - 1], park, yr)
+                tz = 1 if tz_offset(self.park[i - 1], yr) != tz_offset(park, yr) else 0
+            if o != prev_ord:
+                new = 1
+                if prev_ord is not None and o - prev_ord == 1:
+                    b2b = 1
+            prev_ord = o
+            self.cum_km[i + 1] = self.cum_km[i] + km
+            self.cum_tz[i + 1] = self.cum_tz[i] + tz
+            self.cum_b2b[i + 1] = self.cum_b2b[i] + b2b
+            self.cum_newdate[i + 1] = self.cum_newdate[i] + new
+            self.cum_win[i + 1] = self.cum_win[i] + (1 if won else 0)
+            self.cum_dec[i + 1] = self.cum_dec[i] + (0 if won is None else 1)
+            self.away_run[i] = 0 if is_home else (self.away_run[i - 1] + 1 if i > 0 else 1)
+
+    def span(self, o0: int, o1: int) -> Tuple[int, int]:
+        return bisect_left(self.ords, o0), bisect_right(self.ords, o1)
+
+    def win_pct_through(self, o1: int, season: Optional[int] = None) -> Optional[float]:
+        """season(기본 o1 연도) 개막~o1 승률 — 이전 시즌 누적은 제외."""
+        season = season or date.fromordinal(o1).year
+        k0 = bisect_left(self.ords, date(season, 1, 1).toordinal())
+        k = bisect_right(self.ords, min(o1, date(season, 12, 31).toordinal()))
+        dec = self.cum_dec[k] - self.cum_dec[k0]
+        return ((self.cum_win[k] - self.cum_win[k0]) / dec) if dec > 0 else None
+
+
+class ScheduleIndex:
+    def __init__(self, games_paths: List[str]):
+        self.sources = list(games_paths)
+        self.teams: Dict[str, _TeamSchedule] = {}
+        self.n_games = 0
+        self._build()
+
+    def _build(self):
+        seen = {}
+        for p in self.sources:
+            try:
+                with open(p, newline="", encoding="utf-8") as f:
+                    for r in csv.DictReader(f):
+                        home, away, d = norm_team(r.get("home")), norm_team(r.get("away")), r.get("date")
+                        if not home or not away or not d:
+                            continue
+                        try:
+                            o = date.fromisoformat(d[:10]).toordinal()
+                        except ValueError:
+                            continue
+                        key = r.get("game_pk") or f"{d}|{home}|{away}"
+                        seen[key] = (o, home, away, _to_int(r.get("home_runs")), _to_int(r.get("away_runs")))
+            except OSError:
+                continue
+        per_team: Dict[str, list] = {}
+        for o, home, away, hr, ar in seen.values():
+            hw = None if hr is None or ar is None else hr > ar
+            per_team.setdefault(home, []).append((o, True, away, home, hw))
+            per_team.setdefault(away, []).append((o, False, home, home, None if hw is None else not hw))
+        self.teams = {t: _TeamSchedule(rows) for t, rows in per_team.items()}
+        self.n_games = len(seen)
+
+    def has_team(self, team: str) -> bool:
+        return norm_team(team) in self.teams
+
+    def window(self, team: str, d0: date, d1: date) -> Optional[dict]:
+        """[d0, d1] 구간 일정 요약. 팀 데이터가 없으면 None."""
+        ts = self.teams.get(norm_team(team))
+        if ts is None:
+            return None
+        if d1 < d0:
+            d0, d1 = d1, d0
+        o0, o1 = d0.toordinal(), d1.toordinal()
+        lo, hi = ts.span(o0, o1)
+        days = o1 - o0 + 1
+        games = hi - lo
+        game_days = ts.cum_newdate[hi] - ts.cum_newdate[lo]
+        b2b = ts.cum_b2b[hi] - ts.cum_b2b[lo]
+        # 구간 첫 경기가 전일 경기의 연속이면 구간 내 연전으로 보지 않음(경계 보정)
+        if games and lo > 0 and ts.ords[lo] - ts.ords[lo - 1] == 1:
+            b2b -= 1
+        opp_wp = []
+        for i in range(lo, hi):
+            opp = self.teams.get(ts.opp[i])
+            wp = opp.win_pct_through(o1, date.fromordinal(ts.ords[i]).year) if opp else None
+            if wp is not None:
+                opp_wp.append(wp)
+        return {
+            "games": games,
+            "game_days": game_days,
+            "home_games": sum(ts.home[lo:hi]),
+            "back_to_backs": max(0, b2b),
+            "rest_days": days - game_days,
+            "travel_km": round(ts.cum_km[hi] - ts.cum_km[lo], 1),
+            "tz_shifts": ts.cum_tz[hi] - ts.cum_tz[lo],
+            # 구간 시작 전부터 이어진 원정은 구간 안 경기 수만(최장/현재 모두)
+            "road_trip_max": max((min(ts.away_run[i], i - lo + 1) for i in range(lo, hi)), default=0),
+            "road_trip_current": min(ts.away_run[hi - 1], hi - lo) if games else 0,
+            "opp_strength": round(sum(opp_wp) / len(opp_wp), 3) if opp_wp else None,
+            "days": days,
+        }
+
+
+def _default_sources(out_dir: str) -> List[str]:
+    return [os.path.join(out_dir, "games.csv")] + sorted(glob.glob(os.path.join(out_dir, "shards", "*", "games.csv")))
+
+_INDEX: Optional[ScheduleIndex] = None
+_INDEX_SIG: Optional[tuple] = None
+_INDEX_LOCK = threading.Lock()
+
+def _signature(paths: List[str]) -> tuple:
+    sig = []
+    for p in paths:
+        try:
+            st = os.stat(p)
+            sig.append((p, st.st_mtime_ns, st.st_size))
+        except OSError:
+            pass
+    return tuple(sig)
+
+def get_schedule_index(out_dir: str = OUTPUT_DIR) -> ScheduleIndex:
+    """프로세스 공용 인덱스. 원본 CSV mtime/size가 바뀌면 재빌드."""
+    global _INDEX, _INDEX_SIG
+    paths = _default_sources(out_dir)
+    sig = _signature(paths)
+    with _INDEX_LOCK:
+        if _INDEX is None or sig != _INDEX_SIG:
+            _INDEX = ScheduleIndex(paths)
+            _INDEX_SIG = sig
+        return _INDEX
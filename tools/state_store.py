@@ -0,0 +1,448 @@
+# -*- coding: utf-8 -*-
+# 운영 상태 저장소(SQLite WAL 한 파일) — 로스터/IL/워치리스트/알람 규칙/의사결정 로그
+#   - 여러 uvicorn 워커·CLI 가 같은 파일을 공유 → 워커 간 상태 일치, 재시작해도 유지
+#   - 로스터/IL: (team, player_id) 행 단위 upsert(바뀐 선수만 기록, 전체 파일 재작성 없음), 팀 단위 인덱스 조회
+#   - 워치리스트: (team, player_id, pos) 순서 보존, 알람 규칙: 팀별 목록 교체(트랜잭션)
+#   - 의사결정 로그: append-only(seq 자동 증가), action/team/created_at/레드팀 레벨 인덱스, seq 키셋 페이지네이션
+#     FTS5(요약·근거) 전문 검색 — FTS5 없는 SQLite 면 LIKE 로 대체. 레드팀 점수는 기록 시 열로 저장
+#   - 알람 엔진(tools/alert_engine): 선수 지표 최신값 + 변경 버전(CDC 피드), 팀별 평가 커서, 발화 기록(쿨다운)
+#   - 예전 JSON 스냅샷({"roster":…, "il":…} 또는 roster dict)은 import_snapshot 으로 1회 이관(replace=True 면 교체), export_snapshot 으로 백업
+#   - 한 선수 증감 수정은 update_record(읽기-수정-쓰기를 BEGIN IMMEDIATE 한 트랜잭션에서)
+#   - 파일을 열 수 없으면(읽기 전용 FS 등) get_state_store 가 프로세스 메모리 DB 로 대체(그 밖의 오류는 그대로 실패)
+import os, json, time, sqlite3, threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+STATE_DB = os.getenv("COGM_STATE_DB", "data/cogm_state.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS roster(
+    team TEXT NOT NULL, player_id TEXT NOT NULL, rec TEXT NOT NULL, updated_at REAL NOT NULL,
+    UNIQUE(team, player_id)
+);
+CREATE TABLE IF NOT EXISTS il(
+    team TEXT NOT NULL, player_id TEXT NOT NULL, status TEXT, est_return_date TEXT, rec TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE(team, player_id)
+);
+CREATE INDEX IF NOT EXISTS ix_il_status ON il(team, status);
+CREATE TABLE IF NOT EXISTS watchlist(
+    team TEXT NOT NULL, player_id TEXT NOT NULL, pos INTEGER NOT NULL, added_at REAL NOT NULL,
+    PRIMARY KEY(team, player_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_watchlist_pos ON watchlist(team, pos);
+CREATE TABLE IF NOT EXISTS alert_rules(
+    team TEXT NOT NULL, idx INTEGER NOT NULL, metric TEXT NOT NULL, op TEXT NOT NULL, threshold REAL NOT NULL,
+    PRIMARY KEY(team, idx)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS decisions(
+    seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT NOT NULL, team TEXT, actor TEXT, action TEXT,
+    created_at TEXT NOT NULL, entry TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metric_feed(
+    version INTEGER PRIMARY KEY AUTOINCREMENT, source TEXT, changed INTEGER NOT NULL, created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS player_metrics(
+    player_id TEXT PRIMARY KEY, digest TEXT NOT NULL, version INTEGER NOT NULL, season INTEGER,
+    metrics TEXT NOT NULL, updated_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_player_metrics_version ON player_metrics(version);
+CREATE TABLE IF NOT EXISTS alert_cursor(
+    team TEXT PRIMARY KEY, version INTEGER NOT NULL, sig TEXT NOT NULL, evaluated_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS alert_fired(
+    team TEXT NOT NULL, player_id TEXT NOT NULL, rule TEXT NOT NULL, value REAL, fired_at REAL NOT NULL,
+    PRIMARY KEY(team, player_id, rule)
+) WITHOUT ROWID;
+"""
+
+# 예전 파일(레드팀/검색 열 없는 decisions)도 열 추가 후 인덱스 생성
+_DECISION_COLS = {"rt_level": "TEXT", "rt_score": "INTEGER", "search_text": "TEXT"}
+_DECISION_INDEXES = """
+CREATE INDEX IF NOT EXISTS ix_decisions_action ON decisions(action, seq);
+CREATE INDEX IF NOT EXISTS ix_decisions_team ON decisions(team, seq);
+CREATE INDEX IF NOT EXISTS ix_decisions_created ON decisions(created_at);
+CREATE INDEX IF NOT EXISTS ix_decisions_rt ON decisions(rt_level, seq);
+"""
+
+_TEAM_TABLES = ("roster", "il")
+
+def decision_text(entry: Dict[str, Any]) -> Tuple[str, str]:
+    """전문 검색 대상: (요약/근거 설명, 증거 k:v)."""
+    ctx = entry.get("context") or {}
+    why = " ".join(str(x) for x in (entry.get("summary"), ctx.get("rationale")) if x)
+    ev = " ".join(f"{e.get('k')}:{e.get('v')}" for e in entry.get("evidence") or [])
+    return why, ev
+
+def fts_query(q: str) -> str:
+    """사용자 입력 → FTS5 MATCH 식(토큰마다 따옴표, 암묵 AND). 끝이 * 인 토큰은 접두 검색."""
+    out = []
+    for t in q.split():
+        star = t.endswith("*") and len(t) > 1
+        t = t.rstrip("*").replace('"', '""')
+        if t:
+            out.append(f'"{t}"' + ("*" if star else ""))
+    return " ".join(out)
+
+class StateStore:
+    def __init__(self, path: str = STATE_DB):
+        self.path = path
+        self._memory = path == ":memory:"
+        if not self._memory:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._mem_conn: Optional[sqlite3.Connection] = None
+        self._mem_lock = threading.RLock()
+        with self._lock():
+            self._db().executescript(_SCHEMA)
+            self._fts = self._migrate_decisions(self._db())
+
+    # ----- 내부 -----
+    def _db(self) -> sqlite3.Connection:
+        if self._memory:                                # 메모리 DB 는 연결 하나를 락으로 공유
+            if self._mem_conn is None:
+                self._mem_conn = sqlite3.connect(":memory:", isolation_level=None, check_same_thread=False)
+            return self._mem_conn
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _lock(self):
+        if self._memory:
+            with self._mem_lock:
+                yield
+        else:
+            yield
+
+    @contextmanager
+    def tx(self):
+        """쓰기 트랜잭션(BEGIN IMMEDIATE: 워커 간 쓰기 직렬화)."""
+        with self._lock():
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+                db.execute("COMMIT")
+            except BaseException:
+                if db.in_transaction:                   # COMMIT 실패(잠금 등)도 되돌림
+                    db.execute("ROLLBACK")
+                raise
+
+    def _migrate_decisions(self, db: sqlite3.Connection) -> bool:
+        """레드팀/검색 열 추가 + FTS5 색인 생성(처음 한 번 기존 행 채움). 반환: FTS5 사용 가능 여부.
+        여러 워커가 동시에 기동해도 BEGIN IMMEDIATE 로 직렬화(열 중복 추가 오류는 다른 워커가 먼저 한 것)."""
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            fts = self._migrate_decisions_tx(db)
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+        return fts
+
+    def _migrate_decisions_tx(self, db: sqlite3.Connection) -> bool:
+        have = {r[1] for r in db.execute("PRAGMA table_info(decisions)")}
+        for c, t in _DECISION_COLS.items():
+            if c not in have:
+                try:
+                    db.execute(f"ALTER TABLE decisions ADD COLUMN {c} {t}")
+                except sqlite3.OperationalError as e:
+                    if "duplicate column" not in str(e).lower():
+                        raise
+        for stmt in filter(str.strip, _DECISION_INDEXES.split(";")):
+            db.execute(stmt)
+        todo = db.execute("SELECT seq, entry FROM decisions WHERE search_text IS NULL").fetchall()
+        for seq, e in todo:
+            e = json.loads(e)
+            rt = e.get("redteam") or {}
+            db.execute("UPDATE decisions SET rt_level=?, rt_score=?, search_text=? WHERE seq=?",
+                       (rt.get("level"), rt.get("score"), " ".join(decision_text(e)), seq))
+        try:
+            new = not db.execute("SELECT 1 FROM sqlite_master WHERE name='decisions_fts'").fetchone()
+            # 외부 콘텐츠 = decisions.search_text(원문은 한 번만 저장), rowid = seq
+            db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS decisions_fts USING fts5("
+                       "search_text, content='decisions', content_rowid='seq')")
+        except sqlite3.OperationalError:
+            return False
+        if new:
+            db.execute("INSERT INTO decisions_fts(decisions_fts) VALUES('rebuild')")
+        return True
+
+    def _rows(self, sql: str, args: tuple = ()) -> List[tuple]:
+        with self._lock():
+            return self._db().execute(sql, args).fetchall()
+
+    # ----- 로스터 / IL -----
+    def team_records(self, kind: str, team: str) -> Dict[str, dict]:
+        """player_id → rec (처음 들어온 순서; upsert 는 rowid 유지)."""
+        assert kind in _TEAM_TABLES
+        return {pid: json.loads(rec) for pid, rec in
+                self._rows(f"SELECT player_id, rec FROM {kind} WHERE team=? ORDER BY rowid", (team,))}
+
+    def upsert_records(self, kind: str, team: str, recs: Dict[str, dict]) -> None:
+        assert kind in _TEAM_TABLES
+        if not recs:
+            return
+        with self.tx() as db:
+            self._upsert(db, kind, team, recs)
+
+    def update_record(self, kind: str, team: str, player_id: str, fn: Callable[[dict], None],
+                      default: Optional[dict] = None) -> dict:
+        """한 선수 rec 읽기 → fn(rec) 로 수정 → 저장을 한 트랜잭션(BEGIN IMMEDIATE)에서.
+        워커 간 동시 증감(옵션 연수 +1 등)이 서로 덮어쓰지 않음. 없던 선수는 default 로 시작."""
+        return self.update_records(kind, team, [player_id], fn, lambda pid: default)[player_id]
+
+    def update_records(self, kind: str, team: str, player_ids: List[str], fn: Callable[[dict], None],
+                       default: Optional[Callable[[str], Optional[dict]]] = None) -> Dict[str, dict]:
+        """여러 선수 rec 에 같은 fn 을 한 트랜잭션에서(읽기-수정-쓰기). default(pid) 는 없던 선수의 시작 rec."""
+        assert kind in _TEAM_TABLES
+        out: Dict[str, dict] = {}
+        with self.tx() as db:
+            for pid in dict.fromkeys(player_ids):
+                row = db.execute(f"SELECT rec FROM {kind} WHERE team=? AND player_id=?", (team, pid)).fetchone()
+                rec = json.loads(row[0]) if row else dict((default(pid) if default else None) or {"player_id": pid})
+                fn(rec)
+                out[pid] = rec
+            if out:
+                self._upsert(db, kind, team, out)
+        return out
+
+    def _upsert(self, db: sqlite3.Connection, kind: str, team: str, recs: Dict[str, dict]) -> None:
+        now = time.time()
+        if kind == "il":
+            db.executemany(
+                "INSERT INTO il(team, player_id, status, est_return_date, rec, updated_at) VALUES(?,?,?,?,?,?) "
+                "ON CONFLICT(team, player_id) DO UPDATE SET status=excluded.status, "
+                "est_return_date=excluded.est_return_date, rec=excluded.rec, updated_at=excluded.updated_at",
+                [(team, pid, r.get("status"), r.get("est_return_date"), json.dumps(r, ensure_ascii=False), now)
+                 for pid, r in recs.items()])
+        else:
+            db.executemany(
+                "INSERT INTO roster(team, player_id, rec, updated_at) VALUES(?,?,?,?) "
+                "ON CONFLICT(team, player_id) DO UPDATE SET rec=excluded.rec, updated_at=excluded.updated_at",
+                [(team, pid, json.dumps(r, ensure_ascii=False), now) for pid, r in recs.items()])
+
+    def delete_record(self, kind: str, team: str, player_id: str) -> bool:
+        assert kind in _TEAM_TABLES
+        with self.tx() as db:
+            return db.execute(f"DELETE FROM {kind} WHERE team=? AND player_id=?", (team, player_id)).rowcount > 0
+
+    def teams(self, kind: str) -> List[str]:
+        assert kind in _TEAM_TABLES
+        return [t for (t,) in self._rows(f"SELECT DISTINCT team FROM {kind} ORDER BY team")]
+
+    # ----- 워치리스트 -----
+    def watchlist(self, team: str) -> List[str]:
+        return [p for (p,) in self._rows("SELECT player_id FROM watchlist WHERE team=? ORDER BY pos", (team,))]
+
+    def watchlist_set(self, team: str, player_ids: List[str]) -> List[str]:
+        ids = list(dict.fromkeys(player_ids))
+        now = time.time()
+        with self.tx() as db:
+            db.execute("DELETE FROM watchlist WHERE team=?", (team,))
+            db.executemany("INSERT INTO watchlist(team, player_id, pos, added_at) VALUES(?,?,?,?)",
+                           [(team, p, i, now) for i, p in enumerate(ids)])
+        return ids
+
+    def watchlist_add(self, team: str, player_ids: List[str]) -> List[str]:
+        now = time.time()
+        with self.tx() as db:
+            (nxt,) = db.execute("SELECT COALESCE(MAX(pos) + 1, 0) FROM watchlist WHERE team=?", (team,)).fetchone()
+            for p in dict.fromkeys(player_ids):
+                if db.execute("INSERT OR IGNORE INTO watchlist(team, player_id, pos, added_at) VALUES(?,?,?,?)",
+                              (team, p, nxt, now)).rowcount:
+                    nxt += 1
+        return self.watchlist(team)
+
+    def watchlist_teams(self) -> List[str]:
+        return [t for (t,) in self._rows("SELECT DISTINCT team FROM watchlist ORDER BY team")]
+
+    # ----- 알람 규칙 -----
+    def alert_rules(self, team: str) -> List[Dict[str, Any]]:
+        return [{"metric": m, "op": o, "threshold": t} for m, o, t in
+                self._rows("SELECT metric, op, threshold FROM alert_rules WHERE team=? ORDER BY idx", (team,))]
+
+    def alert_rules_set(self, team: str, rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        with self.tx() as db:
+            db.execute("DELETE FROM alert_rules WHERE team=?", (team,))
+            db.executemany("INSERT INTO alert_rules(team, idx, metric, op, threshold) VALUES(?,?,?,?,?)",
+                           [(team, i, r["metric"], r["op"], float(r.get("threshold", 0.0))) for i, r in enumerate(rules)])
+        return self.alert_rules(team)
+
+    # ----- 의사결정 로그 -----
+    def decision_append(self, entry: Dict[str, Any]) -> int:
+        ctx = entry.get("context") or {}
+        rt = entry.get("redteam") or {}
+        text = " ".join(decision_text(entry))
+        with self.tx() as db:
+            cur = db.execute("INSERT INTO decisions(id, team, actor, action, created_at, entry, rt_level, rt_score, "
+                             "search_text) VALUES(?,?,?,?,?,?,?,?,?)",
+                             (entry["id"], ctx.get("team"), entry.get("actor"), entry.get("action"),
+                              entry["created_at"], json.dumps(entry, ensure_ascii=False),
+                              rt.get("level"), rt.get("score"), text))
+            seq = int(cur.lastrowid)
+            if self._fts:
+                db.execute("INSERT INTO decisions_fts(rowid, search_text) VALUES(?,?)", (seq, text))
+            return seq
+
+    def decision_list(self, limit: int = 20, offset: int = 0, action: Optional[str] = None,
+                      team: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+                      risk: Optional[str] = None, q: Optional[str] = None, cursor: Optional[int] = None,
+                      desc: bool = False, with_total: Optional[bool] = None
+                      ) -> Tuple[Optional[int], List[Dict[str, Any]], Optional[int]]:
+        """필터(action/team/기간[since, until)/레드팀 레벨/전문 검색) + seq 키셋 페이지.
+        cursor 가 있으면 그 seq 다음부터(offset 무시). 반환 (전체 건수, 항목, 다음 cursor 또는 None).
+        전체 건수(COUNT)는 첫 페이지(cursor 없음)에서만 — with_total 로 강제/생략, 안 세면 None."""
+        conds, args = [], []
+        for col, v in (("action", action), ("team", team), ("rt_level", risk)):
+            if v:
+                conds.append(f"d.{col}=?"); args.append(v)
+        if since:
+            conds.append("d.created_at>=?"); args.append(since)
+        if until:
+            conds.append("d.created_at<?"); args.append(until)
+        src = "decisions d"
+        if q and q.strip():
+            if self._fts:
+                src += " JOIN decisions_fts f ON f.rowid = d.seq"
+                conds.append("decisions_fts MATCH ?"); args.append(fts_query(q))
+            else:
+                for t in q.split():
+                    conds.append("d.search_text LIKE ?"); args.append(f"%{t.rstrip('*')}%")
+        base = tuple(args)
+        where = ("WHERE " + " AND ".join(conds)) if conds else ""
+        if with_total is None:
+            with_total = cursor is None
+        total = int(self._rows(f"SELECT COUNT(*) FROM {src} {where}", base)[0][0]) if with_total else None
+        page, pargs = list(conds), list(args)
+        if cursor is not None:
+            page.append("d.seq<?" if desc else "d.seq>?"); pargs.append(int(cursor))
+        pwhere = ("WHERE " + " AND ".join(page)) if page else ""
+        tail = "" if cursor is not None else " OFFSET ?"
+        rows = self._rows(f"SELECT d.seq, d.entry FROM {src} {pwhere} ORDER BY d.seq {'DESC' if desc else 'ASC'} "
+                          f"LIMIT ?{tail}", tuple(pargs) + ((limit,) if cursor is not None else (limit, offset)))
+        nxt = int(rows[-1][0]) if len(rows) == limit and limit > 0 else None
+        return total, [json.loads(e) for _, e in rows], nxt
+
+    # ----- 알람 엔진: 지표 CDC 피드 / 커서 / 발화 기록 -----
+    def metrics_publish(self, rows: List[Tuple[str, str, Optional[int], str]], source: str = "") -> Tuple[int, int]:
+        """rows: (player_id, digest, season, metrics JSON). digest 가 바뀐 행만 새 버전으로 기록.
+        반환 (현재 버전, 바뀐 선수 수) — 바뀐 게 없으면 버전을 올리지 않음."""
+        with self.tx() as db:
+            old = dict(db.execute("SELECT player_id, digest FROM player_metrics"))
+            changed = [r for r in rows if old.get(r[0]) != r[1]]
+            if not changed:
+                (v,) = db.execute("SELECT COALESCE(MAX(version), 0) FROM metric_feed").fetchone()
+                return int(v), 0
+            now = time.time()
+            v = int(db.execute("INSERT INTO metric_feed(source, changed, created_at) VALUES(?,?,?)",
+                               (source, len(changed), now)).lastrowid)
+            db.executemany(
+                "INSERT INTO player_metrics(player_id, digest, version, season, metrics, updated_at) VALUES(?,?,?,?,?,?) "
+                "ON CONFLICT(player_id) DO UPDATE SET digest=excluded.digest, version=excluded.version, "
+                "season=excluded.season, metrics=excluded.metrics, updated_at=excluded.updated_at",
+                [(pid, dg, v, season, m, now) for pid, dg, season, m in changed])
+            return v, len(changed)
+
+    def metrics_version(self) -> int:
+        (v,) = self._rows("SELECT COALESCE(MAX(version), 0) FROM metric_feed")[0]
+        return int(v)
+
+    def metrics_for(self, player_ids: List[str], since: int = 0, upto: Optional[int] = None) -> Dict[str, dict]:
+        """since < version <= upto 인 선수의 최신 지표(player_id → metrics). SQLite 변수 한도 때문에 500개씩."""
+        upto = self.metrics_version() if upto is None else upto
+        out: Dict[str, dict] = {}
+        ids = list(dict.fromkeys(player_ids))
+        for lo in range(0, len(ids), 500):
+            part = ids[lo:lo + 500]
+            q = ",".join("?" * len(part))
+            for pid, m in self._rows(f"SELECT player_id, metrics FROM player_metrics WHERE player_id IN ({q}) "
+                                     "AND version > ? AND version <= ?", tuple(part) + (since, upto)):
+                out[pid] = json.loads(m)
+        return out
+
+    def alert_cursor(self, team: str) -> Tuple[int, str]:
+        rows = self._rows("SELECT version, sig FROM alert_cursor WHERE team=?", (team,))
+        return (int(rows[0][0]), rows[0][1]) if rows else (0, "")
+
+    def alert_cursor_set(self, team: str, version: int, sig: str) -> None:
+        with self.tx() as db:
+            db.execute("INSERT INTO alert_cursor(team, version, sig, evaluated_at) VALUES(?,?,?,?) "
+                       "ON CONFLICT(team) DO UPDATE SET version=excluded.version, sig=excluded.sig, "
+                       "evaluated_at=excluded.evaluated_at", (team, version, sig, time.time()))
+
+    def alert_fire(self, team: str, hits: List[Tuple[str, str, float]], cooldown_sec: float,
+                   now: Optional[float] = None) -> List[bool]:
+        """hits: (player_id, rule 키, 값). 같은 키가 cooldown_sec 안에 발화했으면 억제(False), 아니면 기록 후 True."""
+        now = time.time() if now is None else now
+        out = []
+        with self.tx() as db:
+            for pid, rule, val in hits:
+                row = db.execute("SELECT fired_at FROM alert_fired WHERE team=? AND player_id=? AND rule=?",
+                                 (team, pid, rule)).fetchone()
+                ok = row is None or now - row[0] >= cooldown_sec
+                if ok:
+                    db.execute("INSERT INTO alert_fired(team, player_id, rule, value, fired_at) VALUES(?,?,?,?,?) "
+                               "ON CONFLICT(team, player_id, rule) DO UPDATE SET value=excluded.value, "
+                               "fired_at=excluded.fired_at", (team, pid, rule, val, now))
+                out.append(ok)
+        return out
+
+    # ----- 스냅샷 이관/백업 -----
+    def is_empty(self) -> bool:
+        return not any(self._rows(f"SELECT 1 FROM {k} LIMIT 1") for k in _TEAM_TABLES)
+
+    def import_snapshot(self, data: Dict[str, Any], replace: bool = False) -> Dict[str, int]:
+        """예전 JSON 스냅샷 → 저장소. {"roster": {team: {pid: rec}}, "il": {...}} 또는 roster dict 단독.
+        replace=True 면 스냅샷이 다루는 표(단독 dict 는 roster, 묶음은 roster+il)를 비우고 채움(한 트랜잭션)."""
+        combined = "roster" in data or "il" in data
+        parts = data if combined else {"roster": data}
+        kinds = _TEAM_TABLES if combined else ("roster",)
+        n = {}
+        with self.tx() as db:
+            for kind in kinds:
+                if replace:
+                    db.execute(f"DELETE FROM {kind}")
+                n[kind] = 0
+                for team, recs in (parts.get(kind) or {}).items():
+                    if recs:
+                        self._upsert(db, kind, team, recs)
+                    n[kind] += len(recs)
+        return n
+
+    def export_snapshot(self) -> Dict[str, Dict[str, Dict[str, dict]]]:
+        out: Dict[str, Dict[str, Dict[str, dict]]] = {}
+        for kind in _TEAM_TABLES:
+            out[kind] = {}
+            for team, pid, rec in self._rows(f"SELECT team, player_id, rec FROM {kind} ORDER BY team, player_id"):
+                out[kind].setdefault(team, {})[pid] = json.loads(rec)
+        return out
+
+_SHARED: Dict[str, StateStore] = {}
+_SHARED_LOCK = threading.Lock()
+
+_OPEN_ERRORS = ("unable to open", "readonly database", "read-only", "disk i/o error")
+
+def _is_open_error(e: sqlite3.OperationalError) -> bool:
+    return any(m in str(e).lower() for m in _OPEN_ERRORS)
+
+def get_state_store(path: str = STATE_DB) -> StateStore:
+    with _SHARED_LOCK:
+        s = _SHARED.get(path)
+        if s is None:
+            try:
+                s = StateStore(path)
+            except (OSError, sqlite3.OperationalError) as e:
+                # 파일을 열/쓸 수 없을 때만 메모리 DB 로 — 마이그레이션 실패 등은 데이터 유실을 막으려 그대로 실패
+                if isinstance(e, sqlite3.OperationalError) and not _is_open_error(e):
+                    raise
+                print(f"[state_store] {path} 사용 불가({type(e).__name__}: {e}) → 메모리 DB")
+                s = StateStore(":memory:")
+            _SHARED[path] = s
+        return s
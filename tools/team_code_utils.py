@@ -9,13 +9,31 @@ TEAM_ALIAS = {
     "CHN":"CHC", "CHA":"CWS", "TBA":"TBR", "FLA":"MIA", "ANA":"LAA",
     # 역사적/이전 코드
     "CAL":"LAA", "MLN":"MIL", "MON":"WSN", "KCA":"KCR", "WSH":"WSN",
+    # MLB StatsAPI 약칭(games.csv 등) -> 내부 표준
+    "SD":"SDP", "SF":"SFG", "KC":"KCR", "TB":"TBR", "AZ":"ARI", "CHW":"CWS",
+    "WAS":"WSN", "ATH":"OAK",
+}
+
+# StatsAPI 팀 풀네임(shards/<year>/games.csv 의 home/away) -> 내부 표준
+TEAM_NAME_ALIAS = {
+    "ARIZONA DIAMONDBACKS":"ARI", "ATLANTA BRAVES":"ATL", "BALTIMORE ORIOLES":"BAL",
+    "BOSTON RED SOX":"BOS", "CHICAGO CUBS":"CHC", "CHICAGO WHITE SOX":"CWS",
+    "CINCINNATI REDS":"CIN", "CLEVELAND GUARDIANS":"CLE", "CLEVELAND INDIANS":"CLE",
+    "COLORADO ROCKIES":"COL", "DETROIT TIGERS":"DET", "HOUSTON ASTROS":"HOU",
+    "KANSAS CITY ROYALS":"KCR", "LOS ANGELES ANGELS":"LAA", "LOS ANGELES DODGERS":"LAD",
+    "MIAMI MARLINS":"MIA", "FLORIDA MARLINS":"MIA", "MILWAUKEE BREWERS":"MIL",
+    "MINNESOTA TWINS":"MIN", "NEW YORK METS":"NYM", "NEW YORK YANKEES":"NYY",
+    "OAKLAND ATHLETICS":"OAK", "ATHLETICS":"OAK", "PHILADELPHIA PHILLIES":"PHI",
+    "PITTSBURGH PIRATES":"PIT", "SAN DIEGO PADRES":"SDP", "SAN FRANCISCO GIANTS":"SFG",
+    "SEATTLE MARINERS":"SEA", "ST. LOUIS CARDINALS":"STL", "TAMPA BAY RAYS":"TBR",
+    "TEXAS RANGERS":"TEX", "TORONTO BLUE JAYS":"TOR", "WASHINGTON NATIONALS":"WSN",
 }
 
 def norm_team(value: str) -> str:
     if value is None: return None
-    t = str(value).upper()
-    return TEAM_ALIAS.get(t, t)
+    t = str(value).strip().upper()
+    return TEAM_ALIAS.get(t) or TEAM_NAME_ALIAS.get(t, t)
 
 def norm_team_series(s: Iterable) -> pd.Series:
-    ser = pd.Series(s, copy=False).astype(str).str.upper()
-    return ser.map(lambda x: TEAM_ALIAS.get(x, x))
+    ser = pd.Series(s, copy=False).astype(str).str.strip().str.upper()
+    return ser.map(lambda x: TEAM_ALIAS.get(x) or TEAM_NAME_ALIAS.get(x, x))
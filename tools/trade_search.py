@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+# 트레이드 패키지 탐색(두 구단 로스터 → 가치 균형 패키지 top-k)
+#   - 각 팀에서 내줄 수 있는 선수 부분집합(크기 1..max_size)을 모두 열거해 가치 합/적합도 점수를 배열로(양쪽 = meet-in-the-middle 의 두 절반)
+#   - B 쪽 부분집합을 가치 합으로 정렬 → A 부분집합마다 |ΣA − ΣB| ≤ tolerance 구간을 searchsorted 로 한 번에 찾음
+#   - 점수는 양쪽 분리형: score = f(A 패키지) + g(B 패키지)
+#       f = fit_weight·cover(B 가 받는 A 선수 적합도)/2 − surplus_weight·ΣA/value_scale
+#       g = fit_weight·cover(A 가 받는 B 선수 적합도)/2 + surplus_weight·ΣB/value_scale   (A 팀 관점 이득)
+#       cover = 1 − Π(1 − fit): 니즈 충족 정도(선수 수가 늘수록 포화)
+#     → 구간 최댓값(sparse table) + 힙 분할로 전체 top-k 를 정확히 뽑음(모든 쌍을 만들지 않음)
+#   - 선수 수 차이 제한(max_count_diff), 필수 포함/제외 선수, 시간 예산(크기별 열거 중에도 청크마다 확인, 넘기면 중단 → truncated)
+# 사용: python -m tools.trade_search --players output/trade_values.csv --fit output/team_fit.csv --team ARI --partner LAD
+import argparse
+import heapq
+import time
+from itertools import combinations, islice
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+_CHUNK = 1 << 16
+
+def _subsets(n: int, size: int, required: Sequence[int] = (), exclude: Sequence[int] = (),
+             deadline: Optional[float] = None) -> Tuple[np.ndarray, bool]:
+    """크기 size 부분집합 인덱스 (m, size)와 완료 여부. required 는 모두 포함, exclude 는 제외.
+    deadline(time.monotonic 기준)을 넘기면 청크 단위로 열거를 멈추고 그때까지의 부분집합만 반환."""
+    req = sorted(set(required))
+    pool = [i for i in range(n) if i not in set(exclude) and i not in set(req)]
+    k = size - len(req)
+    if k < 0 or k > len(pool):
+        return np.zeros((0, size), dtype=np.int64), True
+    if not k:
+        rest, done = np.zeros((1, 0), dtype=np.int64), True
+    else:
+        it, parts, done = combinations(pool, k), [], False
+        while True:
+            c = list(islice(it, _CHUNK))
+            if c:
+                parts.append(np.array(c, dtype=np.int64).reshape(-1, k))
+            if len(c) < _CHUNK:
+                done = True
+                break
+            if deadline is not None and time.monotonic() > deadline:
+                break
+        rest = np.vstack(parts) if parts else np.zeros((0, k), dtype=np.int64)
+    if req:
+        rest = np.hstack([np.broadcast_to(np.array(req, dtype=np.int64), (len(rest), len(req))), rest])
+    return rest, done
+
+def _side(values: np.ndarray, fit: np.ndarray, size: int, sign: float, fit_weight: float, surplus_weight: float,
+          value_scale: float, required=(), exclude=(), deadline: Optional[float] = None) -> Dict[str, np.ndarray]:
+    idx, done = _subsets(len(values), size, required, exclude, deadline)
+    tot = values[idx].sum(1) if len(idx) else np.zeros(0)
+    cover = 1.0 - np.prod(1.0 - np.clip(fit[idx], 0.0, 1.0), axis=1) if len(idx) else np.zeros(0)
+    part = fit_weight * cover / 2.0 + sign * surplus_weight * tot / value_scale
+    return {"idx": idx, "total": tot, "cover": cover, "part": part, "done": done}
+
+class _RangeMax:
+    """정적 배열 구간 argmax(sparse table, O(1) 질의)."""
+    def __init__(self, a: np.ndarray):
+        self.a = a
+        self.t = [np.arange(len(a))]
+        j = 1
+        while (1 << j) <= len(a):
+            p = self.t[-1]
+            h = 1 << (j - 1)
+            l, r = p[:-h], p[h:]
+            self.t.append(np.where(a[l] >= a[r], l, r))
+            j += 1
+
+    def argmax_many(self, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        j = np.floor(np.log2(hi - lo + 1)).astype(int)
+        out = np.empty(len(lo), dtype=np.int64)
+        for lvl in np.unique(j):                              # 레벨(log 구간 길이)별로 묶어 벡터 질의
+            m = j == lvl
+            l, r = self.t[lvl][lo[m]], self.t[lvl][hi[m] - (1 << lvl) + 1]
+            out[m] = np.where(self.a[l] >= self.a[r], l, r)
+        return out
+
+    def argmax(self, lo: int, hi: int) -> int:
+        """[lo, hi] 포함 구간."""
+        j = (hi - lo + 1).bit_length() - 1
+        l, r = self.t[j][lo], self.t[j][hi - (1 << j) + 1]
+        return int(l if self.a[l] >= self.a[r] else r)
+
+def search(a_values: np.ndarray, a_fit: np.ndarray, b_values: np.ndarray, b_fit: np.ndarray,
+           tolerance: float = 3_000_000.0, max_size: int = 3, max_count_diff: int = 1, top_k: int = 20,
+           fit_weight: float = 1.0, surplus_weight: float = 0.5, value_scale: float = 10_000_000.0,
+           a_required: Sequence[int] = (), b_required: Sequence[int] = (),
+           a_exclude: Sequence[int] = (), b_exclude: Sequence[int] = (), time_budget_sec: float = 2.0) -> Dict:
+    """a_values/b_values: 선수 트레이드 가치($), a_fit: A 선수의 B 팀 적합도(0~1), b_fit: B 선수의 A 팀 적합도.
+    반환 packages: A 가 주는 인덱스/B 가 주는 인덱스/가치 합/적합도/점수(내림차순)."""
+    t0 = time.monotonic()
+    a_values, b_values = np.asarray(a_values, float), np.asarray(b_values, float)
+    a_fit, b_fit = np.asarray(a_fit, float), np.asarray(b_fit, float)
+    kw = dict(fit_weight=fit_weight, surplus_weight=surplus_weight, value_scale=value_scale)
+    deadline = t0 + time_budget_sec
+    A, B, truncated = {}, {}, False
+    for s in range(1, max_size + 1):
+        if time.monotonic() > deadline:
+            truncated = True
+            break
+        # 크기별 열거 안에서도 예산 확인 — 중간에 멈춘 크기는 열거된 부분집합까지만 쓰고 truncated
+        A[s] = _side(a_values, a_fit, s, -1.0, required=a_required, exclude=a_exclude, deadline=deadline, **kw)
+        B[s] = _side(b_values, b_fit, s, +1.0, required=b_required, exclude=b_exclude, deadline=deadline, **kw)
+        da, db = A[s].pop("done"), B[s].pop("done")              # 둘 다 꺼냄(남으면 정렬 단계에서 bool 인덱싱)
+        if not (da and db):
+            truncated = True
+            break
+    heap: List[tuple] = []
+    pairs = sorted((max(sa, sb), sa, sb, c0) for sa in A for sb in B if abs(sa - sb) <= max_count_diff
+                   for c0 in range(0, len(A[sa]["total"]), _CHUNK))   # 작은 패키지부터, A 패키지 청크 단위
+    for m, sa, sb, c0 in pairs:
+        pa, pb = A[sa], B[sb]
+        if not len(pb["total"]):
+            continue
+        # 매칭 중에도 예산 확인 — 남은 청크는 건너뜀(후보가 아직 없으면 값싼 1~2명 패키지까지는 매칭)
+        if (heap or m > 2) and time.monotonic() > deadline:
+            truncated = True
+            break
+        if "rmq" not in pb:                                      # B: 가치 합 정렬 + 구간 argmax 테이블(처음 쓸 때)
+            o = np.argsort(pb["total"], kind="stable")
+            pb = B[sb] = {k: v[o] for k, v in pb.items()}
+            pb["rmq"] = _RangeMax(pb["part"])
+        lo = np.searchsorted(pb["total"], pa["total"][c0:c0 + _CHUNK] - tolerance, side="left")
+        hi = np.searchsorted(pb["total"], pa["total"][c0:c0 + _CHUNK] + tolerance, side="right") - 1
+        ok = np.flatnonzero(lo <= hi)
+        if not len(ok):
+            continue
+        j = pb["rmq"].argmax_many(lo[ok], hi[ok])
+        best = pa["part"][c0 + ok] + pb["part"][j]
+        # 전체 top-k 는 각 A 패키지의 최선값 상위 top_k 안에서만 나옴 → 초기 힙은 청크별 상위 top_k 만
+        keep = np.argsort(-best, kind="stable")[:top_k]
+        heap.extend((-float(best[t]), sa, sb, c0 + int(ok[t]), int(lo[ok[t]]), int(hi[ok[t]]), int(j[t]))
+                    for t in keep)
+    heapq.heapify(heap)
+    out = []
+    while heap and len(out) < top_k:
+        neg, sa, sb, i, lo, hi, j = heapq.heappop(heap)
+        pa, pb = A[sa], B[sb]
+        out.append({"a_idx": pa["idx"][i].tolist(), "b_idx": pb["idx"][j].tolist(),
+                    "a_total": float(pa["total"][i]), "b_total": float(pb["total"][j]),
+                    "delta": float(pb["total"][j] - pa["total"][i]),
+                    "fit_b": float(pa["cover"][i]), "fit_a": float(pb["cover"][j]), "score": -neg})
+        for l2, h2 in ((lo, j - 1), (j + 1, hi)):            # 같은 A 패키지의 차선 B 패키지
+            if l2 <= h2:
+                j2 = pb["rmq"].argmax(l2, h2)
+                heapq.heappush(heap, (-(pa["part"][i] + pb["part"][j2]), sa, sb, i, l2, h2, j2))
+    return {"packages": out, "truncated": truncated,
+            "subsets_a": int(sum(len(p["total"]) for p in A.values())),
+            "subsets_b": int(sum(len(p["total"]) for p in B.values())),
+            "elapsed_sec": round(time.monotonic() - t0, 4)}
+
+_TABLES: Dict[str, tuple] = {}
+
+def load_table(path: str) -> Optional[pd.DataFrame]:
+    """CSV 를 mtime 기준으로 캐시(API 요청마다 다시 읽지 않음). 없으면 None."""
+    p = Path(path)
+    try:
+        mt = p.stat().st_mtime_ns
+    except OSError:
+        return None
+    hit = _TABLES.get(str(p))
+    if hit and hit[0] == mt:
+        return hit[1]
+    df = pd.read_csv(p)
+    _TABLES[str(p)] = (mt, df)
+    return df
+
+def roster_arrays(values: pd.DataFrame, fit: Optional[pd.DataFrame], team: str, partner: str,
+                  value_col: str = "Surplus", default_fit: float = 0.5) -> pd.DataFrame:
+    """trade_values.csv(player, team, Surplus) + team_fit.csv(player, team, fit) → team 로스터와 partner 적합도."""
+    r = values[values["team"].astype(str) == str(team)][["player", value_col]].rename(columns={value_col: "value"})
+    r["value"] = pd.to_numeric(r["value"], errors="coerce").fillna(0.0)
+    if fit is not None and len(fit):
+        f = fit[fit["team"].astype(str) == str(partner)][["player", "fit"]].drop_duplicates("player")
+        r = r.merge(f, on="player", how="left")
+    else:
+        r["fit"] = np.nan
+    r["fit"] = pd.to_numeric(r["fit"], errors="coerce").fillna(default_fit)
+    return r.reset_index(drop=True)
+
+def search_teams(values: pd.DataFrame, fit: Optional[pd.DataFrame], team: str, partner: str, **kw) -> pd.DataFrame:
+    a = roster_arrays(values, fit, team, partner)
+    b = roster_arrays(values, fit, partner, team)
+    if a.empty or b.empty:
+        return pd.DataFrame()
+    res = search(a["value"].to_numpy(), a["fit"].to_numpy(), b["value"].to_numpy(), b["fit"].to_numpy(), **kw)
+    rows = [{"team": team, "partner": partner,
+             "gives": "|".join(a["player"].iloc[p["a_idx"]]), "gets": "|".join(b["player"].iloc[p["b_idx"]]),
+             "give_value": round(p["a_total"], 2), "get_value": round(p["b_total"], 2), "delta": round(p["delta"], 2),
+             "fit_partner": round(p["fit_b"], 4), "fit_team": round(p["fit_a"], 4), "score": round(p["score"], 4)}
+            for p in res["packages"]]
+    return pd.DataFrame(rows)
+
+def main():
+    ap = argparse.ArgumentParser(prog="trade_search")
+    ap.add_argument("--players", default="output/trade_values.csv")
+    ap.add_argument("--fit", default="output/team_fit.csv")
+    ap.add_argument("--team", required=True)
+    ap.add_argument("--partner", default=None, help="없으면 다른 모든 팀")
+    ap.add_argument("--tolerance", type=float, default=3_000_000.0)
+    ap.add_argument("--max_size", type=int, default=3)
+    ap.add_argument("--top_k", type=int, default=20)
+    ap.add_argument("--time_budget", type=float, default=2.0)
+    ap.add_argument("--out", default="output/trade_packages.csv")
+    a = ap.parse_args()
+    values, fit = pd.read_csv(a.players), load_table(a.fit)
+    partners = [a.partner] if a.partner else sorted(set(values["team"].astype(str)) - {str(a.team)})
+    frames = [search_teams(values, fit, a.team, p, tolerance=a.tolerance, max_size=a.max_size, top_k=a.top_k,
+                           time_budget_sec=a.time_budget) for p in partners]
+    out = pd.concat([f for f in frames if len(f)], ignore_index=True) if any(len(f) for f in frames) else pd.DataFrame()
+    if len(out):
+        out = out.sort_values("score", ascending=False)
+    out.to_csv(a.out, index=False)
+    print(f"[trade_search] {a.team} vs {len(partners)} teams -> {a.out} ({len(out)} packages)")
+
+if __name__ == "__main__":
+    main()
@@ -3,34 +3,46 @@
 # ex)
 # python tools/transactions_suite.py day43_players --players data/players.csv --dollar_per_war 9e6 --discount_rate 0.08 --out output/trade_values.csv
 # python tools/transactions_suite.py day44_v2 --players output/trade_values.csv --teams data/teams.csv --min_surplus 1e6 --out output/trade_proposals_v2.csv
+# python tools/transactions_suite.py day44_search --players output/trade_values.csv --fit output/team_fit.csv --team ARI --out output/trade_packages.csv
 
 import argparse
 import numpy as np
 import pandas as pd
 from typing import List
 
+try:
+    from tools.artifact_io import read_artifact, write_artifact
+    from tools import contract_engine as ce
+    from tools import trade_search as ts
+except ImportError:  # python tools/transactions_suite.py 로 직접 실행
+    from artifact_io import read_artifact, write_artifact
+    import contract_engine as ce
+    import trade_search as ts
+
 def npv(cashflows: List[float], rate: float) -> float:
-    return sum(cf / ((1.0 + rate) ** t) for t, cf in enumerate(cashflows, start=1))
+    return ce.npv(cashflows, rate, start=1)
+
+def _year_matrix(df: pd.DataFrame, prefix: str, years: np.ndarray) -> np.ndarray:
+    # war_y1.. / salary_y1.. 열 → (선수, 연도) 배열, 계약 연수(years) 밖은 0
+    n = int(years.max()) if len(years) else 0
+    cols = [df[f"{prefix}{i}"] if f"{prefix}{i}" in df.columns else pd.Series(0.0, index=df.index) for i in range(1, n + 1)]
+    m = np.column_stack([pd.to_numeric(c, errors="coerce").fillna(0.0).to_numpy(float) for c in cols]) if cols else np.zeros((len(df), 0))
+    return np.where(np.arange(n) < years[:, None], m, 0.0)
 
 # ---------- Day43: Trade Value ----------
 def cmd_day43_players(args):
-    df = pd.read_csv(args.players)
-    vals, costs = [], []
-    for _, r in df.iterrows():
-        yrs = int(r.get("years", 0) or 0)
-        w = [float(r.get(f"war_y{i}", 0) or 0) for i in range(1, yrs + 1)]
-        s = [float(r.get(f"salary_y{i}", 0) or 0) for i in range(1, yrs + 1)]
-        v = [wi * float(args.dollar_per_war) for wi in w]
-        vals.append(npv(v, float(args.discount_rate)))
-        costs.append(npv(s, float(args.discount_rate)))
-    df["NPV_value"] = vals
-    df["NPV_cost"] = costs
+    df = read_artifact(args.players)
+    yrs = pd.to_numeric(df["years"], errors="coerce").fillna(0).astype(int).to_numpy() if "years" in df.columns else np.zeros(len(df), int)
+    ev = ce.evaluate(_year_matrix(df, "salary_y", yrs), _year_matrix(df, "war_y", yrs),
+                     dpw=float(args.dollar_per_war), rate=float(args.discount_rate), start=1)
+    df["NPV_value"] = ev["npv_value"]
+    df["NPV_cost"] = ev["npv_salary"]
     df["Surplus"] = df["NPV_value"] - df["NPV_cost"]
-    df.to_csv(args.out, index=False)
+    write_artifact(df, args.out)
     print(f"[Day43] -> {args.out} ({len(df)} rows)")
 
 def cmd_day43_package(args):
-    p = pd.read_csv(args.players)
+    p = read_artifact(args.players)
     pkg = pd.read_csv(args.package)
     m = pkg.merge(p, on="player", how="left")
     m["Surplus_total"] = m["qty"] * m["Surplus"]
@@ -40,7 +52,7 @@ def cmd_day43_package(args):
 
 # ---------- Day44 (baseline) ----------
 def cmd_day44(args):
-    players = pd.read_csv(args.players)
+    players = read_artifact(args.players)
     teams = pd.read_csv(args.teams)
     deals = []
     for _, row in players.iterrows():
@@ -54,7 +66,7 @@ def cmd_day44(args):
 
 # ---------- Day44_v2 (practical proposals) ----------
 def cmd_day44_v2(args):
-    players = pd.read_csv(args.players)
+    players = read_artifact(args.players)
     teams = pd.read_csv(args.teams)
     players = players.copy()
     players = players[players.get("Surplus", 0) >= float(args.min_surplus)].fillna({"team": "NA"})
@@ -79,9 +91,27 @@ def cmd_day44_v2(args):
     out.to_csv(args.out, index=False)
     print(f"[Day44_v2] -> {args.out} ({len(out)} deals)")
 
+# ---------- Day44_search (균형 패키지 탐색: tools/trade_search) ----------
+def cmd_day44_search(args):
+    players = read_artifact(args.players)
+    fit = ts.load_table(args.fit) if args.fit else None
+    teams = sorted(set(players["team"].astype(str)))
+    mine = [args.team] if args.team else teams
+    frames = []
+    for a in mine:
+        for b in teams:
+            if a == b or (not args.team and a > b):      # 팀 지정 없으면 쌍마다 한 번
+                continue
+            frames.append(ts.search_teams(players, fit, a, b, tolerance=float(args.tolerance),
+                                          max_size=int(args.max_size), top_k=int(args.top_k)))
+    frames = [f for f in frames if len(f)]
+    out = pd.concat(frames, ignore_index=True).sort_values("score", ascending=False) if frames else pd.DataFrame()
+    out.to_csv(args.out, index=False)
+    print(f"[Day44_search] -> {args.out} ({len(out)} packages)")
+
 # ---------- Day45: Team Fit ----------
 def cmd_day45(args):
-    players = pd.read_csv(args.players)
+    players = read_artifact(args.players)
     teams = pd.read_csv(args.teams)
     fits = []
     rng = np.random.default_rng(43)
@@ -161,6 +191,16 @@ def main():
     p44v2.add_argument("--out", required=True)
     p44v2.set_defaults(func=cmd_day44_v2)
 
+    p44s = sp.add_parser("day44_search")
+    p44s.add_argument("--players", required=True)
+    p44s.add_argument("--fit", default="output/team_fit.csv")
+    p44s.add_argument("--team", default=None)
+    p44s.add_argument("--tolerance", type=float, default=3e6)
+    p44s.add_argument("--max_size", type=int, default=3)
+    p44s.add_argument("--top_k", type=int, default=20)
+    p44s.add_argument("--out", required=True)
+    p44s.set_defaults(func=cmd_day44_search)
+
     p45 = sp.add_parser("day45")
     p45.add_argument("--players", required=True)
     p45.add_argument("--teams", required=True)
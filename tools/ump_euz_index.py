@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+# 심판 EUZ 인덱스: Statcast 투구(파일 단위 스트리밍) × 홈플레이트 심판 배정 → 심판-시즌별 존 셀 카운트
+#   - 콜 투구(called_strike/ball/blocked_ball)만, plate_x/plate_z 고정 격자(12×12, 0.25ft)
+#   - 누적은 고정 크기 정수 배열(심판 수 × 셀)뿐 → 투구 수/시즌 수와 무관하게 메모리 일정
+#   - 시즌이 끝나면 output/ump_euz/ump_euz_<season>.npz 로 flush, API는 npz 슬라이스로 지표 계산
+# 사용: python -m tools.ump_euz_index [--statcast output/raw/statcast_parquet] [--out output]
+import os, csv, glob, argparse, threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+OUTPUT_DIR = os.getenv("COGM_OUTPUT_DIR", "output")
+INDEX_DIR = "ump_euz"
+
+X_EDGES = np.linspace(-1.5, 1.5, 13)
+Z_EDGES = np.linspace(1.0, 4.0, 13)
+NX, NZ = len(X_EDGES) - 1, len(Z_EDGES) - 1
+NCELL = NX * NZ
+NZONE = 15                      # Statcast zone 1~14 (0 미사용)
+EDGE_ZONES = [2, 3, 4, 6, 7, 8]
+HEART_ZONES = [5]
+LOW_Z_MAX = 2.0                 # 이 높이 미만 셀 = 낮은 코스
+CALLED = {"called_strike", "ball", "blocked_ball"}
+_COLS = ["game_pk", "game_year", "plate_x", "plate_z", "zone", "description", "umpire"]
+
+def norm_ump(name) -> str:
+    return " ".join(str(name or "").split()).upper()
+
+# ---------- 심판 배정 ----------
+def load_assignments(out_dir: str = OUTPUT_DIR) -> Dict[int, str]:
+    """game_pk → 홈플레이트 심판. shards/<year>/umpires.csv + umpire_assignments.csv(수동/보강)."""
+    paths = sorted(glob.glob(os.path.join(out_dir, "shards", "*", "umpires.csv"))) + [os.path.join(out_dir, "umpire_assignments.csv")]
+    out: Dict[int, str] = {}
+    for p in paths:
+        if not os.path.exists(p):
+            continue
+        with open(p, newline="", encoding="utf-8") as f:
+            for r in csv.DictReader(f):
+                name = norm_ump(r.get("plate_ump") or r.get("hp_umpire"))
+                try:
+                    pk = int(float(r.get("game_pk")))
+                except (TypeError, ValueError):
+                    continue
+                if name:
+                    out[pk] = name
+    return out
+
+# ---------- 누적기 ----------
+class _SeasonAcc:
+    __slots__ = ("umps", "pos", "called", "strikes", "lg_called", "lg_strikes", "zone_called", "zone_strikes")
+
+    def __init__(self):
+        self.umps: List[str] = []
+        self.pos: Dict[str, int] = {}
+        self.called = np.zeros((0, NCELL), np.int64)
+        self.strikes = np.zeros((0, NCELL), np.int64)
+        self.lg_called = np.zeros(NCELL, np.int64)
+        self.lg_strikes = np.zeros(NCELL, np.int64)
+        self.zone_called = np.zeros(NZONE, np.int64)
+        self.zone_strikes = np.zeros(NZONE, np.int64)
+
+    def _ensure(self, names: Iterable[str]):
+        new = [n for n in names if n not in self.pos]
+        for n in new:
+            self.pos[n] = len(self.umps); self.umps.append(n)
+        if new:
+            pad = np.zeros((len(new), NCELL), np.int64)
+            self.called = np.vstack([self.called, pad]); self.strikes = np.vstack([self.strikes, pad])
+
+class EUZAccumulator:
+    def __init__(self, assignments: Dict[int, str]):
+        self.assign = assignments
+        self.seasons: Dict[int, _SeasonAcc] = {}
+        self.rows_in = 0
+        self.rows_called = 0
+        self._written: set = set()
+
+    def add(self, df: pd.DataFrame):
+        self.rows_in += len(df)
+        df = df[df["description"].isin(CALLED)]
+        df = df.dropna(subset=["plate_x", "plate_z", "game_year"])
+        self.rows_called += len(df)
+        if df.empty:
+            return
+        ump = df["game_pk"].map(self.assign)
+        if "umpire" in df.columns:
+            # Statcast 자체 umpire 열이 채워진 구간은 보조 소스로 사용
+            alt = df["umpire"].where(df["umpire"].notna() & (df["umpire"].astype(str) != "nan"))
+            ump = ump.fillna(alt.map(lambda v: norm_ump(v) if isinstance(v, str) else None))
+        ix = np.clip(np.searchsorted(X_EDGES, df["plate_x"].to_numpy(float), side="right") - 1, 0, NX - 1)
+        iz = np.clip(np.searchsorted(Z_EDGES, df["plate_z"].to_numpy(float), side="right") - 1, 0, NZ - 1)
+        cell = iz * NX + ix
+        strike = (df["description"].to_numpy() == "called_strike")
+        zone = pd.to_numeric(df["zone"], errors="coerce").fillna(0).clip(0, NZONE - 1).to_numpy(int)
+        years = df["game_year"].to_numpy(int)
+        umps = ump.to_numpy(object)
+        for y in np.unique(years):
+            m = years == y
+            acc = self.seasons.setdefault(int(y), _SeasonAcc())
+            c, s, z = cell[m], strike[m], zone[m]
+            acc.lg_called += np.bincount(c, minlength=NCELL)
+            acc.lg_strikes += np.bincount(c, weights=s, minlength=NCELL).astype(np.int64)
+            acc.zone_called += np.bincount(z, minlength=NZONE)
+            acc.zone_strikes += np.bincount(z, weights=s, minlength=NZONE).astype(np.int64)
+            u = umps[m]
+            has = pd.notna(u)
+            if not has.any():
+                continue
+            names = u[has]
+            acc._ensure(pd.unique(names))
+            rows = np.fromiter((acc.pos[n] for n in names), np.int64, len(names))
+            key = rows * NCELL + c[has]
+            size = len(acc.umps) * NCELL
+            acc.called += np.bincount(key, minlength=size).reshape(-1, NCELL)
+            acc.strikes += np.bincount(key, weights=s[has], minlength=size).astype(np.int64).reshape(-1, NCELL)
+
+    def flush(self, season: int, out_dir: str = OUTPUT_DIR):
+        """시즌 누적을 npz 로 기록(같은 실행에서 이미 기록된 시즌이면 합산) 후 메모리 해제."""
+        acc = self.seasons.pop(season, None)
+        if acc is None:
+            return
+        d = Path(out_dir) / INDEX_DIR; d.mkdir(parents=True, exist_ok=True)
+        fp = d / f"ump_euz_{season}.npz"
+        if season in self._written and fp.exists():
+            prev = np.load(fp, allow_pickle=False)
+            acc._ensure(list(prev["umps"]))
+            rows = np.array([acc.pos[n] for n in prev["umps"]], np.int64)
+            acc.called[rows] += prev["called"]; acc.strikes[rows] += prev["strikes"]
+            for k in ("lg_called", "lg_strikes", "zone_called", "zone_strikes"):
+                getattr(acc, k)[:] += prev[k]
+        tmp = fp.with_suffix(".tmp.npz")
+        np.savez_compressed(tmp, umps=np.array(acc.umps, dtype=str), called=acc.called.astype(np.uint32),
+                            strikes=acc.strikes.astype(np.uint32), lg_called=acc.lg_called, lg_strikes=acc.lg_strikes,
+                            zone_called=acc.zone_called, zone_strikes=acc.zone_strikes,
+                            x_edges=X_EDGES, z_edges=Z_EDGES)
+        os.replace(tmp, fp)
+        self._written.add(season)
+
+def iter_statcast(paths: List[str], columns: List[str] = _COLS, chunksize: int = 200_000) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """파일 단위(CSV는 chunk 단위)로 필요한 열만 읽기."""
+    for p in paths:
+        try:
+            if p.endswith(".parquet"):
+                import pyarrow.parquet as pq
+                have = set(pq.read_schema(p).names)
+                yield p, pq.read_table(p, columns=[c for c in columns if c in have]).to_pandas()
+            else:
+                head = pd.read_csv(p, nrows=0).columns
+                for ch in pd.read_csv(p, usecols=[c for c in columns if c in head], chunksize=chunksize, low_memory=False):
+                    yield p, ch
+        except Exception:
+            continue
+
+def statcast_sources(root: Optional[str] = None) -> List[str]:
+    roots = [root] if root else [os.path.join(OUTPUT_DIR, "raw", "statcast_parquet"), os.path.join(OUTPUT_DIR, "cache", "statcast")]
+    files: List[str] = []
+    for r in roots:
+        files += sorted(glob.glob(os.path.join(r, "**", "*.parquet"), recursive=True))
+        files += sorted(glob.glob(os.path.join(r, "*.csv")))
+    return files
+
+def build(paths: List[str], out_dir: str = OUTPUT_DIR, assignments: Optional[Dict[int, str]] = None) -> EUZAccumulator:
+    acc = EUZAccumulator(assignments if assignments is not None else load_assignments(out_dir))
+    prev = None
+    for p, df in iter_statcast(paths):
+        acc.add(df)
+        if p != prev and prev is not None:
+            # 파일이 바뀔 때 이번 파일보다 이전 시즌은 끝난 것으로 보고 flush (시즌 파티션 정렬 기준)
+            lo = int(df["game_year"].min()) if "game_year" in df and len(df) else None
+            for s in [s for s in acc.seasons if lo is not None and s < lo]:
+                acc.flush(s, out_dir)
+        prev = p
+    for s in list(acc.seasons):
+        acc.flush(s, out_dir)
+    return acc
+
+# ---------- 지표 ----------
+_LOW_CELLS = np.repeat((Z_EDGES[:-1] + Z_EDGES[1:]) / 2 < LOW_Z_MAX, NX)
+
+def euz_metrics(called: np.ndarray, strikes: np.ndarray, lg_called: np.ndarray, lg_strikes: np.ndarray) -> Dict[str, float]:
+    """리그 셀별 콜 스트라이크율 대비 심판 편차.
+    zone_expand_pct: 기대 대비 추가 스트라이크 / 콜 투구, low_strike_bias: 낮은 셀 한정 동일 지표,
+    edge_call_volatility: 경합 셀(리그 CSR 20~80%) 잔차의 가중 표준편차(0~1 스케일)."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        lg = np.where(lg_called > 0, lg_strikes / np.maximum(lg_called, 1), 0.0)
+    n = float(called.sum())
+    exp = called * lg
+    resid = strikes - exp
+    n_low = float(called[_LOW_CELLS].sum())
+    edge = (lg > 0.2) & (lg < 0.8) & (called >= 5)
+    vol = 0.5
+    if edge.any():
+        r = resid[edge] / called[edge]
+        w = called[edge]
+        vol = float(np.clip(2.0 * np.sqrt(np.average(r ** 2, weights=w)), 0.0, 1.0))
+    return {
+        "zone_expand_pct": round(float(resid.sum()) / n, 4) if n else 0.0,
+        "low_strike_bias": round(float(resid[_LOW_CELLS].sum()) / n_low, 4) if n_low else 0.0,
+        "edge_call_volatility": round(vol, 3),
+        "n_called": int(n),
+    }
+
+def league_zone_rates(zone_called: np.ndarray, zone_strikes: np.ndarray) -> Dict[str, float]:
+    def rate(zs):
+        den = zone_called[zs].sum()
+        return float(zone_strikes[zs].sum() / den) if den else float("nan")
+    e, h = rate(EDGE_ZONES), rate(HEART_ZONES)
+    return {"csr_edge": e, "csr_heart": h, "euz_index": e - h}
+
+class EUZIndex:
+    def __init__(self, index_dir: Path):
+        self.seasons: Dict[int, dict] = {}
+        for fp in sorted(index_dir.glob("ump_euz_*.npz")):
+            try:
+                z = np.load(fp, allow_pickle=False)
+                umps = [str(u) for u in z["umps"]]
+                self.seasons[int(fp.stem.rsplit("_", 1)[1])] = {
+                    "pos": {u: i for i, u in enumerate(umps)},
+                    **{k: z[k] for k in ("called", "strikes", "lg_called", "lg_strikes")},
+                }
+            except Exception:
+                continue
+
+    def lookup(self, ump: str, season: Optional[int] = None) -> Optional[Dict[str, float]]:
+        """season 지정 시 해당 시즌, 없으면 보유 전 시즌 합산."""
+        key = norm_ump(ump)
+        seasons = [season] if season is not None else sorted(self.seasons)
+        c = np.zeros(NCELL); s = np.zeros(NCELL); lc = np.zeros(NCELL); ls = np.zeros(NCELL); used = []
+        for y in seasons:
+            S = self.seasons.get(y)
+            if not S or key not in S["pos"]:
+                continue
+            i = S["pos"][key]
+            c += S["called"][i]; s += S["strikes"][i]; lc += S["lg_called"]; ls += S["lg_strikes"]; used.append(y)
+        if not used or c.sum() == 0:
+            return None
+        return {**euz_metrics(c, s, lc, ls), "seasons": used}
+
+_INDEX: Optional[EUZIndex] = None
+_INDEX_SIG = None
+_INDEX_LOCK = threading.Lock()
+
+def get_euz_index(out_dir: str = OUTPUT_DIR) -> EUZIndex:
+    global _INDEX, _INDEX_SIG
+    d = Path(out_dir) / INDEX_DIR
+    sig = tuple((p.name, p.stat().st_mtime_ns) for p in sorted(d.glob("ump_euz_*.npz"))) if d.exists() else ()
+    with _INDEX_LOCK:
+        if _INDEX is None or sig != _INDEX_SIG:
+            _INDEX, _INDEX_SIG = EUZIndex(d), sig
+        return _INDEX
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--statcast", default=None, help="Statcast parquet/csv 루트")
+    ap.add_argument("--out", default=OUTPUT_DIR)
+    a = ap.parse_args()
+    acc = build(statcast_sources(a.statcast), a.out)
+    print(f"[OK] ump_euz index rows_in={acc.rows_in} called={acc.rows_called} assignments={len(acc.assign)}")
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# 구장 레지스트리: team_code_utils 표준 코드 기준 좌표/표준시/사용 연도
+#   - 연고 이전/신구장 이력 반영(연도별 홈구장)
+#   - 전 구장 거리 행렬은 NumPy 벡터화 haversine 1회 계산 후 연도별 캐시
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from tools.team_code_utils import norm_team
+
+EARTH_R_KM = 6371.0
+CURRENT_YEAR = 2025
+
+class Venue(NamedTuple):
+    team: str
+    name: str
+    lat: float
+    lon: float
+    tz: int          # 표준시 UTC 오프셋(서머타임 무시)
+    first_year: int
+    last_year: int   # 현역 구장은 9999
+
+# (team, venue, lat, lon, tz, first, last) — 1960년대 이후 주요 홈구장
+VENUES: List[Venue] = [Venue(*v) for v in [
+    ("ARI", "Chase Field",                      33.4455, -112.0667, -7, 1998, 9999),
+    ("ATL", "Atlanta-Fulton County Stadium",    33.7400,  -84.3894, -5, 1966, 1996),
+    ("ATL", "Turner Field",                     33.7350,  -84.3900, -5, 1997, 2016),
+    ("ATL", "Truist Park",                      33.8907,  -84.4677, -5, 2017, 9999),
+    ("BAL", "Memorial Stadium",                 39.3289,  -76.6017, -5, 1954, 1991),
+    ("BAL", "Oriole Park at Camden Yards",      39.2839,  -76.6217, -5, 1992, 9999),
+    ("BOS", "Fenway Park",                      42.3467,  -71.0972, -5, 1912, 9999),
+    ("CHC", "Wrigley Field",                    41.9484,  -87.6553, -6, 1916, 9999),
+    ("CWS", "Comiskey Park",                    41.8310,  -87.6340, -6, 1910, 1990),
+    ("CWS", "Rate Field",                       41.8301,  -87.6339, -6, 1991, 9999),
+    ("CIN", "Riverfront Stadium",               39.0972,  -84.5078, -5, 1970, 2002),
+    ("CIN", "Great American Ball Park",         39.0970,  -84.5070, -5, 2003, 9999),
+    ("CLE", "Cleveland Stadium",                41.5061,  -81.6997, -5, 1932, 1993),
+    ("CLE", "Progressive Field",                41.4962,  -81.6852, -5, 1994, 9999),
+    ("COL", "Mile High Stadium",                39.7464, -105.0214, -7, 1993, 1994),
+    ("COL", "Coors Field",                      39.7559, -104.9942, -7, 1995, 9999),
+    ("DET", "Tiger Stadium",                    42.3320,  -83.0686, -5, 1912, 1999),
+    ("DET", "Comerica Park",                    42.3390,  -83.0485, -5, 2000, 9999),
+    ("HOU", "Astrodome",                        29.6847,  -95.4072, -6, 1965, 1999),
+    ("HOU", "Daikin Park",                      29.7572,  -95.3556, -6, 2000, 9999),
+    ("KCR", "Municipal Stadium",                39.0853,  -94.5578, -6, 1969, 1972),
+    ("KCR", "Kauffman Stadium",                 39.0516,  -94.4803, -6, 1973, 9999),
+    ("LAA", "Angel Stadium",                    33.8003, -117.8827, -8, 1966, 9999),
+    ("LAD", "Dodger Stadium",                   34.0739, -118.2400, -8, 1962, 9999),
+    ("MIA", "Hard Rock Stadium",                25.9580,  -80.2389, -5, 1993, 2011),
+    ("MIA", "loanDepot park",                   25.7783,  -80.2209, -5, 2012, 9999),
+    ("MIL", "County Stadium",                   43.0280,  -87.9750, -6, 1970, 2000),
+    ("MIL", "American Family Field",            43.0280,  -87.9712, -6, 2001, 9999),
+    ("MIN", "Metrodome",                        44.9740,  -93.2580, -6, 1982, 2009),
+    ("MIN", "Target Field",                     44.9817,  -93.2776, -6, 2010, 9999),
+    ("NYM", "Shea Stadium",                     40.7560,  -73.8456, -5, 1964, 2008),
+    ("NYM", "Citi Field",                       40.7571,  -73.8458, -5, 2009, 9999),
+    ("NYY", "Yankee Stadium (1923)",            40.8270,  -73.9280, -5, 1923, 2008),
+    ("NYY", "Yankee Stadium",                   40.8296,  -73.9262, -5, 2009, 9999),
+    ("OAK", "Oakland Coliseum",                 37.7516, -122.2005, -8, 1968, 2024),
+    ("OAK", "Sutter Health Park",               38.5803, -121.5135, -8, 2025, 9999),
+    ("PHI", "Veterans Stadium",                 39.9061,  -75.1711, -5, 1971, 2003),
+    ("PHI", "Citizens Bank Park",               39.9057,  -75.1665, -5, 2004, 9999),
+    ("PIT", "Three Rivers Stadium",             40.4467,  -80.0136, -5, 1970, 2000),
+    ("PIT", "PNC Park",                         40.4469,  -80.0057, -5, 2001, 9999),
+    ("SDP", "Qualcomm Stadium",                 32.7831, -117.1196, -8, 1969, 2003),
+    ("SDP", "Petco Park",                       32.7073, -117.1573, -8, 2004, 9999),
+    ("SEA", "Kingdome",                         47.5952, -122.3316, -8, 1977, 1999),
+    ("SEA", "T-Mobile Park",                    47.5914, -122.3325, -8, 1999, 9999),
+    ("SFG", "Candlestick Park",                 37.7136, -122.3863, -8, 1960, 1999),
+    ("SFG", "Oracle Park",                      37.7786, -122.3893, -8, 2000, 9999),
+    ("STL", "Busch Memorial Stadium",           38.6245,  -90.1930, -6, 1966, 2005),
+    ("STL", "Busch Stadium",                    38.6226,  -90.1928, -6, 2006, 9999),
+    ("TBR", "Tropicana Field",                  27.7680,  -82.6534, -5, 1998, 2024),
+    ("TBR", "George M. Steinbrenner Field",     27.9803,  -82.5067, -5, 2025, 9999),
+    ("TEX", "Arlington Stadium",                32.7510,  -97.0830, -6, 1972, 1993),
+    ("TEX", "Globe Life Park",                  32.7513,  -97.0825, -6, 1994, 2019),
+    ("TEX", "Globe Life Field",                 32.7473,  -97.0842, -6, 2020, 9999),
+    ("TOR", "Exhibition Stadium",               43.6333,  -79.4186, -5, 1977, 1989),
+    ("TOR", "Rogers Centre",                    43.6414,  -79.3894, -5, 1989, 9999),
+    ("WSN", "Olympic Stadium",                  45.5580,  -73.5519, -5, 1977, 2004),
+    ("WSN", "RFK Stadium",                      38.8899,  -76.9719, -5, 2005, 2007),
+    ("WSN", "Nationals Park",                   38.8730,  -77.0074, -5, 2008, 9999),
+]]
+
+_BY_TEAM: Dict[str, List[Venue]] = {}
+for _v in VENUES:
+    _BY_TEAM.setdefault(_v.team, []).append(_v)
+_BY_NAME: Dict[str, Venue] = {v.name.upper(): v for v in VENUES}
+
+def teams() -> List[str]:
+    return sorted(_BY_TEAM)
+
+def venue_for(team: str, year: Optional[int] = None) -> Optional[Venue]:
+    """팀(또는 구장명)의 해당 시즌 홈구장. 이력 밖 연도는 가장 가까운 구장."""
+    if team is None:
+        return None
+    key = str(team).strip().upper()
+    if key in _BY_NAME:
+        return _BY_NAME[key]
+    hist = _BY_TEAM.get(norm_team(key))
+    if not hist:
+        return None
+    y = CURRENT_YEAR if year is None else int(year)
+    # 같은 해 두 구장(시즌 중 이전)은 나중 구장 우선
+    for v in reversed(hist):
+        if v.first_year <= y <= v.last_year:
+            return v
+    return hist[0] if y < hist[0].first_year else hist[-1]
+
+def latlon(team: str, year: Optional[int] = None) -> Tuple[Optional[float], Optional[float]]:
+    v = venue_for(team, year)
+    return (v.lat, v.lon) if v else (None, None)
+
+def tz_offset(team: str, year: Optional[int] = None, default: int = -5) -> int:
+    v = venue_for(team, year)
+    return v.tz if v else default
+
+def haversine_matrix(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """좌표 벡터(N) → N×N 대원거리(km). 루프 없이 브로드캐스팅."""
+    la = np.radians(np.asarray(lat, dtype=float))
+    lo = np.radians(np.asarray(lon, dtype=float))
+    dlat = la[:, None] - la[None, :]
+    dlon = lo[:, None] - lo[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(la)[:, None] * np.cos(la)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_R_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+@lru_cache(maxsize=256)
+def distance_matrix(year: Optional[int] = None) -> Tuple[Tuple[str, ...], np.ndarray]:
+    """(팀코드 튜플, km 행렬) — 해당 시즌 홈구장 기준, 연도별 캐시."""
+    codes = tuple(teams())
+    vs = [venue_for(t, year) for t in codes]
+    km = haversine_matrix(np.array([v.lat for v in vs]), np.array([v.lon for v in vs]))
+    km.setflags(write=False)
+    return codes, km
+
+@lru_cache(maxsize=256)
+def _code_pos(year: Optional[int]) -> Dict[str, int]:
+    return {c: i for i, c in enumerate(distance_matrix(year)[0])}
+
+def distance_km(a: str, b: str, year: Optional[int] = None) -> float:
+    pos = _code_pos(year)
+    i, j = pos.get(norm_team(a)), pos.get(norm_team(b))
+    if i is None or j is None:
+        return 0.0
+    return float(distance_matrix(year)[1][i, j])
+
+def distance_frame(years=None):
+    """파이프라인용 long 포맷(from,to,km,fatigue_idx[,season])."""
+    import pandas as pd
+    frames = []
+    for y in (years if years is not None else [None]):
+        codes, km = distance_matrix(y)
+        n = len(codes)
+        df = pd.DataFrame({
+            "from": np.repeat(codes, n), "to": np.tile(codes, n),
+            "km": km.ravel(), "fatigue_idx": km.ravel() / 1500.0,
+        })
+        if y is not None:
+            df.insert(0, "season", y)
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+# 약점 히트맵 엔진: Statcast plate_x/plate_z → 5×5 고정 격자(안쪽 3×3 = 스트라이크존, 바깥 링 = 유인구)
+#   - 타자-시즌 × 투수손(L/R) × 구종 × 지표(투구/스윙/헛스윙/xwOBA 분자·분모) 카운트를 float32 로 누적
+#   - 전체를 output/weakness_heatmap.f32 한 파일(memmap)에 저장, 행 인덱스는 .json
+#   - API는 행 슬라이스 후 구종/투수손 필터 합산 → 비율 계산 (파이프라인 재실행 없이 임의 필터)
+#   - 좌타자는 plate_x 부호를 뒤집어 음수 = 몸쪽(In)으로 통일
+# 사용: python -m tools.weakness_heatmap [--statcast output/raw/statcast_parquet] [--out output]
+import os, json, argparse, threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from tools.ump_euz_index import iter_statcast, statcast_sources
+
+OUTPUT_DIR = os.getenv("COGM_OUTPUT_DIR", "output")
+DATA_FILE = "weakness_heatmap.f32"
+INDEX_FILE = "weakness_heatmap.json"
+
+X_EDGES = np.linspace(-1.385, 1.385, 6)            # 가운데 3칸 ≈ 홈플레이트 폭(+공 반지름)
+Z_EDGES = np.array([0.833, 1.5, 2.167, 2.833, 3.5, 4.167])
+NX, NZ = len(X_EDGES) - 1, len(Z_EDGES) - 1
+HANDS = ["L", "R"]                                  # 투수 손
+PITCH_TYPES = ["FF", "SI", "FC", "SL", "ST", "SV", "CU", "KC", "CH", "FS", "OT"]
+STATS = ["pitches", "swings", "whiffs", "xw_num", "xw_den"]
+ROW_SHAPE = (len(HANDS), len(PITCH_TYPES), len(STATS), NZ, NX)
+
+SWINGS = {"swinging_strike", "swinging_strike_blocked", "foul", "foul_tip", "hit_into_play",
+          "foul_bunt", "missed_bunt", "bunt_foul_tip"}
+WHIFFS = {"swinging_strike", "swinging_strike_blocked", "missed_bunt"}
+_COLS = ["batter", "game_year", "p_throws", "stand", "pitch_type", "plate_x", "plate_z", "description",
+         "estimated_woba_using_speedangle", "woba_value", "woba_denom"]
+
+# 안쪽 3×3 라벨(아래→위, 몸쪽→바깥쪽) — 기존 /player/weakness_map 응답 키와 동일
+ZONE_LABELS = [["Low-In", "Low-Mid", "Low-Out"], ["Mid-In", "Mid", "Mid-Out"], ["Up-In", "Up-Mid", "Up-Out"]]
+_IN_ZONE = np.zeros((NZ, NX), bool); _IN_ZONE[1:4, 1:4] = True
+
+def _cell_index(x: np.ndarray, z: np.ndarray) -> np.ndarray:
+    ix = np.clip(np.searchsorted(X_EDGES, x, side="right") - 1, 0, NX - 1)
+    iz = np.clip(np.searchsorted(Z_EDGES, z, side="right") - 1, 0, NZ - 1)
+    return iz * NX + ix
+
+class HeatmapAccumulator:
+    def __init__(self):
+        self.rows: Dict[str, np.ndarray] = {}
+        self.rows_in = 0
+
+    def add(self, df: pd.DataFrame):
+        self.rows_in += len(df)
+        df = df.dropna(subset=["batter", "game_year", "plate_x", "plate_z", "description"])
+        if df.empty:
+            return
+        x = df["plate_x"].to_numpy(float)
+        x = np.where(df["stand"].to_numpy() == "L", -x, x)          # 좌타: 부호 반전(음수=몸쪽)
+        cell = _cell_index(x, df["plate_z"].to_numpy(float))
+        hand = np.where(df["p_throws"].to_numpy() == "L", 0, 1)
+        pt_pos = {p: i for i, p in enumerate(PITCH_TYPES)}
+        pt = df["pitch_type"].map(pt_pos).fillna(len(PITCH_TYPES) - 1).to_numpy(int)
+        desc = df["description"]
+        xw = pd.to_numeric(df["estimated_woba_using_speedangle"], errors="coerce")
+        wv = pd.to_numeric(df["woba_value"], errors="coerce")
+        den = pd.to_numeric(df["woba_denom"], errors="coerce").fillna(0.0)
+        stats = np.stack([
+            np.ones(len(df)),
+            desc.isin(SWINGS).to_numpy(float),
+            desc.isin(WHIFFS).to_numpy(float),
+            (xw.fillna(wv).fillna(0.0) * den).to_numpy(float),
+            den.to_numpy(float),
+        ])
+        # 타자-시즌 묶음별로 (손, 구종, 셀) 복합 키 bincount = 다차원 histogram2d 1회 패스
+        key = (hand * len(PITCH_TYPES) + pt) * (NZ * NX) + cell
+        grp = df["batter"].astype("int64").astype(str) + "|" + df["game_year"].astype("int64").astype(str)
+        for k, idx in grp.groupby(grp, sort=False).indices.items():
+            block = np.stack([np.bincount(key[idx], weights=stats[s, idx], minlength=len(HANDS) * len(PITCH_TYPES) * NZ * NX)
+                              for s in range(len(STATS))])           # [stat, hand*pt*cell]
+            arr = block.reshape(len(STATS), len(HANDS), len(PITCH_TYPES), NZ, NX).transpose(1, 2, 0, 3, 4)
+            if k in self.rows:
+                self.rows[k] += arr
+            else:
+                self.rows[k] = arr.astype(np.float64)
+
+    def write(self, out_dir: str = OUTPUT_DIR):
+        d = Path(out_dir); d.mkdir(parents=True, exist_ok=True)
+        keys = sorted(self.rows)
+        tmp = d / (DATA_FILE + ".tmp")
+        mm = np.memmap(tmp, dtype=np.float32, mode="w+", shape=(max(1, len(keys)),) + ROW_SHAPE)
+        for i, k in enumerate(keys):
+            mm[i] = self.rows[k]
+        mm.flush(); del mm
+        meta = {"rows": {k: i for i, k in enumerate(keys)}, "n_rows": len(keys), "row_shape": list(ROW_SHAPE),
+                "hands": HANDS, "pitch_types": PITCH_TYPES, "stats": STATS,
+                "x_edges": X_EDGES.tolist(), "z_edges": Z_EDGES.tolist()}
+        os.replace(tmp, d / DATA_FILE)
+        tmp_j = d / (INDEX_FILE + ".tmp")
+        tmp_j.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp_j, d / INDEX_FILE)
+
+def build(paths: List[str], out_dir: str = OUTPUT_DIR) -> HeatmapAccumulator:
+    acc = HeatmapAccumulator()
+    for _, df in iter_statcast(paths, columns=_COLS):
+        acc.add(df)
+    acc.write(out_dir)
+    return acc
+
+# ---------- 조회 ----------
+def _rates(t: np.ndarray) -> Dict[str, np.ndarray]:
+    """t: [stat, NZ, NX] 합계 → 지표 격자(표본 없으면 nan)."""
+    p, sw, wh, xn, xd = t
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "pitches": p,
+            "swing_rate": np.where(p > 0, sw / p, np.nan),
+            "whiff_rate": np.where(sw > 0, wh / sw, np.nan),
+            "xwoba": np.where(xd > 0, xn / xd, np.nan),
+        }
+
+class HeatmapStore:
+    def __init__(self, out_dir: str = OUTPUT_DIR):
+        d = Path(out_dir)
+        self.meta = json.loads((d / INDEX_FILE).read_text(encoding="utf-8"))
+        n = max(1, self.meta["n_rows"])
+        self.data = np.memmap(d / DATA_FILE, dtype=np.float32, mode="r", shape=(n,) + tuple(self.meta["row_shape"]))
+
+    def has(self, batter, season: int) -> bool:
+        return f"{batter}|{season}" in self.meta["rows"]
+
+    def query(self, batter, season: int, pitch_types: Optional[List[str]] = None, p_throws: Optional[str] = None) -> Optional[dict]:
+        i = self.meta["rows"].get(f"{batter}|{season}")
+        if i is None:
+            return None
+        row = self.data[i]                                            # [hand, pt, stat, z, x] (memmap 슬라이스)
+        hands = [HANDS.index(p_throws.upper())] if p_throws and p_throws.upper() in HANDS else list(range(len(HANDS)))
+        pts = [PITCH_TYPES.index(p) for p in (pitch_types or []) if p in PITCH_TYPES] or list(range(len(PITCH_TYPES)))
+        t = np.asarray(row[np.ix_(hands, pts)].sum(axis=(0, 1)), dtype=np.float64)
+        out = _rates(t)
+        # 유인구 스윙률: 존 밖 투구 중 스윙
+        p, sw = t[0], t[1]
+        out_p = p[~_IN_ZONE].sum()
+        out["chase_rate"] = float(sw[~_IN_ZONE].sum() / out_p) if out_p else None
+        out["n_pitches"] = int(p.sum())
+        out["xwoba_all"] = float(t[3].sum() / t[4].sum()) if t[4].sum() else None
+        return out
+
+    def per_pitch_type(self, batter, season: int, p_throws: Optional[str] = None) -> Dict[str, dict]:
+        return {pt: r for pt in PITCH_TYPES if (r := self.query(batter, season, [pt], p_throws)) and r["n_pitches"] > 0}
+
+def zone_labels(grid: np.ndarray) -> Dict[str, Optional[float]]:
+    """5×5 격자 → 안쪽 3×3 라벨 dict."""
+    return {ZONE_LABELS[r][c]: (None if np.isnan(grid[r + 1, c + 1]) else round(float(grid[r + 1, c + 1]), 3))
+            for r in range(3) for c in range(3)}
+
+def grid_to_list(grid: np.ndarray, nd: int = 3) -> List[List[Optional[float]]]:
+    return [[None if np.isnan(v) else round(float(v), nd) for v in row] for row in grid]
+
+_STORE: Optional[HeatmapStore] = None
+_STORE_SIG = None
+_STORE_LOCK = threading.Lock()
+
+def get_heatmap_store(out_dir: str = OUTPUT_DIR) -> Optional[HeatmapStore]:
+    global _STORE, _STORE_SIG
+    fp = Path(out_dir) / INDEX_FILE
+    try:
+        sig = fp.stat().st_mtime_ns
+    except OSError:
+        return None
+    with _STORE_LOCK:
+        if _STORE is None or sig != _STORE_SIG:
+            _STORE, _STORE_SIG = HeatmapStore(out_dir), sig
+        return _STORE
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--statcast", default=None, help="Statcast parquet/csv 루트")
+    ap.add_argument("--out", default=OUTPUT_DIR)
+    a = ap.parse_args()
+    acc = build(statcast_sources(a.statcast), a.out)
+    print(f"[OK] {DATA_FILE} player_years={len(acc.rows)} rows_in={acc.rows_in}")
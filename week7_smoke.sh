@@ -33,8 +33,8 @@ curl -s -X POST http://127.0.0.1:8000/ops/watchlist/set \
 curl -s -X POST http://127.0.0.1:8000/ops/alerts/set_rules \
   -H "Content-Type: application/json" \
   -d '{"team":"SEA","rules":[
-        {"metric":"OPS_plus","op":"gt","threshold":130},
-        {"metric":"ERA_plus","op":"lt","threshold":90},
+        {"metric":"wrc_plus","op":"gt","threshold":130},
+        {"metric":"era","op":"gt","threshold":4.8},
         {"metric":"injury_flag","op":"eq","threshold":1}
       ]}' | python -m json.tool
 